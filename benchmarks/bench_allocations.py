@@ -0,0 +1,66 @@
+"""Measure per-query allocations of the demo catalog search.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_allocations.py
+
+Reports, per query, the peak transient memory traced by ``tracemalloc`` and
+the number of string-transforming calls (``str.lower``/``str.casefold``)
+made while filtering, which is where the per-listing string copies come from.
+"""
+
+import sys
+import tracemalloc
+
+from rv_search_agent.search_api import _search_demo
+
+QUERIES = [
+    {"query": "Storyteller"},
+    {"rv_type": "Class C", "max_price": 100000},
+    {"location": "CA", "source": "Facebook"},
+    {"query": "Unity", "min_year": 2023, "source": "Dealer"},
+    {"query": "NonExistentBrandXYZ123"},
+]
+
+_STRING_CALLS = {"lower", "casefold"}
+
+
+def count_string_calls(filters: dict) -> int:
+    """Count str.lower/str.casefold calls made by one query."""
+    count = 0
+
+    def profiler(frame, event, arg):
+        nonlocal count
+        if event == "c_call" and getattr(arg, "__name__", None) in _STRING_CALLS:
+            count += 1
+
+    sys.setprofile(profiler)
+    try:
+        _search_demo(max_results=100, **filters)
+    finally:
+        sys.setprofile(None)
+    return count
+
+
+def peak_bytes(filters: dict) -> int:
+    """Return the peak transient memory traced during one query."""
+    tracemalloc.start()
+    try:
+        _search_demo(max_results=100, **filters)  # warm up
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        _search_demo(max_results=100, **filters)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - base
+
+
+def main() -> None:
+    print(f"{'query':<55} {'str calls':>10} {'peak bytes':>11}")
+    for filters in QUERIES:
+        label = ", ".join(f"{k}={v!r}" for k, v in filters.items())
+        print(f"{label:<55} {count_string_calls(filters):>10} {peak_bytes(filters):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Load test arun_agent: concurrent agent sessions on one event loop.
+
+A fake async model client sleeps to simulate model latency, calls the
+search tool once (demo catalog, run in the thread pool), then answers. For
+each session count, all sessions start together on one event loop and
+share a concurrency limiter; the script reports wall time, throughput and
+session latency percentiles. The blocking run_agent, one session after
+another with the same latency, is the baseline.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_async_agent.py [--sessions 10,100,500,1000]
+        [--llm-latency 0.2] [--limit 256]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from rv_search_agent import agent
+
+QUERIES = ["Unity", "Storyteller", "Winnebago", "Class C", "Airstream", "Jayco"]
+
+
+def _tool_use(messages):
+    block = SimpleNamespace(type="tool_use", name="search_rv_listings", id="tool_1",
+                            input={"query": messages[0]["content"][0]["text"]})
+    return SimpleNamespace(stop_reason="tool_use", content=[block])
+
+
+_ANSWER = SimpleNamespace(stop_reason="end_turn",
+                          content=[SimpleNamespace(type="text", text="Here you go")])
+
+
+class FakeMessages:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, messages, **kwargs):
+        time.sleep(self.latency)
+        return _tool_use(messages) if len(messages) == 1 else _ANSWER
+
+
+class FakeAsyncMessages(FakeMessages):
+    async def create(self, messages, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _tool_use(messages) if len(messages) == 1 else _ANSWER
+
+
+async def _session(query: str, limiter: agent.AgentLimiter) -> float:
+    start = time.perf_counter()
+    await agent.arun_agent(query, fast_path=False, limiter=limiter)
+    return time.perf_counter() - start
+
+
+async def load(sessions: int, limit: int) -> tuple:
+    limiter = agent.AgentLimiter(limit)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(
+        _session(QUERIES[i % len(QUERIES)], limiter) for i in range(sessions)
+    ))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="10,100,500,1000")
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="simulated seconds per model call")
+    parser.add_argument("--limit", type=int, default=256, help="concurrent model calls")
+    parser.add_argument("--sync-sessions", type=int, default=10)
+    args = parser.parse_args()
+
+    sync_client = SimpleNamespace(messages=FakeMessages(args.llm_latency))
+    async_client = SimpleNamespace(messages=FakeAsyncMessages(args.llm_latency))
+    with mock.patch.object(agent, "create_agent", lambda: sync_client), \
+            mock.patch.object(agent, "create_async_agent", lambda: async_client):
+        start = time.perf_counter()
+        for i in range(args.sync_sessions):
+            agent.run_agent(QUERIES[i % len(QUERIES)], fast_path=False)
+        sync_elapsed = time.perf_counter() - start
+
+        rows = [(n, *asyncio.run(load(n, args.limit)))
+                for n in [int(s) for s in args.sessions.split(",")]]
+
+    print(f"{args.llm_latency * 1000:.0f}ms per model call, 2 calls per session, "
+          f"limit {args.limit} concurrent calls")
+    print(f"  run_agent, sequential: {args.sync_sessions} sessions in {sync_elapsed:.2f}s "
+          f"({args.sync_sessions / sync_elapsed:.1f} sessions/s)")
+    print(f"  {'sessions':>8}  {'wall s':>7}  {'sessions/s':>10}  {'p50 s':>6}  {'p95 s':>6}")
+    for sessions, elapsed, latencies in rows:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"  {sessions:8,}  {elapsed:7.2f}  {sessions / elapsed:10.1f}  "
+              f"{statistics.median(latencies):6.2f}  {p95:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
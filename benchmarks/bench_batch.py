@@ -0,0 +1,101 @@
+"""Benchmark batch search against calling the single-search API in a loop.
+
+Demo mode runs saved searches over a synthetic catalog; live mode runs them
+against a mocked Serper API that sleeps to simulate network latency.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_batch.py [--rows 100000] [--searches 300]
+"""
+
+import argparse
+import os
+import threading
+import time
+from unittest import mock
+
+import httpx
+from synthetic import synthetic_listings, synthetic_saved_searches, synthetic_serper_results
+
+from rv_search_agent import quota, search_api
+from rv_search_agent.batch import search_rv_listings_batch
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.catalog import ListingCatalog
+
+
+def _mock_serper(latency: float, calls: list):
+    payload = {"organic": synthetic_serper_results(10)}
+    real_client = httpx.Client
+    lock = threading.Lock()
+
+    def handler(request):
+        with lock:
+            calls.append(request)
+        time.sleep(latency)
+        return httpx.Response(200, json=payload)
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+    return client
+
+
+def bench_demo(rows: int, searches: list) -> None:
+    search_api.DEMO_CATALOG = ListingCatalog(synthetic_listings(rows))
+
+    start = time.perf_counter()
+    loop = [search_api.search_rv_listings(demo_mode=True, **f) for f in searches]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = search_rv_listings_batch(searches, demo_mode=True)
+    batch_seconds = time.perf_counter() - start
+    assert batch == loop
+
+    print(f"demo, {rows:,} rows, {len(searches)} searches")
+    print(f"  loop:  {loop_seconds * 1000:9.1f} ms  {len(searches) / loop_seconds:8.0f} searches/s")
+    print(f"  batch: {batch_seconds * 1000:9.1f} ms  {len(searches) / batch_seconds:8.0f} searches/s "
+          f"({loop_seconds / batch_seconds:.1f}x)")
+
+
+def bench_live(searches: list, latency: float) -> None:
+    live = [{k: v for k, v in f.items() if k != "source"} for f in searches]
+    with mock.patch.dict(os.environ, {"SERPER_API_KEY": "benchmark"}), \
+            mock.patch("builtins.print"):
+        loop_calls: list = []
+        with mock.patch.object(httpx, "Client", _mock_serper(latency, loop_calls)):
+            start = time.perf_counter()
+            loop = [search_api.search_rv_listings_live(**f) for f in live]
+            loop_seconds = time.perf_counter() - start
+
+        batch_calls: list = []
+        with mock.patch.object(httpx, "Client", _mock_serper(latency, batch_calls)):
+            start = time.perf_counter()
+            batch = search_rv_listings_batch(live, live=True)
+            batch_seconds = time.perf_counter() - start
+    assert batch == loop
+
+    print(f"live, {len(live)} searches, {latency * 1000:.0f} ms per request")
+    print(f"  loop:  {loop_seconds:7.2f} s  {len(loop_calls):5} requests")
+    print(f"  batch: {batch_seconds:7.2f} s  {len(batch_calls):5} requests "
+          f"({loop_seconds / batch_seconds:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--searches", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="simulated seconds per Serper request (default: 0.02)")
+    args = parser.parse_args()
+
+    # Measure the work itself, not repeat lookups
+    SEARCH_CACHE.enabled = False
+    # Mocked calls shouldn't count against (or be throttled by) the real quota
+    quota.SERPER_QUOTA.enabled = False
+    searches = synthetic_saved_searches(args.searches)
+    bench_demo(args.rows, searches)
+    bench_live(searches, args.latency)
+
+
+if __name__ == "__main__":
+    main()
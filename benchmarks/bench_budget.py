@@ -0,0 +1,102 @@
+"""Measure the budget governor on runaway agent runs.
+
+A fake model client answers most queries after one search, but for a
+share of them (--confused) keeps calling the search tool until tools are
+turned off. Each call sleeps per output token (scaled by --time-scale) and
+reports input tokens as request characters / 4. The same queries run with
+an effectively unlimited budget, capped at --runaway-turns, and with a
+budget; the script reports run time, turns and tokens per run, and which
+limits cut runs short.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_budget.py [--queries 20] [--confused 0.25]
+        [--max-turns 6] [--deadline 20]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+from rv_search_agent import agent
+
+QUERIES = ["Unity", "Storyteller", "Winnebago", "Class C", "Airstream", "Jayco"]
+SECONDS_PER_TURN = 0.8
+OUTPUT_TOKENS = 80
+
+
+class FakeMessages:
+    """Searches once, or keeps searching for confused queries."""
+
+    def __init__(self, confused: set, runaway_turns: int, time_scale: float):
+        self.confused = confused
+        self.runaway_turns = runaway_turns
+        self.time_scale = time_scale
+
+    def create(self, messages, tool_choice=None, **kwargs):
+        time.sleep(SECONDS_PER_TURN * self.time_scale)
+        usage = SimpleNamespace(input_tokens=len(json.dumps(messages, default=vars)) // 4,
+                                output_tokens=OUTPUT_TOKENS)
+        query = messages[0]["content"][0]["text"]
+        turn = (len(messages) + 1) // 2
+        keep_going = query in self.confused and turn < self.runaway_turns
+        if tool_choice is None and (turn == 1 or keep_going):
+            block = SimpleNamespace(type="tool_use", name="search_rv_listings", id=f"tool_{turn}",
+                                    input={"query": query.split("#")[0], "max_results": 10})
+            return SimpleNamespace(stop_reason="tool_use", usage=usage, content=[block])
+        return SimpleNamespace(stop_reason="end_turn", usage=usage,
+                               content=[SimpleNamespace(type="text", text="Here you go")])
+
+
+def run(fake: FakeMessages, queries: list, budget: agent.AgentBudget) -> agent.AgentUsage:
+    client = SimpleNamespace(messages=fake)
+    usage = agent.AgentUsage()
+    with mock.patch.object(agent, "create_agent", lambda: client), \
+            mock.patch("builtins.print"):
+        for query in queries:
+            agent.run_agent(query, usage=usage, fast_path=False, budget=budget)
+    return usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--confused", type=float, default=0.25,
+                        help="share of queries the model keeps searching for")
+    parser.add_argument("--runaway-turns", type=int, default=25,
+                        help="turns a confused run takes without a budget")
+    parser.add_argument("--max-turns", type=int, default=6)
+    parser.add_argument("--deadline", type=float, default=20.0, help="seconds per run")
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="multiply simulated sleeps by this factor")
+    args = parser.parse_args()
+
+    queries = [f"{QUERIES[i % len(QUERIES)]}#{i}" for i in range(args.queries)]
+    confused = set(queries[:round(len(queries) * args.confused)])
+    fake = FakeMessages(confused, args.runaway_turns, args.time_scale)
+    policies = {
+        "unlimited": agent.AgentBudget(max_turns=10_000, deadline=1e9, max_input_tokens=10**12,
+                                       max_output_tokens=10**12, max_tool_calls=10_000),
+        "budget": agent.AgentBudget(max_turns=args.max_turns,
+                                    deadline=args.deadline * args.time_scale),
+    }
+
+    print(f"{len(queries)} queries, {len(confused)} confused; "
+          f"{SECONDS_PER_TURN * 1000:.0f}ms per model call (unscaled)")
+    print(f"  {'policy':<10} {'p50 s':>6} {'max s':>6} {'turns':>6} {'max':>4} "
+          f"{'input tok':>10} {'output tok':>11}  wrap-ups")
+    for label, budget in policies.items():
+        runs = run(fake, queries, budget).runs
+        seconds = [r.elapsed / args.time_scale for r in runs]
+        wrap_ups = Counter(r.wrap_up for r in runs if r.wrap_up)
+        print(f"  {label:<10} {statistics.median(seconds):6.1f} {max(seconds):6.1f} "
+              f"{sum(r.turns for r in runs):6} {max(r.turns for r in runs):4} "
+              f"{sum(r.input_tokens for r in runs):10,} {sum(r.output_tokens for r in runs):11,}"
+              f"  {dict(wrap_ups) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
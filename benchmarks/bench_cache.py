@@ -0,0 +1,55 @@
+"""Benchmark the hot-query path with the result cache on and off.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_cache.py [--rows 100000]
+"""
+
+import argparse
+import time
+
+from synthetic import synthetic_listings
+
+from rv_search_agent import search_api
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.catalog import ListingCatalog
+
+HOT_QUERIES = [
+    {"query": "Storyteller", "max_results": 10},
+    {"rv_type": "Class C", "max_price": 100000, "max_results": 10},
+    {"query": "unity", "source": "Dealer", "max_results": 20},
+    {"location": "Denver", "min_year": 2022, "max_results": 10},
+]
+
+
+def run(rounds: int) -> float:
+    """Return microseconds per search over repeated hot queries."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for filters in HOT_QUERIES:
+            search_api.search_rv_listings(demo_mode=True, **filters)
+    return (time.perf_counter() - start) * 1e6 / (rounds * len(HOT_QUERIES))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    search_api.DEMO_CATALOG = ListingCatalog(synthetic_listings(args.rows))
+
+    SEARCH_CACHE.enabled = False
+    uncached = run(args.rounds)
+
+    SEARCH_CACHE.enabled = True
+    SEARCH_CACHE.clear()
+    cached = run(args.rounds)
+
+    print(f"catalog rows: {args.rows:,}")
+    print(f"uncached: {uncached:10.1f} us/search")
+    print(f"cached:   {cached:10.1f} us/search ({uncached / cached:,.0f}x)")
+    print(f"hit rate: {SEARCH_CACHE.hit_rate:.1%}")
+
+
+if __name__ == "__main__":
+    main()
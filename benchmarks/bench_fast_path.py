@@ -0,0 +1,104 @@
+"""Benchmark the agent's local fast path against the full model loop.
+
+Runs a sample set of user queries through run_agent twice, with and
+without the fast path, using a fake model client that sleeps to simulate
+model latency and calls the search tool once before answering. Reports the
+fraction of queries the fast path answered and the latency of each path.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_fast_path.py [--llm-latency 0.5] [--repeat 3]
+"""
+
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from rv_search_agent import agent
+
+SAMPLE_QUERIES = [
+    "Find me Class C RVs under $100,000",
+    "Show me Unity U24RL listings in Denver, CO",
+    "Storyteller Beast MODE XO from 2023 to 2025 under $250k",
+    "Class B+ RVs with under 20,000 miles near Seattle",
+    "fifth wheels between $50,000 and $90,000",
+    "Winnebago 2020+",
+    "Airstream $80k-$120k",
+    "Class A within 200 miles of Phoenix, AZ",
+    "Jayco for sale in Austin, TX",
+    "Any Storyteller Stealth MODE for sale?",
+    "travel trailers under $40k",
+    "2024 Unity",
+    "Find me 2024 Storyteller Overland XO Classic RVs",
+    "What's the typical price of a 2023 Unity U24RL?",
+    "Compare the Winnebago View and the Thor Four Winds",
+    "Travel trailers in California",
+    "Which Class B has the best resale value?",
+    "Is a Unity U24RL worth $150k?",
+    "Find me an AWD camper van with solar",
+    "Show me RVs that sleep six under $80k",
+]
+
+
+class FakeMessages:
+    """Sleeps ``latency`` per call; searches once, then answers."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, messages, **kwargs):
+        time.sleep(self.latency)
+        if len(messages) == 1:
+            block = SimpleNamespace(type="tool_use", name="search_rv_listings", id="tool_1",
+                                    input={"query": "Unity"})
+            return SimpleNamespace(stop_reason="tool_use", content=[block])
+        return SimpleNamespace(stop_reason="end_turn",
+                               content=[SimpleNamespace(type="text", text="Here you go")])
+
+
+def timed(query: str, fast_path: bool, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        agent.run_agent(query, fast_path=fast_path)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def parse_time(queries: list, repeat: int) -> float:
+    """Best mean seconds to parse one query."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            agent.parse_simple_query(query)
+        best = min(best, (time.perf_counter() - start) / len(queries))
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.5,
+                        help="simulated seconds per model call")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = SimpleNamespace(messages=FakeMessages(args.llm_latency))
+    with mock.patch.object(agent, "create_agent", lambda: client):
+        answered = [q for q in SAMPLE_QUERIES if agent.parse_simple_query(q) is not None]
+        parse_us = parse_time(SAMPLE_QUERIES, args.repeat) * 1e6
+        fast = {q: timed(q, True, args.repeat) for q in SAMPLE_QUERIES}
+        full = {q: timed(q, False, args.repeat) for q in SAMPLE_QUERIES}
+
+    print(f"{len(SAMPLE_QUERIES)} sample queries, {args.llm_latency * 1000:.0f}ms per model call")
+    print(f"  answered by the fast path: {len(answered)}/{len(SAMPLE_QUERIES)} "
+          f"({len(answered) / len(SAMPLE_QUERIES):.0%}); parse {parse_us:.0f}µs/query")
+    print(f"  {'':<24} {'fast path':>10} {'model only':>11}")
+    for label, queries in (("answered queries", answered), ("all queries", SAMPLE_QUERIES)):
+        print(f"  {'mean ' + label:<24} {statistics.mean(fast[q] for q in queries) * 1000:8.1f}ms "
+              f"{statistics.mean(full[q] for q in queries) * 1000:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark radius queries on the grid spatial index.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_geo.py [--points 1000000]
+
+Builds a GeoIndex over synthetic points scattered across the continental
+US and compares radius queries against a linear haversine scan.
+"""
+
+import argparse
+import random
+import time
+
+from rv_search_agent.geo import GeoIndex, geocode, haversine_miles
+
+ORIGINS = ["Denver, CO", "Los Angeles, CA", "Chicago, IL", "Miami, FL", "Seattle, WA"]
+RADII = [25, 100, 200, 500]
+
+
+def synthetic_points(count: int, seed: int = 42):
+    """Uniform random points over the continental US bounding box."""
+    rng = random.Random(seed)
+    return [(rng.uniform(24.5, 49.0), rng.uniform(-124.7, -67.0)) for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--scan-points", type=int, default=100_000,
+                        help="points timed for the linear scan, extrapolated to --points")
+    args = parser.parse_args()
+
+    points = synthetic_points(args.points)
+
+    start = time.perf_counter()
+    index = GeoIndex()
+    for item_id, (lat, lon) in enumerate(points):
+        index.insert(item_id, lat, lon)
+    print(f"built index over {len(index):,} points in {time.perf_counter() - start:.2f}s")
+
+    scan_points = points[:args.scan_points]
+    print(f"{'radius':>7} {'avg hits':>10} {'index ms':>9} {'scan ms (est)':>14}")
+    for radius in RADII:
+        hits = 0
+        start = time.perf_counter()
+        for origin in ORIGINS:
+            hits += len(index.within(*geocode(origin), radius))
+        index_ms = (time.perf_counter() - start) * 1000 / len(ORIGINS)
+
+        start = time.perf_counter()
+        for origin in ORIGINS:
+            lat, lon = geocode(origin)
+            [p for p in scan_points if haversine_miles(lat, lon, *p) <= radius]
+        scan_ms = (time.perf_counter() - start) * 1000 / len(ORIGINS)
+        scan_ms *= len(points) / max(1, len(scan_points))
+
+        print(f"{radius:>7} {hits / len(ORIGINS):>10,.0f} {index_ms:>9.2f} {scan_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
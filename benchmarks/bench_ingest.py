@@ -0,0 +1,69 @@
+"""Benchmark bulk parsing across worker counts.
+
+Parses synthetic Serper results and RSS items with 1, 2, 4 and 8 worker
+processes. "cold" includes starting the pool; "warm" reuses a started pool,
+as a long backfill would. Also sweeps the chunk size at the largest worker
+count, showing where pickling and dispatch overhead stops mattering.
+Speedup is bounded by the CPUs available (printed first).
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_ingest.py [--items 40000] [--workers 1,2,4,8]
+"""
+
+import argparse
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from synthetic import synthetic_rss_feed, synthetic_serper_results
+
+from rv_search_agent import ingest
+from rv_search_agent.ingest import default_workers, parse_rss_items, parse_serper_results
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=40_000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--chunks", default="50,250,1000,5000", help="chunk sizes to sweep")
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    results = synthetic_serper_results(args.items)
+    items = [ET.tostring(item) for item in ET.fromstring(synthetic_rss_feed(args.items)).iter("item")]
+    jobs = {
+        "serper": lambda **kw: parse_serper_results(results, "rvtrader.com", **kw),
+        "rss": lambda **kw: parse_rss_items(items, **kw),
+    }
+
+    print(f"{args.items:,} items, {default_workers()} CPU(s) available")
+    for name, job in jobs.items():
+        serial = timed(lambda: job(workers=1))
+        print(f"\n{name}: in-process {serial * 1000:8.1f} ms")
+        print(f"  {'workers':>7}  {'cold ms':>9}  {'warm ms':>9}  {'speedup':>7}")
+        for workers in worker_counts:
+            cold = timed(lambda: job(workers=workers))
+            with ProcessPoolExecutor(workers) as pool:
+                job(workers=workers, executor=pool)  # start the workers
+                warm = timed(lambda: job(workers=workers, executor=pool))
+            print(f"  {workers:>7}  {cold * 1000:9.1f}  {warm * 1000:9.1f}  {serial / warm:6.2f}x")
+
+    workers = max(worker_counts)
+    print(f"\nserper, chunk size sweep at {workers} workers (warm):")
+    with ProcessPoolExecutor(workers) as pool:
+        jobs["serper"](workers=workers, executor=pool)
+        for size in [int(c) for c in args.chunks.split(",")]:
+            with mock.patch.object(ingest, "chunk_size", lambda items, workers: size):
+                elapsed = timed(lambda: jobs["serper"](workers=workers, executor=pool))
+            print(f"  {size:>6} items/chunk  {elapsed * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
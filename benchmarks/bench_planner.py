@@ -0,0 +1,60 @@
+"""Benchmark planned catalog searches against a fixed-order full scan.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_planner.py [--rows 200000]
+"""
+
+import argparse
+import time
+
+from synthetic import synthetic_listings
+
+from rv_search_agent import planner
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.search_api import _search_demo
+
+QUERIES = [
+    {"source": "Facebook Marketplace"},
+    {"query": "Unity", "source": "Facebook"},
+    {"rv_type": "Class B+", "max_price": 80000},
+    {"location": "Boise", "min_year": 2024},
+    {"query": "Storyteller", "min_year": 2023, "max_price": 150000},
+]
+
+
+def timed(filters: dict, catalog: ListingCatalog, repeat: int = 5):
+    """Return (best ms, plan) for a query with unlimited results."""
+    best = float("inf")
+    plan = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        plan = _search_demo(max_results=10**9, catalog=catalog, explain=True, **filters)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, plan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = ListingCatalog(synthetic_listings(args.rows))
+    print(f"built catalog of {len(catalog):,} rows in {time.perf_counter() - start:.2f}s\n")
+
+    threshold = planner.INDEX_SELECTIVITY_THRESHOLD
+    for filters in QUERIES:
+        planned_ms, plan = timed(filters, catalog)
+        planner.INDEX_SELECTIVITY_THRESHOLD = -1.0  # force a full scan
+        scan_ms, scan_plan = timed(filters, catalog)
+        planner.INDEX_SELECTIVITY_THRESHOLD = threshold
+
+        label = ", ".join(f"{k}={v!r}" for k, v in filters.items())
+        print(label)
+        print(f"  planned: {planned_ms:8.1f} ms, {plan.rows_examined:>8,} rows examined "
+              f"via {plan.access}")
+        print(f"  scan:    {scan_ms:8.1f} ms, {scan_plan.rows_examined:>8,} rows examined")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark the live search paths offline, replaying recorded HTTP traffic.
+
+Records one pass of saved searches against a mocked Serper API, then
+replays the fixtures with injected latency and connection-error rates. For
+each setting it times the single-search loop, the concurrent batch, and a
+second loop served by the query cache, and counts the listings lost to
+injected errors. Point --fixtures at a directory recorded with
+`rv-search --live --record DIR` to replay real traffic instead.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_replay.py [--searches 100] [--latency 0,0.02]
+        [--error-rates 0,0.1]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from unittest import mock
+
+import httpx
+from synthetic import synthetic_saved_searches, synthetic_serper_results
+
+from rv_search_agent import quota, replay, search_api
+from rv_search_agent.batch import search_rv_listings_batch
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.replay import FixtureStore, RecordingTransport
+
+
+def _recording_client(store: FixtureStore):
+    real_client = httpx.Client
+
+    def handler(request):
+        rng = random.Random(request.content)
+        return httpx.Response(200, json={"organic": synthetic_serper_results(10, seed=rng.random())})
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = RecordingTransport(store, httpx.MockTransport(handler))
+        return real_client(*args, **kwargs)
+    return client
+
+
+def record(searches: list, directory: str) -> int:
+    """Record the requests made by both the loop and the batch."""
+    with mock.patch.object(httpx, "Client", _recording_client(FixtureStore(directory))):
+        for filters in searches:
+            search_api.search_rv_listings_live(**filters)
+        search_rv_listings_batch(searches, live=True)
+    return len(os.listdir(directory))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, sum(len(listings) for listings in result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=100)
+    parser.add_argument("--latency", default="0,0.02", help="seconds per request, comma-separated")
+    parser.add_argument("--error-rates", default="0,0.1", help="comma-separated fractions")
+    parser.add_argument("--fixtures", help="replay this fixture directory instead of recording one")
+    args = parser.parse_args()
+
+    searches = [{k: v for k, v in f.items() if k != "source"}
+                for f in synthetic_saved_searches(args.searches)]
+    quota.SERPER_QUOTA.enabled = False
+    SEARCH_CACHE.enabled = False
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.dict(os.environ, {"SERPER_API_KEY": "benchmark"}), \
+            mock.patch("builtins.print"):
+        directory = args.fixtures or tmp
+        fixtures = len(os.listdir(directory)) if args.fixtures else record(searches, directory)
+
+        rows = []
+        for latency in [float(s) for s in args.latency.split(",")]:
+            for error_rate in [float(s) for s in args.error_rates.split(",")]:
+                replay.HTTP_HARNESS.configure("replay", directory, latency=latency,
+                                              error_rate=error_rate, seed=0)
+                loop = timed(lambda: [search_api.search_rv_listings_live(**f) for f in searches])
+                batch = timed(lambda: search_rv_listings_batch(searches, live=True))
+                SEARCH_CACHE.enabled = True
+                SEARCH_CACHE.clear()
+                for filters in searches:  # fill the cache
+                    search_api.search_rv_listings_live(**filters)
+                cached = timed(lambda: [search_api.search_rv_listings_live(**f) for f in searches])
+                SEARCH_CACHE.enabled = False
+                rows.append((latency, error_rate, loop, batch, cached))
+
+    print(f"{len(searches)} searches, {fixtures} recorded request(s)")
+    print(f"  {'latency':>7}  {'errors':>6}  {'loop s':>7}  {'batch s':>7}  {'cached s':>8}  "
+          f"{'listings (loop/batch)':>21}")
+    for latency, error_rate, loop, batch, cached in rows:
+        print(f"  {latency * 1000:5.0f}ms  {error_rate:6.0%}  {loop[0]:7.2f}  {batch[0]:7.2f}  "
+              f"{cached[0]:8.3f}  {loop[1]:>10,}/{batch[1]:<10,}")
+
+
+if __name__ == "__main__":
+    main()
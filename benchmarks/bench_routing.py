@@ -0,0 +1,99 @@
+"""Compare model routing policies on the agent loop: per-turn latency and tokens.
+
+A fake model client plays each query as one tool call followed by an
+answer. Its latency depends on the model it's asked for: time to first
+token plus output tokens at the model's decode speed, with output capped at
+the request's max_tokens. Three policies run the same queries: the big
+model for every turn, routed (the fast model picks the tool, the big model
+writes the answer), and the fast model for every turn. Sleeps are scaled by
+--time-scale; reported latencies are unscaled.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_routing.py [--queries 6] [--time-scale 0.1]
+"""
+
+import argparse
+import statistics
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from unittest import mock
+
+from rv_search_agent import agent
+
+QUERIES = ["Unity", "Storyteller", "Winnebago", "Class C", "Airstream", "Jayco"]
+
+# model: (seconds to first token, output tokens per second)
+SPEEDS = {"big": (0.6, 60), "fast": (0.25, 180)}
+TOOL_OUTPUT_TOKENS = 60
+ANSWER_OUTPUT_TOKENS = 450
+
+POLICIES = {
+    "big for every turn": agent.ModelRouting("big", "big", agent.MAX_TOKENS, agent.MAX_TOKENS),
+    "routed": agent.ModelRouting("fast", "big", agent.TOOL_MAX_TOKENS, agent.MAX_TOKENS),
+    "fast for every turn": agent.ModelRouting("fast", "fast", agent.TOOL_MAX_TOKENS,
+                                              agent.MAX_TOKENS),
+}
+
+
+class FakeMessages:
+    """One tool call, then an answer; latency and tokens depend on the model."""
+
+    def __init__(self, time_scale: float):
+        self.time_scale = time_scale
+
+    def create(self, messages, model, max_tokens, **kwargs):
+        first_token, tokens_per_second = SPEEDS[model]
+        answering = len(messages) > 1
+        output = min(max_tokens, ANSWER_OUTPUT_TOKENS if answering else TOOL_OUTPUT_TOKENS)
+        time.sleep((first_token + output / tokens_per_second) * self.time_scale)
+        usage = SimpleNamespace(input_tokens=1500 if answering else 1200, output_tokens=output)
+        if answering:
+            return SimpleNamespace(stop_reason="end_turn", usage=usage,
+                                   content=[SimpleNamespace(type="text", text="Here you go")])
+        block = SimpleNamespace(type="tool_use", name="search_rv_listings", id="tool_1",
+                                input={"query": messages[0]["content"][0]["text"]})
+        return SimpleNamespace(stop_reason="tool_use", usage=usage, content=[block])
+
+
+def run(routing: agent.ModelRouting, queries: list, time_scale: float) -> agent.AgentUsage:
+    client = SimpleNamespace(messages=FakeMessages(time_scale))
+    usage = agent.AgentUsage()
+    with mock.patch.object(agent, "create_agent", lambda: client), \
+            mock.patch("builtins.print"):
+        for query in queries:
+            agent.run_agent(query, usage=usage, fast_path=False, routing=routing)
+    for turn in usage.turns:
+        turn.latency /= time_scale
+    return usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=6)
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="multiply simulated sleeps by this factor")
+    args = parser.parse_args()
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+
+    print(f"{len(queries)} queries, 2 turns each; " + ", ".join(
+        f"{model}: {ttft * 1000:.0f}ms to first token, {tps} tok/s"
+        for model, (ttft, tps) in SPEEDS.items()))
+    print(f"  {'policy':<20} {'turn':<7} {'model':<5} {'p50 s':>6} {'in tok':>7} "
+          f"{'out tok':>8} {'query s':>8}")
+    for label, routing in POLICIES.items():
+        usage = run(routing, queries, args.time_scale)
+        by_kind = defaultdict(list)
+        for turn in usage.turns:
+            by_kind[turn.kind].append(turn)
+        per_query = sum(turn.latency for turn in usage.turns) / len(queries)
+        for kind, turns in by_kind.items():
+            print(f"  {label:<20} {kind:<7} {turns[0].model:<5} "
+                  f"{statistics.median(t.latency for t in turns):6.2f} "
+                  f"{sum(t.input_tokens for t in turns):7,} "
+                  f"{sum(t.output_tokens for t in turns):8,} {per_query:8.2f}")
+            label = ""
+
+
+if __name__ == "__main__":
+    main()
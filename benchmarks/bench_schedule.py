@@ -0,0 +1,132 @@
+"""Benchmark site-yield scheduling on a replayed query log.
+
+Replays saved searches against a mocked Serper API whose sites differ in
+how many usable listings they return per make: a dealer site carrying
+three makes, a marketplace returning mostly sold listings, and so on. It
+compares Serper calls per delivered listing for the fixed schedule (every
+site, every search) against the yield-based schedule, which learns from
+the replay itself.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_schedule.py [--searches 400]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+from unittest import mock
+
+import httpx
+from synthetic import MAKES, synthetic_saved_searches
+
+from rv_search_agent import quota, search_api
+from rv_search_agent.cache import SEARCH_CACHE
+
+# Fraction of a site's results that are active listings, per make
+MASS_MARKET = {"Winnebago", "Thor", "Jayco", "Grand Design"}
+DEALER_MAKES = {"Storyteller", "Unity", "Airstream"}
+
+
+def active_fraction(site: str, make: str) -> float:
+    if site == "rvtrader.com":
+        return 0.5
+    if site == "facebook.com/marketplace":
+        return 0.05
+    if site == "craigslist.org":
+        return 0.4 if make in MASS_MARKET else 0.05
+    return 0.9 if make in DEALER_MAKES else 0.0
+
+
+MODEL_MAKES = {model.split()[0].lower(): make for make, models in MAKES.items() for model in models}
+MODEL_MAKES.update({make.split()[0].lower(): make for make in MAKES})
+
+
+def mock_serper(calls: list):
+    real_client = httpx.Client
+
+    def handler(request):
+        payload = json.loads(request.content)
+        site, query = payload["q"][len("site:"):].split(" ", 1)
+        calls.append(site)
+        make = MODEL_MAKES.get(query.split()[0].lower(), "")
+        rng = random.Random(payload["q"])
+        p = active_fraction(site, make)
+        organic = []
+        for i in range(payload["num"]):
+            year = rng.randint(2015, 2025)
+            if rng.random() < p:
+                title = f"{year} {make} - ${rng.randrange(40_000, 250_000, 500):,}"
+            else:
+                title = f"{year} {make} - SOLD"
+            organic.append({"title": title, "link": f"https://{site}/{query}/{i}", "snippet": ""})
+        return httpx.Response(200, json={"organic": organic})
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+    return client
+
+
+def fixed_schedule(query=None, rv_type=None, min_price=None, max_price=None, min_year=None,
+                   max_year=None, location=None, max_results=20):
+    """Query every site in fixed order, as live search did before scheduling."""
+    search_query = search_api._serper_query(query, rv_type, min_year, location)
+    listings = []
+    with httpx.Client(timeout=30) as client:
+        for site in search_api.SERPER_SITES:
+            organic = search_api._fetch_serper(client, "benchmark", site, search_query,
+                                               min(max_results, 10))
+            listings.extend(search_api._filter_serper_results(
+                organic, site, min_price, max_price, min_year, max_year))
+    return listings[:max_results]
+
+
+def replay(search, searches: list) -> tuple:
+    calls: list = []
+    delivered = []
+    with mock.patch.object(httpx, "Client", mock_serper(calls)):
+        for filters in searches:
+            before = len(calls)
+            delivered.append((len(search(**filters)), len(calls) - before))
+    return calls, delivered
+
+
+def report(name: str, delivered: list) -> None:
+    listings = sum(n for n, _ in delivered)
+    calls = sum(c for _, c in delivered)
+    half = delivered[len(delivered) // 2:]
+    late = sum(c for _, c in half) / max(1, sum(n for n, _ in half))
+    print(f"  {name:<10} {calls:6,} calls  {listings:6,} listings  "
+          f"{calls / max(1, listings):5.3f} calls/listing  (second half {late:5.3f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=400)
+    args = parser.parse_args()
+
+    searches = synthetic_saved_searches(args.searches)
+    SEARCH_CACHE.enabled = False
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.dict(os.environ, {"SERPER_API_KEY": "benchmark"}), \
+            mock.patch("builtins.print"):
+        quota.SERPER_QUOTA = quota.QuotaLedger(
+            os.path.join(tmp, "quota.db"), monthly_limit=10**9, rate=10**9, burst=10**9,
+        )
+        _, fixed = replay(fixed_schedule, searches)
+        quota.SERPER_QUOTA = quota.QuotaLedger(
+            os.path.join(tmp, "adaptive.db"), monthly_limit=10**9, rate=10**9, burst=10**9,
+        )
+        _, adaptive = replay(search_api.search_rv_listings_live, searches)
+        segments = len({quota.yield_segment(f["query"], f.get("rv_type")) for f in searches})
+        quota.SERPER_QUOTA.close()
+
+    print(f"{len(searches)} searches from the replayed log, {segments} make/type segments")
+    report("fixed", fixed)
+    report("adaptive", adaptive)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark the seen-URL set against a Python set of URLs.
+
+Adds URLs shaped like listing links, then reports memory per URL, the
+measured false-positive rate against the configured bound (using URLs that
+were never added), and add/lookup throughput.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_seen.py [--count 1000000] [--error-rate 1e-4]
+"""
+
+import argparse
+import sys
+import time
+
+from rv_search_agent.seen import DEFAULT_CAPACITY, DEFAULT_ERROR_RATE, SeenSet
+
+
+def urls(start: int, stop: int):
+    return (f"https://denver.craigslist.org/rvs/d/2021-unity-u24rl/{7700000000 + i}.html"
+            for i in range(start, stop))
+
+
+def set_bytes(seen: set) -> int:
+    """Approximate bytes held by a set of strings: the table plus each string."""
+    return sys.getsizeof(seen) + sum(sys.getsizeof(url) for url in seen)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000, help="URLs to add")
+    parser.add_argument("--probes", type=int, default=200_000, help="unseen URLs to look up")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE)
+    args = parser.parse_args()
+
+    bloom = SeenSet(capacity=args.capacity, error_rate=args.error_rate)
+    start = time.perf_counter()
+    for url in urls(0, args.count):
+        bloom.add(url)
+    bloom_add = time.perf_counter() - start
+
+    start = time.perf_counter()
+    false_positives = sum(url in bloom for url in urls(args.count, args.count + args.probes))
+    bloom_lookup = time.perf_counter() - start
+
+    exact: set = set()
+    start = time.perf_counter()
+    for url in urls(0, args.count):
+        if url not in exact:
+            exact.add(url)
+    set_add = time.perf_counter() - start
+    start = time.perf_counter()
+    sum(url in exact for url in urls(args.count, args.count + args.probes))
+    set_lookup = time.perf_counter() - start
+
+    per_million = 1_000_000 / args.count
+    print(f"{args.count:,} URLs, capacity {args.capacity:,}, error rate {args.error_rate:g}, "
+          f"{len(bloom.filters)} filters")
+    print(f"  memory:   seen-set {bloom.memory_bytes * per_million / 2**20:8.1f} MiB/M URLs "
+          f"({bloom.memory_bytes * 8 / args.count:.1f} bits/URL)"
+          f"   set {set_bytes(exact) * per_million / 2**20:8.1f} MiB/M URLs")
+    print(f"  false positives: {false_positives / args.probes:.2e} measured, "
+          f"{bloom.max_error_rate:.2e} bound ({false_positives} of {args.probes:,} unseen URLs)")
+    print(f"  add:      seen-set {args.count / bloom_add:10,.0f}/s   set {args.count / set_add:10,.0f}/s")
+    print(f"  lookup:   seen-set {args.probes / bloom_lookup:10,.0f}/s   set {args.probes / set_lookup:10,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark follow-up questions: AgentSession refinement vs. stateless re-runs.
+
+Plays scripted dialogs (a search, then follow-ups that narrow it) through
+a fake model client that sleeps per call and picks the scripted tool call.
+An AgentSession answers follow-ups with refine_results over the listings
+it already has; the stateless baseline re-runs run_agent with the whole
+question, which searches again and sends the listings to the model again.
+Searches sleep to simulate live latency (the result cache is off, as if
+its entries had expired).
+
+Input tokens are estimated as JSON characters / 4. "Uncached" counts only
+what isn't a prefix of an earlier request, as the prompt cache would.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_session.py [--llm-latency 0.3] [--search-latency 1.0]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from rv_search_agent import agent, search_api, session
+from rv_search_agent.cache import SEARCH_CACHE
+
+# (question, scripted tool call); the first question of each dialog searches
+DIALOGS = [
+    [("Find Storyteller vans", ("search_rv_listings", {"query": "Storyteller", "max_results": 50})),
+     ("Now only the AWD ones", ("refine_results", {"keyword": "AWD"})),
+     ("Which of those are under $200k?", ("refine_results", {"max_price": 200_000}))],
+    [("Find Unity RVs", ("search_rv_listings", {"query": "Unity", "max_results": 50})),
+     ("Only 2023 or newer", ("refine_results", {"min_year": 2023})),
+     ("Any under $150k?", ("refine_results", {"max_price": 150_000}))],
+    [("Show me Class B RVs", ("search_rv_listings", {"rv_type": "Class B", "max_results": 50})),
+     ("Just the ones with solar", ("refine_results", {"keyword": "solar"})),
+     ("Which are in California?", ("refine_results", {"location": "CA"}))],
+]
+
+
+def _strip(value):
+    if isinstance(value, dict):
+        return {k: _strip(v) for k, v in value.items() if k != "cache_control"}
+    if isinstance(value, list):
+        return [_strip(v) for v in value]
+    if isinstance(value, SimpleNamespace):
+        return _strip(vars(value))
+    return value
+
+
+class FakeMessages:
+    """Scripted tool call per question, then an answer; sleeps per call."""
+
+    def __init__(self, script: dict, latency: float):
+        self.script = script
+        self.latency = latency
+        self.cached = set()
+        self.input_tokens = 0
+        self.uncached_tokens = 0
+
+    def create(self, messages, tools, system, **kwargs):
+        time.sleep(self.latency)
+        segments = tuple(json.dumps(_strip(part), sort_keys=True)
+                         for part in [tools, system] + messages)
+        read = max((len(p) for p in self.cached if segments[:len(p)] == p), default=0)
+        self.cached.add(segments)
+        self.input_tokens += sum(len(s) for s in segments) // 4
+        self.uncached_tokens += sum(len(s) for s in segments[read:]) // 4
+
+        block = messages[-1]["content"][-1]
+        if block["type"] == "tool_result":
+            return SimpleNamespace(stop_reason="end_turn",
+                                   content=[SimpleNamespace(type="text", text="Here you go")])
+        name, tool_input = self.script[block["text"]]
+        return SimpleNamespace(stop_reason="tool_use", content=[
+            SimpleNamespace(type="tool_use", name=name, input=tool_input, id=f"t{len(self.cached)}")])
+
+
+def run(fake: FakeMessages, dialogs: list, stateful: bool) -> float:
+    client = SimpleNamespace(messages=fake)
+    start = time.perf_counter()
+    with mock.patch.object(agent, "create_agent", lambda: client), \
+            mock.patch.object(session, "create_agent", lambda: client):
+        for dialog in dialogs:
+            conversation = session.AgentSession()
+            for question, _ in dialog:
+                if stateful:
+                    conversation.ask(question)
+                else:
+                    agent.run_agent(question, fast_path=False)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.3,
+                        help="simulated seconds per model call")
+    parser.add_argument("--search-latency", type=float, default=1.0,
+                        help="simulated seconds per search")
+    args = parser.parse_args()
+
+    search = search_api.search_rv_listings
+
+    def slow_search(*a, **kw):
+        time.sleep(args.search_latency)
+        return search(*a, **kw)
+
+    # Stateless: each follow-up is asked in full and searches again
+    baseline_dialogs, baseline_script = [], {}
+    for dialog in DIALOGS:
+        first, first_call = dialog[0]
+        baseline_dialogs.append([(first, first_call)] + [
+            (f"{first}. {question}", first_call) for question, _ in dialog[1:]])
+        baseline_script.update(dict(baseline_dialogs[-1]))
+    session_script = {question: call for dialog in DIALOGS for question, call in dialog}
+
+    SEARCH_CACHE.enabled = False
+    with mock.patch.object(agent, "search_rv_listings", slow_search), \
+            mock.patch.object(session, "search_rv_listings", slow_search), \
+            mock.patch("builtins.print"):
+        baseline = FakeMessages(baseline_script, args.llm_latency)
+        baseline_s = run(baseline, baseline_dialogs, stateful=False)
+        stateful = FakeMessages(session_script, args.llm_latency)
+        stateful_s = run(stateful, DIALOGS, stateful=True)
+
+    followups = sum(len(dialog) - 1 for dialog in DIALOGS)
+    print(f"{len(DIALOGS)} dialogs, {followups} follow-ups; {args.llm_latency * 1000:.0f}ms per "
+          f"model call, {args.search_latency * 1000:.0f}ms per search")
+    print(f"  {'':<22} {'wall s':>7} {'input tok':>10} {'uncached tok':>13}")
+    for label, fake, elapsed in (("stateless run_agent", baseline, baseline_s),
+                                 ("AgentSession", stateful, stateful_s)):
+        print(f"  {label:<22} {elapsed:7.2f} {fake.input_tokens:10,} {fake.uncached_tokens:13,}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = session.SessionStore(f"{tmp}/sessions.db")
+        conversation = session.AgentSession()
+        client = SimpleNamespace(messages=FakeMessages(session_script, 0))
+        with mock.patch.object(session, "create_agent", lambda: client):
+            for question, _ in DIALOGS[0]:
+                conversation.ask(question)
+        stored = store.save(conversation)
+        store.close()
+    full = len(json.dumps(conversation.messages, separators=(",", ":")))
+    print(f"  stored session: {stored:,} bytes compact vs {full:,} bytes of full messages")
+
+
+if __name__ == "__main__":
+    main()
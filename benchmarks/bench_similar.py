@@ -0,0 +1,68 @@
+"""Measure similar-listing search: recall against exact search vs query latency.
+
+Builds a SimilarityIndex over synthetic listings (with amenity words in
+their descriptions, so similarities vary) and times ``similar`` for a
+sample of listings at several probe and candidate settings, plus exact
+search over every listing as the baseline. Recall counts a result as
+correct if it scores at least the exact k-th neighbour's cosine.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_similar.py [--listings 100000] [--queries 30]
+        [--tables 24] [--bits BITS]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from synthetic import synthetic_listings
+
+from rv_search_agent.similar import DEFAULT_TABLES, SimilarityIndex, recall
+
+# (probes, candidates)
+SETTINGS = [(0, 100), (1, 100), (1, 200), (2, 100), (2, 200), (4, 200), (4, 500)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=DEFAULT_TABLES)
+    parser.add_argument("--bits", type=int, help="hyperplanes per table (default: by size)")
+    args = parser.parse_args()
+
+    listings = synthetic_listings(args.listings, amenities=8)
+    start = time.perf_counter()
+    index = SimilarityIndex(listings, tables=args.tables, bits=args.bits)
+    build = time.perf_counter() - start
+    sizes = [len(bucket) for table in index._buckets for bucket in table.values()]
+    print(f"{len(listings):,} listings; {index.tables} tables x {index.bits} bits; "
+          f"built in {build:.1f}s ({build / len(listings) * 1e6:.0f}us per listing); "
+          f"buckets p50 {statistics.median(sizes):.0f}, max {max(sizes):,}")
+
+    urls = [listing.url for listing in random.Random(1).sample(listings, args.queries)]
+    start = time.perf_counter()
+    truth = {url: index.exact(url, args.k) for url in urls}
+    exact = (time.perf_counter() - start) / len(urls)
+    print(f"  exact search: {exact * 1000:.1f}ms per query")
+
+    print(f"  {'probes':>6} {'candidates':>10} {f'recall@{args.k}':>10} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'speedup':>8}")
+    for probes, candidates in SETTINGS:
+        latencies, recalls = [], []
+        for url in urls:
+            start = time.perf_counter()
+            found = index.similar(url, args.k, probes=probes, candidates=candidates)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(recall(found, truth[url]))
+        latencies.sort()
+        p50 = statistics.median(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"  {probes:6} {candidates:10} {statistics.mean(recalls):10.2f} "
+              f"{p50 * 1000:7.2f} {p99 * 1000:7.2f} {exact / p50:7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark speculative search prefetch in run_agent.
+
+A fake model client sleeps per call, makes the scripted first tool call
+for each query (the arguments a model plausibly sends, which don't always
+match the local guess), then answers. Searches sleep to simulate live
+latency, with the result cache off. Each query runs with speculation off
+and on; the script reports the prefetch hit rate, the search time hidden
+behind the model call and the wall-clock difference.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_speculation.py [--llm-latency 1.0]
+        [--search-latency 2.0]
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from rv_search_agent import agent, search_api
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.metrics import AGENT_SPECULATION, AGENT_SPECULATION_SAVED
+
+# (question, the model's first tool call)
+SCRIPT = {
+    "What's the typical price of a 2023 Unity U24RL?":
+        ("summarize_rv_market", {"query": "U24RL", "min_year": 2023, "max_year": 2023}),
+    "Compare Storyteller vans under $200k":
+        ("search_rv_listings", {"query": "Storyteller", "max_price": 200_000}),
+    "Any Class B vans with solar near Denver, CO?":
+        ("search_rv_listings", {"rv_type": "Class B", "near": "Denver, CO"}),
+    "Which Winnebago is the best value?":
+        ("search_rv_listings", {"query": "Winnebago", "max_results": 20}),
+    "How much is a Airstream worth these days?":
+        ("summarize_rv_market", {"query": "Airstream"}),
+    "Find an AWD Class C under $150k":
+        ("search_rv_listings", {"query": "AWD", "rv_type": "Class C", "max_price": 150_000}),
+    "Is a 2022 Jayco a good deal at $60k?":
+        ("summarize_rv_market", {"query": "Jayco", "min_year": 2022, "max_year": 2022}),
+    "Show me fifth wheels that sleep six":
+        ("search_rv_listings", {"rv_type": "Fifth Wheel"}),
+    "I want something for a family of four":
+        ("search_rv_listings", {"query": "bunkhouse"}),
+    "Tell me about Thor motorhomes in Texas":
+        ("search_rv_listings", {"query": "Thor", "location": "TX"}),
+}
+
+
+class FakeMessages:
+    """Scripted first tool call per question, then an answer; sleeps per call."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, messages, **kwargs):
+        time.sleep(self.latency)
+        if len(messages) > 1:
+            return SimpleNamespace(stop_reason="end_turn",
+                                   content=[SimpleNamespace(type="text", text="Here you go")])
+        name, tool_input = SCRIPT[messages[0]["content"][0]["text"]]
+        return SimpleNamespace(stop_reason="tool_use", content=[
+            SimpleNamespace(type="tool_use", name=name, input=tool_input, id="tool_1")])
+
+
+def run(speculate: bool) -> float:
+    start = time.perf_counter()
+    for question in SCRIPT:
+        agent.run_agent(question, fast_path=False, speculate=speculate)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=1.0,
+                        help="simulated seconds per model call")
+    parser.add_argument("--search-latency", type=float, default=2.0,
+                        help="simulated seconds per search")
+    args = parser.parse_args()
+
+    search = search_api.search_rv_listings
+
+    def slow_search(*a, **kw):
+        time.sleep(args.search_latency)
+        return search(*a, **kw)
+
+    SEARCH_CACHE.enabled = False
+    client = SimpleNamespace(messages=FakeMessages(args.llm_latency))
+    with mock.patch.object(agent, "create_agent", lambda: client), \
+            mock.patch.object(agent, "search_rv_listings", slow_search):
+        baseline = run(speculate=False)
+        before = {outcome: AGENT_SPECULATION.value(outcome=outcome)
+                  for outcome in ("hit", "miss", "none")}
+        saved_before = AGENT_SPECULATION_SAVED.value()
+        speculative = run(speculate=True)
+        outcomes = {outcome: AGENT_SPECULATION.value(outcome=outcome) - count
+                    for outcome, count in before.items()}
+        saved = AGENT_SPECULATION_SAVED.value() - saved_before
+
+    print(f"{len(SCRIPT)} queries; {args.llm_latency * 1000:.0f}ms per model call, "
+          f"{args.search_latency * 1000:.0f}ms per search")
+    print(f"  guesses: {outcomes['hit']:.0f} hit, {outcomes['miss']:.0f} miss, "
+          f"{outcomes['none']:.0f} no guess; hit rate {outcomes['hit'] / len(SCRIPT):.0%}")
+    print(f"  search time hidden behind the model: {saved:.2f}s")
+    print(f"  wall s: {baseline:.2f} without speculation, {speculative:.2f} with "
+          f"({baseline - speculative:.2f}s saved, "
+          f"{(baseline - speculative) / len(SCRIPT):.2f}s per query)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark make/model/location autocomplete against searching per keystroke.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_suggest.py [--listings 200000] [--makes 400]
+        [--places 20000]
+
+Builds a catalog with many distinct makes, models and locations, with
+listing counts skewed the way real catalogs are (a few popular makes and
+cities, a long tail), then types a set of words one keystroke at a time.
+Each keystroke is completed by the SuggestIndex, and for comparison by a
+catalog search for the prefix (what the search box did before), counting
+the makes and models of the results.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.models import RVListing
+from rv_search_agent.search_api import _search_demo
+
+SYLLABLES = ["ka", "lo", "ran", "vi", "ster", "mo", "ne", "tor", "qua", "bel", "sha", "win",
+             "tra", "dun", "el", "ford", "ash", "ley", "ton", "ville", "port", "ro", "sa", "jay"]
+STATES = ["CO", "AZ", "CA", "OR", "WA", "TX", "GA", "TN", "FL", "IL", "UT", "ID", "NV", "NM"]
+TYPED = ["winnebago", "storyteller", "sacramento", "unity u24", "tor", "ash", "four winds",
+         "mo", "k", "denver, co"]
+
+
+def _name(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).title()
+
+
+def vocabulary_listings(count: int, makes: int, places: int, seed: int = 42):
+    """Listings over generated makes, models and places with Zipf-like counts."""
+    rng = random.Random(seed)
+    make_names = ["Winnebago", "Storyteller", "Unity", "Thor"] + [
+        _name(rng, rng.randint(2, 3)) for _ in range(makes - 4)]
+    models = {make: [f"{_name(rng, 2)} {rng.randint(18, 40)}{rng.choice('ABCDRLT')}"
+                     for _ in range(rng.randint(2, 12))] for make in make_names}
+    models["Unity"] = ["U24RL", "U24TB", "U24MB"]
+    models["Thor"] = ["Four Winds 28A", "Chateau 31W"]
+    place_names = ["Denver, CO", "Sacramento, CA"] + [
+        f"{_name(rng, rng.randint(1, 3))}, {rng.choice(STATES)}" for _ in range(places - 2)]
+    make_weights = [1 / (rank + 1) for rank in range(len(make_names))]
+    place_weights = [1 / (rank + 1) for rank in range(len(place_names))]
+    listings = []
+    for i, (make, place) in enumerate(zip(rng.choices(make_names, make_weights, k=count),
+                                          rng.choices(place_names, place_weights, k=count))):
+        model = rng.choice(models[make])
+        listings.append(RVListing(title=f"{make} {model}", make=make, model=model,
+                                  location=place, url=f"https://example.com/listing/v{i}"))
+    return listings
+
+
+def keystrokes():
+    return [word[:length] for word in TYPED for length in range(1, len(word) + 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=200_000)
+    parser.add_argument("--makes", type=int, default=400)
+    parser.add_argument("--places", type=int, default=20_000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--scan-keystrokes", type=int, default=10,
+                        help="keystrokes to time the per-keystroke search on")
+    args = parser.parse_args()
+
+    catalog = ListingCatalog(vocabulary_listings(args.listings, args.makes, args.places))
+    start = time.perf_counter()
+    index = catalog.suggest_index()
+    build = time.perf_counter() - start
+    kinds = Counter(s.kind for s in index.suggestions)
+    print(f"{len(catalog):,} listings; {kinds['make']:,} makes, {kinds['model']:,} models, "
+          f"{kinds['location']:,} locations; {len(index._keys):,} keys, "
+          f"{len(index._top):,} precomputed prefixes; built in {build * 1000:.0f}ms")
+
+    typed = keystrokes()
+    latencies = []
+    for prefix in typed:
+        start = time.perf_counter()
+        for _ in range(100):
+            index.suggest(prefix, args.k)
+        latencies.append((time.perf_counter() - start) / 100)
+    latencies.sort()
+
+    scans = []
+    for prefix in typed[:args.scan_keystrokes]:
+        start = time.perf_counter()
+        results = _search_demo(prefix, catalog=catalog, max_results=len(catalog))
+        Counter((listing.make, listing.model) for listing in results).most_common(args.k)
+        scans.append(time.perf_counter() - start)
+
+    print(f"  {len(typed)} keystrokes over {len(TYPED)} words, top {args.k}")
+    print(f"  {'method':<22} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+    print(f"  {'SuggestIndex':<22} {statistics.median(latencies) * 1e6:9.1f} "
+          f"{latencies[int(len(latencies) * 0.99)] * 1e6:9.1f} {latencies[-1] * 1e6:9.1f}")
+    scans.sort()
+    print(f"  {'search per keystroke':<22} {statistics.median(scans) * 1e6:9.0f} "
+          f"{scans[int(len(scans) * 0.99)] * 1e6:9.0f} {scans[-1] * 1e6:9.0f}  "
+          f"({len(scans)} keystrokes)")
+    for prefix in ("w", "four ", "denver"):
+        print(f"  {prefix!r}: " + ", ".join(
+            f"{s.text} ({s.count:,})" for s in index.suggest(prefix, 3)))
+
+
+if __name__ == "__main__":
+    main()
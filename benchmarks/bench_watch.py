@@ -0,0 +1,89 @@
+"""Benchmark steady-state watch cost against re-running saved searches.
+
+Serves Craigslist-style feeds (with ETags) from a local HTTP server and
+compares requests and CPU per polling pass for a watcher against calling
+the Craigslist search for every saved search, as a cron job would.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_watch.py [--searches 300] [--items 100]
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from synthetic import synthetic_rss_feed, synthetic_saved_searches
+
+from rv_search_agent import search_api
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.watch import SavedSearch, Watcher
+
+
+def serve(feed: bytes, etag: str, requests: list) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(feed)))
+            self.end_headers()
+            self.wfile.write(feed)
+
+        def log_message(self, format, *args):
+            return None
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def measure(fn) -> float:
+    """Return process CPU seconds spent in fn."""
+    start = time.process_time()
+    fn()
+    return time.process_time() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=300)
+    parser.add_argument("--items", type=int, default=100, help="items per feed")
+    args = parser.parse_args()
+
+    saved = [{k: v for k, v in f.items() if k != "max_results"}
+             for f in synthetic_saved_searches(args.searches)]
+    requests: list = []
+    httpd = serve(synthetic_rss_feed(args.items).encode(), '"v1"', requests)
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/{{region}}/search/rva"
+    SEARCH_CACHE.enabled = False
+
+    with mock.patch.object(search_api, "CRAIGSLIST_URL", url):
+        cron = measure(lambda: [search_api.search_rv_listings(demo_mode=False, **f) for f in saved])
+        cron_requests = len(requests)
+
+        searches = [SavedSearch.from_dict(f, f"search-{i}") for i, f in enumerate(saved)]
+        watcher = Watcher(searches, [])
+        del requests[:]
+        first = measure(watcher.poll_all)
+        first_requests = len(requests)
+        del requests[:]
+        steady = measure(watcher.poll_all)
+        steady_requests = len(requests)
+        watcher.close()
+    httpd.shutdown()
+
+    print(f"{args.searches} saved searches, {args.items} items per feed, "
+          f"{len(watcher.feeds)} distinct feeds")
+    print(f"  re-run searches:     {cron * 1000:8.1f} ms CPU  {cron_requests:4} requests (all 200)")
+    print(f"  watch, first poll:   {first * 1000:8.1f} ms CPU  {first_requests:4} requests")
+    print(f"  watch, steady state: {steady * 1000:8.1f} ms CPU  {steady_requests:4} requests (304)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Benchmark cases for the hot paths: search, feed parsing and the CLI.
+
+Each case has a setup function that builds its fixtures for a given size
+and returns the zero-argument callable that is timed. Everything runs
+offline: catalogs and feeds are generated, and HTTP is served by an
+``httpx.MockTransport``.
+"""
+
+import contextlib
+import io
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+from unittest import mock
+
+import httpx
+from synthetic import (
+    synthetic_listings,
+    synthetic_rss_feed,
+    synthetic_saved_searches,
+    synthetic_serper_results,
+)
+
+from rv_search_agent import cli, quota, search_api
+from rv_search_agent.batch import search_rv_listings_batch
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.search_api import _parse_rss_feed, _parse_serper_result, _search_demo
+
+# Catalog rows and feed items per scale
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"rows": 1_000, "items": 100},
+    "medium": {"rows": 10_000, "items": 1_000},
+    "large": {"rows": 100_000, "items": 5_000},
+}
+
+SEARCH_MIX = [
+    {"query": "Storyteller"},
+    {"rv_type": "Class C", "max_price": 100000},
+    {"source": "Facebook Marketplace"},
+    {"location": "Denver", "min_year": 2022},
+    {"query": "NonExistentBrandXYZ123"},
+]
+
+
+@dataclass
+class Case:
+    """A named benchmark whose setup takes a scale and returns the timed callable."""
+
+    name: str
+    setup: Callable[[Dict[str, int]], Callable[[], object]]
+
+
+def _catalog(size: Dict[str, int]) -> ListingCatalog:
+    return ListingCatalog(synthetic_listings(size["rows"]))
+
+
+def search_mix(size: Dict[str, int]) -> Callable[[], object]:
+    """Uncached catalog searches over a mix of filters, all results."""
+    catalog = _catalog(size)
+
+    def run():
+        for filters in SEARCH_MIX:
+            _search_demo(max_results=size["rows"], catalog=catalog, **filters)
+    return run
+
+
+def search_first_page(size: Dict[str, int]) -> Callable[[], object]:
+    """Uncached catalog searches returning the first 10 results."""
+    catalog = _catalog(size)
+
+    def run():
+        for filters in SEARCH_MIX:
+            _search_demo(max_results=10, catalog=catalog, **filters)
+    return run
+
+
+def search_near(size: Dict[str, int]) -> Callable[[], object]:
+    """Radius searches driven by the spatial index."""
+    catalog = _catalog(size)
+
+    def run():
+        _search_demo(near="Denver, CO", radius_miles=300, max_results=size["rows"], catalog=catalog)
+    return run
+
+
+def search_batch(size: Dict[str, int]) -> Callable[[], object]:
+    """100 saved searches as one uncached batch over the demo catalog."""
+    catalog = _catalog(size)
+    searches = synthetic_saved_searches(100)
+
+    def run():
+        with mock.patch.object(search_api, "DEMO_CATALOG", catalog), \
+                mock.patch.object(SEARCH_CACHE, "enabled", False):
+            search_rv_listings_batch(searches, demo_mode=True)
+    return run
+
+
+def parse_rss_feed(size: Dict[str, int]) -> Callable[[], object]:
+    """Parse a Craigslist RSS feed end to end."""
+    feed = synthetic_rss_feed(size["items"])
+
+    def run():
+        _parse_rss_feed(feed, max_results=size["items"])
+    return run
+
+
+def parse_serper_results(size: Dict[str, int]) -> Callable[[], object]:
+    """Parse Serper organic results into listings."""
+    results = synthetic_serper_results(size["items"])
+
+    def run():
+        for result in results:
+            _parse_serper_result(result, "rvtrader.com")
+    return run
+
+
+def _run_cli(argv: List[str]) -> None:
+    with mock.patch.object(sys, "argv", ["rv-search"] + argv), \
+            contextlib.redirect_stdout(io.StringIO()):
+        try:
+            cli.main()
+        except SystemExit:
+            pass
+
+
+def cli_demo(size: Dict[str, int]) -> Callable[[], object]:
+    """`rv-search` end to end over a synthetic demo catalog, cache disabled."""
+    catalog = _catalog(size)
+
+    def run():
+        with mock.patch.object(search_api, "DEMO_CATALOG", catalog), \
+                mock.patch.object(SEARCH_CACHE, "enabled", False):
+            _run_cli(["-q", "Unity", "--max-price", "200000", "--sort-by", "price", "-n", "50"])
+    return run
+
+
+def cli_live(size: Dict[str, int]) -> Callable[[], object]:
+    """`rv-search --live` end to end against a mocked Serper API."""
+    payload = {"organic": synthetic_serper_results(min(size["items"], 100))}
+    real_client = httpx.Client
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(lambda request: httpx.Response(200, json=payload))
+        return real_client(*args, **kwargs)
+
+    def run():
+        with mock.patch.object(httpx, "Client", client), \
+                mock.patch.dict(os.environ, {"SERPER_API_KEY": "benchmark"}), \
+                mock.patch.object(SEARCH_CACHE, "enabled", False), \
+                mock.patch.object(quota.SERPER_QUOTA, "enabled", False):
+            _run_cli(["-q", "Unity", "--live", "-n", "20"])
+    return run
+
+
+CASES = [
+    Case("search_mix", search_mix),
+    Case("search_first_page", search_first_page),
+    Case("search_near", search_near),
+    Case("search_batch", search_batch),
+    Case("parse_rss_feed", parse_rss_feed),
+    Case("parse_serper_results", parse_serper_results),
+    Case("cli_demo", cli_demo),
+    Case("cli_live", cli_live),
+]
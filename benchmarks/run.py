@@ -0,0 +1,118 @@
+"""Run the benchmark suite, record baselines and check for regressions.
+
+Usage:
+    PYTHONPATH=src python benchmarks/run.py                      # run and print
+    PYTHONPATH=src python benchmarks/run.py --save baseline.json # record
+    PYTHONPATH=src python benchmarks/run.py --compare benchmarks/baseline.json
+
+With --compare, exits with status 1 if any benchmark is slower than its
+baseline by more than --threshold (default 25%). Baselines are only
+comparable on the machine that recorded them.
+"""
+
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+import time
+from typing import Callable, Dict
+
+from cases import CASES, SCALES
+
+# Minimum wall time per timing repeat, so short calls are looped
+MIN_REPEAT_SECONDS = 0.05
+
+
+def measure(fn: Callable[[], object], repeats: int) -> float:
+    """Return the best seconds-per-call over `repeats` timed loops."""
+    fn()  # warm up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_REPEAT_SECONDS:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def run_suite(scales, pattern: str, repeats: int) -> Dict[str, float]:
+    """Run matching cases at each scale, returning seconds per call by name."""
+    results = {}
+    for scale in scales:
+        for case in CASES:
+            name = f"{case.name}[{scale}]"
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+            fn = case.setup(SCALES[scale])
+            results[name] = measure(fn, repeats)
+            print(f"{name:<36} {results[name] * 1000:>10.3f} ms", flush=True)
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> int:
+    """Print a comparison table and return the number of regressions."""
+    regressions = 0
+    print(f"\n{'benchmark':<36} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for name, current in results.items():
+        if name not in baseline:
+            print(f"{name:<36} {'-':>12} {current * 1000:>11.3f} {'new':>8}")
+            continue
+        change = current / baseline[name] - 1.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<36} {baseline[name] * 1000:>12.3f} {current * 1000:>11.3f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the rv-search benchmark suite")
+    parser.add_argument("--scales", default="small,medium",
+                        help=f"comma-separated scales ({', '.join(SCALES)})")
+    parser.add_argument("-k", "--filter", default="*", help="glob on benchmark names")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--save", metavar="FILE", help="record results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before failing (default: 0.25)")
+    args = parser.parse_args()
+
+    results = run_suite(args.scales.split(","), args.filter, args.repeats)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Synthetic data generators for benchmarks."""
+
+import random
+from typing import List
+
+from rv_search_agent.models import RVListing
+
+MAKES = {
+    "Winnebago": ["View", "Revel", "Travato", "Minnie Winnie"],
+    "Thor": ["Four Winds", "Chateau", "Sequence"],
+    "Jayco": ["Greyhawk", "Redhawk", "Eagle"],
+    "Storyteller": ["Classic MODE", "Beast MODE", "Stealth MODE"],
+    "Unity": ["U24RL", "U24TB", "U24MB"],
+    "Airstream": ["Interstate 24GT", "Atlas", "Basecamp"],
+    "Grand Design": ["Reflection", "Solitude", "Imagine"],
+    "Tiffin": ["Allegro", "Wayfarer"],
+}
+RV_TYPES = ["Class A", "Class B", "Class B+", "Class C", "Travel Trailer", "Fifth Wheel"]
+SOURCES = ["Dealer"] * 20 + ["RV Trader"] * 6 + ["Craigslist"] * 3 + ["Facebook Marketplace"]
+LOCATIONS = [
+    "Denver, CO", "Boulder, CO", "Phoenix, AZ", "Scottsdale, AZ", "Los Angeles, CA",
+    "San Diego, CA", "Sacramento, CA", "Portland, OR", "Seattle, WA", "Austin, TX",
+    "Dallas, TX", "Houston, TX", "Atlanta, GA", "Nashville, TN", "Miami, FL",
+    "Tampa, FL", "Chicago, IL", "Salt Lake City, UT", "Boise, ID", "Las Vegas, NV",
+]
+AMENITIES = [
+    "solar", "lithium", "inverter", "generator", "awd", "4x4", "diesel", "gas", "bunkhouse",
+    "king", "queen", "twin", "murphy", "dinette", "sofa", "recliners", "fireplace", "washer",
+    "dryer", "dishwasher", "induction", "convection", "starlink", "awning", "rack", "ladder",
+    "hitch", "heated", "tanks", "wet", "dry", "bath", "shower", "cassette", "composting",
+    "leveling", "jacks", "backup", "camera", "tow", "package", "off-grid", "winterized",
+    "one-owner", "warranty", "new", "tires", "brakes", "upgraded", "suspension", "roof",
+    "fans", "ac", "furnace", "diesel-heater", "garage", "outdoor", "kitchen", "tv", "wifi",
+]
+
+
+def synthetic_listings(count: int, seed: int = 42, amenities: int = 0) -> List[RVListing]:
+    """Generate `count` plausible listings, deterministic for a given seed.
+
+    With ``amenities``, each description also lists up to that many words
+    from AMENITIES, so descriptions vary the way real ones do.
+    """
+    rng = random.Random(seed)
+    extras = random.Random(seed + 1)
+    makes = list(MAKES)
+    listings = []
+    for i in range(count):
+        make = rng.choice(makes)
+        model = rng.choice(MAKES[make])
+        year = rng.randint(2015, 2025)
+        rv_type = rng.choice(RV_TYPES)
+        source = rng.choice(SOURCES)
+        picked = extras.sample(AMENITIES, extras.randint(0, amenities)) if amenities else []
+        listings.append(RVListing(
+            title=f"{year} {make} {model} {rv_type}",
+            price=rng.randrange(30_000, 300_000, 500),
+            year=year,
+            make=make,
+            model=model,
+            location=rng.choice(LOCATIONS),
+            url=f"https://example.com/listing/synthetic-{i}",
+            mileage=rng.randrange(1_000, 90_000, 100) if source != "Dealer" else None,
+            rv_type=rv_type,
+            description=" ".join(
+                [f"{make} {model} in good condition, {rng.randint(0, 3)} slides.", *picked]),
+            source=source,
+        ))
+    return listings
+
+
+def synthetic_rss_feed(count: int, seed: int = 42) -> str:
+    """Generate a Craigslist-style RSS feed with `count` items."""
+    rng = random.Random(seed)
+    makes = list(MAKES)
+    items = []
+    for i in range(count):
+        make = rng.choice(makes)
+        model = rng.choice(MAKES[make])
+        rv_type = rng.choice(RV_TYPES)
+        city = rng.choice(LOCATIONS).split(",")[0]
+        items.append(
+            "<item>"
+            f"<title>{rng.randint(2012, 2025)} {make} {model} {rv_type} - "
+            f"${rng.randrange(20_000, 250_000, 500):,} ({city})</title>"
+            f"<link>https://sfbay.craigslist.org/rvs/d/{i}.html</link>"
+            f"<description>Well kept {rv_type.lower()}, {rng.randint(5, 90)}k miles.</description>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel><title>craigslist | rvs</title>'
+        + "".join(items)
+        + "</channel></rss>"
+    )
+
+
+def synthetic_serper_results(count: int, seed: int = 42) -> List[dict]:
+    """Generate `count` Serper organic results."""
+    rng = random.Random(seed)
+    makes = list(MAKES)
+    results = []
+    for i in range(count):
+        make = rng.choice(makes)
+        model = rng.choice(MAKES[make])
+        rv_type = rng.choice(RV_TYPES)
+        results.append({
+            "title": f"{rng.randint(2012, 2025)} {make} {model} - "
+                     f"${rng.randrange(20_000, 250_000, 500):,} | RV Trader",
+            "link": f"https://www.rvtrader.com/listing/{i}",
+            "snippet": f"{rv_type} with {rng.randint(1, 90)},{rng.randint(100, 999)} miles. "
+                       f"Located in {rng.choice(LOCATIONS)}.",
+        })
+    return results
+
+
+def synthetic_saved_searches(count: int, seed: int = 42) -> List[dict]:
+    """Generate `count` saved searches: make/model/price/type combinations."""
+    rng = random.Random(seed)
+    makes = list(MAKES)
+    searches = []
+    for _ in range(count):
+        make = rng.choice(makes)
+        filters = {"query": rng.choice([make, rng.choice(MAKES[make])])}
+        if rng.random() < 0.6:
+            filters["max_price"] = rng.choice([75_000, 100_000, 150_000, 200_000])
+        if rng.random() < 0.3:
+            filters["rv_type"] = rng.choice(RV_TYPES)
+        if rng.random() < 0.3:
+            filters["min_year"] = rng.choice([2018, 2020, 2022])
+        filters["max_results"] = rng.choice([10, 20])
+        searches.append(filters)
+    return searches
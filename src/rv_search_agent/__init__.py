@@ -4,11 +4,13 @@ __version__ = "0.1.0"
 
 from .agent import run_agent
 from .models import RVListing
-from .search_api import search_rv_listings, SearchAPIError
+from .search_api import find_similar, search_rv_listings, suggest, SearchAPIError
 
 __all__ = [
     "run_agent",
     "RVListing",
     "search_rv_listings",
+    "find_similar",
+    "suggest",
     "SearchAPIError",
 ]
@@ -1,66 +1,143 @@
 """Main agent implementation for RV search."""
 
+import asyncio
+import contextvars
 import json
+import os
+import re
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import anthropic
 from dotenv import load_dotenv
 
-from .search_api import search_rv_listings, SearchAPIError
+from .geo import get_gazetteer
+from .market import summarize_listings
+from .metrics import (
+    AGENT_BUDGET_WRAP_UPS,
+    AGENT_FAST_PATH,
+    AGENT_LATENCY,
+    AGENT_LLM_CALLS,
+    AGENT_LLM_LATENCY,
+    AGENT_RUNS,
+    AGENT_SPECULATION,
+    AGENT_SPECULATION_SAVED,
+    AGENT_TOKENS,
+    AGENT_TOOL_CALLS,
+    track,
+)
+from .models import RVListing, SearchQuery, normalize_text
+from .search_api import DEMO_LISTINGS, search_rv_listings, SearchAPIError
+from .tracing import count, span
 
 load_dotenv()
 
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 4096
+
+# Tool turns only pick a tool and its arguments, so a faster model with a
+# small output budget is enough (see ModelRouting)
+TOOL_MODEL = "claude-3-5-haiku-20241022"
+TOOL_MAX_TOKENS = 1024
+
+# Prompt caching: the tool schema and system prompt are identical on every
+# call, and each turn only appends to the conversation. Breakpoints after
+# the tools, the system prompt and the newest message let each call read
+# everything the previous call sent from the cache.
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Token counts in a response's usage, by metric kind
+TOKEN_KINDS = (
+    ("input", "input_tokens"),
+    ("output", "output_tokens"),
+    ("cache_read", "cache_read_input_tokens"),
+    ("cache_write", "cache_creation_input_tokens"),
+)
+
+# Search filters shared by both tools
+_SEARCH_PROPERTIES = {
+    "query": {
+        "type": "string",
+        "description": "Search query or keyword (e.g., 'Winnebago View', 'Storyteller Overland XO')",
+    },
+    "rv_type": {
+        "type": "string",
+        "description": "Type of RV (e.g., 'Class A', 'Class B', 'Class C', 'travel trailer', 'fifth wheel')",
+    },
+    "min_price": {
+        "type": "integer",
+        "description": "Minimum price filter",
+    },
+    "max_price": {
+        "type": "integer",
+        "description": "Maximum price filter",
+    },
+    "min_year": {
+        "type": "integer",
+        "description": "Minimum year filter",
+    },
+    "max_year": {
+        "type": "integer",
+        "description": "Maximum year filter",
+    },
+    "location": {
+        "type": "string",
+        "description": "Location to search near (e.g., 'California', 'Denver, CO')",
+    },
+    "near": {
+        "type": "string",
+        "description": "City and state to measure distance from (e.g., 'Denver, CO'); results are sorted nearest first",
+    },
+    "radius_miles": {
+        "type": "number",
+        "description": "Only return listings within this many miles of 'near' (default: 100)",
+    },
+    "max_results": {
+        "type": "integer",
+        "description": "Maximum number of results to return (default: 10)",
+    },
+}
+
 TOOLS = [
     {
         "name": "search_rv_listings",
         "description": "Search for RV listings from online marketplaces using Google Search. Returns a list of RV listings with details like price, year, make, model, and location.",
+        "input_schema": {
+            "type": "object",
+            "properties": _SEARCH_PROPERTIES,
+            "required": [],
+        },
+    },
+    {
+        "name": "summarize_rv_market",
+        "description": "Summarize the market for RVs matching the same filters as search_rv_listings, without returning the listings. Returns the number of matches; min, median, mean and max price; median price by model year; mileage statistics; and the cheapest and most expensive listing. Use this for questions about typical prices, price ranges or how prices vary by year.",
         "input_schema": {
             "type": "object",
             "properties": {
-                "query": {
-                    "type": "string",
-                    "description": "Search query or keyword (e.g., 'Winnebago View', 'Storyteller Overland XO')",
-                },
-                "rv_type": {
-                    "type": "string",
-                    "description": "Type of RV (e.g., 'Class A', 'Class B', 'Class C', 'travel trailer', 'fifth wheel')",
-                },
-                "min_price": {
-                    "type": "integer",
-                    "description": "Minimum price filter",
-                },
-                "max_price": {
-                    "type": "integer",
-                    "description": "Maximum price filter",
-                },
-                "min_year": {
-                    "type": "integer",
-                    "description": "Minimum year filter",
-                },
-                "max_year": {
-                    "type": "integer",
-                    "description": "Maximum year filter",
-                },
-                "location": {
-                    "type": "string",
-                    "description": "Location to search near (e.g., 'California', 'Denver, CO')",
-                },
+                **_SEARCH_PROPERTIES,
                 "max_results": {
                     "type": "integer",
-                    "description": "Maximum number of results to return (default: 10)",
+                    "description": "Maximum number of listings to summarize (default: 100)",
                 },
             },
             "required": [],
         },
-    }
+    },
 ]
 
-SYSTEM_PROMPT = """You are an RV search assistant that helps users find and analyze RV listings. You have access to a tool that can search for RV listings across the web.
+SYSTEM_PROMPT = """You are an RV search assistant that helps users find and analyze RV listings. You have access to tools that can search for RV listings across the web and summarize the market for them.
 
 When users ask about finding RVs:
 1. Use the search_rv_listings tool to find relevant listings
 2. Analyze the results and present them in a helpful format
 3. Provide insights about pricing, value, and what to look for
 
+When users ask about typical prices, price ranges or how prices vary by year, use the summarize_rv_market tool: it computes the statistics for you, so you don't need to fetch the listings.
+
 You can filter by:
 - Query terms (make, model, keywords)
 - RV type (Class A, B, C, travel trailer, fifth wheel)
@@ -71,20 +148,35 @@ You can filter by:
 Always be helpful and provide actionable information about the RV market. Include listing URLs when available so users can view the full details."""
 
 
-def process_tool_call(tool_name: str, tool_input: dict) -> str:
-    """Process a tool call and return the result."""
+# Default max_results for tool calls (the search functions default to 20)
+TOOL_MAX_RESULTS = 10
+
+# Default max_results for market summaries, which return statistics rather
+# than listings and so can cover more of them
+SUMMARY_MAX_RESULTS = 100
+
+
+def tool_search_query(tool_input: dict, max_results: int = TOOL_MAX_RESULTS) -> SearchQuery:
+    """Build the SearchQuery for a search tool call, defaulting to ``max_results``."""
+    filters = {name: tool_input.get(name) for name in _SEARCH_PROPERTIES}
+    if filters["max_results"] is None:
+        filters["max_results"] = max_results
+    try:
+        return SearchQuery(**filters)
+    except (TypeError, ValueError) as e:
+        raise SearchAPIError(f"Invalid search: {e}")
+
+
+def process_tool_call(tool_name: str, tool_input: Union[dict, SearchQuery]) -> str:
+    """Process a tool call and return the result.
+
+    ``tool_input`` is the tool's JSON input, or an already built SearchQuery.
+    """
     if tool_name == "search_rv_listings":
         try:
-            listings = search_rv_listings(
-                query=tool_input.get("query"),
-                rv_type=tool_input.get("rv_type"),
-                min_price=tool_input.get("min_price"),
-                max_price=tool_input.get("max_price"),
-                min_year=tool_input.get("min_year"),
-                max_year=tool_input.get("max_year"),
-                location=tool_input.get("location"),
-                max_results=tool_input.get("max_results", 10),
-            )
+            if not isinstance(tool_input, SearchQuery):
+                tool_input = tool_search_query(tool_input)
+            listings = search_rv_listings(tool_input)
 
             if not listings:
                 return json.dumps({
@@ -100,64 +192,978 @@ def process_tool_call(tool_name: str, tool_input: dict) -> str:
         except Exception as e:
             return json.dumps({"error": f"Unexpected error: {str(e)}"})
 
+    if tool_name == "summarize_rv_market":
+        try:
+            if not isinstance(tool_input, SearchQuery):
+                tool_input = tool_search_query(tool_input, SUMMARY_MAX_RESULTS)
+            listings = search_rv_listings(tool_input)
+
+            if not listings:
+                return json.dumps({
+                    "count": 0,
+                    "message": "No listings found matching your criteria. Try broadening your search."
+                })
+
+            return json.dumps(summarize_listings(listings))
+
+        except SearchAPIError as e:
+            return json.dumps({"error": str(e)})
+        except Exception as e:
+            return json.dumps({"error": f"Unexpected error: {str(e)}"})
+
     return json.dumps({"error": f"Unknown tool: {tool_name}"})
 
 
+# Fast path: plain structured requests like "Find me Class C RVs under
+# $100,000" are parsed locally and answered from a single search, with no
+# model calls. Anything the parser doesn't fully understand goes to the
+# model. Disable with RV_SEARCH_FAST_PATH=false.
+FAST_PATH = os.getenv("RV_SEARCH_FAST_PATH", "true").lower() not in ("0", "false", "off")
+
+# Makes the fast path recognizes, besides those in the demo catalog
+KNOWN_MAKES = (
+    "Winnebago", "Thor", "Jayco", "Coachmen", "Forest River", "Keystone", "Fleetwood",
+    "Newmar", "Tiffin", "Entegra", "Airstream", "Grand Design", "Heartland", "Dutchmen",
+    "Storyteller", "Pleasure-Way", "Roadtrek", "Unity", "Leisure Travel", "Revel",
+)
+
+# Words that carry no search criteria
+_FILLER_WORDS = frozenset([
+    "a", "all", "an", "any", "are", "available", "buy", "camper", "campers", "can", "find",
+    "for", "get", "give", "i", "i'm", "im", "list", "listing", "listings", "look", "looking",
+    "me", "motorhome", "motorhomes", "need", "please", "rv", "rvs", "search", "show", "some",
+    "the", "there", "to", "us", "used", "want", "you",
+])
+
+_TOKEN = re.compile(r"[\w'-]+")
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s?(k|m)?\b"
+_PRICE = r"\$?\s?" + _NUMBER
+_DOLLARS = r"\$\s?" + _NUMBER
+# A four digit year, not part of a price or a larger number
+_YEAR = r"(?<![\w$,.])((?:19|20)\d\d)(?![\w,])"
+_UPPER = r"(?:under|below|less than|fewer than|cheaper than|up to|at most|no more than|max|<)"
+_LOWER = r"(?:over|above|more than|at least|min|>)"
+
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000}
+
+
+def _amount(number: str, suffix: Optional[str]) -> int:
+    return int(float(number.replace(",", "")) * _MULTIPLIERS.get((suffix or "").lower(), 1))
+
+
+def _place(match: "re.Match") -> Optional[dict]:
+    """Search near a city; states, unknown places and ambiguous cities need the model."""
+    place = match.group(2).strip(" ,")
+    gazetteer = get_gazetteer()
+    if (gazetteer.is_state(place) or gazetteer.is_ambiguous(place)
+            or gazetteer.geocode(place) is None):
+        return None
+    filters = {"near": place}
+    if match.group(1):
+        filters["radius_miles"] = int(match.group(1))
+    return filters
+
+
+# (pattern, filters for a match), applied in order. Each match is cut from
+# the query before the next pattern runs, so "under 20k miles" isn't also
+# read as a price, and years aren't read as prices. A None result means the
+# match can't be handled locally.
+_CRITERIA: List[Tuple["re.Pattern", Callable[["re.Match"], Optional[dict]]]] = [
+    (r"\bfor sale\b", lambda m: {}),
+    (rf"(?:with\s+)?{_UPPER}\s+{_NUMBER}\s*(?:miles|mi)\b",
+     lambda m: {"max_mileage": _amount(m[1], m[2])}),
+    (rf"(?:with\s+)?{_LOWER}\s+{_NUMBER}\s*(?:miles|mi)\b",
+     lambda m: {"min_mileage": _amount(m[1], m[2])}),
+    (rf"(?:from\s+|between\s+)?{_YEAR}\s*(?:-|to|through|and)\s*{_YEAR}",
+     lambda m: {"min_year": int(m[1]), "max_year": int(m[2])}),
+    (rf"{_YEAR}\s*(?:\+|or newer|or later|and newer|and up)",
+     lambda m: {"min_year": int(m[1])}),
+    (rf"\b(?:newer than|after)\s+{_YEAR}", lambda m: {"min_year": int(m[1]) + 1}),
+    (rf"\b(?:since|from)\s+{_YEAR}", lambda m: {"min_year": int(m[1])}),
+    (rf"\b(?:older than|before)\s+{_YEAR}", lambda m: {"max_year": int(m[1]) - 1}),
+    (rf"{_YEAR}\s*(?:or older|and older)", lambda m: {"max_year": int(m[1])}),
+    (_YEAR, lambda m: {"min_year": int(m[1]), "max_year": int(m[1])}),
+    (rf"\bbetween\s+{_PRICE}\s+and\s+{_PRICE}",
+     lambda m: {"min_price": _amount(m[1], m[2]), "max_price": _amount(m[3], m[4])}),
+    (rf"{_DOLLARS}\s*(?:-|to)\s*{_PRICE}",
+     lambda m: {"min_price": _amount(m[1], m[2]), "max_price": _amount(m[3], m[4])}),
+    (rf"(?:\bfor\s+)?{_UPPER}\s+{_PRICE}", lambda m: {"max_price": _amount(m[1], m[2])}),
+    (rf"(?:\bfor\s+)?{_LOWER}\s+{_PRICE}", lambda m: {"min_price": _amount(m[1], m[2])}),
+    (r"\bclass\s*b\s*(?:\+|plus\b)", lambda m: {"rv_type": "Class B+"}),
+    (r"\bclass\s*a\b", lambda m: {"rv_type": "Class A"}),
+    (r"\bclass\s*b\b", lambda m: {"rv_type": "Class B"}),
+    (r"\bclass\s*c\b", lambda m: {"rv_type": "Class C"}),
+    (r"\btravel\s*trailers?\b", lambda m: {"rv_type": "Travel Trailer"}),
+    (r"\b(?:fifth|5th)\s*wheels?\b", lambda m: {"rv_type": "Fifth Wheel"}),
+    # Last, so the place runs to the end of what's left
+    (r"\b(?:within\s+(\d+)\s*(?:miles|mi)\s+of|near|around|close to|in)\s+([^\d$]+?)[\s.!?]*$",
+     _place),
+]
+_CRITERIA = [(re.compile(pattern, re.IGNORECASE), filters) for pattern, filters in _CRITERIA]
+
+
+@lru_cache(maxsize=1)
+def _vocabulary() -> Dict[str, Tuple[str, str]]:
+    """Map normalized make and model phrases to (search query, display name).
+
+    "Make Model" searches for the model, since the catalog matches a query
+    against the title, make and model separately.
+    """
+    vocabulary: Dict[str, Tuple[str, str]] = {}
+
+    def add(phrase: str, query: str) -> None:
+        key = " ".join(_TOKEN.findall(normalize_text(phrase)))
+        vocabulary.setdefault(key, (query, phrase))
+
+    for make in KNOWN_MAKES:
+        add(make, make)
+    for listing in DEMO_LISTINGS:
+        if listing.make:
+            add(listing.make, listing.make)
+        if listing.model:
+            add(listing.model, listing.model)
+            if listing.make:
+                add(f"{listing.make} {listing.model}", listing.model)
+    return vocabulary
+
+
+@dataclass(frozen=True)
+class SimpleQuery:
+    """A request the fast path can answer: its search, and how to describe it."""
+
+    search: SearchQuery
+    description: str
+
+
+def _money(amount: int) -> str:
+    return f"${amount:,}"
+
+
+def _describe(filters: dict, name: Optional[str]) -> str:
+    """Describe a search, e.g. "2024 Unity Class B+ RVs up to $150,000 near Denver, CO"."""
+    words = []
+    min_year, max_year = filters.get("min_year"), filters.get("max_year")
+    if min_year and min_year == max_year:
+        words.append(str(min_year))
+    words.extend(word for word in (name, filters.get("rv_type"), "RVs") if word)
+
+    if min_year and max_year and min_year != max_year:
+        words.append(f"from {min_year}-{max_year}")
+    elif min_year and not max_year:
+        words.append(f"{min_year} or newer")
+    elif max_year and not min_year:
+        words.append(f"{max_year} or older")
+
+    for name, unit in (("price", _money), ("mileage", lambda n: f"{n:,} miles")):
+        low, high = filters.get(f"min_{name}"), filters.get(f"max_{name}")
+        prefix = "with " if name == "mileage" else ""
+        if low and high:
+            words.append(f"{prefix}{unit(low)}-{unit(high)}")
+        elif high:
+            words.append(f"{prefix}up to {unit(high)}")
+        elif low:
+            words.append(f"{prefix}{unit(low)} or more")
+
+    if "radius_miles" in filters:
+        words.append(f"within {filters['radius_miles']} miles of {filters['near']}")
+    elif "near" in filters:
+        words.append(f"near {filters['near']}")
+    return " ".join(words)
+
+
+def _extract_criteria(text: str, strict: bool = True) -> Optional[Tuple[dict, List[str]]]:
+    """Pull the criteria out of ``text``; returns (filters, leftover words).
+
+    Strict extraction returns None for a criterion that needs the model or
+    is given twice; otherwise those are skipped, keeping the first value.
+    """
+    filters: dict = {}
+    for pattern, criteria in _CRITERIA:
+        while True:
+            match = pattern.search(text)
+            if match is None:
+                break
+            found = criteria(match)
+            if found is None or filters.keys() & found.keys():
+                if strict:
+                    return None
+                found = {k: v for k, v in (found or {}).items() if k not in filters}
+            filters.update(found)
+            text = f"{text[:match.start()]} {text[match.end():]}"
+    words = [word for word in _TOKEN.findall(normalize_text(text)) if word not in _FILLER_WORDS]
+    return filters, words
+
+
+def parse_simple_query(text: str) -> Optional[SimpleQuery]:
+    """Parse a plain structured request into a search, without the model.
+
+    Recognizes a make and/or model, RV type, price, year and mileage
+    bounds, and a city to search near. The parse is all or nothing: it
+    returns None, leaving the query to the model, if any word is left
+    unexplained (e.g. "typical", "compare", "AWD"), a criterion is given
+    twice, or nothing but filler was found.
+    """
+    extracted = _extract_criteria(text)
+    if extracted is None:
+        return None
+    filters, words = extracted
+    name = None
+    if words:
+        known = _vocabulary().get(" ".join(words))
+        if known is None:
+            return None
+        filters["query"], name = known
+    if not filters:
+        return None
+
+    try:
+        search = SearchQuery(max_results=TOOL_MAX_RESULTS, **filters)
+    except ValueError:
+        return None
+    return SimpleQuery(search, _describe(filters, name))
+
+
+def render_listings(simple: SimpleQuery, listings: List[RVListing]) -> str:
+    """Render a fast path answer from a search's listings."""
+    if not listings:
+        return f"No listings found for {simple.description}. Try broadening your search."
+    noun = "listing" if len(listings) == 1 else "listings"
+    lines = [f"Found {len(listings)} {noun} for {simple.description}:", ""]
+    for number, listing in enumerate(listings, 1):
+        lines.append(f"{number}. {listing.summary()}")
+        if listing.url:
+            lines.append(f"   {listing.url}")
+    return "\n".join(lines)
+
+
+def answer_simple_query(query: str) -> Optional[str]:
+    """Answer a plain structured request from one search, without the model.
+
+    Returns None when the query needs the model: the parser didn't fully
+    understand it, or its search failed (the agent can explain the error).
+    """
+    simple = parse_simple_query(query)
+    if simple is None:
+        AGENT_FAST_PATH.inc(outcome="fallback")
+        return None
+    try:
+        with span("agent.fast_path"):
+            listings = search_rv_listings(simple.search)
+    except SearchAPIError:
+        AGENT_FAST_PATH.inc(outcome="error")
+        return None
+    AGENT_FAST_PATH.inc(outcome="answered")
+    count("agent.fast_path")
+    return render_listings(simple, listings)
+
+
+# Speculative prefetch: when the model is needed, guess its first search
+# from the query and start it in the background, so the search runs while
+# the model decides. Off by default, since a wrong guess spends a search
+# (and, live, API quota). Enable with RV_SEARCH_SPECULATE=true.
+SPECULATE = os.getenv("RV_SEARCH_SPECULATE", "false").lower() not in ("0", "false", "off")
+
+# Questions answered from market statistics rather than listings
+_STATS_WORDS = re.compile(
+    r"\b(?:typical|average|median|market|price range|how much|worth|going rate)\b",
+    re.IGNORECASE)
+
+_SPECULATION_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rv-search-speculate")
+
+
+def _known_phrase(words: List[str]) -> Optional[str]:
+    """The search query for the longest make or model phrase in ``words``."""
+    vocabulary = _vocabulary()
+    for size in range(len(words), 0, -1):
+        for start in range(len(words) - size + 1):
+            known = vocabulary.get(" ".join(words[start:start + size]))
+            if known is not None:
+                return known[0]
+    return None
+
+
+def guess_tool_call(text: str) -> Optional[Tuple[str, SearchQuery]]:
+    """Guess the tool call the model will make first for ``text``.
+
+    A lenient ``parse_simple_query``: criteria that need the model are
+    skipped, unexplained words are ignored, and the longest make or model
+    phrase becomes the query. Questions about prices ("typical", "average",
+    ...) guess ``summarize_rv_market``. Returns (tool name, search), or None
+    if nothing searchable was found.
+    """
+    filters, words = _extract_criteria(text, strict=False)
+    phrase = _known_phrase(words)
+    if phrase is not None:
+        filters["query"] = phrase
+    if not filters:
+        return None
+    if _STATS_WORDS.search(text):
+        tool, max_results = "summarize_rv_market", SUMMARY_MAX_RESULTS
+    else:
+        tool, max_results = "search_rv_listings", TOOL_MAX_RESULTS
+    try:
+        return tool, SearchQuery(max_results=max_results, **filters)
+    except ValueError:
+        return None
+
+
+class Prefetch:
+    """A tool call started before the model asks for it.
+
+    ``handle`` is a tool handler: a call for the same tool and search is
+    served from the prefetched result, waiting for it if it's still
+    running; anything else runs as usual. ``saved`` is the search time
+    hidden behind the model call.
+    """
+
+    def __init__(self, tool: str, search: SearchQuery):
+        self.tool = tool
+        self.search = search
+        self.hits = 0
+        self.saved = 0.0
+        self._started = time.perf_counter()
+        self._duration = 0.0
+        # Run in a copy of the caller's context so the search's spans reach its trace
+        self._future: Future = _SPECULATION_POOL.submit(contextvars.copy_context().run,
+                                                        self._run)
+
+    @classmethod
+    def start(cls, query: str) -> Optional["Prefetch"]:
+        """Start the guessed tool call for ``query``, or return None if there's no guess."""
+        guess = guess_tool_call(query)
+        if guess is None:
+            AGENT_SPECULATION.inc(outcome="none")
+            return None
+        return cls(*guess)
+
+    def _run(self) -> str:
+        with span("agent.speculate", tool=self.tool):
+            result = process_tool_call(self.tool, self.search)
+        self._duration = time.perf_counter() - self._started
+        return result
+
+    def matches(self, tool_name: str, tool_input: dict) -> bool:
+        if tool_name != self.tool:
+            return False
+        default = SUMMARY_MAX_RESULTS if tool_name == "summarize_rv_market" else TOOL_MAX_RESULTS
+        try:
+            return tool_search_query(tool_input, default) == self.search
+        except SearchAPIError:
+            return False
+
+    def handle(self, tool_name: str, tool_input: dict) -> str:
+        """Serve a tool call from the prefetch if it matches, else run it."""
+        if not self.matches(tool_name, tool_input):
+            return process_tool_call(tool_name, tool_input)
+        waited = time.perf_counter()
+        result = self._future.result()
+        waited = time.perf_counter() - waited
+        if not self.hits:
+            self.saved = max(0.0, self._duration - waited)
+            AGENT_SPECULATION_SAVED.inc(self.saved)
+        self.hits += 1
+        count("agent.speculation_hits")
+        return result
+
+    def finish(self) -> None:
+        """Count the run's outcome: whether the prefetch was used."""
+        AGENT_SPECULATION.inc(outcome="hit" if self.hits else "miss")
+
+
+@dataclass
+class TurnUsage:
+    """One model call: its turn kind, model, latency and token counts."""
+
+    turn: int
+    kind: str
+    model: str
+    max_tokens: int
+    latency: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    stop_reason: Optional[str] = None
+
+
+@dataclass
+class AgentUsage:
+    """Token usage of agent runs, summed over their model calls.
+
+    ``input_tokens`` counts only uncached input; cached prefix tokens are
+    in ``cache_read_input_tokens`` (read) and ``cache_creation_input_tokens``
+    (written). ``turns`` has a TurnUsage per model call, and ``runs`` a
+    BudgetUsage per run that called the model.
+    """
+
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    turns: List[TurnUsage] = field(default_factory=list)
+    runs: List["BudgetUsage"] = field(default_factory=list)
+
+    def add(self, usage) -> None:
+        """Add the ``usage`` of one model response (None if it had none)."""
+        self.llm_calls += 1
+        for _, name in TOKEN_KINDS:
+            setattr(self, name, getattr(self, name) + (getattr(usage, name, 0) or 0))
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of input tokens read from the prompt cache."""
+        total = self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+        return self.cache_read_input_tokens / total if total else 0.0
+
+
+@dataclass(frozen=True)
+class ModelRouting:
+    """The model and output budget for each kind of turn.
+
+    A "tool" turn answers a user message that looks like a search (one
+    ``guess_tool_call`` finds criteria in): it usually only picks a tool
+    and its arguments, so it gets ``tool_model`` and ``tool_max_tokens``.
+    An "answer" turn follows tool results, or answers a message that
+    doesn't look like a search (a general question, or a session follow-up
+    about earlier results), and writes the analysis (or calls a tool) with
+    ``answer_model`` and ``answer_max_tokens``. When a tool turn answers
+    anyway instead of calling a tool, that response is discarded and the
+    turn re-issued as an answer turn, so answers always come from the
+    answer model; the discarded call counts toward the budget's tokens and
+    time but not its turns. Each model has its own prompt cache, so routing
+    trades some cache reads for faster, cheaper tool turns. Set both
+    models to MODEL to disable routing.
+    """
+
+    tool_model: str = TOOL_MODEL
+    answer_model: str = MODEL
+    tool_max_tokens: int = TOOL_MAX_TOKENS
+    answer_max_tokens: int = MAX_TOKENS
+
+    @classmethod
+    def from_env(cls) -> "ModelRouting":
+        """Configure from RV_SEARCH_TOOL_MODEL, RV_SEARCH_ANSWER_MODEL,
+        RV_SEARCH_TOOL_MAX_TOKENS and RV_SEARCH_ANSWER_MAX_TOKENS."""
+        return cls(
+            tool_model=os.getenv("RV_SEARCH_TOOL_MODEL", TOOL_MODEL),
+            answer_model=os.getenv("RV_SEARCH_ANSWER_MODEL", MODEL),
+            tool_max_tokens=int(os.getenv("RV_SEARCH_TOOL_MAX_TOKENS", TOOL_MAX_TOKENS)),
+            answer_max_tokens=int(os.getenv("RV_SEARCH_ANSWER_MAX_TOKENS", MAX_TOKENS)),
+        )
+
+    def route(self, messages: List[dict], answer: bool = False) -> Tuple[str, str, int]:
+        """Return (turn kind, model, max_tokens) for the next call.
+
+        ``answer`` forces an answer turn, for re-issuing a tool turn.
+        """
+        if answer or _has_tool_results(messages) or not _looks_like_search(messages):
+            return "answer", self.answer_model, self.answer_max_tokens
+        return "tool", self.tool_model, self.tool_max_tokens
+
+    def reissue(self, kind: str, response) -> bool:
+        """Whether a response must be re-issued to the answer model: a tool
+        turn that answered (or ran out of tokens) without calling a tool."""
+        return (kind == "tool" and self.tool_model != self.answer_model
+                and getattr(response, "stop_reason", None) != "tool_use")
+
+
+# Routing used by agent runs that don't pass their own
+ROUTING = ModelRouting.from_env()
+
+
+def _has_tool_results(messages: List[dict]) -> bool:
+    return any(block.get("type") == "tool_result" for block in messages[-1]["content"])
+
+
+def _looks_like_search(messages: List[dict]) -> bool:
+    text = " ".join(block["text"] for block in messages[-1]["content"]
+                    if block.get("type") == "text")
+    return guess_tool_call(text) is not None
+
+
+@dataclass(frozen=True)
+class AgentBudget:
+    """Limits on one agent run, enforced by the tool loop.
+
+    Input tokens include cache reads and writes. Before each call that
+    follows tool results, the loop checks whether that call could take the
+    run past a limit: the turn or tool call count, the deadline (assuming
+    the call takes as long as the previous one), input tokens (the previous
+    call's input plus the new tool result) or output tokens (the call's
+    max_tokens). If so, the call becomes a wrap-up: tools are turned off
+    (``tool_choice`` none), max_tokens is capped at the output left, and the
+    model is told to answer from the results it has. The deadline can
+    therefore be overrun by one model call.
+    """
+
+    max_turns: int = 10
+    deadline: float = 120.0
+    max_input_tokens: int = 500_000
+    max_output_tokens: int = 20_000
+    max_tool_calls: int = 8
+
+    def __post_init__(self):
+        if self.max_turns < 2:
+            raise ValueError("max_turns must be at least 2, to leave a turn for the answer")
+
+    @classmethod
+    def from_env(cls) -> "AgentBudget":
+        """Configure from RV_SEARCH_AGENT_MAX_TURNS, RV_SEARCH_AGENT_DEADLINE,
+        RV_SEARCH_AGENT_MAX_INPUT_TOKENS, RV_SEARCH_AGENT_MAX_OUTPUT_TOKENS
+        and RV_SEARCH_AGENT_MAX_TOOL_CALLS."""
+        return cls(
+            max_turns=int(os.getenv("RV_SEARCH_AGENT_MAX_TURNS", cls.max_turns)),
+            deadline=float(os.getenv("RV_SEARCH_AGENT_DEADLINE", cls.deadline)),
+            max_input_tokens=int(os.getenv("RV_SEARCH_AGENT_MAX_INPUT_TOKENS",
+                                           cls.max_input_tokens)),
+            max_output_tokens=int(os.getenv("RV_SEARCH_AGENT_MAX_OUTPUT_TOKENS",
+                                            cls.max_output_tokens)),
+            max_tool_calls=int(os.getenv("RV_SEARCH_AGENT_MAX_TOOL_CALLS", cls.max_tool_calls)),
+        )
+
+
+# Budget used by agent runs that don't pass their own
+BUDGET = AgentBudget.from_env()
+
+# What the wrap-up note calls each limit
+_LIMIT_NAMES = {
+    "turns": "turn",
+    "tool_calls": "tool call",
+    "deadline": "time",
+    "input_tokens": "input token",
+    "output_tokens": "output token",
+}
+
+
+@dataclass
+class BudgetUsage:
+    """What one agent run used of its AgentBudget.
+
+    ``wrap_up`` names the limit that cut the run short ("turns",
+    "tool_calls", "deadline", "input_tokens" or "output_tokens"), or is None
+    if the model finished on its own.
+    """
+
+    turns: int = 0
+    tool_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    elapsed: float = 0.0
+    wrap_up: Optional[str] = None
+
+    def used(self, budget: AgentBudget) -> Dict[str, float]:
+        """Fraction of each limit used."""
+        return {
+            "turns": self.turns / budget.max_turns,
+            "tool_calls": self.tool_calls / budget.max_tool_calls if budget.max_tool_calls else 1.0,
+            "deadline": self.elapsed / budget.deadline,
+            "input_tokens": self.input_tokens / budget.max_input_tokens,
+            "output_tokens": self.output_tokens / budget.max_output_tokens,
+        }
+
+
+class _Governor:
+    """Enforces an AgentBudget on one run, recording into a BudgetUsage."""
+
+    def __init__(self, budget: Optional[AgentBudget], usage: AgentUsage):
+        self.budget = budget or BUDGET
+        self.spent = BudgetUsage()
+        self.start = time.perf_counter()
+        self.last_latency = 0.0
+        self.last_input_tokens = 0
+        usage.runs.append(self.spent)
+
+    @property
+    def done(self) -> bool:
+        """Whether the wrap-up call has been made, or is being made."""
+        return self.spent.wrap_up is not None
+
+    def call_tool(self, block, handler: Callable[[str, dict], str] = process_tool_call) -> str:
+        """Run a tool call, or refuse it if the tool call budget is used up."""
+        if self.spent.tool_calls >= self.budget.max_tool_calls:
+            return json.dumps({"error": "Not run: this request's tool call budget is used up"})
+        self.spent.tool_calls += 1
+        return _call_tool(block, handler)
+
+    def _limit_reached(self, messages: List[dict], max_tokens: int) -> Optional[str]:
+        budget, spent = self.budget, self.spent
+        new_input = sum(len(str(block.get("content", ""))) // 4
+                        for block in messages[-1]["content"])
+        if spent.turns + 1 >= budget.max_turns:
+            return "turns"
+        if spent.tool_calls >= budget.max_tool_calls:
+            return "tool_calls"
+        if time.perf_counter() - self.start + self.last_latency > budget.deadline:
+            return "deadline"
+        if spent.input_tokens + self.last_input_tokens + new_input > budget.max_input_tokens:
+            return "input_tokens"
+        if spent.output_tokens + max_tokens > budget.max_output_tokens:
+            return "output_tokens"
+        return None
+
+    def before_call(self, messages: List[dict], max_tokens: int) -> dict:
+        """Check the budget before a call; returns request overrides.
+
+        Only calls that follow tool results are checked. For a wrap-up, a
+        note is added to the newest message.
+        """
+        if self.done or not _has_tool_results(messages):
+            return {}
+        limit = self._limit_reached(messages, max_tokens)
+        if limit is None:
+            return {}
+        self.spent.wrap_up = limit
+        AGENT_BUDGET_WRAP_UPS.inc(limit=limit)
+        count("agent.wrap_ups")
+        messages[-1]["content"].append({
+            "type": "text",
+            "text": f"This request's {_LIMIT_NAMES[limit]} budget is nearly used up. "
+                    "Don't call any more tools: answer now from the results above, and "
+                    "say if they may be incomplete.",
+        })
+        left = self.budget.max_output_tokens - self.spent.output_tokens
+        return {"tool_choice": {"type": "none"}, "max_tokens": max(1, min(max_tokens, left))}
+
+    def after_call(self, turn: TurnUsage, counts_turn: bool = True) -> None:
+        spent = self.spent
+        self.last_latency = turn.latency
+        self.last_input_tokens = (turn.input_tokens + turn.cache_creation_input_tokens
+                                  + turn.cache_read_input_tokens)
+        spent.turns += counts_turn
+        spent.input_tokens += self.last_input_tokens
+        spent.output_tokens += turn.output_tokens
+        spent.elapsed = time.perf_counter() - self.start
+
+
+def _cached_system() -> List[dict]:
+    return [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": CACHE_CONTROL}]
+
+
+def _cached_tools(tools: List[dict] = TOOLS) -> List[dict]:
+    return tools[:-1] + [{**tools[-1], "cache_control": CACHE_CONTROL}]
+
+
+def _with_breakpoint(messages: List[dict]) -> List[dict]:
+    """Return messages with a cache breakpoint on the newest one's last block.
+
+    The stored history isn't modified, so earlier breakpoints don't pile up
+    and each request's prefix is byte-identical to the previous request.
+    The newest message is always the user's: the query or tool results.
+    """
+    last = messages[-1]
+    content = last["content"][:-1] + [{**last["content"][-1], "cache_control": CACHE_CONTROL}]
+    return messages[:-1] + [{**last, "content": content}]
+
+
+def _request(messages: List[dict], tools: List[dict], model: str, max_tokens: int) -> dict:
+    """Keyword arguments of a model call, with cache breakpoints."""
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": _cached_system(),
+        "tools": _cached_tools(tools),
+        "messages": _with_breakpoint(messages),
+    }
+
+
+def _record_usage(response, usage: AgentUsage, turn: TurnUsage) -> None:
+    AGENT_LLM_CALLS.inc()
+    AGENT_LLM_LATENCY.observe(turn.latency, model=turn.model, turn=turn.kind)
+    response_usage = getattr(response, "usage", None)
+    usage.add(response_usage)
+    for kind, name in TOKEN_KINDS:
+        tokens = getattr(response_usage, name, 0) or 0
+        setattr(turn, name, tokens)
+        if tokens:
+            AGENT_TOKENS.inc(tokens, kind=kind)
+            count(f"agent.tokens.{kind}", tokens)
+    turn.stop_reason = getattr(response, "stop_reason", None)
+    usage.turns.append(turn)
+
+
+def _prepare(messages: List[dict], tools: List[dict], routing: Optional[ModelRouting],
+             governor: Optional[_Governor], answer: bool = False) -> Tuple[str, dict]:
+    """Route the next call and build its request, applying the budget."""
+    kind, model, max_tokens = (routing or ROUTING).route(messages, answer)
+    overrides = governor.before_call(messages, max_tokens) if governor is not None else {}
+    return kind, {**_request(messages, tools, model, max_tokens), **overrides}
+
+
+def _finish_call(response, usage: AgentUsage, turn: int, kind: str, request: dict,
+                 latency: float, governor: Optional[_Governor], reissued: bool = False) -> None:
+    turn_usage = TurnUsage(turn, kind, request["model"], request["max_tokens"], latency)
+    _record_usage(response, usage, turn_usage)
+    if governor is not None:
+        governor.after_call(turn_usage, counts_turn=not reissued)
+
+
+def _create_message(client, messages: List[dict], turn: int, usage: AgentUsage,
+                    tools: List[dict] = TOOLS, routing: Optional[ModelRouting] = None,
+                    governor: Optional[_Governor] = None):
+    """Make one model call with cache breakpoints, recording its usage.
+
+    A tool turn that answered is re-issued to the answer model.
+    """
+    kind, request = _prepare(messages, tools, routing, governor)
+    while True:
+        start = time.perf_counter()
+        with span("agent.llm", turn=turn, kind=kind, model=request["model"]):
+            response = client.messages.create(**request)
+        reissue = (routing or ROUTING).reissue(kind, response)
+        _finish_call(response, usage, turn, kind, request, time.perf_counter() - start,
+                     governor, reissue)
+        if not reissue:
+            return response
+        count("agent.reissued_turns")
+        kind, request = _prepare(messages, tools, routing, governor, answer=True)
+
+
+def _call_tool(block, handler: Callable[[str, dict], str] = process_tool_call) -> str:
+    """Run a tool_use block's tool with ``handler``, recording the call."""
+    with span("agent.tool", tool=block.name):
+        tool_result = handler(block.name, block.input)
+    count("agent.tool_calls")
+    AGENT_TOOL_CALLS.inc(tool=block.name)
+    return tool_result
+
+
+def _add_tool_result(messages: List[dict], content: list, block, tool_result: str) -> None:
+    """Append the model's tool call (its response ``content``) and the result."""
+    messages.append({"role": "assistant", "content": content})
+    messages.append({
+        "role": "user",
+        "content": [
+            {
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": tool_result,
+            }
+        ],
+    })
+
+
+def _tool_use(response):
+    return next(block for block in response.content if block.type == "tool_use")
+
+
+def _first_message(query: str) -> dict:
+    # Content as blocks, so the message reads the same with or without a
+    # breakpoint
+    return {"role": "user", "content": [{"type": "text", "text": query}]}
+
+
+def _answer(response, turns: int) -> str:
+    count("agent.turns", turns)
+    text_blocks = [block.text for block in response.content if hasattr(block, "text")]
+    return "\n".join(text_blocks)
+
+
 def create_agent():
     """Create and return an Anthropic client for the agent."""
     return anthropic.Anthropic()
 
 
-def run_agent(query: str) -> str:
+def run_agent(
+    query: str,
+    usage: Optional[AgentUsage] = None,
+    fast_path: Optional[bool] = None,
+    routing: Optional[ModelRouting] = None,
+    budget: Optional[AgentBudget] = None,
+    speculate: Optional[bool] = None,
+) -> str:
     """
     Run the RV search agent with the given query.
 
+    Plain structured requests are answered by the local fast path without
+    calling the model (see ``parse_simple_query``). Otherwise the system
+    prompt, tool schema and conversation so far are marked for prompt
+    caching, so each model call after the first reads its prefix from the
+    cache. The tool loop is bounded by ``budget``: when a limit is near, the
+    model is asked to answer from the results it has.
+
     Args:
         query: The user's search query about RVs
+        usage: Add the run's token usage, including cache reads and writes,
+            to this AgentUsage
+        fast_path: Try the local fast path first (default: FAST_PATH, from
+            RV_SEARCH_FAST_PATH)
+        routing: Models and max_tokens per turn kind (default: ROUTING,
+            from the environment; see ModelRouting)
+        budget: Limits on turns, time, tokens and tool calls (default:
+            BUDGET, from the environment). What the run used is appended to
+            ``usage.runs``
+        speculate: Start the likely first search while the model decides
+            (default: SPECULATE, from RV_SEARCH_SPECULATE; see Prefetch)
 
     Returns:
         The agent's response
     """
-    client = create_agent()
-    messages = [{"role": "user", "content": query}]
+    if usage is None:
+        usage = AgentUsage()
+    if fast_path is None:
+        fast_path = FAST_PATH
+    if speculate is None:
+        speculate = SPECULATE
+    with track(AGENT_RUNS, AGENT_LATENCY):
+        if fast_path:
+            answer = answer_simple_query(query)
+            if answer is not None:
+                return answer
 
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=4096,
-        system=SYSTEM_PROMPT,
-        tools=TOOLS,
-        messages=messages,
-    )
+        prefetch = Prefetch.start(query) if speculate else None
+        handler = prefetch.handle if prefetch is not None else process_tool_call
+        client = create_agent()
+        messages = [_first_message(query)]
+        governor = _Governor(budget, usage)
 
-    while response.stop_reason == "tool_use":
-        tool_use_block = next(
-            block for block in response.content if block.type == "tool_use"
-        )
+        try:
+            response = _create_message(client, messages, 1, usage, routing=routing,
+                                       governor=governor)
+            turns = 1
 
-        tool_result = process_tool_call(tool_use_block.name, tool_use_block.input)
-
-        messages.append({"role": "assistant", "content": response.content})
-        messages.append({
-            "role": "user",
-            "content": [
-                {
-                    "type": "tool_result",
-                    "tool_use_id": tool_use_block.id,
-                    "content": tool_result,
-                }
-            ],
-        })
+            while response.stop_reason == "tool_use" and not governor.done:
+                block = _tool_use(response)
+                tool_result = governor.call_tool(block, handler)
+                _add_tool_result(messages, response.content, block, tool_result)
+                turns += 1
+                response = _create_message(client, messages, turns, usage, routing=routing,
+                                           governor=governor)
+        finally:
+            if prefetch is not None:
+                prefetch.finish()
 
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4096,
-            system=SYSTEM_PROMPT,
-            tools=TOOLS,
-            messages=messages,
-        )
+        return _answer(response, turns)
 
-    text_blocks = [block.text for block in response.content if hasattr(block, "text")]
-    return "\n".join(text_blocks)
+
+# Concurrent model calls allowed across all arun_agent conversations in a
+# process (RV_SEARCH_AGENT_CONCURRENCY)
+AGENT_CONCURRENCY = int(os.getenv("RV_SEARCH_AGENT_CONCURRENCY", "64"))
+
+
+class AgentLimiter:
+    """Bounds concurrent model calls across async agent conversations.
+
+    Use as ``async with limiter:``. asyncio semaphores belong to one event
+    loop, so the limiter keeps one per running loop.
+    """
+
+    def __init__(self, limit: int = AGENT_CONCURRENCY):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    async def __aenter__(self) -> None:
+        await self._semaphore().acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore().release()
+
+
+# Shared by every arun_agent call that doesn't pass its own limiter
+AGENT_LIMITER = AgentLimiter()
+
+
+async def _acreate_message(client, messages: List[dict], turn: int, usage: AgentUsage,
+                           limiter: AgentLimiter, routing: Optional[ModelRouting] = None,
+                           governor: Optional[_Governor] = None):
+    """Async ``_create_message``, waiting for a slot from ``limiter``."""
+    kind, request = _prepare(messages, TOOLS, routing, governor)
+    while True:
+        async with limiter:
+            start = time.perf_counter()
+            with span("agent.llm", turn=turn, kind=kind, model=request["model"]):
+                response = await client.messages.create(**request)
+        reissue = (routing or ROUTING).reissue(kind, response)
+        _finish_call(response, usage, turn, kind, request, time.perf_counter() - start,
+                     governor, reissue)
+        if not reissue:
+            return response
+        count("agent.reissued_turns")
+        kind, request = _prepare(messages, TOOLS, routing, governor, answer=True)
+
+
+def create_async_agent():
+    """Create and return an async Anthropic client for the agent."""
+    return anthropic.AsyncAnthropic()
+
+
+async def arun_agent(
+    query: str,
+    usage: Optional[AgentUsage] = None,
+    fast_path: Optional[bool] = None,
+    limiter: Optional[AgentLimiter] = None,
+    routing: Optional[ModelRouting] = None,
+    budget: Optional[AgentBudget] = None,
+    speculate: Optional[bool] = None,
+) -> str:
+    """
+    Async ``run_agent``, for serving many conversations from one event loop.
+
+    Model calls go through ``AsyncAnthropic`` and, across all conversations
+    sharing ``limiter``, at most ``limiter.limit`` are in flight at once.
+    Searches, including the fast path's, run in the default thread pool so
+    live HTTP doesn't block the loop.
+
+    Args:
+        query: The user's search query about RVs
+        usage: Add the run's token usage to this AgentUsage
+        fast_path: Try the local fast path first (default: FAST_PATH)
+        limiter: Concurrency limiter for model calls (default: AGENT_LIMITER,
+            sized by RV_SEARCH_AGENT_CONCURRENCY)
+        routing: Models and max_tokens per turn kind (default: ROUTING)
+        budget: Limits on the run (default: BUDGET); see ``run_agent``
+        speculate: Prefetch the likely first search (default: SPECULATE)
+
+    Returns:
+        The agent's response
+    """
+    if usage is None:
+        usage = AgentUsage()
+    if fast_path is None:
+        fast_path = FAST_PATH
+    if limiter is None:
+        limiter = AGENT_LIMITER
+    if speculate is None:
+        speculate = SPECULATE
+    with track(AGENT_RUNS, AGENT_LATENCY):
+        if fast_path:
+            answer = await asyncio.to_thread(answer_simple_query, query)
+            if answer is not None:
+                return answer
+
+        prefetch = Prefetch.start(query) if speculate else None
+        handler = prefetch.handle if prefetch is not None else process_tool_call
+        client = create_async_agent()
+        messages = [_first_message(query)]
+        governor = _Governor(budget, usage)
+
+        try:
+            response = await _acreate_message(client, messages, 1, usage, limiter, routing,
+                                              governor)
+            turns = 1
+
+            while response.stop_reason == "tool_use" and not governor.done:
+                block = _tool_use(response)
+                tool_result = await asyncio.to_thread(governor.call_tool, block, handler)
+                _add_tool_result(messages, response.content, block, tool_result)
+                turns += 1
+                response = await _acreate_message(client, messages, turns, usage, limiter,
+                                                  routing, governor)
+        finally:
+            if prefetch is not None:
+                prefetch.finish()
+
+        return _answer(response, turns)
 
 
 if __name__ == "__main__":
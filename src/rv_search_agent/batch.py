@@ -0,0 +1,337 @@
+"""Run many searches in one call.
+
+Saved-search jobs used to call ``search_rv_listings`` in a loop, scanning
+the catalog (or hitting the network) once per search. A batch instead:
+
+- answers duplicate searches and cached searches without any work,
+- evaluates demo searches together (see ``planner.execute_batch``), and
+- in live and Craigslist mode, sends each distinct upstream request once
+  and runs them concurrently, streaming a search's results as soon as its
+  last request completes.
+
+    results = search_rv_listings_batch([
+        {"query": "Unity", "max_price": 150000},
+        {"query": "Storyteller", "rv_type": "Class B"},
+    ])
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import sys
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import httpx
+
+from . import quota, search_api
+from .cache import SEARCH_CACHE
+from .models import RVListing, SearchQuery
+from .planner import execute_batch
+from .replay import http_client
+from .search_api import (
+    CRAIGSLIST_HEADERS,
+    CRAIGSLIST_REQUESTS,
+    SERPER_SITES,
+    QuotaExhausted,
+    SearchAPIError,
+    _craigslist_feed_url,
+    _fetch_craigslist,
+    _fetch_serper,
+    _filter_serper_results,
+    _parse_craigslist,
+    _resolve_origin,
+    _serper_api_key,
+    _serper_query,
+)
+from .tracing import count, span
+
+# Filters accepted per mode; the names match search_rv_listings and
+# search_rv_listings_live.
+SEARCH_FILTERS = (
+    "query", "rv_type", "min_price", "max_price", "min_year", "max_year",
+    "min_mileage", "max_mileage", "location", "source", "max_results",
+    "near", "radius_miles",
+)
+LIVE_FILTERS = (
+    "query", "rv_type", "min_price", "max_price", "min_year", "max_year",
+    "location", "max_results",
+)
+
+# Concurrent upstream requests in live and Craigslist mode
+DEFAULT_MAX_WORKERS = 8
+
+Item = Tuple[Hashable, SearchQuery]
+
+
+def _normalize(queries: Iterable[Union[dict, SearchQuery]],
+               allowed: Tuple[str, ...]) -> List[SearchQuery]:
+    """Validate filter dicts into SearchQuerys."""
+    normalized = []
+    for i, filters in enumerate(queries):
+        if isinstance(filters, SearchQuery):
+            normalized.append(filters)
+            continue
+        if not isinstance(filters, dict):
+            raise SearchAPIError(f"Query {i}: expected a dict of filters, got {filters!r}")
+        unknown = sorted(set(filters) - set(allowed))
+        if unknown:
+            raise SearchAPIError(f"Query {i}: unknown filter(s): {', '.join(unknown)}")
+        try:
+            normalized.append(SearchQuery(**filters))
+        except (TypeError, ValueError) as e:
+            raise SearchAPIError(f"Query {i}: {e}")
+    return normalized
+
+
+def _submit(pool: Executor, fn: Callable, *args) -> Future:
+    # Run in a copy of the caller's context so spans reach the active trace
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _batch_demo(items: List[Item]) -> List[Tuple[Hashable, List[RVListing]]]:
+    catalog = search_api.DEMO_CATALOG
+    plans = []
+    limits = []
+    with span("batch.plan", queries=len(items)):
+        for _, search in items:
+            limits.append(search.max_results)
+            origin, radius_miles = _resolve_origin(catalog, search.near, search.radius_miles)
+            plans.append(search.plan(catalog, origin, radius_miles))
+    with span("batch.execute", queries=len(items)):
+        execute_batch(plans, limits)
+    count("search.rows_examined", sum(plan.rows_examined for plan in plans))
+    return [(key, plan.results) for (key, _), plan in zip(items, plans)]
+
+
+def _batch_serper(items: List[Item], max_workers: int,
+                  failed: set) -> Iterator[Tuple[Hashable, List[RVListing]]]:
+    api_key = _serper_api_key()
+
+    # Searches differing only in price or max_year share their requests.
+    # Requests run concurrently, so each search queries all the sites it is
+    # scheduled for rather than stopping once it has max_results. A search
+    # with a failed request yields the other sites' results, and its key is
+    # added to ``failed``.
+    #
+    # As for a single search, only the calls above the quota's reserve are
+    # made: past that budget a search keeps only requests already planned,
+    # plus its best site.
+    ledger = quota.SERPER_QUOTA
+    budget = max(1, ledger.remaining(api_key) - ledger.reserve) if ledger.active else None
+    schedules: Dict[Tuple[str, str], List[str]] = {}
+    requests: Dict[Tuple[str, str, int], List[int]] = {}
+    segments: Dict[Tuple[str, str, int], Tuple[str, str]] = {}
+    needs = []
+    for position, (_, search) in enumerate(items):
+        search_query = _serper_query(search.query, search.rv_type, search.min_year, search.location)
+        num = min(search.max_results, 10)
+        segment = quota.yield_segment(search.query, search.rv_type)
+        if segment not in schedules:
+            schedules[segment] = (ledger.schedule(SERPER_SITES, segment)
+                                  or ledger.order_sites(SERPER_SITES)[:1])
+        keys = []
+        for rank, site in enumerate(schedules[segment][:budget]):
+            key = (site, search_query, num)
+            if key not in requests:
+                if rank and budget is not None and len(requests) >= budget:
+                    continue
+                requests[key] = []
+                segments[key] = segment
+            requests[key].append(position)
+            keys.append(key)
+        needs.append(keys)
+    count("batch.upstream_requests", len(requests))
+    count("serper.sites_skipped",
+          sum(len(SERPER_SITES) - len(keys) for keys in needs))
+
+    # Each response is filtered for every search sharing it when it arrives,
+    # so its yield is recorded once: the listings kept by any of them
+    filtered: Dict[Tuple[Tuple[str, str, int], int], List[RVListing]] = {}
+    remaining = [len(keys) for keys in needs]
+    with http_client(timeout=30) as client, ThreadPoolExecutor(max_workers) as pool:
+        futures = {
+            _submit(pool, _fetch_serper, client, api_key, site, search_query, num):
+                (site, search_query, num)
+            for site, search_query, num in requests
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            site = key[0]
+            try:
+                organic = future.result()
+            except (httpx.HTTPError, QuotaExhausted) as e:
+                # Continue with other sites if one fails
+                count(f"serper.{site}.errors")
+                print(f"Warning: Failed to search {site}: {e}", file=sys.stderr)
+                organic = None
+
+            if organic is not None:
+                kept = set()
+                for position in requests[key]:
+                    search = items[position][1]
+                    listings = filtered[key, position] = _filter_serper_results(
+                        organic, site, search.min_price, search.max_price,
+                        search.min_year, search.max_year, record=False,
+                    )
+                    kept.update(listing.url for listing in listings)
+                ledger.record_yield(site, len(organic), len(kept), segments[key])
+
+            for position in requests[key]:
+                remaining[position] -= 1
+                if remaining[position]:
+                    continue
+                cache_key, search = items[position]
+                listings = []
+                for needed in needs[position]:
+                    if (needed, position) in filtered:
+                        listings.extend(filtered.pop((needed, position)))
+                    else:
+                        failed.add(cache_key)
+                yield cache_key, listings[:search.max_results]
+
+
+def _batch_craigslist(items: List[Item], max_workers: int,
+                      failed: set) -> Iterator[Tuple[Hashable, List[RVListing]]]:
+    # max_year and max_results are applied after the fetch, so searches that
+    # differ only in those share a feed. A feed that fails yields no results
+    # for its searches, whose keys are added to ``failed``.
+    feeds: Dict[Tuple[str, str], List[int]] = {}
+    for position, (_, search) in enumerate(items):
+        feed = _craigslist_feed_url(
+            search.query, search.rv_type, search.min_price, search.max_price,
+            search.min_year, search.location or search.near,
+        )
+        feeds.setdefault(feed, []).append(position)
+    count("batch.upstream_requests", len(feeds))
+
+    with http_client(timeout=30, follow_redirects=True, headers=CRAIGSLIST_HEADERS) as client, \
+            ThreadPoolExecutor(max_workers) as pool:
+        futures = {
+            _submit(pool, _fetch_craigslist, client, region, url): (region, url)
+            for region, url in feeds
+        }
+        for future in as_completed(futures):
+            region, url = futures[future]
+            positions = feeds[(region, url)]
+            try:
+                xml_content = future.result()
+                results = []
+                for position in positions:
+                    search = items[position][1]
+                    results.append(_parse_craigslist(
+                        region, xml_content, search.max_results, search.min_year, search.max_year,
+                    ))
+            except SearchAPIError as e:
+                # Continue with other feeds if one fails
+                count(f"craigslist.{region}.errors")
+                print(f"Warning: Failed to search Craigslist {region}: {e}", file=sys.stderr)
+                results = [[] for _ in positions]
+                failed.update(items[position][0] for position in positions)
+            else:
+                CRAIGSLIST_REQUESTS.inc(region=region, outcome="ok")
+            for position, listings in zip(positions, results):
+                yield items[position][0], listings
+
+
+def iter_rv_listings_batch(
+    queries: Iterable[Union[dict, SearchQuery]],
+    live: bool = False,
+    demo_mode: Optional[bool] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Iterator[Tuple[int, List[RVListing]]]:
+    """
+    Run a batch of searches, yielding ``(index, listings)`` as each completes.
+
+    Args:
+        queries: SearchQuerys, or filter dicts using the keyword arguments
+            of ``search_rv_listings`` (or ``search_rv_listings_live`` when
+            ``live`` is set); ``max_results`` defaults to 20
+        live: Search live listings via the Serper API
+        demo_mode: Force demo mode on/off (default: auto-detect)
+        max_workers: Concurrent upstream requests in live/Craigslist mode
+
+    Cached and duplicate searches are yielded first; the rest in completion
+    order. Results are stored in the shared result cache under the same keys
+    as single searches. A live batch runs against Craigslist instead once
+    the Serper quota is down to its reserve. An upstream request that fails
+    is reported on stderr, and its searches' results aren't cached: in
+    Craigslist mode they are empty, in live mode they come from the other
+    sites.
+    """
+    if live:
+        mode = "serper"
+        queries = _normalize(queries, LIVE_FILTERS)
+        if quota.SERPER_QUOTA.near_exhaustion(_serper_api_key()):
+            count("serper.degraded.craigslist")
+            print("Warning: Serper quota nearly used up for this month; "
+                  "searching Craigslist instead", file=sys.stderr)
+            mode = "craigslist"
+    else:
+        if demo_mode is None:
+            demo_mode = os.getenv("DEMO_MODE", "true").lower() != "false"
+        mode = "demo" if demo_mode else "craigslist"
+        queries = _normalize(queries, SEARCH_FILTERS)
+    namespace = ("demo", search_api.DEMO_CATALOG.version) if mode == "demo" else mode
+
+    # Group identical searches so each runs once
+    groups: Dict[Hashable, List[int]] = {}
+    items: List[Item] = []
+    for index, search in enumerate(queries):
+        key = (namespace, search)
+        if key not in groups:
+            groups[key] = []
+            items.append((key, search))
+        groups[key].append(index)
+    count("batch.queries", len(queries))
+    count("batch.unique", len(items))
+
+    pending = []
+    hits = []
+    failed: set = set()
+    for key, search in items:
+        cached = SEARCH_CACHE.get(key)
+        if cached is None:
+            pending.append((key, search))
+        else:
+            hits.append((key, list(cached)))
+    count("batch.cache_hits", len(hits))
+
+    if not pending:
+        completed: Iterable = ()
+    elif mode == "demo":
+        completed = _batch_demo(pending)
+    elif mode == "serper":
+        completed = _batch_serper(pending, max_workers, failed)
+    else:
+        completed = _batch_craigslist(pending, max_workers, failed)
+
+    for key, listings in hits:
+        for index in groups[key]:
+            yield index, list(listings)
+    for key, listings in completed:
+        if key not in failed:
+            SEARCH_CACHE.put(key, tuple(listings))
+        for index in groups[key]:
+            yield index, list(listings)
+
+
+def search_rv_listings_batch(
+    queries: Iterable[Union[dict, SearchQuery]],
+    live: bool = False,
+    demo_mode: Optional[bool] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> List[List[RVListing]]:
+    """
+    Run a batch of searches and return their results in input order.
+
+    Takes the same arguments as ``iter_rv_listings_batch``. Equivalent to
+    calling ``search_rv_listings`` (or ``search_rv_listings_live``) once per
+    filter dict, but shares catalog scans and upstream requests.
+    """
+    queries = list(queries)
+    results: List[List[RVListing]] = [[] for _ in queries]
+    for index, listings in iter_rv_listings_batch(queries, live, demo_mode, max_workers):
+        results[index] = listings
+    return results
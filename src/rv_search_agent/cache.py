@@ -0,0 +1,116 @@
+"""In-process LRU cache for search results."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+DEFAULT_MAX_SIZE = 256
+DEFAULT_TTL_SECONDS = 300.0
+
+
+class QueryCache:
+    """Thread-safe LRU cache with a size cap and per-entry TTL.
+
+    Callers include anything that identifies the data version (such as a
+    catalog's version counter) in the key, so entries for stale data are
+    never hit and age out through LRU eviction or TTL.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "QueryCache":
+        """Configure from RV_SEARCH_CACHE, RV_SEARCH_CACHE_SIZE and RV_SEARCH_CACHE_TTL."""
+        enabled = os.getenv("RV_SEARCH_CACHE", "true").lower() not in ("0", "false", "off")
+        max_size = int(os.getenv("RV_SEARCH_CACHE_SIZE", DEFAULT_MAX_SIZE))
+        ttl = float(os.getenv("RV_SEARCH_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        return cls(max_size=max_size, ttl_seconds=ttl if ttl > 0 else None, enabled=enabled)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss.
+
+        With ``allow_stale``, entries past their TTL are returned too (and
+        kept), for callers that prefer old results to none.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if not allow_stale and self.ttl_seconds is not None \
+                    and self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        if not self.enabled or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Return cache statistics."""
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+# Shared cache used by search_rv_listings and search_rv_listings_live
+SEARCH_CACHE = QueryCache.from_env()
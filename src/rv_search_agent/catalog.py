@@ -0,0 +1,185 @@
+"""In-memory listing catalog with precomputed search keys."""
+
+from __future__ import annotations
+
+import math
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from .geo import GeoIndex, Gazetteer, get_gazetteer
+from .models import RVListing, normalize_text
+from .similar import SimilarityIndex
+from .suggest import SuggestIndex
+
+# Fields with few distinct values whose keys are interned, so that matching
+# them is a set lookup against the (small) vocabulary instead of a substring
+# check per listing.
+LOW_CARDINALITY_FIELDS = ("rv_type", "source")
+
+# Fields with posting lists (key -> rows), usable to drive a search plan
+INDEXED_FIELDS = ("rv_type", "source", "location")
+
+# Numeric fields with histograms, and their bucket widths
+HISTOGRAM_FIELDS = {"price": 10_000, "year": 1, "mileage": 5_000}
+
+
+def _key(value: Optional[str]) -> Optional[str]:
+    return normalize_text(value) if value else None
+
+
+def _interned_key(value: Optional[str]) -> Optional[str]:
+    return sys.intern(normalize_text(value)) if value else None
+
+
+@dataclass(frozen=True)
+class SearchKeys:
+    """Normalized search keys for a listing, computed once at ingest."""
+
+    title: str
+    make: Optional[str] = None
+    model: Optional[str] = None
+    location: Optional[str] = None
+    rv_type: Optional[str] = None
+    source: Optional[str] = None
+
+    @classmethod
+    def from_listing(cls, listing: RVListing) -> "SearchKeys":
+        """Build the search keys for a listing."""
+        return cls(
+            title=normalize_text(listing.title) or "",
+            make=_key(listing.make),
+            model=_key(listing.model),
+            location=_key(listing.location),
+            rv_type=_interned_key(listing.rv_type),
+            source=_interned_key(listing.source),
+        )
+
+
+class Histogram:
+    """Fixed-width histogram over a numeric listing field.
+
+    Falsy values (None or 0) are counted separately, because search filters
+    let listings without a value through.
+    """
+
+    def __init__(self, bucket_width: int):
+        self.bucket_width = bucket_width
+        self.buckets: Counter = Counter()
+        self.missing = 0
+        self.total = 0
+
+    def add(self, value: Optional[int]) -> None:
+        """Record one value."""
+        self.total += 1
+        if value:
+            self.buckets[value // self.bucket_width] += 1
+        else:
+            self.missing += 1
+
+    def fraction_between(self, low: Optional[int] = None, high: Optional[int] = None) -> float:
+        """Estimate the fraction of rows with low <= value <= high, or no value."""
+        if not self.total:
+            return 0.0
+        low = -math.inf if low is None else low
+        high = math.inf if high is None else high
+        count = float(self.missing)
+        for bucket, bucket_count in self.buckets.items():
+            start = bucket * self.bucket_width
+            end = start + self.bucket_width
+            overlap = min(end, high + 1) - max(start, low)
+            if overlap > 0:
+                count += bucket_count * min(1.0, overlap / self.bucket_width)
+        return count / self.total
+
+
+class ListingCatalog:
+    """A collection of listings paired with their normalized search keys.
+
+    The catalog carries a ``version`` counter that is bumped whenever
+    listings are added, so derived structures can tell when they are stale.
+    Listing locations are geocoded at ingest into a spatial index, and
+    posting lists and histograms are maintained for the query planner.
+    """
+
+    def __init__(self, listings: Iterable[RVListing] = (), gazetteer: Optional[Gazetteer] = None):
+        self.version = 0
+        self.gazetteer = gazetteer or get_gazetteer()
+        self._entries: List[Tuple[RVListing, SearchKeys]] = []
+        self._geo_index = GeoIndex()
+        self._postings: Dict[str, Dict[Optional[str], List[int]]] = {
+            name: {} for name in INDEXED_FIELDS
+        }
+        self.histograms: Dict[str, Histogram] = {
+            name: Histogram(width) for name, width in HISTOGRAM_FIELDS.items()
+        }
+        self._similarity: Optional[Tuple[int, SimilarityIndex]] = None
+        self._suggest: Optional[Tuple[int, SuggestIndex]] = None
+        self.extend(listings)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[RVListing]:
+        return (listing for listing, _ in self._entries)
+
+    def add(self, listing: RVListing) -> None:
+        """Add a single listing to the catalog."""
+        self.extend([listing])
+
+    def extend(self, listings: Iterable[RVListing]) -> None:
+        """Add listings to the catalog, computing their search keys."""
+        added = False
+        for listing in listings:
+            keys = SearchKeys.from_listing(listing)
+            coords = self.gazetteer.geocode(listing.location)
+            row = len(self._entries)
+            if coords is not None:
+                self._geo_index.insert(row, *coords)
+            self._entries.append((listing, keys))
+            for name, postings in self._postings.items():
+                postings.setdefault(getattr(keys, name), []).append(row)
+            for name, histogram in self.histograms.items():
+                histogram.add(getattr(listing, name))
+            added = True
+        if added:
+            self.version += 1
+
+    def entries(self) -> List[Tuple[RVListing, SearchKeys]]:
+        """Return the (listing, search keys) pairs in insertion order."""
+        return self._entries
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> List[Tuple[float, int]]:
+        """Return (distance_miles, row) pairs for entries within the radius, nearest first."""
+        return self._geo_index.within(lat, lon, radius_miles)
+
+    def matching_values(self, field_name: str, needle: str) -> FrozenSet[str]:
+        """Return the distinct keys of an indexed field containing needle."""
+        return frozenset(
+            value for value in self._postings[field_name]
+            if value is not None and needle in value
+        )
+
+    def postings(self, field_name: str) -> Dict[Optional[str], List[int]]:
+        """Return the key -> rows mapping of an indexed field.
+
+        Rows are in ascending order; listings without a value are under None.
+        """
+        return self._postings[field_name]
+
+    def similarity_index(self) -> SimilarityIndex:
+        """Return the similar-listing index, built on first use per version.
+
+        IDF weights depend on every listing, so the index is rebuilt rather
+        than extended when listings are added.
+        """
+        if self._similarity is None or self._similarity[0] != self.version:
+            self._similarity = (self.version, SimilarityIndex(listing for listing, _ in self._entries))
+        return self._similarity[1]
+
+    def suggest_index(self) -> SuggestIndex:
+        """Return the make/model/location autocomplete index, built on first use per version."""
+        if self._suggest is None or self._suggest[0] != self.version:
+            self._suggest = (self.version, SuggestIndex(listing for listing, _ in self._entries))
+        return self._suggest[1]
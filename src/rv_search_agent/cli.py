@@ -2,11 +2,35 @@
 """Command-line interface for RV Search Agent."""
 
 import argparse
+import contextlib
+import dataclasses
+import json
+import os
 import sys
 import webbrowser
 from urllib.parse import quote
 
-from .search_api import search_rv_listings, search_rv_listings_live, SearchAPIError
+from . import quota, replay
+from .batch import iter_rv_listings_batch
+from .models import SearchQuery
+from .search_api import (
+    find_similar,
+    search_rv_listings,
+    search_rv_listings_live,
+    suggest,
+    SearchAPIError,
+)
+from .tracing import Trace, tracing
+from .watch import (
+    DEFAULT_INTERVALS,
+    DEFAULT_JITTER,
+    FileEmitter,
+    StdoutEmitter,
+    Watcher,
+    WebhookEmitter,
+    load_saved_searches,
+    open_seen_set,
+)
 
 
 def open_fb_marketplace(query: str = None, min_price: int = None, max_price: int = None):
@@ -64,7 +88,369 @@ def open_rvtrader(query: str = None, min_price: int = None, max_price: int = Non
     webbrowser.open(url)
 
 
-def main():
+def _report_trace(trace, trace_file=None):
+    """Print a profile to stderr and optionally write a Chrome trace file."""
+    if trace is None:
+        return
+    print(f"Profile:\n{trace.summary()}\n", file=sys.stderr)
+    if trace_file:
+        trace.write_chrome_trace(trace_file)
+        print(f"Wrote trace to {trace_file} (open in chrome://tracing)\n", file=sys.stderr)
+
+
+def _configure_http(args):
+    """Apply --record/--replay to the shared HTTP harness."""
+    if args.record and args.replay:
+        raise SearchAPIError("--record and --replay can't be used together")
+    if args.record:
+        replay.HTTP_HARNESS.configure("record", args.record)
+    elif args.replay:
+        try:
+            latency = args.replay_latency
+            replay.HTTP_HARNESS.configure(
+                "replay",
+                args.replay,
+                latency=latency if latency == "recorded" else float(latency),
+                error_rate=args.replay_error_rate,
+                seed=args.replay_seed,
+            )
+        except ValueError as e:
+            raise SearchAPIError(f"Invalid replay option: {e}")
+
+
+def _search_query(args):
+    """Build the SearchQuery for the search flags."""
+    try:
+        return SearchQuery(
+            query=args.query,
+            rv_type=args.rv_type,
+            min_price=args.min_price,
+            max_price=args.max_price,
+            min_year=args.min_year,
+            max_year=args.max_year,
+            min_mileage=args.min_mileage,
+            max_mileage=args.max_mileage,
+            location=args.location,
+            source=args.source,
+            max_results=args.max_results,
+            near=args.near,
+            radius_miles=args.radius_miles,
+        )
+    except ValueError as e:
+        raise SearchAPIError(f"Invalid search: {e}")
+
+
+def _sort_listings(listings, sort_by=None):
+    """Sort listings in place by one of the --sort-by keys."""
+    if sort_by:
+        if sort_by == "price":
+            listings.sort(key=lambda x: x.price if x.price else float('inf'))
+        elif sort_by == "price-desc":
+            listings.sort(key=lambda x: x.price if x.price else 0, reverse=True)
+        elif sort_by == "year":
+            listings.sort(key=lambda x: x.year if x.year else 0)
+        elif sort_by == "year-desc":
+            listings.sort(key=lambda x: x.year if x.year else 0, reverse=True)
+        elif sort_by == "mileage":
+            listings.sort(key=lambda x: x.mileage if x.mileage else float('inf'))
+        elif sort_by == "mileage-desc":
+            listings.sort(key=lambda x: x.mileage if x.mileage else 0, reverse=True)
+
+
+def _print_listings(listings, verbose=False):
+    """Print numbered listings, with full details when verbose."""
+    for i, listing in enumerate(listings, 1):
+        # Title line
+        price_str = f"${listing.price:,}" if listing.price else "Price N/A"
+        print(f"{i}. {listing.title}")
+        print(f"   Price: {price_str}")
+
+        if listing.year:
+            print(f"   Year: {listing.year}")
+
+        if listing.location:
+            print(f"   Location: {listing.location}")
+
+        if listing.source:
+            print(f"   Source: {listing.source}")
+
+        if listing.mileage:
+            print(f"   Mileage: {listing.mileage:,} miles")
+
+        if verbose:
+            if listing.rv_type:
+                print(f"   Type: {listing.rv_type}")
+            if listing.make:
+                print(f"   Make: {listing.make}")
+            if listing.model:
+                print(f"   Model: {listing.model}")
+            if listing.description:
+                print(f"   Details: {listing.description}")
+            if listing.url:
+                print(f"   URL: {listing.url}")
+
+        print()
+
+
+def _read_batch(path, max_results):
+    """Read one JSON object of search filters per line from a file or stdin."""
+    try:
+        if path == "-":
+            lines = sys.stdin.readlines()
+        else:
+            with open(path) as f:
+                lines = f.readlines()
+    except OSError as e:
+        raise SearchAPIError(f"Cannot read {path}: {e}")
+
+    queries = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            filters = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise SearchAPIError(f"{path}:{line_number}: invalid JSON: {e}")
+        if isinstance(filters, dict):
+            filters.setdefault("max_results", max_results)
+        queries.append(filters)
+    return queries
+
+
+def _run_batch(args):
+    """Run the searches in --batch, printing each one's results as it completes."""
+    queries = _read_batch(args.batch, args.max_results)
+    for index, listings in iter_rv_listings_batch(queries, live=args.live):
+        print(f"Query {index + 1}: {json.dumps(queries[index])}")
+        if not listings:
+            print("No listings found matching your criteria.\n")
+            continue
+        _sort_listings(listings, args.sort_by)
+        print(f"Found {len(listings)} listing(s):\n")
+        _print_listings(listings, args.verbose)
+        sys.stdout.flush()
+
+
+def watch_main(argv=None):
+    """Run `rv-search watch`: poll saved searches and report new listings."""
+    parser = argparse.ArgumentParser(
+        prog="rv-search watch",
+        description="Watch saved searches and report new listings as they appear",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Each line of SEARCHES is a JSON object of filters (query, rv_type,
+min_price, max_price, min_year, max_year, location) with an optional
+"name" and "sources" (["craigslist"], ["serper"] or both).
+
+Examples:
+  %(prog)s searches.jsonl --state watch-state.json
+  %(prog)s searches.jsonl --webhook https://example.com/hook --quiet
+  %(prog)s searches.jsonl --once --output new-listings.jsonl
+        """,
+    )
+    parser.add_argument("searches", metavar="SEARCHES", help="JSONL file of saved searches")
+    parser.add_argument(
+        "--sources",
+        default="craigslist",
+        help="Default sources for searches that don't list their own, comma-separated "
+             "(default: craigslist)",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="PATH",
+        help="Persist seen listings and feed validators to PATH across restarts",
+    )
+    parser.add_argument("--output", metavar="FILE", help="Append new listings to FILE as JSON lines")
+    parser.add_argument("--webhook", metavar="URL", help="POST new listings to URL as JSON")
+    parser.add_argument("--quiet", action="store_true", help="Don't print new listings to stdout")
+    parser.add_argument(
+        "--craigslist-interval",
+        type=float,
+        default=DEFAULT_INTERVALS["craigslist"],
+        metavar="SECONDS",
+        help=f"Seconds between Craigslist polls (default: {DEFAULT_INTERVALS['craigslist']})",
+    )
+    parser.add_argument(
+        "--serper-interval",
+        type=float,
+        default=DEFAULT_INTERVALS["serper"],
+        metavar="SECONDS",
+        help=f"Seconds between Serper polls (default: {DEFAULT_INTERVALS['serper']})",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=DEFAULT_JITTER,
+        help=f"Random spread of poll times as a fraction of the interval (default: {DEFAULT_JITTER})",
+    )
+    parser.add_argument(
+        "--emit-initial",
+        action="store_true",
+        help="Report listings already present on the first poll (default: only new ones)",
+    )
+    parser.add_argument(
+        "--seen-exact",
+        action="store_true",
+        help="Confirm seen URLs against an exact store next to --state, so no new "
+             "listing is ever mistaken for a seen one (uses more disk)",
+    )
+    parser.add_argument("--once", action="store_true", help="Poll every feed once and exit")
+
+    args = parser.parse_args(argv)
+
+    emitters = []
+    if not args.quiet:
+        emitters.append(StdoutEmitter())
+    if args.output:
+        emitters.append(FileEmitter(args.output))
+    if args.webhook:
+        emitters.append(WebhookEmitter(args.webhook))
+
+    try:
+        searches = load_saved_searches(args.searches, args.sources.split(","))
+        seen = open_seen_set(args.state, exact=True) if args.seen_exact else None
+        watcher = Watcher(
+            searches,
+            emitters,
+            intervals={"craigslist": args.craigslist_interval, "serper": args.serper_interval},
+            jitter=args.jitter,
+            state_path=args.state,
+            emit_initial=args.emit_initial,
+            seen=seen,
+        )
+    except SearchAPIError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Watching {len(searches)} saved search(es) via {len(watcher.feeds)} feed(s)",
+          file=sys.stderr)
+    try:
+        if args.once:
+            watcher.poll_all()
+            watcher.close()
+        else:
+            watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def quota_main(argv=None):
+    """Run `rv-search quota`: report Serper API usage this month."""
+    parser = argparse.ArgumentParser(
+        prog="rv-search quota",
+        description="Show Serper API calls used and left this month, per API key",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument(
+        "--segments",
+        action="store_true",
+        help="Also show each site's yield per make and RV type, as used to schedule sites",
+    )
+    args = parser.parse_args(argv)
+
+    ledger = quota.SERPER_QUOTA
+    if not ledger.enabled:
+        print("Quota tracking is disabled (RV_SEARCH_QUOTA=off)")
+        return
+    current = quota.key_id(os.environ["SERPER_API_KEY"]) if os.getenv("SERPER_API_KEY") else None
+    usage = ledger.usage()
+    if current and all(entry["key_id"] != current for entry in usage):
+        usage.append({"key_id": current, "used": 0, "remaining": ledger.monthly_limit, "sites": {}})
+    for entry in usage:
+        entry["current"] = entry["key_id"] == current
+    yields = ledger.site_yields()
+
+    if args.json:
+        print(json.dumps({
+            "ledger": ledger.path,
+            "monthly_limit": ledger.monthly_limit,
+            "reserve": ledger.reserve,
+            "rate_per_second": ledger.rate,
+            "keys": usage,
+            "site_yield": {site: {"fetched": f, "kept": k} for site, (f, k) in yields.items()},
+            "segments": ledger.segment_yields() if args.segments else None,
+        }, indent=2))
+        return
+
+    print(f"Serper quota ledger: {ledger.path}")
+    print(f"Limit {ledger.monthly_limit:,} calls/month per key, reserve {ledger.reserve:,}, "
+          f"rate {ledger.rate:g}/s")
+    if not usage:
+        print("\nNo Serper calls this month (set SERPER_API_KEY to see your key)")
+    for entry in usage:
+        label = " (SERPER_API_KEY)" if entry["current"] else ""
+        status = ""
+        if entry["remaining"] <= ledger.reserve:
+            status = "  - degraded to cached/Craigslist results"
+        print(f"\nKey {entry['key_id']}{label}: {entry['used']:,} used, "
+              f"{entry['remaining']:,} left{status}")
+        for site, calls in sorted(entry["sites"].items(), key=lambda item: -item[1]):
+            print(f"  {site:<28} {calls:>6,} calls")
+    if yields:
+        print("\nSite yield (results kept / fetched), best first:")
+        for site in ledger.order_sites(list(yields)):
+            fetched, kept = yields[site]
+            rate = f"{kept / fetched:5.0%}" if fetched else "    -"
+            print(f"  {site:<28} {kept:>6,} / {fetched:<6,} {rate}")
+    if args.segments and yields:
+        print("\nListings kept per call, by make and RV type:")
+        for row in ledger.segment_yields():
+            if not row["calls"]:
+                continue
+            segment = " / ".join(part or "*" for part in (row["make"], row["rv_type"]))
+            skipped = f"  (skipped {row['skips']}x)" if row["skips"] else ""
+            print(f"  {segment:<24} {row['site']:<28} {row['kept'] / row['calls']:5.1f} "
+                  f"over {row['calls']:,} call(s){skipped}")
+
+
+def suggest_main(argv=None):
+    """Run `rv-search suggest`: complete a make, model or location."""
+    parser = argparse.ArgumentParser(
+        prog="rv-search suggest",
+        description="Suggest demo catalog makes, models and locations starting with a prefix, "
+                    "most listings first",
+    )
+    parser.add_argument("prefix", metavar="PREFIX", help="Start of a make, model or location word")
+    parser.add_argument(
+        "-n", "--max-results",
+        type=int,
+        default=10,
+        help="Maximum number of suggestions (default: 10)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the suggestions as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        suggestions = suggest(args.prefix, args.max_results)
+    except SearchAPIError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps([dataclasses.asdict(s) for s in suggestions], indent=2))
+        return
+    if not suggestions:
+        print(f"No suggestions for '{args.prefix}'")
+        return
+    width = max(len(s.text) for s in suggestions)
+    for s in suggestions:
+        print(f"  {s.text:<{width}}  {s.kind:<8} {s.count:>6,} listing(s)")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["watch"]:
+        watch_main(argv[1:])
+        return
+    if argv[:1] == ["quota"]:
+        quota_main(argv[1:])
+        return
+    if argv[:1] == ["suggest"]:
+        suggest_main(argv[1:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Search for RV listings",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -74,6 +460,14 @@ Examples:
   %(prog)s --query "Winnebago" --type "Class C" --max-price 100000
   %(prog)s --query "Storyteller" --source "Facebook Marketplace"
   %(prog)s --min-year 2024 --max-year 2025
+  %(prog)s --near "Denver, CO" --radius 200
+  %(prog)s --similar-to https://example.com/listing/1 -n 5
+  %(prog)s --batch saved-searches.jsonl
+  %(prog)s --live --query "Unity" --record fixtures/
+  %(prog)s --live --query "Unity" --replay fixtures/ --replay-latency 0.3
+  %(prog)s watch saved-searches.jsonl --state watch-state.json
+  %(prog)s quota
+  %(prog)s suggest win
         """,
     )
 
@@ -120,6 +514,16 @@ Examples:
         "-l", "--location",
         help="Location filter",
     )
+    parser.add_argument(
+        "--near",
+        help="Only show listings near a place, nearest first (e.g. \"Denver, CO\")",
+    )
+    parser.add_argument(
+        "--radius",
+        type=float,
+        dest="radius_miles",
+        help="Search radius in miles around --near (default: 100)",
+    )
     parser.add_argument(
         "-s", "--source",
         help="Source filter (Dealer, Facebook Marketplace)",
@@ -150,13 +554,76 @@ Examples:
         choices=["price", "price-desc", "year", "year-desc", "mileage", "mileage-desc"],
         help="Sort results: price, price-desc, year, year-desc, mileage, mileage-desc",
     )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Show the query plan and rows examined (demo mode only)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage timings and counters to stderr",
+    )
+    parser.add_argument(
+        "--trace-file",
+        metavar="PATH",
+        help="Write a Chrome trace (chrome://tracing) of the search to PATH",
+    )
+    parser.add_argument(
+        "--similar-to",
+        metavar="URL",
+        help="Show the demo listings most like the listing at URL (-n of them)",
+    )
     parser.add_argument(
         "--live",
         action="store_true",
         help="Search live listings using Serper API (requires SERPER_API_KEY)",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Run one search per line of a JSONL file of filters ('-' for stdin), "
+             "printing each search's results as it completes",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Record the HTTP responses of --live/--batch searches to fixtures in DIR",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Serve --live/--batch searches from fixtures recorded in DIR, without the network",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        default="0",
+        metavar="SECONDS",
+        help="Delay added to each replayed response, or 'recorded' for the original timing",
+    )
+    parser.add_argument(
+        "--replay-error-rate",
+        type=float,
+        default=0.0,
+        metavar="FRACTION",
+        help="Fraction of replayed requests that fail with a connection error",
+    )
+    parser.add_argument(
+        "--replay-seed",
+        type=int,
+        help="Seed for --replay-error-rate, for repeatable runs",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.live:
+        # Live searches can't apply these, so say so rather than ignore them
+        unsupported = [flag for flag, value in (
+            ("--near", args.near), ("--radius", args.radius_miles), ("--source", args.source),
+            ("--min-mileage", args.min_mileage), ("--max-mileage", args.max_mileage),
+            ("--explain", args.explain),
+        ) if value is not None and value is not False]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} can't be used with --live")
 
     # Open Facebook Marketplace if requested
     if args.open_fb:
@@ -169,90 +636,41 @@ Examples:
                       args.min_year, args.max_year, args.rv_type)
         sys.exit(0)
 
-    # Run search
-    try:
-        if args.live:
-            print("Searching live listings via Serper API...\n")
-            listings = search_rv_listings_live(
-                query=args.query,
-                rv_type=args.rv_type,
-                min_price=args.min_price,
-                max_price=args.max_price,
-                min_year=args.min_year,
-                max_year=args.max_year,
-                location=args.location,
-                max_results=args.max_results,
-            )
-        else:
-            listings = search_rv_listings(
-                query=args.query,
-                rv_type=args.rv_type,
-                min_price=args.min_price,
-                max_price=args.max_price,
-                min_year=args.min_year,
-                max_year=args.max_year,
-                min_mileage=args.min_mileage,
-                max_mileage=args.max_mileage,
-                location=args.location,
-                source=args.source,
-                max_results=args.max_results,
-            )
-    except SearchAPIError as e:
-        print(f"Error: {e}")
-        sys.exit(1)
+    # Run search, collecting timings when profiling
+    trace = Trace() if args.profile or args.trace_file else None
+    with tracing(trace) if trace else contextlib.nullcontext():
+        try:
+            _configure_http(args)
+            if args.batch:
+                _run_batch(args)
+            elif args.similar_to:
+                listings = find_similar(args.similar_to, args.max_results)
+            elif args.live:
+                print("Searching live listings via Serper API...\n")
+                listings = search_rv_listings_live(_search_query(args))
+            else:
+                listings = search_rv_listings(_search_query(args), explain=args.explain)
+                if args.explain:
+                    plan = listings
+                    listings = plan.results
+                    print(f"Query plan:\n{plan}\n")
+        except SearchAPIError as e:
+            print(f"Error: {e}")
+            _report_trace(trace, args.trace_file)
+            sys.exit(1)
+
+    _report_trace(trace, args.trace_file)
+
+    if args.batch:
+        sys.exit(0)
 
     if not listings:
         print("No listings found matching your criteria.")
         sys.exit(0)
 
-    # Sort results if requested
-    if args.sort_by:
-        if args.sort_by == "price":
-            listings.sort(key=lambda x: x.price if x.price else float('inf'))
-        elif args.sort_by == "price-desc":
-            listings.sort(key=lambda x: x.price if x.price else 0, reverse=True)
-        elif args.sort_by == "year":
-            listings.sort(key=lambda x: x.year if x.year else 0)
-        elif args.sort_by == "year-desc":
-            listings.sort(key=lambda x: x.year if x.year else 0, reverse=True)
-        elif args.sort_by == "mileage":
-            listings.sort(key=lambda x: x.mileage if x.mileage else float('inf'))
-        elif args.sort_by == "mileage-desc":
-            listings.sort(key=lambda x: x.mileage if x.mileage else 0, reverse=True)
-
+    _sort_listings(listings, args.sort_by)
     print(f"Found {len(listings)} listing(s):\n")
-
-    for i, listing in enumerate(listings, 1):
-        # Title line
-        price_str = f"${listing.price:,}" if listing.price else "Price N/A"
-        print(f"{i}. {listing.title}")
-        print(f"   Price: {price_str}")
-
-        if listing.year:
-            print(f"   Year: {listing.year}")
-
-        if listing.location:
-            print(f"   Location: {listing.location}")
-
-        if listing.source:
-            print(f"   Source: {listing.source}")
-
-        if listing.mileage:
-            print(f"   Mileage: {listing.mileage:,} miles")
-
-        if args.verbose:
-            if listing.rv_type:
-                print(f"   Type: {listing.rv_type}")
-            if listing.make:
-                print(f"   Make: {listing.make}")
-            if listing.model:
-                print(f"   Model: {listing.model}")
-            if listing.description:
-                print(f"   Details: {listing.description}")
-            if listing.url:
-                print(f"   URL: {listing.url}")
-
-        print()
+    _print_listings(listings, args.verbose)
 
 
 if __name__ == "__main__":
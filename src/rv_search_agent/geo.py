@@ -0,0 +1,194 @@
+"""Offline geocoding and spatial indexing for listing locations."""
+
+from __future__ import annotations
+
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .models import normalize_text
+
+DATA_DIR = Path(__file__).parent / "data"
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+Coordinates = Tuple[float, float]
+
+# Distinct location strings whose coordinates each Gazetteer remembers
+GEOCODE_CACHE_SIZE = 4096
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in miles."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Gazetteer:
+    """Offline US city/state gazetteer.
+
+    Resolves strings like "Denver, CO", "Denver, Colorado", "Denver" or
+    "Colorado" to coordinates. Unknown cities in a known state resolve to
+    None rather than the state centroid, so radius searches don't match
+    listings hundreds of miles away. A bare city name in several states
+    resolves to the first listed (see ``is_ambiguous``).
+    """
+
+    def __init__(self, cities: Dict[Tuple[str, str], Coordinates], states: Dict[str, Coordinates],
+                 state_names: Dict[str, str]):
+        self._cities = cities
+        self._states = states
+        self._state_names = state_names
+        self._bare_cities: Dict[str, Coordinates] = {}
+        self._ambiguous: Set[str] = set()
+        for (city, _), coords in cities.items():
+            # First entry wins for ambiguous names (e.g. Portland OR over ME)
+            if city in self._bare_cities:
+                self._ambiguous.add(city)
+            self._bare_cities.setdefault(city, coords)
+        # Bounded: listing locations come from scraped feeds, without limit
+        self._lookup = lru_cache(maxsize=GEOCODE_CACHE_SIZE)(self._resolve)
+
+    @classmethod
+    def load(cls, data_dir: Path = DATA_DIR) -> "Gazetteer":
+        """Load the gazetteer bundled with the package."""
+        states: Dict[str, Coordinates] = {}
+        state_names: Dict[str, str] = {}
+        with open(data_dir / "us_states.csv", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                abbr = row["abbr"].lower()
+                states[abbr] = (float(row["lat"]), float(row["lon"]))
+                state_names[abbr] = abbr
+                state_names[normalize_text(row["name"])] = abbr
+
+        cities: Dict[Tuple[str, str], Coordinates] = {}
+        with open(data_dir / "us_cities.csv", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = (normalize_text(row["city"]), row["state"].lower())
+                cities[key] = (float(row["lat"]), float(row["lon"]))
+
+        return cls(cities, states, state_names)
+
+    def _state(self, text: str) -> Optional[str]:
+        if text in self._state_names:
+            return self._state_names[text]
+        # Tolerate trailing ZIP codes, e.g. "co 80202"
+        first = text.split(" ", 1)[0]
+        return self._state_names.get(first)
+
+    def geocode(self, location: Optional[str]) -> Optional[Coordinates]:
+        """Resolve a location string to (lat, lon), or None if unknown."""
+        if not location:
+            return None
+        return self._lookup(normalize_text(location).strip())
+
+    def is_state(self, location: Optional[str]) -> bool:
+        """Whether a location string names a whole state, e.g. "Colorado" or "CO"."""
+        return bool(location) and normalize_text(location).strip() in self._state_names
+
+    def is_ambiguous(self, location: Optional[str]) -> bool:
+        """Whether a location is a city name, without a state, found in several states.
+
+        "Springfield" is; "Springfield, IL", "Springfield IL" and "Denver" aren't.
+        """
+        parts = [part.strip() for part in normalize_text(location or "").split(",")
+                 if part.strip()]
+        if not parts or (len(parts) > 1 and self._state(parts[1]) is not None):
+            return False
+        head, _, tail = parts[0].rpartition(" ")
+        if head and tail in self._state_names and (head, self._state_names[tail]) in self._cities:
+            return False
+        return parts[0] in self._ambiguous
+
+    def _resolve(self, key: str) -> Optional[Coordinates]:
+        parts = [part.strip() for part in key.split(",") if part.strip()]
+        if not parts:
+            return None
+        city = parts[0]
+
+        if len(parts) > 1:
+            state = self._state(parts[1])
+            if state is None:
+                return self._bare_cities.get(city)
+            return self._cities.get((city, state))
+
+        state = self._state_names.get(city)
+        if state is not None:
+            return self._states[state]
+
+        # "Los Angeles CA" without a comma
+        head, _, tail = city.rpartition(" ")
+        if head and tail in self._state_names:
+            return self._cities.get((head, self._state_names[tail]))
+
+        return self._bare_cities.get(city)
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    """Return the shared bundled gazetteer."""
+    return Gazetteer.load()
+
+
+def geocode(location: Optional[str]) -> Optional[Coordinates]:
+    """Resolve a location string using the bundled gazetteer."""
+    return get_gazetteer().geocode(location)
+
+
+class GeoIndex:
+    """Grid-bucket spatial index for radius queries.
+
+    Points are bucketed into cells of ``cell_degrees`` on each side. A radius
+    query only visits the cells overlapping the query's bounding box and
+    computes exact distances for the points in them.
+    """
+
+    def __init__(self, cell_degrees: float = 1.0):
+        self.cell_degrees = cell_degrees
+        self._columns = int(math.ceil(360.0 / cell_degrees))
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, int]]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = int(math.floor((lat + 90.0) / self.cell_degrees))
+        col = int(math.floor((lon + 180.0) / self.cell_degrees)) % self._columns
+        return row, col
+
+    def insert(self, item_id: int, lat: float, lon: float) -> None:
+        """Add a point to the index."""
+        self._cells.setdefault(self._cell(lat, lon), []).append((lat, lon, item_id))
+        self._size += 1
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> List[Tuple[float, int]]:
+        """Return (distance_miles, item_id) pairs within the radius, nearest first."""
+        lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(min(89.0, abs(lat) + lat_delta)))
+        lon_delta = min(180.0, radius_miles / (MILES_PER_DEGREE_LAT * max(cos_lat, 1e-6)))
+
+        min_row, min_col = self._cell(max(-90.0, lat - lat_delta), lon - lon_delta)
+        max_row, _ = self._cell(min(89.999, lat + lat_delta), lon + lon_delta)
+        col_span = min(self._columns, int(math.ceil(2 * lon_delta / self.cell_degrees)) + 1)
+
+        matches = []
+        for row in range(min_row, max_row + 1):
+            for offset in range(col_span):
+                bucket = self._cells.get((row, (min_col + offset) % self._columns))
+                if not bucket:
+                    continue
+                for point_lat, point_lon, item_id in bucket:
+                    distance = haversine_miles(lat, lon, point_lat, point_lon)
+                    if distance <= radius_miles:
+                        matches.append((distance, item_id))
+
+        matches.sort()
+        return matches
@@ -0,0 +1,154 @@
+"""Parse large backfill batches of Serper results and RSS items in parallel.
+
+``_parse_serper_result`` and ``_parse_rss_item`` are regex-heavy pure
+Python, so a backfill of tens of thousands of items is CPU-bound on one
+core. These functions split a batch into chunks and parse them in a
+process pool. Chunks are large enough that pickling items and listings
+costs little next to parsing them. Small batches are parsed in-process,
+where starting workers would cost more than it saves.
+
+    listings = parse_serper_results(organic_results, "rvtrader.com", workers=4)
+    listings = parse_rss_items(root.iter("item"))
+
+Results come back in input order, one per item: a listing, or None where
+the item isn't a listing.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, List, Optional, Sequence, Union
+
+from .models import RVListing
+from .search_api import _parse_rss_item, _parse_serper_result
+from .tracing import count, span
+
+# Below this many items a batch is parsed in-process
+MIN_PARALLEL_ITEMS = 2000
+
+# Chunks are at least this many items, so per-chunk overhead (pickling,
+# task dispatch) stays small next to parsing
+MIN_CHUNK_ITEMS = 250
+
+# Chunks per worker; more than one evens out workers that finish early
+CHUNKS_PER_WORKER = 4
+
+RSSItem = Union[ET.Element, str, bytes]
+
+
+def default_workers() -> int:
+    """Workers to use when none are given: the CPUs available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def chunk_size(items: int, workers: int) -> int:
+    """Items per chunk for a batch split across workers."""
+    return max(MIN_CHUNK_ITEMS, math.ceil(items / (workers * CHUNKS_PER_WORKER)))
+
+
+def _parse_serper_chunk(site: str, results: List[dict]) -> List[Optional[RVListing]]:
+    return [_parse_serper_result(result, site) for result in results]
+
+
+def _parse_rss_chunk(items: List[bytes]) -> List[Optional[RVListing]]:
+    return [_parse_rss_item(ET.fromstring(item)) for item in items]
+
+
+def _parse_parallel(
+    name: str,
+    items: Sequence,
+    parse_chunk: Callable,
+    args: tuple,
+    workers: Optional[int],
+    executor: Optional[Executor],
+) -> List[Optional[RVListing]]:
+    if workers is None:
+        workers = default_workers()
+    size = chunk_size(len(items), workers)
+    chunks = [list(items[i:i + size]) for i in range(0, len(items), size)]
+    count(f"ingest.{name}.chunks", len(chunks))
+    with span(f"ingest.{name}", items=len(items), workers=workers, chunks=len(chunks)):
+        pool = executor or ProcessPoolExecutor(min(workers, len(chunks)))
+        try:
+            # map yields chunk results in submission order
+            parsed = pool.map(partial(parse_chunk, *args), chunks)
+            return [listing for chunk in parsed for listing in chunk]
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+
+def _run_in_process(items: int, workers: Optional[int], executor: Optional[Executor]) -> bool:
+    if items < MIN_PARALLEL_ITEMS:
+        return True
+    if executor is not None:
+        return False
+    return (workers if workers is not None else default_workers()) <= 1
+
+
+def parse_serper_results(
+    results: Sequence[dict],
+    site: str,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[Optional[RVListing]]:
+    """
+    Parse Serper organic results from one site into listings.
+
+    Args:
+        results: Serper organic result dicts
+        site: The site the results came from (sets the listing source)
+        workers: Worker processes, or with ``executor``, how many of its
+            workers to split chunks across (default: available CPUs)
+        executor: Reuse a process pool across calls instead of starting one
+
+    Returns one listing (or None) per result, in order. Unlike a search,
+    sold and out-of-range results are not filtered out.
+    """
+    results = list(results)
+    count("ingest.serper.items", len(results))
+    if _run_in_process(len(results), workers, executor):
+        with span("ingest.serper", items=len(results), workers=1):
+            return _parse_serper_chunk(site, results)
+    return _parse_parallel("serper", results, _parse_serper_chunk, (site,), workers, executor)
+
+
+def parse_rss_items(
+    items: Iterable[RSSItem],
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[Optional[RVListing]]:
+    """
+    Parse Craigslist RSS ``<item>`` elements into listings.
+
+    Args:
+        items: ``<item>`` elements, or their serialized XML
+        workers: Worker processes, or with ``executor``, how many of its
+            workers to split chunks across (default: available CPUs)
+        executor: Reuse a process pool across calls instead of starting one
+
+    Returns one listing (or None) per item, in order. Elements are
+    serialized before being sent to workers; passing XML avoids that step.
+    """
+    items = list(items)
+    count("ingest.rss.items", len(items))
+    if _run_in_process(len(items), workers, executor):
+        with span("ingest.rss", items=len(items), workers=1):
+            return [
+                _parse_rss_item(ET.fromstring(item) if isinstance(item, (str, bytes)) else item)
+                for item in items
+            ]
+    with span("ingest.rss.serialize", items=len(items)):
+        encoded = [
+            item.encode() if isinstance(item, str)
+            else item if isinstance(item, bytes)
+            else ET.tostring(item)
+            for item in items
+        ]
+    return _parse_parallel("rss", encoded, _parse_rss_chunk, (), workers, executor)
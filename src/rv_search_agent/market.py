@@ -0,0 +1,62 @@
+"""Market statistics over a set of listings.
+
+The agent's ``summarize_rv_market`` tool returns these instead of the
+listings themselves, so questions like "what's the typical price of a 2023
+Unity U24RL?" are answered from a few numbers computed here rather than
+from raw listing JSON reasoned over by the model.
+"""
+
+import statistics
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+from .models import RVListing
+
+
+def _stats(values: Sequence[int]) -> Optional[dict]:
+    """Min, median, mean and max of ``values``, or None if there are none."""
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "min": min(values),
+        "median": round(statistics.median(values)),
+        "mean": round(statistics.fmean(values)),
+        "max": max(values),
+    }
+
+
+def _example(listing: RVListing) -> dict:
+    return {"summary": listing.summary(), "url": listing.url}
+
+
+def summarize_listings(listings: Sequence[RVListing]) -> dict:
+    """Summarize prices, mileage and the median price of each model year.
+
+    Listings missing a price, year or mileage count toward ``count`` but
+    are left out of that field's statistics; each statistic reports how
+    many listings it covers.
+
+    Returns:
+        {"count", "price", "mileage", "price_by_year", "cheapest",
+        "most_expensive"}, with None for statistics no listing has data for
+    """
+    priced = [listing for listing in listings if listing.price]
+    by_year: Dict[int, List[int]] = defaultdict(list)
+    for listing in priced:
+        if listing.year:
+            by_year[listing.year].append(listing.price)
+
+    cheapest = min(priced, key=lambda listing: listing.price, default=None)
+    priciest = max(priced, key=lambda listing: listing.price, default=None)
+    return {
+        "count": len(listings),
+        "price": _stats([listing.price for listing in priced]),
+        "mileage": _stats([listing.mileage for listing in listings if listing.mileage]),
+        "price_by_year": [
+            {"year": year, "count": len(prices), "median": round(statistics.median(prices))}
+            for year, prices in sorted(by_year.items(), reverse=True)
+        ],
+        "cheapest": _example(cheapest) if cheapest else None,
+        "most_expensive": _example(priciest) if priciest else None,
+    }
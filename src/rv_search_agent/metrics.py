@@ -0,0 +1,334 @@
+"""Prometheus-style counters and histograms for the search and agent paths.
+
+Metrics are always recorded (an increment or observation is a dict lookup,
+a lock and an add) and can be rendered in the Prometheus text exposition
+format or served over HTTP:
+
+    from rv_search_agent.metrics import start_http_server
+    start_http_server(9464)   # then scrape http://127.0.0.1:9464/metrics
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from in-memory searches to slow HTTP calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, **labels: str):
+        """Return the child metric for a set of label values.
+
+        Values are converted to strings, so ``code=200`` and ``code="200"``
+        are the same series.
+        """
+        key = tuple([str(labels[name]) for name in self.labelnames])
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Create the child holding one label set's values."""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    @abc.abstractmethod
+    def _render_child(self, key: Tuple[str, ...], child) -> List[str]:
+        """Render one child's sample lines."""
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment the counter for the given labels."""
+        self.labels(**labels).inc(amount)
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        return self.labels(**labels).value
+
+    def _render_child(self, key, child) -> List[str]:
+        labels = _format_labels(self.labelnames, key)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """A histogram of observed values with cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given labels."""
+        self.labels(**labels).observe(value)
+
+    def _render_child(self, key, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SEARCH_REQUESTS = Counter(
+    "rv_search_requests_total", "Searches by mode and outcome.",
+    ["mode", "outcome"], registry=REGISTRY,
+)
+SEARCH_LATENCY = Histogram(
+    "rv_search_latency_seconds", "Search latency by mode, including cache hits.",
+    ["mode"], registry=REGISTRY,
+)
+SERPER_REQUESTS = Counter(
+    "rv_search_serper_requests_total", "Serper API requests by site and outcome.",
+    ["site", "outcome"], registry=REGISTRY,
+)
+SERPER_LATENCY = Histogram(
+    "rv_search_serper_request_seconds", "Serper API request latency by site.",
+    ["site"], registry=REGISTRY,
+)
+SERPER_LISTINGS = Counter(
+    "rv_search_serper_listings_total", "Serper results by site and what happened to them.",
+    ["site", "result"], registry=REGISTRY,
+)
+CRAIGSLIST_REQUESTS = Counter(
+    "rv_search_craigslist_requests_total",
+    "Craigslist RSS requests by region and outcome (ok, blocked, parse_error).",
+    ["region", "outcome"], registry=REGISTRY,
+)
+AGENT_RUNS = Counter(
+    "rv_search_agent_runs_total", "Agent runs by outcome.",
+    ["outcome"], registry=REGISTRY,
+)
+AGENT_LATENCY = Histogram(
+    "rv_search_agent_run_seconds", "End-to-end agent run latency.",
+    registry=REGISTRY,
+)
+AGENT_LLM_CALLS = Counter(
+    "rv_search_agent_llm_calls_total", "Model calls made by the agent loop.",
+    registry=REGISTRY,
+)
+AGENT_LLM_LATENCY = Histogram(
+    "rv_search_agent_llm_seconds", "Model call latency by model and turn kind (tool, answer).",
+    ["model", "turn"], registry=REGISTRY,
+)
+AGENT_TOKENS = Counter(
+    "rv_search_agent_tokens_total",
+    "Model tokens used by the agent loop, by kind (input, output, cache_read, cache_write).",
+    ["kind"], registry=REGISTRY,
+)
+AGENT_BUDGET_WRAP_UPS = Counter(
+    "rv_search_agent_budget_wrap_ups_total",
+    "Agent runs asked to answer early because a budget limit was near, by limit.",
+    ["limit"], registry=REGISTRY,
+)
+AGENT_FAST_PATH = Counter(
+    "rv_search_agent_fast_path_total",
+    "Agent queries by fast path outcome (answered, fallback, error).",
+    ["outcome"], registry=REGISTRY,
+)
+AGENT_SPECULATION = Counter(
+    "rv_search_agent_speculation_total",
+    "Speculative prefetches by outcome (hit, miss, none: no guess).",
+    ["outcome"], registry=REGISTRY,
+)
+AGENT_SPECULATION_SAVED = Counter(
+    "rv_search_agent_speculation_saved_seconds_total",
+    "Search time hidden behind model calls by speculative prefetches.",
+    registry=REGISTRY,
+)
+AGENT_TOOL_CALLS = Counter(
+    "rv_search_agent_tool_calls_total", "Tool calls made by the agent loop.",
+    ["tool"], registry=REGISTRY,
+)
+WATCH_POLLS = Counter(
+    "rv_search_watch_polls_total",
+    "Saved-search feed polls by source and outcome (new, unchanged, not_modified, error).",
+    ["source", "outcome"], registry=REGISTRY,
+)
+WATCH_MATCHES = Counter(
+    "rv_search_watch_matches_total", "New listings matched by saved searches, by source.",
+    ["source"], registry=REGISTRY,
+)
+
+
+class track:
+    """Time a block into `histogram` and count it in `counter` by outcome.
+
+    The outcome defaults to "ok", or "error" if the block raises; the block
+    can override it through the yielded dict:
+
+        with track(SEARCH_REQUESTS, SEARCH_LATENCY, mode="demo") as status:
+            status["outcome"] = "cache_hit"
+    """
+
+    __slots__ = ("_counter", "_histogram", "_labels", "_status", "_start")
+
+    def __init__(self, counter: Counter, histogram: Histogram, **labels: str):
+        self._counter = counter
+        self._histogram = histogram
+        self._labels = labels
+        self._status = {"outcome": "ok"}
+
+    def __enter__(self) -> Dict[str, str]:
+        self._start = time.perf_counter()
+        return self._status
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._start
+        if exc_type is not None:
+            self._status["outcome"] = "error"
+        self._histogram.labels(**self._labels).observe(elapsed)
+        self._counter.labels(outcome=self._status["outcome"], **self._labels).inc()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        return None
+
+
+def start_http_server(port: int = 9464, host: str = "127.0.0.1",
+                      registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; returns the running server.
+
+    Pass port 0 to pick a free port (see ``server.server_address``).
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name="rv-search-metrics", daemon=True)
+    thread.start()
+    return server
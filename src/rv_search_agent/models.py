@@ -1,7 +1,30 @@
-"""Data models for RV listings."""
+"""Data models for RV listings and searches."""
 
-from dataclasses import dataclass, field
-from typing import Optional
+import sys
+import unicodedata
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .catalog import ListingCatalog
+    from .planner import QueryPlan
+
+DEFAULT_MAX_RESULTS = 20
+
+# Slotted dataclasses need Python 3.10
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def normalize_text(text: Optional[str]) -> Optional[str]:
+    """Casefold text and strip accents, e.g. "Résidence" -> "residence"."""
+    if text is None:
+        return None
+    if text.isascii():
+        return text.casefold()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
 
 
 @dataclass
@@ -62,3 +85,194 @@ class RVListing:
         location_str = self.location or "Location N/A"
 
         return f"{title} - {price_str} - {location_str}"
+
+
+# Text filters, normalized like the catalog's search keys
+_TEXT_FILTERS = ("query", "rv_type", "location", "source", "near")
+
+# (listing field, lower bound filter, upper bound filter)
+_RANGE_FILTERS = (
+    ("price", "min_price", "max_price"),
+    ("year", "min_year", "max_year"),
+    ("mileage", "min_mileage", "max_mileage"),
+)
+
+
+@dataclass(frozen=True, **_SLOTS)
+class SearchQuery:
+    """A validated set of search filters, normalized once.
+
+    Text filters are trimmed, casefolded and stripped of accents, and blank
+    ones dropped, so equivalent searches compare and hash equal and a query
+    can key a cache as is. Negative bounds, inverted ranges, a non-positive
+    ``max_results`` or ``radius_miles`` raise ValueError.
+
+    The search functions accept a SearchQuery in place of their ``query``
+    argument (see ``coerce``).
+    """
+
+    query: Optional[str] = None
+    rv_type: Optional[str] = None
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    min_year: Optional[int] = None
+    max_year: Optional[int] = None
+    min_mileage: Optional[int] = None
+    max_mileage: Optional[int] = None
+    location: Optional[str] = None
+    source: Optional[str] = None
+    max_results: int = DEFAULT_MAX_RESULTS
+    near: Optional[str] = None
+    radius_miles: Optional[float] = None
+    # All the fields as a tuple, built once: queries key caches, so they're
+    # hashed and compared often
+    _key: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        set_field = object.__setattr__
+        for name in _TEXT_FILTERS:
+            value = getattr(self, name)
+            if value is not None:
+                if not isinstance(value, str):
+                    raise TypeError(f"{name} must be a string, got {value!r}")
+                set_field(self, name, normalize_text(value.strip()) or None)
+        if self.max_results is None:
+            set_field(self, "max_results", DEFAULT_MAX_RESULTS)
+        elif self.max_results < 1:
+            raise ValueError(f"max_results must be at least 1, got {self.max_results}")
+        _check_range("min_price", self.min_price, "max_price", self.max_price)
+        _check_range("min_year", self.min_year, "max_year", self.max_year)
+        _check_range("min_mileage", self.min_mileage, "max_mileage", self.max_mileage)
+        if self.radius_miles is not None and self.radius_miles <= 0:
+            raise ValueError(f"radius_miles must be positive, got {self.radius_miles}")
+        set_field(self, "_key", _field_values(self))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SearchQuery):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    @classmethod
+    def coerce(cls, query=None, **filters) -> "SearchQuery":
+        """Build a SearchQuery from search keyword arguments.
+
+        ``query`` may already be a SearchQuery, which is returned as is;
+        filters passed with it that aren't None override its fields.
+        """
+        if isinstance(query, cls):
+            overrides = {name: value for name, value in filters.items() if value is not None}
+            return replace(query, **overrides) if overrides else query
+        return cls(query=query, **filters)
+
+    def filters(self) -> dict:
+        """Return the filters that are set, as search keyword arguments."""
+        values = ((name, getattr(self, name)) for name in _FIELD_NAMES)
+        return {name: value for name, value in values if value is not None}
+
+    def predicate(self) -> Callable[[RVListing], bool]:
+        """Return a test for whether a listing matches the filters.
+
+        Matches like a catalog search: listings missing a filtered field
+        pass. ``near`` and ``radius_miles`` need geocoding and are left to
+        ``plan``. The test is compiled once per distinct query.
+        """
+        return _compile_predicate(self)
+
+    def plan(
+        self,
+        catalog: "ListingCatalog",
+        origin: Optional[Tuple[float, float]] = None,
+        radius_miles: Optional[float] = None,
+    ) -> "QueryPlan":
+        """Plan this search over a catalog; ``origin`` is ``near`` geocoded."""
+        # Imported here: the planner depends on this module
+        from .planner import plan_search
+
+        return plan_search(
+            catalog,
+            query=self.query,
+            rv_type=self.rv_type,
+            min_price=self.min_price,
+            max_price=self.max_price,
+            min_year=self.min_year,
+            max_year=self.max_year,
+            min_mileage=self.min_mileage,
+            max_mileage=self.max_mileage,
+            location=self.location,
+            source=self.source,
+            origin=origin,
+            radius_miles=radius_miles,
+        )
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(SearchQuery) if f.compare)
+_field_values = attrgetter(*_FIELD_NAMES)
+
+
+def _check_range(low_name: str, low: Optional[int], high_name: str, high: Optional[int]) -> None:
+    for name, value in ((low_name, low), (high_name, high)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise TypeError(f"{name} must be a number, got {value!r}")
+    if low is not None and low < 0:
+        raise ValueError(f"{low_name} can't be negative, got {low}")
+    if high is not None and high < 0:
+        raise ValueError(f"{high_name} can't be negative, got {high}")
+    if low and high and low > high:
+        raise ValueError(f"{low_name} ({low}) is greater than {high_name} ({high})")
+
+
+def _contains(name: str, needle: str) -> Callable[[RVListing], bool]:
+    def test(listing: RVListing) -> bool:
+        value = getattr(listing, name)
+        return not value or needle in normalize_text(value)
+    return test
+
+
+def _at_least(name: str, low: int) -> Callable[[RVListing], bool]:
+    def test(listing: RVListing) -> bool:
+        value = getattr(listing, name)
+        return not value or value >= low
+    return test
+
+
+def _at_most(name: str, high: int) -> Callable[[RVListing], bool]:
+    def test(listing: RVListing) -> bool:
+        value = getattr(listing, name)
+        return not value or value <= high
+    return test
+
+
+@lru_cache(maxsize=256)
+def _compile_predicate(search: SearchQuery) -> Callable[[RVListing], bool]:
+    tests: List[Callable[[RVListing], bool]] = []
+    if search.query:
+        needle = search.query
+
+        def test_query(listing: RVListing) -> bool:
+            # Title, falling through to make and model as the planner does
+            if needle in normalize_text(listing.title or ""):
+                return True
+            if not listing.make or needle in normalize_text(listing.make):
+                return True
+            return not listing.model or needle in normalize_text(listing.model)
+
+        tests.append(test_query)
+    for name in ("rv_type", "location", "source"):
+        if getattr(search, name):
+            tests.append(_contains(name, getattr(search, name)))
+    for name, low_name, high_name in _RANGE_FILTERS:
+        if getattr(search, low_name):
+            tests.append(_at_least(name, getattr(search, low_name)))
+        if getattr(search, high_name):
+            tests.append(_at_most(name, getattr(search, high_name)))
+
+    def predicate(listing: RVListing) -> bool:
+        for test in tests:
+            if not test(listing):
+                return False
+        return True
+
+    return predicate
@@ -0,0 +1,346 @@
+"""Selectivity-based query planning for catalog searches."""
+
+from __future__ import annotations
+
+import heapq
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .catalog import ListingCatalog, SearchKeys
+from .models import RVListing, normalize_text
+
+# Use a posting list to drive the scan when it keeps at most this fraction
+# of the catalog; above that a full scan is about as cheap.
+INDEX_SELECTIVITY_THRESHOLD = 0.25
+
+# Title matches can't be estimated from the catalog statistics
+QUERY_SELECTIVITY = 0.1
+
+# Relative per-row cost of evaluating each kind of predicate
+RANGE_COST = 1.0
+SET_COST = 1.0
+SUBSTRING_COST = 2.0
+QUERY_COST = 4.0
+
+# Chunk sizes when full scans are executed together (see execute_batch):
+# small first, since searches with a result limit often finish early
+BATCH_FIRST_CHUNK_ROWS = 128
+BATCH_MAX_CHUNK_ROWS = 1024
+
+Entry = Tuple[RVListing, SearchKeys]
+
+
+@dataclass
+class Predicate:
+    """A single search filter with its estimated selectivity and cost."""
+
+    name: str
+    description: str
+    selectivity: float
+    cost: float
+    test: Callable[[RVListing, SearchKeys], bool] = field(repr=False)
+    rows: Optional[Callable[[], Iterable[int]]] = field(default=None, repr=False)
+
+    @property
+    def rank(self) -> float:
+        """Expected cost per row eliminated; lower ranks run first."""
+        return self.cost / max(1e-9, 1.0 - self.selectivity)
+
+
+@dataclass
+class QueryPlan:
+    """The chosen access path and predicate order for a catalog search."""
+
+    access: str
+    estimated_rows: float
+    catalog_rows: int
+    predicates: List[Predicate] = field(default_factory=list)
+    rows_examined: int = 0
+    results: List[RVListing] = field(default_factory=list)
+    candidates: Callable[[], Iterable[Entry]] = field(default=list, repr=False)
+    # Plans with equal scan keys read the same candidate rows in the same
+    # order, so execute_batch can scan them together; None if unshareable
+    scan_key: Optional[str] = field(default=None, repr=False)
+
+    def execute(self, max_results: int) -> List[RVListing]:
+        """Run the plan, recording the number of rows examined."""
+        tests = [predicate.test for predicate in self.predicates]
+        results = []
+        examined = 0
+
+        for listing, keys in self.candidates():
+            examined += 1
+            for test in tests:
+                if not test(listing, keys):
+                    break
+            else:
+                results.append(listing)
+                if len(results) >= max_results:
+                    break
+
+        self.rows_examined = examined
+        self.results = results
+        return results
+
+    def explain(self) -> str:
+        """Return a human-readable description of the plan."""
+        lines = [
+            f"Access: {self.access} "
+            f"(est. {self.estimated_rows:,.0f} of {self.catalog_rows:,} rows)",
+        ]
+        if self.predicates:
+            lines.append("Filters, in evaluation order:")
+            for i, predicate in enumerate(self.predicates, 1):
+                lines.append(
+                    f"  {i}. {predicate.description} "
+                    f"(selectivity {predicate.selectivity:.2f}, cost {predicate.cost:g})"
+                )
+        lines.append(f"Rows examined: {self.rows_examined:,}, matched: {len(self.results):,}")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.explain()
+
+
+def _index_predicate(catalog: ListingCatalog, name: str, value: str, cost: float) -> Predicate:
+    """Build a predicate on an indexed field, with exact selectivity."""
+    needle = normalize_text(value)
+    postings = catalog.postings(name)
+    values = catalog.matching_values(name, needle)
+    matched = sum(len(postings[v]) for v in values) + len(postings.get(None, ()))
+
+    if name == "location":
+        # Location keys aren't interned; a substring check avoids hashing them
+        def test(listing: RVListing, keys: SearchKeys) -> bool:
+            return not keys.location or needle in keys.location
+    else:
+        def test(listing: RVListing, keys: SearchKeys) -> bool:
+            key = getattr(keys, name)
+            return key is None or key in values
+
+    def rows() -> Iterable[int]:
+        # Merged lazily, so a search that stops early reads only a prefix
+        lists = [postings[v] for v in values]
+        if None in postings:
+            lists.append(postings[None])
+        if len(lists) == 1:
+            return lists[0]
+        return heapq.merge(*lists)
+
+    return Predicate(
+        name=name,
+        description=f"{name} contains {value!r}",
+        selectivity=matched / len(catalog) if len(catalog) else 0.0,
+        cost=cost,
+        test=test,
+        rows=rows,
+    )
+
+
+def _range_predicates(catalog: ListingCatalog, name: str, low: Optional[int],
+                      high: Optional[int]) -> List[Predicate]:
+    """Build min/max predicates on a numeric field; falsy bounds are ignored."""
+    histogram = catalog.histograms[name]
+    predicates = []
+
+    if low:
+        def test_low(listing: RVListing, keys: SearchKeys) -> bool:
+            value = getattr(listing, name)
+            return not value or value >= low
+
+        predicates.append(Predicate(
+            name=name,
+            description=f"{name} >= {low}",
+            selectivity=histogram.fraction_between(low=low),
+            cost=RANGE_COST,
+            test=test_low,
+        ))
+
+    if high:
+        def test_high(listing: RVListing, keys: SearchKeys) -> bool:
+            value = getattr(listing, name)
+            return not value or value <= high
+
+        predicates.append(Predicate(
+            name=name,
+            description=f"{name} <= {high}",
+            selectivity=histogram.fraction_between(high=high),
+            cost=RANGE_COST,
+            test=test_high,
+        ))
+
+    return predicates
+
+
+def _query_predicate(query: str) -> Predicate:
+    needle = normalize_text(query)
+
+    def test(listing: RVListing, keys: SearchKeys) -> bool:
+        # A listing matches on title, or falls through to make/model, and
+        # passes when the field it falls through to is missing.
+        if needle in keys.title:
+            return True
+        if not keys.make or needle in keys.make:
+            return True
+        return not keys.model or needle in keys.model
+
+    return Predicate(
+        name="query",
+        description=f"title/make/model contains {query!r}",
+        selectivity=QUERY_SELECTIVITY,
+        cost=QUERY_COST,
+        test=test,
+    )
+
+
+def plan_search(
+    catalog: ListingCatalog,
+    query: Optional[str] = None,
+    rv_type: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    min_mileage: Optional[int] = None,
+    max_mileage: Optional[int] = None,
+    location: Optional[str] = None,
+    source: Optional[str] = None,
+    origin: Optional[Tuple[float, float]] = None,
+    radius_miles: Optional[float] = None,
+) -> QueryPlan:
+    """Choose an access path and predicate order for a catalog search.
+
+    Predicates on indexed fields get exact selectivities from the posting
+    lists, numeric ranges are estimated from histograms. The most selective
+    indexed predicate drives the scan when it is selective enough, and the
+    remaining predicates are ordered by expected cost per row eliminated.
+    With an ``origin``, the spatial index drives the scan so results come
+    back nearest first.
+    """
+    predicates: List[Predicate] = []
+    if query:
+        predicates.append(_query_predicate(query))
+    if rv_type:
+        predicates.append(_index_predicate(catalog, "rv_type", rv_type, SET_COST))
+    predicates += _range_predicates(catalog, "price", min_price, max_price)
+    predicates += _range_predicates(catalog, "year", min_year, max_year)
+    predicates += _range_predicates(catalog, "mileage", min_mileage, max_mileage)
+    if location:
+        predicates.append(_index_predicate(catalog, "location", location, SUBSTRING_COST))
+    if source:
+        predicates.append(_index_predicate(catalog, "source", source, SET_COST))
+
+    entries = catalog.entries()
+    total = len(entries)
+
+    scan_key = None
+    if origin is not None:
+        nearby = catalog.within(origin[0], origin[1], radius_miles)
+        access = f"geo index within {radius_miles:g} miles"
+        estimated = float(len(nearby))
+
+        def candidates() -> Iterable[Entry]:
+            return (entries[row] for _, row in nearby)
+    else:
+        indexed = [p for p in predicates if p.rows is not None]
+        driver = min(indexed, key=lambda p: p.selectivity, default=None)
+        if driver is not None and driver.selectivity <= INDEX_SELECTIVITY_THRESHOLD:
+            predicates.remove(driver)
+            access = f"index on {driver.name} ({driver.description})"
+            estimated = driver.selectivity * total
+            scan_key = access
+
+            def candidates() -> Iterable[Entry]:
+                return (entries[row] for row in driver.rows())
+        else:
+            access = "full scan"
+            estimated = float(total)
+            scan_key = access
+
+            def candidates() -> Iterable[Entry]:
+                return entries
+
+    predicates.sort(key=lambda p: p.rank)
+
+    return QueryPlan(
+        access=access,
+        estimated_rows=estimated,
+        catalog_rows=total,
+        predicates=predicates,
+        candidates=candidates,
+        scan_key=scan_key,
+    )
+
+
+def _chunk_mask(test: Callable[[RVListing, SearchKeys], bool], chunk: Sequence[Entry]) -> int:
+    """Evaluate a predicate over a chunk into a bitmask; bit i is row i."""
+    bits = "".join(["1" if test(listing, keys) else "0" for listing, keys in reversed(chunk)])
+    return int(bits, 2) if bits else 0
+
+
+def execute_batch(plans: Sequence[QueryPlan], limits: Sequence[int]) -> None:
+    """Execute several plans over one catalog, sharing work between them.
+
+    Plans that scan the same candidate rows (full scans, or index scans with
+    the same driving predicate) walk them together a chunk at a time: each
+    distinct predicate is evaluated once per chunk into a bitmask shared by
+    every plan that uses it, and a plan drops out once it has ``limit``
+    results. Geo plans run on their own. Results match ``plan.execute(limit)``.
+    """
+    groups: Dict[str, List[Tuple[QueryPlan, int]]] = {}
+    for plan, limit in zip(plans, limits):
+        if plan.scan_key is None:
+            plan.execute(limit)
+        else:
+            groups.setdefault(plan.scan_key, []).append((plan, limit))
+
+    for group in groups.values():
+        if len(group) == 1:
+            plan, limit = group[0]
+            plan.execute(limit)
+        else:
+            _execute_together(group)
+
+
+def _execute_together(group: List[Tuple[QueryPlan, int]]) -> None:
+    for plan, _ in group:
+        plan.results = []
+        plan.rows_examined = 0
+    candidates = iter(group[0][0].candidates())
+    active = group
+    size = BATCH_FIRST_CHUNK_ROWS
+
+    while active:
+        chunk = list(islice(candidates, size))
+        if not chunk:
+            break
+        size = min(size * 2, BATCH_MAX_CHUNK_ROWS)
+        everything = (1 << len(chunk)) - 1
+        masks: Dict[str, int] = {}
+        remaining = []
+
+        for plan, limit in active:
+            matched = everything
+            for predicate in plan.predicates:
+                mask = masks.get(predicate.description)
+                if mask is None:
+                    mask = masks[predicate.description] = _chunk_mask(predicate.test, chunk)
+                matched &= mask
+                if not matched:
+                    break
+
+            examined = len(chunk)
+            while matched:
+                low = matched & -matched
+                row = low.bit_length() - 1
+                plan.results.append(chunk[row][0])
+                matched ^= low
+                if len(plan.results) >= limit:
+                    examined = row + 1
+                    break
+            plan.rows_examined += examined
+            if len(plan.results) < limit:
+                remaining.append((plan, limit))
+
+        active = remaining
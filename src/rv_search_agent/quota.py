@@ -0,0 +1,356 @@
+"""Persistent accounting and rate limiting for Serper API calls.
+
+Serper's free tier allows 2,500 searches a month, and every live search
+costs one call per site. ``QuotaLedger`` records each call per API key in
+a local SQLite database shared by every process on the machine, and:
+
+- enforces a token-bucket rate limit across threads and processes
+  (SQLite's write lock serializes the bucket update),
+- reports the calls left this month, so searches can degrade to cached or
+  Craigslist results before the budget runs out, and
+- keeps per-site yield (results kept vs. fetched, per make and RV type),
+  so each search queries the sites most likely to deliver listings for it
+  first and skips sites that never do (see ``QuotaLedger.schedule``).
+
+API keys are stored only as a short hash. Configure with SERPER_MONTHLY_QUOTA,
+SERPER_RATE_LIMIT (calls per second), SERPER_QUOTA_RESERVE and
+RV_SEARCH_QUOTA_DB; set RV_SEARCH_QUOTA=off to disable accounting.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import replay
+from .models import normalize_text
+
+DEFAULT_MONTHLY_LIMIT = 2500
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+# Calls held back each month; below this, live searches degrade
+DEFAULT_RESERVE = 100
+DEFAULT_PATH = os.path.join("~", ".rv-search", "quota.db")
+
+# Site scheduling estimates the listings a call will deliver. A site's
+# rate for a make/type segment is smoothed toward its rate for the make,
+# that toward its overall rate, and that toward PRIOR_KEPT_PER_CALL, so
+# sparse history doesn't decide ranks.
+PRIOR_KEPT_PER_CALL = 2.0
+PRIOR_CALLS = 2
+SEGMENT_PRIOR_CALLS = 3
+
+# Sites expected to deliver fewer than LOW_YIELD listings per call for a
+# segment, after MIN_EVIDENCE_CALLS calls for its make, are skipped; every
+# REPROBE_EVERY-th search queries them anyway in case that changed.
+LOW_YIELD = 0.5
+MIN_EVIDENCE_CALLS = 3
+REPROBE_EVERY = 10
+
+# Query words that aren't a make: years, year ranges, prices, sizes
+_NUMBER = re.compile(r"[$']?[\d.,/+-]+k?")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (key_id TEXT NOT NULL, at REAL NOT NULL, site TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS calls_by_key ON calls (key_id, at);
+CREATE TABLE IF NOT EXISTS buckets (key_id TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS site_yields (
+    site TEXT NOT NULL, make TEXT NOT NULL, rv_type TEXT NOT NULL,
+    calls INTEGER NOT NULL, fetched INTEGER NOT NULL, kept INTEGER NOT NULL,
+    skips INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (site, make, rv_type)
+);
+"""
+
+
+def key_id(api_key: str) -> str:
+    """Identify an API key in the ledger without storing it."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def yield_segment(query: Optional[str], rv_type: Optional[str]) -> Tuple[str, str]:
+    """Return the ``(make, rv_type)`` segment yields are tracked under.
+
+    The make is the query's first word after any years, prices or other
+    numbers, which is how searches name makes ("2019 Winnebago View" ->
+    "winnebago"); both parts are "" when absent.
+    """
+    words = (normalize_text(query) or "").split()
+    make = next((word for word in words if not _NUMBER.fullmatch(word)), "")
+    return (make, normalize_text(rv_type or "").strip())
+
+
+def month_start(timestamp: float) -> float:
+    """Return the start of the UTC calendar month containing ``timestamp``."""
+    now = datetime.fromtimestamp(timestamp, timezone.utc)
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class QuotaLedger:
+    """SQLite ledger of Serper calls with a shared token-bucket rate limit.
+
+    Args:
+        path: Database file, shared by all processes using the same key
+        monthly_limit: Calls allowed per API key per UTC calendar month
+        rate: Sustained calls per second, per key
+        burst: Calls allowed at once after a quiet period
+        reserve: Calls left at which ``near_exhaustion`` becomes true
+        enabled: When false, calls are neither counted nor limited. Calls
+            made while ``replay.HTTP_HARNESS`` is replaying never are
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        monthly_limit: int = DEFAULT_MONTHLY_LIMIT,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        reserve: int = DEFAULT_RESERVE,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.path = os.path.expanduser(path)
+        self.monthly_limit = monthly_limit
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.enabled = enabled
+        self._clock = clock
+        self._sleep = sleep
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "QuotaLedger":
+        """Configure from RV_SEARCH_QUOTA, RV_SEARCH_QUOTA_DB, SERPER_MONTHLY_QUOTA,
+        SERPER_RATE_LIMIT and SERPER_QUOTA_RESERVE."""
+        return cls(
+            path=os.getenv("RV_SEARCH_QUOTA_DB", DEFAULT_PATH),
+            monthly_limit=int(os.getenv("SERPER_MONTHLY_QUOTA", DEFAULT_MONTHLY_LIMIT)),
+            rate=float(os.getenv("SERPER_RATE_LIMIT", DEFAULT_RATE)),
+            reserve=int(os.getenv("SERPER_QUOTA_RESERVE", DEFAULT_RESERVE)),
+            enabled=os.getenv("RV_SEARCH_QUOTA", "true").lower() not in ("0", "false", "off"),
+        )
+
+    @property
+    def active(self) -> bool:
+        """Whether calls are counted and limited: enabled, and not replaying fixtures."""
+        return self.enabled and not replay.HTTP_HARNESS.replaying
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                 check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the database write lock, so read-modify-write
+        # of the bucket is atomic across processes
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _used(self, db: sqlite3.Connection, key: str, now: float) -> int:
+        return db.execute(
+            "SELECT COUNT(*) FROM calls WHERE key_id = ? AND at >= ?", (key, month_start(now)),
+        ).fetchone()[0]
+
+    def acquire(self, api_key: str, site: str) -> bool:
+        """Wait for a rate-limit token and record one call.
+
+        Returns False, without recording anything, if the key's monthly
+        budget is used up.
+        """
+        if not self.active:
+            return True
+        key = key_id(api_key)
+        while True:
+            with self._transaction() as db:
+                now = self._clock()
+                if self._used(db, key, now) >= self.monthly_limit:
+                    return False
+                row = db.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key_id = ?", (key,),
+                ).fetchone()
+                tokens = self.burst if row is None else min(
+                    self.burst, row[0] + max(0.0, now - row[1]) * self.rate,
+                )
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0.0
+                    db.execute("INSERT INTO calls VALUES (?, ?, ?)", (key, now, site))
+                else:
+                    wait = (1 - tokens) / self.rate
+                db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (key, tokens, now))
+            if wait <= 0:
+                return True
+            self._sleep(wait)
+
+    def used(self, api_key: str) -> int:
+        """Calls recorded for a key this month."""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._used(self._connect(), key_id(api_key), self._clock())
+
+    def remaining(self, api_key: str) -> int:
+        """Calls left for a key this month."""
+        return max(0, self.monthly_limit - self.used(api_key))
+
+    def near_exhaustion(self, api_key: str) -> bool:
+        """Whether the key is down to its reserve of calls this month."""
+        return self.active and self.remaining(api_key) <= self.reserve
+
+    def record_yield(self, site: str, fetched: int, kept: int,
+                     segment: Tuple[str, str] = ("", "")) -> None:
+        """Add one call's fetched and kept result counts to a site's yield."""
+        if not self.active:
+            return
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO site_yields (site, make, rv_type, calls, fetched, kept) "
+                "VALUES (?, ?, ?, 1, ?, ?) ON CONFLICT (site, make, rv_type) DO UPDATE "
+                "SET calls = calls + 1, fetched = fetched + excluded.fetched, "
+                "kept = kept + excluded.kept",
+                (site, *segment, fetched, kept),
+            )
+
+    def site_yields(self) -> Dict[str, Tuple[int, int]]:
+        """Return ``{site: (fetched, kept)}`` over all recorded calls."""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT site, SUM(fetched), SUM(kept) FROM site_yields GROUP BY site"
+            )
+            return {site: (fetched, kept) for site, fetched, kept in rows}
+
+    def segment_yields(self) -> List[dict]:
+        """Return per-site, per-segment call, fetched and kept counts."""
+        if not self.enabled:
+            return []
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT site, make, rv_type, calls, fetched, kept, skips FROM site_yields "
+                "ORDER BY make, rv_type, site"
+            ).fetchall()
+        columns = ("site", "make", "rv_type", "calls", "fetched", "kept", "skips")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def order_sites(self, sites: Sequence[str]) -> List[str]:
+        """Order sites by historical yield, best first.
+
+        Yield is smoothed toward 1/2, so sites without history sit in the
+        middle and a few results don't decide a site's rank.
+        """
+        yields = self.site_yields()
+
+        def score(site: str) -> float:
+            fetched, kept = yields.get(site, (0, 0))
+            return (kept + 1) / (fetched + 2)
+        return sorted(sites, key=score, reverse=True)
+
+    def schedule(self, sites: Sequence[str], segment: Tuple[str, str] = ("", "")) -> List[str]:
+        """Return the sites to query for a segment, most listings per call first.
+
+        Sites proven to deliver (almost) nothing for the segment are left
+        out, except on every ``REPROBE_EVERY``-th search.
+        """
+        if not self.active:
+            return list(sites)
+        with self._transaction() as db:
+            overall: Dict[str, Tuple[int, int]] = {}
+            for site, calls, kept in db.execute(
+                "SELECT site, SUM(calls), SUM(kept) FROM site_yields GROUP BY site"
+            ):
+                overall[site] = (calls, kept)
+            by_make: Dict[str, Tuple[int, int]] = {}
+            for site, calls, kept in db.execute(
+                "SELECT site, SUM(calls), SUM(kept) FROM site_yields WHERE make = ? GROUP BY site",
+                (segment[0],),
+            ):
+                by_make[site] = (calls, kept)
+            own = {
+                site: (calls, kept, skips)
+                for site, calls, kept, skips in db.execute(
+                    "SELECT site, calls, kept, skips FROM site_yields "
+                    "WHERE make = ? AND rv_type = ?", segment,
+                )
+            }
+
+            expected: Dict[str, float] = {}
+            scheduled = []
+            for site in sites:
+                calls, kept = overall.get(site, (0, 0))
+                rate = (kept + PRIOR_KEPT_PER_CALL * PRIOR_CALLS) / (calls + PRIOR_CALLS)
+                make_calls, kept = by_make.get(site, (0, 0))
+                rate = (kept + rate * SEGMENT_PRIOR_CALLS) / (make_calls + SEGMENT_PRIOR_CALLS)
+                calls, kept, skips = own.get(site, (0, 0, 0))
+                expected[site] = (kept + rate * SEGMENT_PRIOR_CALLS) / (calls + SEGMENT_PRIOR_CALLS)
+                if make_calls >= MIN_EVIDENCE_CALLS and expected[site] < LOW_YIELD:
+                    skips += 1
+                    probe = skips >= REPROBE_EVERY
+                    db.execute(
+                        "INSERT INTO site_yields VALUES (?, ?, ?, 0, 0, 0, ?) "
+                        "ON CONFLICT (site, make, rv_type) DO UPDATE SET skips = excluded.skips",
+                        (site, *segment, 0 if probe else skips),
+                    )
+                    if not probe:
+                        continue
+                scheduled.append(site)
+        return sorted(scheduled, key=lambda site: expected[site], reverse=True)
+
+    def usage(self) -> List[dict]:
+        """Report this month's calls per key, with per-site counts."""
+        if not self.enabled:
+            return []
+        with self._lock:
+            db = self._connect()
+            start = month_start(self._clock())
+            rows = db.execute(
+                "SELECT key_id, site, COUNT(*), MAX(at) FROM calls WHERE at >= ? "
+                "GROUP BY key_id, site ORDER BY key_id, site", (start,),
+            ).fetchall()
+        report: Dict[str, dict] = {}
+        for key, site, calls, last in rows:
+            entry = report.setdefault(key, {"key_id": key, "used": 0, "last_call": 0.0, "sites": {}})
+            entry["used"] += calls
+            entry["last_call"] = max(entry["last_call"], last)
+            entry["sites"][site] = calls
+        for entry in report.values():
+            entry["remaining"] = max(0, self.monthly_limit - entry["used"])
+        return list(report.values())
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Shared ledger used by every Serper request
+SERPER_QUOTA = QuotaLedger.from_env()
@@ -0,0 +1,311 @@
+"""Record and replay HTTP traffic for offline tests and benchmarks.
+
+Every HTTP client the search paths create comes from ``http_client``. By
+default that is a plain ``httpx.Client``. The shared ``HTTP_HARNESS`` can
+switch it to one of two modes:
+
+- record: requests go to the network, and each request/response pair is
+  also written to a fixture directory;
+- replay: responses are served from the fixtures, with no network. Optional
+  injected latency and error rates let the concurrency, caching and error
+  handling of the live paths be measured deterministically.
+
+Select a mode with RV_SEARCH_HTTP=record|replay and RV_SEARCH_HTTP_FIXTURES=DIR
+(plus RV_SEARCH_HTTP_LATENCY, RV_SEARCH_HTTP_ERROR_RATE and RV_SEARCH_HTTP_SEED),
+or the CLI's --record / --replay flags.
+
+Fixtures are keyed on method, URL and body. Request headers, which carry
+API keys, are never stored. Repeated identical requests replay the recorded
+responses in order, repeating the last one, so a recorded 200-then-304
+poll sequence replays the same way.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import httpx
+
+DEFAULT_FIXTURES = "http-fixtures"
+
+# Response headers not replayed: bodies are stored decoded, and cookies
+# aren't fixtures
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+class FixtureNotFound(httpx.TransportError):
+    """Replay mode got a request that was never recorded."""
+
+
+class FixtureStore:
+    """A directory of recorded responses, one JSON file per distinct request."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._recorded: Dict[str, List[dict]] = {}
+        self._replayed: Dict[str, int] = {}
+
+    @staticmethod
+    def key(request: httpx.Request) -> str:
+        """Identify a request by method, URL and body."""
+        digest = hashlib.sha256()
+        for part in (request.method.encode(), str(request.url).encode(), request.content):
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()[:20]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def record(self, request: httpx.Request, response: httpx.Response, elapsed: float) -> None:
+        """Append a response to the request's fixture.
+
+        A request's first response in this process replaces older fixtures.
+        """
+        key = self.key(request)
+        try:
+            body = {"text": response.content.decode("utf-8")}
+        except UnicodeDecodeError:
+            body = {"base64": base64.b64encode(response.content).decode("ascii")}
+        entry = {
+            "status": response.status_code,
+            "headers": [[name, value] for name, value in response.headers.items()
+                        if name.lower() not in _DROPPED_HEADERS],
+            "elapsed": round(elapsed, 4),
+            **body,
+        }
+        with self._lock:
+            responses = self._recorded.setdefault(key, [])
+            responses.append(entry)
+            fixture = {
+                "request": {
+                    "method": request.method,
+                    "url": str(request.url),
+                    "body": request.content.decode("utf-8", "replace"),
+                },
+                "responses": responses,
+            }
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(fixture, f, indent=1)
+            os.replace(tmp_path, self._path(key))
+
+    def next_response(self, request: httpx.Request) -> dict:
+        """Return the next recorded response for a request."""
+        key = self.key(request)
+        try:
+            with open(self._path(key)) as f:
+                responses = json.load(f)["responses"]
+        except FileNotFoundError:
+            raise FixtureNotFound(
+                f"No recorded response for {request.method} {request.url} in {self.directory}",
+                request=request,
+            )
+        with self._lock:
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+        return responses[min(index, len(responses) - 1)]
+
+    def rewind(self) -> None:
+        """Replay every fixture from its first response again."""
+        with self._lock:
+            self._replayed.clear()
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Send requests through ``inner`` and record the responses."""
+
+    def __init__(self, store: FixtureStore, inner: Optional[httpx.BaseTransport] = None):
+        self.store = store
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = self.inner.handle_request(request)
+        content = response.read()
+        self.store.record(request, response, time.perf_counter() - start)
+        # The body was read (and decoded) above
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in _DROPPED_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=content,
+                              request=request)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serve recorded responses, with injected latency and errors.
+
+    Args:
+        store: Recorded fixtures
+        latency: Seconds added to every response, or "recorded" to wait as
+            long as the original response took
+        error_rate: Fraction of requests that fail
+        error_status: Status code of injected failures; None raises
+            ``httpx.ConnectError`` instead, like a network failure
+        rng: Random source for injected errors (seed it for repeatable runs)
+    """
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        latency: Union[float, str] = 0.0,
+        error_rate: float = 0.0,
+        error_status: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.store = store
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = rng or random.Random()
+        self._rng_lock = threading.Lock()
+        self._sleep = sleep
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._rng_lock:
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        entry = self.store.next_response(request)
+        delay = entry.get("elapsed", 0.0) if self.latency == "recorded" else float(self.latency)
+        if delay > 0:
+            self._sleep(delay)
+        if fail:
+            if self.error_status is None:
+                raise httpx.ConnectError("Injected connection failure", request=request)
+            return httpx.Response(self.error_status, request=request)
+        if "base64" in entry:
+            content = base64.b64decode(entry["base64"])
+        else:
+            content = entry["text"].encode("utf-8")
+        return httpx.Response(entry["status"], headers=entry["headers"], content=content,
+                              request=request)
+
+
+class HttpHarness:
+    """Chooses how ``http_client`` reaches the network: directly, recording, or replaying.
+
+    Args:
+        mode: "live", "record" or "replay"
+        fixtures: Fixture directory for record and replay
+        latency: Replay latency in seconds, or "recorded"
+        error_rate: Fraction of replayed requests that fail
+        error_status: Status of injected failures (None: connection errors)
+        seed: Seed for injected errors
+    """
+
+    MODES = ("live", "record", "replay")
+
+    def __init__(
+        self,
+        mode: str = "live",
+        fixtures: str = DEFAULT_FIXTURES,
+        latency: Union[float, str] = 0.0,
+        error_rate: float = 0.0,
+        error_status: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.configure(mode, fixtures, latency, error_rate, error_status, seed)
+
+    @classmethod
+    def from_env(cls, lazy: bool = False) -> "HttpHarness":
+        """Configure from RV_SEARCH_HTTP, RV_SEARCH_HTTP_FIXTURES, RV_SEARCH_HTTP_LATENCY,
+        RV_SEARCH_HTTP_ERROR_RATE, RV_SEARCH_HTTP_ERROR_STATUS and RV_SEARCH_HTTP_SEED.
+
+        With ``lazy``, the variables are read on first use, so a bad value
+        fails the search that needs the harness rather than the import.
+        Invalid values raise SearchAPIError.
+        """
+        harness = cls()
+        if lazy:
+            harness._from_env = True
+        else:
+            harness._configure_from_env()
+        return harness
+
+    def _configure_from_env(self) -> None:
+        from .search_api import SearchAPIError
+
+        def number(name: str, default: str, parse: Callable = float):
+            value = os.getenv(name, default)
+            try:
+                return parse(value) if value else None
+            except ValueError:
+                raise SearchAPIError(f"Invalid {name}: {value!r}")
+
+        latency = os.getenv("RV_SEARCH_HTTP_LATENCY", "0")
+        try:
+            self.configure(
+                mode=os.getenv("RV_SEARCH_HTTP", "live").lower(),
+                fixtures=os.getenv("RV_SEARCH_HTTP_FIXTURES", DEFAULT_FIXTURES),
+                latency=latency if latency == "recorded" else number("RV_SEARCH_HTTP_LATENCY", "0"),
+                error_rate=number("RV_SEARCH_HTTP_ERROR_RATE", "0"),
+                error_status=number("RV_SEARCH_HTTP_ERROR_STATUS", "", int),
+                seed=number("RV_SEARCH_HTTP_SEED", "", int),
+            )
+        except ValueError as e:
+            raise SearchAPIError(f"Invalid RV_SEARCH_HTTP settings: {e}")
+
+    def configure(
+        self,
+        mode: str = "live",
+        fixtures: str = DEFAULT_FIXTURES,
+        latency: Union[float, str] = 0.0,
+        error_rate: float = 0.0,
+        error_status: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Switch mode; replay counters and the error sequence start over."""
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown HTTP mode {mode!r} (expected one of {', '.join(self.MODES)})")
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.mode = mode
+        self.store = FixtureStore(fixtures)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._from_env = False
+
+    def _settle(self) -> None:
+        if self._from_env:
+            self._configure_from_env()
+
+    @property
+    def replaying(self) -> bool:
+        self._settle()
+        return self.mode == "replay"
+
+    def transport(self, inner: Optional[httpx.BaseTransport] = None) -> Optional[httpx.BaseTransport]:
+        """Return a transport for a new client, or None to use httpx's default."""
+        self._settle()
+        if self.mode == "record":
+            return RecordingTransport(self.store, inner)
+        if self.mode == "replay":
+            return ReplayTransport(self.store, self.latency, self.error_rate,
+                                   self.error_status, self._rng)
+        return None
+
+
+# Shared harness used by every HTTP client the search paths create,
+# configured from the environment on first use
+HTTP_HARNESS = HttpHarness.from_env(lazy=True)
+
+
+def http_client(**kwargs) -> httpx.Client:
+    """Create an ``httpx.Client`` that goes through ``HTTP_HARNESS``."""
+    transport = HTTP_HARNESS.transport()
+    if transport is not None:
+        kwargs["transport"] = transport
+    return httpx.Client(**kwargs)
@@ -4,13 +4,31 @@ from __future__ import annotations
 
 import os
 import re
+import sys
 import xml.etree.ElementTree as ET
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 from urllib.parse import urlencode
 
 import httpx
 
-from .models import RVListing
+from . import quota
+from .cache import SEARCH_CACHE
+from .catalog import ListingCatalog
+from .metrics import (
+    CRAIGSLIST_REQUESTS,
+    SEARCH_LATENCY,
+    SEARCH_REQUESTS,
+    SERPER_LATENCY,
+    SERPER_LISTINGS,
+    SERPER_REQUESTS,
+    track,
+)
+from .models import RVListing, SearchQuery
+from .planner import QueryPlan
+from .replay import http_client
+from .seen import SeenSet
+from .suggest import Suggestion
+from .tracing import count, span
 
 
 class SearchAPIError(Exception):
@@ -18,6 +36,10 @@ class SearchAPIError(Exception):
     pass
 
 
+class QuotaExhausted(SearchAPIError):
+    """The Serper API key has used its monthly call budget."""
+
+
 # Sample data for demo mode
 DEMO_LISTINGS = [
     # Storyteller Overland - Dealer listings
@@ -484,6 +506,12 @@ DEMO_LISTINGS = [
     ),
 ]
 
+# Demo listings with search keys precomputed at import time
+DEMO_CATALOG = ListingCatalog(DEMO_LISTINGS)
+
+# Radius used when `near` is given without `radius_miles`
+DEFAULT_RADIUS_MILES = 100
+
 
 # Craigslist regions
 CRAIGSLIST_REGIONS = {
@@ -506,8 +534,16 @@ CRAIGSLIST_REGIONS = {
 }
 
 
+def _search_query(query: Union[str, SearchQuery, None] = None, **filters) -> SearchQuery:
+    """Build the SearchQuery for a search's arguments, raising SearchAPIError if invalid."""
+    try:
+        return SearchQuery.coerce(query, **filters)
+    except (TypeError, ValueError) as e:
+        raise SearchAPIError(f"Invalid search: {e}")
+
+
 def search_rv_listings(
-    query: Optional[str] = None,
+    query: Union[str, SearchQuery, None] = None,
     rv_type: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
@@ -517,16 +553,22 @@ def search_rv_listings(
     max_mileage: Optional[int] = None,
     location: Optional[str] = None,
     source: Optional[str] = None,
-    max_results: int = 20,
+    max_results: Optional[int] = None,
     demo_mode: Optional[bool] = None,
-) -> List[RVListing]:
+    near: Optional[str] = None,
+    radius_miles: Optional[float] = None,
+    explain: bool = False,
+    seen: Optional[SeenSet] = None,
+) -> Union[List[RVListing], QueryPlan]:
     """
     Search for RV listings.
 
     Uses demo data by default, or Craigslist RSS feeds when DEMO_MODE=false.
 
     Args:
-        query: Search query (e.g., "Winnebago", "Storyteller Overland")
+        query: Search query (e.g., "Winnebago", "Storyteller Overland"), or
+            a SearchQuery holding all the filters (filters also passed here
+            override its fields)
         rv_type: Type of RV (e.g., "Class A", "Class B", "Class C")
         min_price: Minimum price filter
         max_price: Maximum price filter
@@ -538,43 +580,92 @@ def search_rv_listings(
         source: Filter by source (e.g., "Dealer", "Facebook Marketplace")
         max_results: Maximum number of results (default 20)
         demo_mode: Force demo mode on/off (default: auto-detect)
+        near: Only return listings near this place (e.g. "Denver, CO"),
+            nearest first
+        radius_miles: Search radius around ``near`` (default 100)
+        explain: Return the executed QueryPlan (with ``results`` and
+            ``rows_examined``) instead of the listings; demo mode only
+        seen: Only return Craigslist listings whose URLs aren't in this
+            SeenSet, recording the new ones (bypasses the cache); not
+            supported in demo mode
 
     Returns:
-        List of RVListing objects
+        List of RVListing objects, or a QueryPlan when ``explain`` is set
     """
+    search = _search_query(
+        query,
+        rv_type=rv_type,
+        min_price=min_price,
+        max_price=max_price,
+        min_year=min_year,
+        max_year=max_year,
+        min_mileage=min_mileage,
+        max_mileage=max_mileage,
+        location=location,
+        source=source,
+        max_results=max_results,
+        near=near,
+        radius_miles=radius_miles,
+    )
+
     # Determine if we should use demo mode
     if demo_mode is None:
         demo_mode = os.getenv("DEMO_MODE", "true").lower() != "false"
 
-    if demo_mode:
-        return _search_demo(
-            query=query,
-            rv_type=rv_type,
-            min_price=min_price,
-            max_price=max_price,
-            min_year=min_year,
-            max_year=max_year,
-            min_mileage=min_mileage,
-            max_mileage=max_mileage,
-            location=location,
-            source=source,
-            max_results=max_results,
-        )
-    else:
-        return _search_craigslist(
-            query=query,
-            rv_type=rv_type,
-            min_price=min_price,
-            max_price=max_price,
-            min_year=min_year,
-            max_year=max_year,
-            location=location,
-            max_results=max_results,
+    if explain and not demo_mode:
+        raise SearchAPIError("explain is only supported for demo catalog searches")
+    if seen is not None and demo_mode:
+        raise SearchAPIError("seen is only supported for Craigslist and live searches")
+
+    mode = "demo" if demo_mode else "craigslist"
+    with track(SEARCH_REQUESTS, SEARCH_LATENCY, mode=mode) as status:
+        # Repeated searches are served from the result cache. Demo keys include
+        # the catalog version so catalog changes invalidate them.
+        namespace = ("demo", DEMO_CATALOG.version) if demo_mode else mode
+        cache_key = (namespace, search)
+        if not explain and seen is None:
+            cached = SEARCH_CACHE.get(cache_key)
+            if cached is not None:
+                count("cache.hits")
+                status["outcome"] = "cache_hit"
+                return list(cached)
+            count("cache.misses")
+
+        if demo_mode:
+            results = _search_demo(search, explain=explain)
+            if explain:
+                return results
+        else:
+            results = _search_craigslist(search, seen=seen)
+            if seen is not None:
+                return results
+
+        SEARCH_CACHE.put(cache_key, tuple(results))
+        return results
+
+
+def _resolve_origin(
+    catalog: ListingCatalog,
+    near: Optional[str],
+    radius_miles: Optional[float],
+) -> Tuple[Optional[Tuple[float, float]], Optional[float]]:
+    """Geocode ``near`` and apply the default radius."""
+    if not near:
+        if radius_miles is not None:
+            raise SearchAPIError("radius_miles requires near")
+        return None, None
+    origin = catalog.gazetteer.geocode(near)
+    if origin is None:
+        raise SearchAPIError(
+            f"Unknown location '{near}'. Try a city and state like 'Denver, CO'."
         )
+    if radius_miles is None:
+        radius_miles = DEFAULT_RADIUS_MILES
+    return origin, radius_miles
 
 
 def _search_demo(
-    query: Optional[str] = None,
+    query: Union[str, SearchQuery, None] = None,
     rv_type: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
@@ -584,67 +675,126 @@ def _search_demo(
     max_mileage: Optional[int] = None,
     location: Optional[str] = None,
     source: Optional[str] = None,
-    max_results: int = 20,
-) -> List[RVListing]:
-    """Search demo listings with filters."""
-    results = []
-
-    for listing in DEMO_LISTINGS:
-        # Apply filters
-        if query and query.lower() not in listing.title.lower():
-            if listing.make and query.lower() not in listing.make.lower():
-                if listing.model and query.lower() not in listing.model.lower():
-                    continue
+    max_results: Optional[int] = None,
+    catalog: Optional[ListingCatalog] = None,
+    near: Optional[str] = None,
+    radius_miles: Optional[float] = None,
+    explain: bool = False,
+) -> Union[List[RVListing], QueryPlan]:
+    """Search demo listings with filters.
+
+    Filters are ordered by a query planner using the catalog statistics;
+    with ``explain=True`` the executed QueryPlan is returned instead.
+    """
+    search = _search_query(
+        query,
+        rv_type=rv_type,
+        min_price=min_price,
+        max_price=max_price,
+        min_year=min_year,
+        max_year=max_year,
+        min_mileage=min_mileage,
+        max_mileage=max_mileage,
+        location=location,
+        source=source,
+        max_results=max_results,
+        near=near,
+        radius_miles=radius_miles,
+    )
+    if catalog is None:
+        catalog = DEMO_CATALOG
 
-        if rv_type and listing.rv_type:
-            if rv_type.lower() not in listing.rv_type.lower():
-                continue
+    origin, radius_miles = _resolve_origin(catalog, search.near, search.radius_miles)
 
-        if min_price and listing.price and listing.price < min_price:
-            continue
+    with span("search.plan"):
+        plan = search.plan(catalog, origin, radius_miles)
+    with span("search.execute", access=plan.access):
+        plan.execute(search.max_results)
+    count("search.rows_examined", plan.rows_examined)
+    count("search.rows_matched", len(plan.results))
+    return plan if explain else plan.results
 
-        if max_price and listing.price and listing.price > max_price:
-            continue
 
-        if min_year and listing.year and listing.year < min_year:
-            continue
+def find_similar(
+    listing_or_url: Union[RVListing, str],
+    k: int = 10,
+    catalog: Optional[ListingCatalog] = None,
+) -> List[RVListing]:
+    """
+    Find the catalog listings most like a listing.
+
+    Listings are compared by TF-IDF cosine over their title and description
+    words, make, model, type and numeric fields, using the catalog's
+    similarity index (built on first use).
 
-        if max_year and listing.year and listing.year > max_year:
-            continue
+    Args:
+        listing_or_url: A listing, or the URL of one in the catalog
+        k: Maximum number of listings to return
+        catalog: Catalog to search (default: the demo catalog)
 
-        if min_mileage and listing.mileage and listing.mileage < min_mileage:
-            continue
+    Returns:
+        Up to ``k`` listings, most similar first, without the listing itself
+    """
+    if k < 1:
+        raise SearchAPIError("k must be at least 1")
+    if catalog is None:
+        catalog = DEMO_CATALOG
+    with span("search.similar"):
+        index = catalog.similarity_index()
+        try:
+            found = index.similar(listing_or_url, k)
+        except KeyError:
+            raise SearchAPIError(f"No listing with URL '{listing_or_url}' in the catalog")
+    count("search.similar_results", len(found))
+    return [listing for _, listing in found]
+
+
+def suggest(
+    prefix: str,
+    k: int = 10,
+    catalog: Optional[ListingCatalog] = None,
+) -> List[Suggestion]:
+    """
+    Complete a make, model or location for a search box.
 
-        if max_mileage and listing.mileage and listing.mileage > max_mileage:
-            continue
+    Uses the catalog's autocomplete index (built on first use) rather than
+    a search, so it's cheap enough to call on every keystroke.
 
-        if location and listing.location:
-            if location.lower() not in listing.location.lower():
-                continue
+    Args:
+        prefix: What has been typed so far; matches the start of any word,
+            ignoring case and accents
+        k: Maximum number of suggestions
+        catalog: Catalog to complete from (default: the demo catalog)
 
-        if source and listing.source:
-            if source.lower() not in listing.source.lower():
-                continue
+    Returns:
+        Up to ``k`` Suggestions (text, kind, count), most listings first
+    """
+    if k < 1:
+        raise SearchAPIError("k must be at least 1")
+    if catalog is None:
+        catalog = DEMO_CATALOG
+    with span("search.suggest"):
+        return catalog.suggest_index().suggest(prefix, k)
 
-        results.append(listing)
 
-        if len(results) >= max_results:
-            break
+# Craigslist RSS search endpoint, per region
+CRAIGSLIST_URL = "https://{region}.craigslist.org/search/rva"
 
-    return results
+CRAIGSLIST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "application/rss+xml, application/xml, text/xml, */*",
+}
 
 
-def _search_craigslist(
+def _craigslist_feed_url(
     query: Optional[str] = None,
     rv_type: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
     min_year: Optional[int] = None,
-    max_year: Optional[int] = None,
     location: Optional[str] = None,
-    max_results: int = 20,
-) -> List[RVListing]:
-    """Search Craigslist RSS feeds (works from home IPs, may be blocked from cloud)."""
+) -> Tuple[str, str]:
+    """Return the region and RSS feed URL for a search."""
     region = _get_region(location)
 
     # Build search query
@@ -659,7 +809,7 @@ def _search_craigslist(
     search_query = " ".join(search_terms) if search_terms else ""
 
     # Build RSS feed URL
-    base_url = f"https://{region}.craigslist.org/search/rva"
+    base_url = CRAIGSLIST_URL.format(region=region)
     params = {"format": "rss"}
 
     if search_query:
@@ -669,30 +819,81 @@ def _search_craigslist(
     if max_price:
         params["max_price"] = max_price
 
-    url = f"{base_url}?{urlencode(params)}"
+    return region, f"{base_url}?{urlencode(params)}"
+
 
+def _fetch_craigslist(client: httpx.Client, region: str, url: str) -> str:
+    """Fetch a Craigslist RSS feed, raising SearchAPIError when blocked."""
     try:
-        with httpx.Client(
-            timeout=30,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-                "Accept": "application/rss+xml, application/xml, text/xml, */*",
-            }
-        ) as client:
+        with span("craigslist.http", region=region):
             response = client.get(url)
             response.raise_for_status()
-            return _parse_rss_feed(response.text, max_results, min_year, max_year)
+        return response.text
     except httpx.HTTPError as e:
+        CRAIGSLIST_REQUESTS.inc(region=region, outcome="blocked")
         raise SearchAPIError(
             f"Craigslist blocked the request (common from cloud servers). "
             f"Try running from your home network with DEMO_MODE=false, or use demo mode. "
             f"Error: {e}"
         )
+
+
+def _parse_craigslist(
+    region: str,
+    xml_content: str,
+    max_results: int,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    seen: Optional[SeenSet] = None,
+) -> List[RVListing]:
+    """Parse a fetched feed, raising SearchAPIError if it isn't valid RSS."""
+    try:
+        with span("craigslist.parse"):
+            return _parse_rss_feed(xml_content, max_results, min_year, max_year, seen)
     except ET.ParseError as e:
+        CRAIGSLIST_REQUESTS.inc(region=region, outcome="parse_error")
         raise SearchAPIError(f"Failed to parse RSS feed: {e}")
 
 
+def _search_craigslist(
+    query: Union[str, SearchQuery, None] = None,
+    rv_type: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    location: Optional[str] = None,
+    max_results: Optional[int] = None,
+    seen: Optional[SeenSet] = None,
+) -> List[RVListing]:
+    """Search Craigslist RSS feeds (works from home IPs, may be blocked from cloud).
+
+    Craigslist has no radius search; a query's ``near`` picks the region
+    when it has no ``location``.
+    """
+    search = _search_query(
+        query,
+        rv_type=rv_type,
+        min_price=min_price,
+        max_price=max_price,
+        min_year=min_year,
+        max_year=max_year,
+        location=location,
+        max_results=max_results,
+    )
+    region, url = _craigslist_feed_url(
+        search.query, search.rv_type, search.min_price, search.max_price, search.min_year,
+        search.location or search.near,
+    )
+    with http_client(timeout=30, follow_redirects=True, headers=CRAIGSLIST_HEADERS) as client:
+        xml_content = _fetch_craigslist(client, region, url)
+    listings = _parse_craigslist(
+        region, xml_content, search.max_results, search.min_year, search.max_year, seen,
+    )
+    CRAIGSLIST_REQUESTS.inc(region=region, outcome="ok")
+    return listings
+
+
 def _get_region(location: Optional[str]) -> str:
     """Convert location string to Craigslist region code."""
     if not location:
@@ -719,23 +920,47 @@ def _parse_rss_feed(
     max_results: int,
     min_year: Optional[int] = None,
     max_year: Optional[int] = None,
+    seen: Optional[SeenSet] = None,
 ) -> List[RVListing]:
-    """Parse Craigslist RSS feed XML into RVListing objects."""
+    """Parse Craigslist RSS feed XML into RVListing objects.
+
+    With a ``seen`` set, items whose URL was already seen are skipped
+    before parsing, and the URLs of parsed items are recorded.
+    """
     listings = []
-    root = ET.fromstring(xml_content)
+    with span("rss.xml"):
+        root = ET.fromstring(xml_content)
     items = root.findall(".//item")
+    parsed = 0
+    filtered = 0
+    skipped = 0
 
-    for item in items[:max_results * 2]:
+    for item in items:
+        if parsed >= max_results * 2:
+            break
+        if seen is not None:
+            url = (item.findtext("link") or "").strip()
+            if url and not seen.add(url):
+                skipped += 1
+                continue
         listing = _parse_rss_item(item)
+        parsed += 1
         if listing:
             if min_year and listing.year and listing.year < min_year:
+                filtered += 1
                 continue
             if max_year and listing.year and listing.year > max_year:
+                filtered += 1
                 continue
             listings.append(listing)
             if len(listings) >= max_results:
                 break
 
+    count("rss.items", len(items))
+    count("rss.seen", skipped)
+    count("rss.parsed", parsed)
+    count("rss.filtered", filtered)
+    count("rss.kept", len(listings))
     return listings
 
 
@@ -821,24 +1046,32 @@ def get_available_regions() -> dict:
     return CRAIGSLIST_REGIONS.copy()
 
 
-def _search_serper(
-    query: Optional[str] = None,
-    rv_type: Optional[str] = None,
-    min_price: Optional[int] = None,
-    max_price: Optional[int] = None,
-    min_year: Optional[int] = None,
-    max_year: Optional[int] = None,
-    location: Optional[str] = None,
-    max_results: int = 20,
-) -> List[RVListing]:
-    """Search for RV listings using Serper API (Google Search)."""
+# Sites searched through Serper, one request per site
+SERPER_SITES = ["rvtrader.com", "facebook.com/marketplace", "craigslist.org", "conejorv.com"]
+
+SERPER_URL = "https://google.serper.dev/search"
+
+# Phrases marking sold or inactive listings in Serper results
+INACTIVE_KEYWORDS = ["sold", "pending", "unavailable", "no longer available",
+                     "listing has ended", "this listing is no longer", "item sold"]
+
+
+def _serper_api_key() -> str:
     api_key = os.getenv("SERPER_API_KEY")
     if not api_key:
         raise SearchAPIError(
             "SERPER_API_KEY not set. Get a free key at https://serper.dev"
         )
+    return api_key
 
-    # Build search query
+
+def _serper_query(
+    query: Optional[str] = None,
+    rv_type: Optional[str] = None,
+    min_year: Optional[int] = None,
+    location: Optional[str] = None,
+) -> str:
+    """Build the Google query shared by all sites (without the site: prefix)."""
     search_parts = []
     if query:
         search_parts.append(query)
@@ -858,59 +1091,167 @@ def _search_serper(
     if location:
         search_parts.append(location)
 
-    search_query = " ".join(search_parts)
+    return " ".join(search_parts)
 
-    # Search multiple sites
-    sites = ["rvtrader.com", "facebook.com/marketplace", "craigslist.org", "conejorv.com"]
-    all_listings = []
 
-    for site in sites:
-        site_query = f"site:{site} {search_query}"
+def _fetch_serper(client: httpx.Client, api_key: str, site: str, search_query: str,
+                  num: int) -> List[dict]:
+    """Fetch organic Serper results for one site; raises httpx.HTTPError.
 
-        try:
-            with httpx.Client(timeout=30) as client:
-                response = client.post(
-                    "https://google.serper.dev/search",
-                    headers={
-                        "X-API-KEY": api_key,
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "q": site_query,
-                        "num": min(max_results, 10),
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                for result in data.get("organic", []):
-                    # Skip sold/inactive listings
-                    title_lower = result.get("title", "").lower()
-                    snippet_lower = result.get("snippet", "").lower()
-                    combined_text = f"{title_lower} {snippet_lower}"
-
-                    inactive_keywords = ["sold", "pending", "unavailable", "no longer available",
-                                        "listing has ended", "this listing is no longer", "item sold"]
-                    if any(keyword in combined_text for keyword in inactive_keywords):
-                        continue
-
-                    listing = _parse_serper_result(result, site)
-                    if listing:
-                        # Apply filters
-                        if min_price and listing.price and listing.price < min_price:
-                            continue
-                        if max_price and listing.price and listing.price > max_price:
-                            continue
-                        if min_year and listing.year and listing.year < min_year:
-                            continue
-                        if max_year and listing.year and listing.year > max_year:
-                            continue
-                        all_listings.append(listing)
-
-        except httpx.HTTPError as e:
-            # Continue with other sites if one fails
-            print(f"Warning: Failed to search {site}: {e}")
-            continue
+    Each call waits for the shared rate limit and is recorded in the quota
+    ledger; raises QuotaExhausted if the key's monthly budget is used up.
+    """
+    if not quota.SERPER_QUOTA.acquire(api_key, site):
+        count("serper.quota_exhausted")
+        raise QuotaExhausted(
+            f"Serper quota used up for this month ({quota.SERPER_QUOTA.monthly_limit} calls)"
+        )
+    with span("serper.http", site=site), track(SERPER_REQUESTS, SERPER_LATENCY, site=site):
+        response = client.post(
+            SERPER_URL,
+            headers={
+                "X-API-KEY": api_key,
+                "Content-Type": "application/json",
+            },
+            json={
+                "q": f"site:{site} {search_query}",
+                "num": num,
+            },
+        )
+        response.raise_for_status()
+    with span("serper.decode", site=site):
+        data = response.json()
+    return data.get("organic", [])
+
+
+def _filter_serper_results(
+    organic: List[dict],
+    site: str,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    seen: Optional[SeenSet] = None,
+    segment: Tuple[str, str] = ("", ""),
+    record: bool = True,
+) -> List[RVListing]:
+    """Parse one site's results, dropping inactive listings and applying filters.
+
+    With a ``seen`` set, results whose URL was already seen are skipped
+    before parsing. Unless ``record`` is false (for callers filtering one
+    response several ways), the kept and fetched counts are added to the
+    site's yield for ``segment`` (see ``quota.yield_segment``).
+    """
+    listings = []
+    inactive = filtered = skipped = 0
+    with span("serper.parse", site=site):
+        for result in organic:
+            if seen is not None:
+                url = result.get("link")
+                if url and not seen.add(url):
+                    skipped += 1
+                    continue
+
+            # Skip sold/inactive listings
+            title_lower = result.get("title", "").lower()
+            snippet_lower = result.get("snippet", "").lower()
+            combined_text = f"{title_lower} {snippet_lower}"
+            if any(keyword in combined_text for keyword in INACTIVE_KEYWORDS):
+                inactive += 1
+                continue
+
+            listing = _parse_serper_result(result, site)
+            if listing:
+                # Apply filters
+                if min_price and listing.price and listing.price < min_price:
+                    filtered += 1
+                    continue
+                if max_price and listing.price and listing.price > max_price:
+                    filtered += 1
+                    continue
+                if min_year and listing.year and listing.year < min_year:
+                    filtered += 1
+                    continue
+                if max_year and listing.year and listing.year > max_year:
+                    filtered += 1
+                    continue
+                listings.append(listing)
+
+    if record:
+        quota.SERPER_QUOTA.record_yield(site, len(organic) - skipped, len(listings), segment)
+    count(f"serper.{site}.fetched", len(organic))
+    count(f"serper.{site}.seen", skipped)
+    count(f"serper.{site}.inactive", inactive)
+    count(f"serper.{site}.filtered", filtered)
+    count(f"serper.{site}.kept", len(listings))
+    SERPER_LISTINGS.inc(len(organic), site=site, result="fetched")
+    SERPER_LISTINGS.inc(skipped, site=site, result="seen")
+    SERPER_LISTINGS.inc(inactive, site=site, result="inactive")
+    SERPER_LISTINGS.inc(filtered, site=site, result="filtered")
+    SERPER_LISTINGS.inc(len(listings), site=site, result="kept")
+    return listings
+
+
+def _search_serper(
+    query: Union[str, SearchQuery, None] = None,
+    rv_type: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    location: Optional[str] = None,
+    max_results: Optional[int] = None,
+    seen: Optional[SeenSet] = None,
+) -> List[RVListing]:
+    """Search for RV listings using Serper API (Google Search).
+
+    Sites are queried one at a time, those that have delivered the most
+    listings per call for this make and RV type first, until ``max_results``
+    listings are found. Sites that deliver almost nothing for them are
+    skipped (see ``QuotaLedger.schedule``), and when the quota has fewer
+    calls above its reserve than there are sites, only the best are queried.
+    """
+    search = _search_query(
+        query,
+        rv_type=rv_type,
+        min_price=min_price,
+        max_price=max_price,
+        min_year=min_year,
+        max_year=max_year,
+        location=location,
+        max_results=max_results,
+    )
+    max_results = search.max_results
+    api_key = _serper_api_key()
+    search_query = _serper_query(search.query, search.rv_type, search.min_year, search.location)
+    ledger = quota.SERPER_QUOTA
+    segment = quota.yield_segment(search.query, search.rv_type)
+    sites = ledger.schedule(SERPER_SITES, segment) or ledger.order_sites(SERPER_SITES)[:1]
+    if ledger.active:
+        sites = sites[:max(1, ledger.remaining(api_key) - ledger.reserve)]
+    count("serper.sites_skipped", len(SERPER_SITES) - len(sites))
+
+    # Search multiple sites
+    all_listings = []
+    with http_client(timeout=30) as client:
+        for position, site in enumerate(sites):
+            if len(all_listings) >= max_results:
+                count("serper.sites_skipped", len(sites) - position)
+                break
+            try:
+                organic = _fetch_serper(client, api_key, site, search_query, min(max_results, 10))
+            except QuotaExhausted as e:
+                print(f"Warning: {e}", file=sys.stderr)
+                break
+            except httpx.HTTPError as e:
+                # Continue with other sites if one fails
+                count(f"serper.{site}.errors")
+                print(f"Warning: Failed to search {site}: {e}", file=sys.stderr)
+                continue
+            all_listings.extend(_filter_serper_results(
+                organic, site, search.min_price, search.max_price, search.min_year,
+                search.max_year, seen, segment,
+            ))
 
     return all_listings[:max_results]
 
@@ -1013,22 +1354,33 @@ def _parse_serper_result(result: dict, site: str) -> Optional[RVListing]:
 
 
 def search_rv_listings_live(
-    query: Optional[str] = None,
+    query: Union[str, SearchQuery, None] = None,
     rv_type: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
     min_year: Optional[int] = None,
     max_year: Optional[int] = None,
     location: Optional[str] = None,
-    max_results: int = 20,
+    max_results: Optional[int] = None,
+    seen: Optional[SeenSet] = None,
 ) -> List[RVListing]:
     """
     Search for live RV listings using Serper API.
 
-    Requires SERPER_API_KEY environment variable.
+    Requires SERPER_API_KEY environment variable. Results are cached in
+    the shared result cache for its TTL. With a ``seen`` set (see
+    ``rv_search_agent.seen``), only listings not seen before are returned
+    and the cache is bypassed.
+
+    Serper calls are counted against the key's monthly quota (see
+    ``rv_search_agent.quota``). Once only the reserve is left, searches are
+    answered from the cache, however stale, or else from Craigslist.
+
+    ``query`` may be a SearchQuery (see ``search_rv_listings``); its
+    mileage and source filters aren't applied to live results.
     """
-    return _search_serper(
-        query=query,
+    search = _search_query(
+        query,
         rv_type=rv_type,
         min_price=min_price,
         max_price=max_price,
@@ -1037,3 +1389,24 @@ def search_rv_listings_live(
         location=location,
         max_results=max_results,
     )
+    degrade = quota.SERPER_QUOTA.near_exhaustion(_serper_api_key())
+
+    cache_key = None
+    if seen is None:
+        cache_key = ("serper", search)
+        cached = SEARCH_CACHE.get(cache_key, allow_stale=degrade)
+        if cached is not None:
+            if degrade:
+                count("serper.degraded.cache")
+            return list(cached)
+
+    if degrade:
+        count("serper.degraded.craigslist")
+        print("Warning: Serper quota nearly used up for this month; "
+              "searching Craigslist instead", file=sys.stderr)
+        return _search_craigslist(search, seen=seen)
+
+    results = _search_serper(search, seen=seen)
+    if cache_key is not None:
+        SEARCH_CACHE.put(cache_key, tuple(results))
+    return results
@@ -0,0 +1,219 @@
+"""Compact record of listing URLs already processed.
+
+A ``SeenSet`` answers "have we processed this URL before?" for unbounded
+streams of polled feeds without keeping every URL in memory. It is a
+scalable Bloom filter: a chain of Bloom filters, each larger and with a
+tighter error rate than the last, so memory grows with the number of URLs
+while the overall false-positive rate stays bounded. A false positive
+means a new listing is treated as seen; pass ``exact=True`` to confirm
+positives against an SQLite store of the full URLs instead.
+
+    seen = SeenSet("seen.bin")
+    listings = search_rv_listings_live(query="Unity", seen=seen)  # new ones only
+    seen.save()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import struct
+from typing import List, Optional, Tuple
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 1e-4
+
+# Each added filter holds GROWTH times more URLs than the previous one at
+# TIGHTENING times its error rate, bounding the total false-positive rate
+# by error_rate / (1 - TIGHTENING)
+GROWTH = 2
+TIGHTENING = 0.5
+
+_MAGIC = b"RVSEEN1\n"
+
+
+def _hashes(url: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    """A fixed-capacity Bloom filter using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def contains_hashes(self, h1: int, h2: int) -> bool:
+        bits, m = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % m
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add_hashes(self, h1: int, h2: int) -> None:
+        bits, m = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % m
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class SeenSet:
+    """A persistent scalable Bloom filter of URLs, optionally exact.
+
+    Args:
+        path: File to load from (if it exists) and save to
+        capacity: URLs the first filter holds; later filters grow from it
+        error_rate: Target false-positive rate of the first filter
+        exact: Confirm positives against an SQLite store of full URLs
+            (``path + ".db"``, or in memory without a path). Raises
+            ValueError for a file recorded without the store
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        exact: bool = False,
+    ):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters: List[BloomFilter] = []
+        self._db: Optional[sqlite3.Connection] = None
+        if path and os.path.exists(path):
+            self._load(path)
+        if exact:
+            self._db = sqlite3.connect(f"{path}.db" if path else ":memory:",
+                                       check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen (url TEXT PRIMARY KEY)")
+            # Every URL in the filters is in the store, unless the file was
+            # written without it; the filters can't say which URLs they hold
+            (stored,) = self._db.execute("SELECT COUNT(*) FROM seen").fetchone()
+            if stored < len(self):
+                self._db.close()
+                self._db = None
+                raise ValueError(f"{path} was recorded without exact=True (or lost {path}.db); "
+                                 "its URLs can't be confirmed")
+
+    def __len__(self) -> int:
+        """Number of URLs added."""
+        return sum(f.count for f in self.filters)
+
+    def __contains__(self, url: str) -> bool:
+        h1, h2 = _hashes(url)
+        if not any(f.contains_hashes(h1, h2) for f in self.filters):
+            return False
+        if self._db is None:
+            return True
+        return self._db.execute("SELECT 1 FROM seen WHERE url = ?", (url,)).fetchone() is not None
+
+    def add(self, url: str) -> bool:
+        """Record a URL, returning True if it had not been seen before."""
+        h1, h2 = _hashes(url)
+        if any(f.contains_hashes(h1, h2) for f in self.filters):
+            if self._db is None:
+                return False
+            # A false positive if the store doesn't have it
+            return self._db.execute("INSERT OR IGNORE INTO seen VALUES (?)", (url,)).rowcount > 0
+        new = True
+        if self._db is not None:
+            # The store can know URLs the filters don't, if the filter file was lost
+            new = self._db.execute("INSERT OR IGNORE INTO seen VALUES (?)", (url,)).rowcount > 0
+        if not self.filters or self.filters[-1].full:
+            n = len(self.filters)
+            self.filters.append(BloomFilter(
+                self.capacity * GROWTH ** n, self.error_rate * TIGHTENING ** n,
+            ))
+        self.filters[-1].add_hashes(h1, h2)
+        return new
+
+    def scoped(self, scope: str) -> "ScopedSeenSet":
+        """Return a view whose URLs are tracked separately from other scopes."""
+        return ScopedSeenSet(self, scope)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of filter bits held in memory."""
+        return sum(len(f.bits) for f in self.filters)
+
+    @property
+    def max_error_rate(self) -> float:
+        """Upper bound on the false-positive rate of the Bloom filters."""
+        return 1 - math.prod(1 - f.error_rate for f in self.filters) if self.filters else 0.0
+
+    def _load(self, path: str) -> None:
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a seen-set file")
+            (header_size,) = struct.unpack(">I", f.read(4))
+            header = json.loads(f.read(header_size))
+            self.capacity = header["capacity"]
+            self.error_rate = header["error_rate"]
+            for entry in header["filters"]:
+                bloom = BloomFilter(entry["capacity"], entry["error_rate"], count=entry["count"])
+                if f.readinto(bloom.bits) != len(bloom.bits):
+                    raise ValueError(f"{path} is truncated")
+                self.filters.append(bloom)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the filters to ``path`` (default: the path given at creation)."""
+        path = path or self.path
+        if self._db is not None:
+            self._db.commit()
+        if not path:
+            return
+        header = json.dumps({
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "filters": [
+                {"capacity": f.capacity, "error_rate": f.error_rate, "count": f.count}
+                for f in self.filters
+            ],
+        }).encode()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack(">I", len(header)))
+            f.write(header)
+            for bloom in self.filters:
+                f.write(bloom.bits)
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        """Save and release the exact store."""
+        self.save()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class ScopedSeenSet:
+    """A view of a SeenSet that prefixes URLs with a scope."""
+
+    def __init__(self, seen: SeenSet, scope: str):
+        self._seen = seen
+        self._prefix = f"{scope}\n"
+
+    def __contains__(self, url: str) -> bool:
+        return self._prefix + url in self._seen
+
+    def add(self, url: str) -> bool:
+        """Record a URL in this scope, returning True if it was new."""
+        return self._seen.add(self._prefix + url)
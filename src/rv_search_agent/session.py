@@ -0,0 +1,360 @@
+"""Multi-turn agent conversations that keep their search results.
+
+``run_agent`` answers one query and forgets it. An ``AgentSession`` keeps
+the conversation, so follow-ups ("now only the AWD ones") see what came
+before, and it keeps the listings of every search as a named result set.
+The model also gets a ``refine_results`` tool that filters a result set in
+memory: a follow-up narrows the listings already found instead of searching
+again, and only the matches' one-line summaries go back to the model.
+
+Sessions persist to a local SQLite store in a compact form. Each tool
+result is stored as a reference to its result set, and each listing once,
+however many result sets contain it. Loading re-renders the tool results
+exactly, so a resumed conversation still reads its prefix from the prompt
+cache.
+
+    session = AgentSession()
+    session.ask("Find Storyteller vans under $250k")
+    session.ask("Now only the AWD ones")
+    SESSION_STORE.save(session)
+    ...
+    session = SESSION_STORE.load(session_id)
+
+Configure the store with RV_SEARCH_SESSIONS_DB.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from .agent import (
+    TOOLS,
+    AgentBudget,
+    AgentUsage,
+    BudgetUsage,
+    ModelRouting,
+    TurnUsage,
+    _Governor,
+    _add_tool_result,
+    _answer,
+    _create_message,
+    _first_message,
+    _tool_use,
+    create_agent,
+    process_tool_call,
+    tool_search_query,
+)
+from .metrics import AGENT_LATENCY, AGENT_RUNS, track
+from .models import RVListing, SearchQuery, normalize_text
+from .search_api import SearchAPIError, search_rv_listings
+
+DEFAULT_PATH = os.path.join("~", ".rv-search", "sessions.db")
+
+_REFINE_FILTERS = ("rv_type", "min_price", "max_price", "min_year", "max_year", "location")
+_SEARCH_PROPERTIES = TOOLS[0]["input_schema"]["properties"]
+
+REFINE_TOOL = {
+    "name": "refine_results",
+    "description": "Filter the listings of an earlier search_rv_listings or refine_results call in this conversation, without searching again. Use this for follow-ups that narrow earlier results (e.g. 'only the AWD ones', 'which of those are under $150k'). Returns a new result set with a one-line summary and URL per matching listing.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "result_set": {
+                "type": "string",
+                "description": "Result set to filter, as returned by an earlier call (default: the latest)",
+            },
+            "keyword": {
+                "type": "string",
+                "description": "Only listings whose title or description contains this (e.g. 'AWD', 'solar')",
+            },
+            **{name: _SEARCH_PROPERTIES[name] for name in _REFINE_FILTERS},
+        },
+        "required": [],
+    },
+}
+
+SESSION_TOOLS = TOOLS + [REFINE_TOOL]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+def _content_block(block) -> dict:
+    """A response content block as a plain dict, as the API accepts it back."""
+    if isinstance(block, dict):
+        return block
+    if block.type == "tool_use":
+        return {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+    return {"type": "text", "text": block.text}
+
+
+def _listing_key(listing: RVListing) -> str:
+    return listing.url or json.dumps(listing.to_dict(), sort_keys=True)
+
+
+class AgentSession:
+    """A conversation with the agent that remembers its searches.
+
+    Args:
+        session_id: Identifies the session in a ``SessionStore`` (default:
+            a new random id)
+        usage: Add the session's token usage to this AgentUsage
+        routing: Models and max_tokens per turn kind (default: the agent's
+            ROUTING)
+        budget: Limits on each ``ask`` (default: the agent's BUDGET); what
+            each used is appended to ``usage.runs``
+    """
+
+    def __init__(self, session_id: Optional[str] = None, usage: Optional[AgentUsage] = None,
+                 routing: Optional[ModelRouting] = None, budget: Optional[AgentBudget] = None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.usage = usage or AgentUsage()
+        self.routing = routing
+        self.budget = budget
+        self.messages: List[dict] = []
+        # Result set name -> {"kind": "search" | "refine", "rows": indexes
+        # into _listings, "parent": result set refined, if any}
+        self.result_sets: Dict[str, dict] = {}
+        self._listings: List[RVListing] = []
+        self._rows: Dict[str, int] = {}
+        # tool_use id -> result set its result renders
+        self._tool_results: Dict[str, str] = {}
+
+    @property
+    def latest(self) -> Optional[str]:
+        """Name of the newest result set."""
+        return next(reversed(self.result_sets), None)
+
+    def results(self, result_set: Optional[str] = None) -> List[RVListing]:
+        """Listings of a result set (default: the latest)."""
+        name = result_set or self.latest
+        if name is None:
+            return []
+        if name not in self.result_sets:
+            raise SearchAPIError(f"Unknown result set '{name}'")
+        return [self._listings[row] for row in self.result_sets[name]["rows"]]
+
+    def _add_result_set(self, kind: str, listings: List[RVListing],
+                        parent: Optional[str] = None) -> str:
+        name = f"r{len(self.result_sets) + 1}"
+        rows = []
+        for listing in listings:
+            key = _listing_key(listing)
+            if key not in self._rows:
+                self._rows[key] = len(self._listings)
+                self._listings.append(listing)
+            rows.append(self._rows[key])
+        self.result_sets[name] = {"kind": kind, "rows": rows, "parent": parent}
+        return name
+
+    def search(self, query=None, **filters) -> List[RVListing]:
+        """Search and keep the listings as a new result set."""
+        listings = search_rv_listings(query, **filters)
+        self._add_result_set("search", listings)
+        return listings
+
+    def refine(self, result_set: Optional[str] = None, keyword: Optional[str] = None,
+               **filters) -> List[RVListing]:
+        """Filter a result set (default: the latest) locally, keeping the
+        matches as a new result set.
+
+        ``keyword`` matches the title or description; the other filters
+        are those of ``search_rv_listings`` except query, near and radius.
+        """
+        parent = result_set or self.latest
+        if parent is None:
+            raise SearchAPIError("No earlier results to refine")
+        listings = self.results(parent)
+        try:
+            predicate = SearchQuery(**filters).predicate()
+        except (TypeError, ValueError) as e:
+            raise SearchAPIError(f"Invalid refinement: {e}")
+        needle = normalize_text(keyword.strip()) if keyword and keyword.strip() else None
+        matches = [
+            listing for listing in listings
+            if predicate(listing) and (
+                needle is None
+                or needle in normalize_text(f"{listing.title} {listing.description or ''}")
+            )
+        ]
+        self._add_result_set("refine", matches, parent)
+        return matches
+
+    def _render(self, name: str) -> str:
+        """The tool result for a result set: full listings for a search, one
+        line each for a refinement, whose listings the model has seen."""
+        result_set = self.result_sets[name]
+        listings = self.results(name)
+        if result_set["kind"] == "search":
+            result = {"result_set": name,
+                      "results": [listing.to_dict() for listing in listings],
+                      "count": len(listings)}
+        else:
+            result = {"result_set": name, "refined_from": result_set["parent"],
+                      "results": [{"summary": listing.summary(), "url": listing.url}
+                                  for listing in listings],
+                      "count": len(listings)}
+        if not listings:
+            result["message"] = "No listings found matching your criteria. Try broadening your search."
+        return json.dumps(result)
+
+    def _process_tool_call(self, tool_name: str, tool_input: dict) -> str:
+        """Like ``process_tool_call``, keeping search results as result sets."""
+        if tool_name not in ("search_rv_listings", "refine_results"):
+            return process_tool_call(tool_name, tool_input)
+        try:
+            if tool_name == "search_rv_listings":
+                self.search(tool_search_query(tool_input))
+            else:
+                filters = {name: tool_input.get(name) for name in _REFINE_FILTERS}
+                self.refine(tool_input.get("result_set"), tool_input.get("keyword"), **filters)
+        except SearchAPIError as e:
+            return json.dumps({"error": str(e)})
+        except Exception as e:
+            return json.dumps({"error": f"Unexpected error: {str(e)}"})
+        return self._render(self.latest)
+
+    def ask(self, query: str) -> str:
+        """Ask the agent a question, in the context of the conversation so far."""
+        with track(AGENT_RUNS, AGENT_LATENCY):
+            client = create_agent()
+            self.messages.append(_first_message(query))
+            governor = _Governor(self.budget, self.usage)
+            response = _create_message(client, self.messages, 1, self.usage, SESSION_TOOLS,
+                                       self.routing, governor)
+            turns = 1
+
+            while response.stop_reason == "tool_use" and not governor.done:
+                block = _tool_use(response)
+                before = self.latest
+                tool_result = governor.call_tool(block, self._process_tool_call)
+                if self.latest != before:
+                    self._tool_results[block.id] = self.latest
+                content = [_content_block(b) for b in response.content]
+                _add_tool_result(self.messages, content, block, tool_result)
+                turns += 1
+                response = _create_message(client, self.messages, turns, self.usage,
+                                           SESSION_TOOLS, self.routing, governor)
+
+            self.messages.append({"role": "assistant",
+                                  "content": [_content_block(b) for b in response.content]})
+            return _answer(response, turns)
+
+    def to_dict(self) -> dict:
+        """Compact state: tool results become {"result_set": name}, and each
+        listing is stored once, without empty fields."""
+        messages = []
+        for message in self.messages:
+            content = [
+                {**block, "content": {"result_set": self._tool_results[block["tool_use_id"]]}}
+                if block.get("type") == "tool_result" and block["tool_use_id"] in self._tool_results
+                else block
+                for block in message["content"]
+            ]
+            messages.append({**message, "content": content})
+        return {
+            "session_id": self.session_id,
+            "messages": messages,
+            "result_sets": self.result_sets,
+            "listings": [
+                {k: v for k, v in listing.to_dict().items() if v not in (None, [])}
+                for listing in self._listings
+            ],
+            "usage": asdict(self.usage),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "AgentSession":
+        """Rebuild a session from ``to_dict``, re-rendering tool results."""
+        usage = dict(state["usage"])
+        usage["turns"] = [TurnUsage(**turn) for turn in usage.get("turns", [])]
+        usage["runs"] = [BudgetUsage(**run) for run in usage.get("runs", [])]
+        session = cls(state["session_id"], AgentUsage(**usage))
+        session.result_sets = state["result_sets"]
+        session._listings = [RVListing(**fields) for fields in state["listings"]]
+        session._rows = {_listing_key(listing): row for row, listing in enumerate(session._listings)}
+        for message in state["messages"]:
+            content = []
+            for block in message["content"]:
+                if block.get("type") == "tool_result" and isinstance(block["content"], dict):
+                    name = block["content"]["result_set"]
+                    session._tool_results[block["tool_use_id"]] = name
+                    block = {**block, "content": session._render(name)}
+                content.append(block)
+            session.messages.append({**message, "content": content})
+        return session
+
+
+class SessionStore:
+    """SQLite store of agent sessions, shared by every process on the machine."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = os.path.expanduser(path)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Configure from RV_SEARCH_SESSIONS_DB."""
+        return cls(os.getenv("RV_SEARCH_SESSIONS_DB", DEFAULT_PATH))
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def save(self, session: AgentSession) -> int:
+        """Save a session, replacing its earlier state; returns the bytes stored."""
+        state = json.dumps(session.to_dict(), separators=(",", ":"))
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, updated_at, state) VALUES (?, ?, ?)",
+                    (session.session_id, time.time(), state),
+                )
+        return len(state.encode("utf-8"))
+
+    def load(self, session_id: str) -> Optional[AgentSession]:
+        """Load a saved session, or None if there is none."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT state FROM sessions WHERE session_id = ?", (session_id,),
+            ).fetchone()
+        return AgentSession.from_dict(json.loads(row[0])) if row else None
+
+    def delete(self, session_id: str) -> None:
+        """Forget a saved session."""
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Shared store for sessions saved by the application
+SESSION_STORE = SessionStore.from_env()
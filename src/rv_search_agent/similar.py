@@ -0,0 +1,360 @@
+"""Similar listings: hashed TF-IDF vectors and a random-projection LSH index.
+
+Each listing becomes a sparse vector of hashed features: the words of its
+title and description, its make, model, RV type and fuel type, and its
+price, year, mileage, length, slides and sleeping capacity as bucket
+features. Features are weighted by TF-IDF and vectors scaled to unit
+length, so a dot product is the cosine similarity.
+
+Candidates come from SimHash tables. Each table keys a listing by the
+signs of its vector's projections onto ``bits`` random hyperplanes, so
+listings at a small angle to each other usually share a bucket in at least
+one table. A query looks up its bucket in every table (and, with
+``probes``, the neighbouring buckets across its least certain bits). The
+Hamming distance between the query's and a candidate's signs over all the
+tables' hyperplanes estimates the angle between them, so the nearest
+``candidates`` by that measure are scored by exact cosine.
+
+    index = SimilarityIndex(listings)
+    index.similar("https://example.com/listing/3", k=5)  # [(score, listing), ...]
+
+Everything is pure Python. A listing's projections onto all hyperplanes
+are computed at once as one big-integer sum (see ``_Projector``), which is
+what makes building the index over a million listings practical.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import operator
+import random
+import re
+import zlib
+from array import array
+from collections import Counter
+from itertools import compress, repeat
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from .models import RVListing, normalize_text
+
+# Hashed feature space size
+DIMENSIONS = 1 << 20
+
+# Index shape: more tables raise recall, more bits per table shrink
+# buckets. By default bits grow with the number of listings, keeping
+# buckets at a few dozen listings (15 bits for a million).
+DEFAULT_TABLES = 24
+DEFAULT_BITS = None
+
+# Neighbouring buckets looked up per table, and candidates scored by exact
+# cosine per query (nearest by Hamming distance first)
+DEFAULT_PROBES = 2
+DEFAULT_CANDIDATES = 200
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words too common in listings to say anything about them
+_STOP_WORDS = frozenset([
+    "a", "an", "and", "at", "for", "in", "is", "it", "of", "on", "or", "the", "to", "with",
+])
+
+# Numeric fields as (name, position of a value on the bucket axis). Each
+# value falls in a bucket of two grids offset by half a bucket, so nearby
+# values share at least one feature.
+_NUMERIC_FEATURES = (
+    ("price", lambda value: math.log(value, 1.15)),
+    ("year", lambda value: value / 2),
+    ("mileage", lambda value: math.log(value, 1.5)),
+    ("length_ft", lambda value: value / 3),
+    ("slides", float),
+    ("sleeping_capacity", float),
+)
+
+
+def listing_features(listing: RVListing) -> List[str]:
+    """The features of a listing's vector, before hashing."""
+    text = normalize_text(f"{listing.title} {listing.description or ''}")
+    features = [word for word in _WORD.findall(text) if word not in _STOP_WORDS]
+    for name in ("make", "model", "rv_type", "fuel_type"):
+        value = getattr(listing, name)
+        if value:
+            features.append(f"{name}={normalize_text(value)}")
+    for name, position in _NUMERIC_FEATURES:
+        value = getattr(listing, name)
+        if value:
+            at = position(value)
+            features.append(f"{name}:{math.floor(at)}")
+            features.append(f"{name}~{math.floor(at + 0.5)}")
+    return features
+
+
+def _hashed_counts(listing: RVListing, dims: Dict[str, int]) -> Dict[int, int]:
+    """Count a listing's features by hashed dimension.
+
+    ``dims`` memoizes feature -> dimension; an index passes one dict for
+    its whole build, so it lives no longer than the build.
+    """
+    counts: Dict[int, int] = {}
+    for feature in listing_features(listing):
+        dim = dims.get(feature)
+        if dim is None:
+            dim = dims[feature] = zlib.crc32(feature.encode()) & (DIMENSIONS - 1)
+        counts[dim] = counts.get(dim, 0) + 1
+    return counts
+
+
+# Default for dimensions missing from a vector, as many as needed
+_ZEROS = repeat(0.0)
+
+# Set bits of an integer (int.bit_count is Python 3.10+)
+_popcount = getattr(int, "bit_count", None) or (lambda value: bin(value).count("1"))
+
+# 1 + log(term frequency), for small frequencies
+_TF_WEIGHTS = [0.0] + [1 + math.log(count) for count in range(1, 64)]
+
+
+class _Projector:
+    """Signs of a weighted sum of hashed features on random hyperplanes.
+
+    Each hyperplane gets a ``_FIELD``-bit field of one big integer. A
+    feature's integer has 2 in the field of every hyperplane its random
+    component is +1 for, and 0 where it's -1. Summing those integers times
+    the (integer-quantized) feature weights gives every hyperplane's field
+    ``W + dot`` at once, where W is the total weight, in a handful of
+    big-integer operations per feature instead of one per hyperplane. Adding
+    ``2**(F-1) - W - 1`` to every field then sets a field's top bit exactly
+    when its dot product is positive; fields never carry into each other.
+    """
+
+    _FIELD = 16
+    _QUANT = 63
+
+    def __init__(self, planes: int, seed: int):
+        self.planes = planes
+        self.seed = seed
+        field = self._FIELD
+        self._ones = sum(1 << (field * plane) for plane in range(planes))
+        self.tops = self._ones << (field - 1)
+        self._vectors: Dict[int, int] = {}
+        self._two = (2).to_bytes(field // 8, "little")
+        self._zero = bytes(field // 8)
+
+    def _vector(self, dim: int) -> int:
+        vector = self._vectors.get(dim)
+        if vector is None:
+            signs = random.Random(self.seed * DIMENSIONS + dim).getrandbits(self.planes)
+            vector = int.from_bytes(b"".join(
+                self._two if signs >> plane & 1 else self._zero for plane in range(self.planes)
+            ), "little")
+            self._vectors[dim] = vector
+        return vector
+
+    def fields(self, weights: Dict[int, float]) -> Tuple[int, int]:
+        """Return (packed fields, W): each field is W + the plane's dot product."""
+        # Signs don't change with the scale of the weights, so quantize
+        # relative to the largest, keeping W within a field
+        top = max(weights.values(), default=0.0) or 1.0
+        limit = 1 << (self._FIELD - 1)
+        scale = min(self._QUANT, (limit - 1) // max(1, len(weights))) / top
+        vectors = self._vectors
+        total = packed = 0
+        for dim, weight in weights.items():
+            quantized = round(weight * scale) or 1
+            total += quantized
+            packed += quantized * (vectors.get(dim) or self._vector(dim))
+        return packed, total
+
+    def signs(self, weights: Dict[int, float]) -> int:
+        """The sign bits of every hyperplane, at each field's top bit."""
+        packed, total = self.fields(weights)
+        return (packed + ((1 << (self._FIELD - 1)) - total - 1) * self._ones) & self.tops
+
+
+class SimilarityIndex:
+    """Approximate nearest neighbours of listings by TF-IDF cosine.
+
+    Built once over ``listings``; IDF weights come from these listings, so
+    rebuild it when they change (``ListingCatalog.similarity_index`` does).
+
+    Args:
+        listings: The listings to index
+        tables: Number of hash tables
+        bits: Hyperplanes per table (default: by number of listings)
+        seed: Seed for the hyperplanes
+    """
+
+    def __init__(self, listings: Iterable[RVListing], tables: int = DEFAULT_TABLES,
+                 bits: Optional[int] = DEFAULT_BITS, seed: int = 0):
+        self.listings: List[RVListing] = list(listings)
+        if bits is None:
+            bits = max(8, len(self.listings).bit_length() - 5)
+        if tables < 1 or bits < 1:
+            raise ValueError("tables and bits must be at least 1")
+        self.tables = tables
+        self.bits = bits
+        self._projector = _Projector(tables * bits, seed)
+        self._rows = {listing.url: row for row, listing in enumerate(self.listings) if listing.url}
+        self._packed: Dict[int, int] = {}
+
+        # Hashed feature counts, flattened: row i's are [offsets[i], offsets[i + 1])
+        dims, counts, offsets = array("I"), array("I"), array("Q", [0])
+        document_frequency: Counter = Counter()
+        feature_dims: Dict[str, int] = {}
+        for listing in self.listings:
+            hashed = _hashed_counts(listing, feature_dims)
+            dims.extend(hashed)
+            counts.extend(hashed.values())
+            offsets.append(len(dims))
+            document_frequency.update(hashed.keys())
+
+        total = len(self.listings)
+        self._idf = {dim: math.log((1 + total) / (1 + df)) + 1
+                     for dim, df in document_frequency.items()}
+        self._unseen_idf = math.log(1 + total) + 1
+
+        # Unit vectors, signatures and table keys
+        self._dims = dims
+        self._offsets = offsets
+        self._weights = array("f")
+        self._signatures: List[int] = []
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(tables)]
+        for row in range(total):
+            start, end = offsets[row], offsets[row + 1]
+            weights = self._unit(zip(dims[start:end], counts[start:end]))
+            self._weights.extend(weights.values())
+            signature = self._signature(self._projector.signs(weights))
+            self._signatures.append(signature)
+            for table, key in enumerate(self._keys(signature)):
+                self._buckets[table].setdefault(key, []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def _unit(self, counts: Iterable[Tuple[int, int]]) -> Dict[int, float]:
+        idf, unseen, tf_weights = self._idf, self._unseen_idf, _TF_WEIGHTS
+        weights = {dim: (tf_weights[count] if count < 64 else 1 + math.log(count))
+                   * idf.get(dim, unseen) for dim, count in counts}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {dim: weight / norm for dim, weight in weights.items()}
+
+    def _signature(self, signs: int) -> int:
+        """Pack the sign bits, one per field, into a ``tables * bits``-bit integer."""
+        field, bits = self._projector._FIELD, self.bits
+        width = field * bits
+        mask = (1 << width) - 1
+        signature = 0
+        for table in range(self.tables):
+            chunk = (signs >> (width * table)) & mask
+            packed = self._packed.get(chunk)
+            if packed is None:
+                packed = self._packed[chunk] = sum(
+                    1 << bit for bit in range(bits) if chunk >> (field * bit + field - 1) & 1)
+            signature |= packed << (bits * table)
+        return signature
+
+    def _keys(self, signature: int) -> List[int]:
+        bits = self.bits
+        mask = (1 << bits) - 1
+        return [(signature >> (bits * table)) & mask for table in range(self.tables)]
+
+    def row_of(self, url: str) -> Optional[int]:
+        """Return the row of the listing with ``url``, or None."""
+        return self._rows.get(url)
+
+    def _vector(self, listing_or_url: Union[RVListing, str]) -> Tuple[Optional[int], Dict[int, float]]:
+        """Return (row, unit vector) for an indexed URL or any listing."""
+        if isinstance(listing_or_url, str):
+            row = self._rows.get(listing_or_url)
+            if row is None:
+                raise KeyError(listing_or_url)
+        else:
+            row = self._rows.get(listing_or_url.url) if listing_or_url.url else None
+        if row is not None:
+            start, end = self._offsets[row], self._offsets[row + 1]
+            return row, dict(zip(self._dims[start:end], self._weights[start:end]))
+        return None, self._unit(_hashed_counts(listing_or_url, {}).items())
+
+    def _probe_keys(self, vector: Dict[int, float], probes: int) -> Tuple[int, List[List[int]]]:
+        """The signature, and each table's key then keys with one of its
+        ``probes`` least certain bits flipped."""
+        projector = self._projector
+        packed, total = projector.fields(vector)
+        signature = self._signature(
+            (packed + ((1 << (projector._FIELD - 1)) - total - 1) * projector._ones)
+            & projector.tops)
+        keys = [[key] for key in self._keys(signature)]
+        if probes:
+            field = projector._FIELD
+            mask = (1 << field) - 1
+            for table, table_keys in enumerate(keys):
+                first = table * self.bits
+                margins = sorted(range(self.bits), key=lambda bit: abs(
+                    ((packed >> (field * (first + bit))) & mask) - total))
+                for bit in margins[:probes]:
+                    table_keys.append(table_keys[0] ^ (1 << bit))
+        return signature, keys
+
+    def _score(self, vector: Dict[int, float], row: int) -> float:
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return sum(map(operator.mul, map(vector.get, self._dims[start:end], _ZEROS),
+                       self._weights[start:end]))
+
+    def similar(self, listing_or_url: Union[RVListing, str], k: int = 10,
+                probes: int = DEFAULT_PROBES, candidates: int = DEFAULT_CANDIDATES) -> List[Tuple[float, RVListing]]:
+        """Return up to ``k`` (cosine, listing) pairs most like a listing, best first.
+
+        ``listing_or_url`` is an indexed listing's URL, or a listing (indexed
+        or not). The listing itself is left out. ``probes`` also looks up
+        the buckets across each table's least certain bits, and
+        ``candidates`` bounds how many listings are scored exactly; indexes
+        no bigger than that are searched exhaustively.
+
+        Raises:
+            KeyError: No indexed listing has the URL
+        """
+        if len(self.listings) <= candidates:
+            # Scoring everything is as cheap as the candidates would be
+            return self.exact(listing_or_url, k)
+        row, vector = self._vector(listing_or_url)
+        signature, keys = self._probe_keys(vector, probes)
+        hits: Set[int] = set()
+        for buckets, table_keys in zip(self._buckets, keys):
+            for key in table_keys:
+                bucket = buckets.get(key)
+                if bucket:
+                    hits.update(bucket)
+        hits.discard(row)
+        if len(hits) > candidates:
+            # Hamming distance over every table's bits estimates the angle;
+            # keep the nearest (and any tied with the last of them)
+            rows = list(hits)
+            distances = list(map(_popcount, map(signature.__xor__,
+                                                map(self._signatures.__getitem__, rows))))
+            cutoff = sorted(distances)[candidates - 1]
+            hits = set(compress(rows, map(cutoff.__ge__, distances)))
+        scored = [(self._score(vector, candidate), candidate) for candidate in hits]
+        best = heapq.nsmallest(k, scored, key=lambda pair: (-pair[0], pair[1]))
+        return [(score, self.listings[candidate]) for score, candidate in best]
+
+    def exact(self, listing_or_url: Union[RVListing, str],
+              k: int = 10) -> List[Tuple[float, RVListing]]:
+        """``similar`` by scoring every listing: the ground truth, for measuring recall."""
+        row, vector = self._vector(listing_or_url)
+        scored = ((self._score(vector, other), other) for other in range(len(self.listings))
+                  if other != row)
+        best = heapq.nsmallest(k, scored, key=lambda pair: (-pair[0], pair[1]))
+        return [(score, self.listings[other]) for score, other in best]
+
+
+def recall(found: Sequence[Tuple[float, RVListing]],
+           truth: Sequence[Tuple[float, RVListing]]) -> float:
+    """Fraction of ``truth`` matched by ``found``, counting ties as matches.
+
+    A found listing counts if it scores at least the k-th exact score, so
+    near-duplicates that tie don't count as misses whichever one is found.
+    """
+    if not truth:
+        return 1.0
+    threshold = truth[-1][0] - 1e-6
+    return min(len(truth), sum(1 for score, _ in found if score >= threshold)) / len(truth)
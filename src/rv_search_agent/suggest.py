@@ -0,0 +1,152 @@
+"""Autocomplete over the makes, models and locations of a catalog.
+
+Every distinct make, make and model, and location is a suggestion,
+weighted by the number of listings with it. Suggestions are keyed by their
+normalized text and by each suffix starting at a later word, so "winds"
+suggests "Thor Four Winds" and "co" suggests "Denver, CO". The keys sit in
+one sorted array, where the keys starting with a prefix are the range
+between two bisections.
+
+Suggestions are numbered best first, so the top k of a range are its k
+smallest numbers. Prefixes matching more than ``_SCAN_LIMIT`` keys (short
+ones like "s") get their top ``MAX_K`` precomputed when the index is
+built, so no lookup ranks more than ``_SCAN_LIMIT`` keys.
+
+    index = SuggestIndex(listings)
+    index.suggest("win", k=5)  # [Suggestion("Winnebago", "make", 412), ...]
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .models import RVListing, normalize_text
+
+# Kinds of suggestion, in the order ties between them are listed
+KINDS = ("make", "model", "location")
+
+# Longest precomputed suggestion list; larger k rank the whole range
+MAX_K = 20
+
+# Prefix ranges up to this many keys are ranked at lookup time
+_SCAN_LIMIT = 256
+
+# Sorts after every character a key can contain
+_LAST = "\U0010ffff"
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """A completion: the text to show, what it is and how many listings have it."""
+
+    text: str
+    kind: str
+    count: int
+
+
+def _key(text: str) -> str:
+    """Normalized text with runs of whitespace collapsed to one space."""
+    return " ".join(normalize_text(text).split())
+
+
+def _values(listing: RVListing) -> Iterator[Tuple[str, str]]:
+    """The (kind, text) suggestions a listing counts towards."""
+    make = (listing.make or "").strip()
+    model = (listing.model or "").strip()
+    location = (listing.location or "").strip()
+    if make:
+        yield "make", make
+    if model:
+        yield "model", f"{make} {model}" if make else model
+    if location:
+        yield "location", location
+
+
+class SuggestIndex:
+    """Prefix completion of makes, models and locations, by listing count.
+
+    Built once over ``listings``; rebuild it when they change
+    (``ListingCatalog.suggest_index`` does).
+    """
+
+    def __init__(self, listings: Iterable[RVListing]):
+        # Count raw values first: far fewer distinct values than listings
+        raw: Counter = Counter(value for listing in listings for value in _values(listing))
+        counts: Counter = Counter()
+        texts: Dict[Tuple[str, str], str] = {}
+        for (kind, text), count in raw.most_common():
+            key = (kind, _key(text))
+            counts[key] += count
+            texts.setdefault(key, text)  # Most common spelling wins
+
+        order = {kind: position for position, kind in enumerate(KINDS)}
+        ranked = sorted(counts.items(),
+                        key=lambda item: (-item[1], order[item[0][0]], item[0][1]))
+        self.suggestions: List[Suggestion] = [
+            Suggestion(texts[key], key[0], count) for key, count in ranked
+        ]
+
+        pairs = sorted(
+            (text[match.start():], number)
+            for number, ((_, text), _) in enumerate(ranked)
+            for match in _WORD.finditer(text)
+        )
+        self._keys: List[str] = [key for key, _ in pairs]
+        self._numbers: List[int] = [number for _, number in pairs]
+        self._top: Dict[str, List[int]] = {}
+        self._precompute()
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def _precompute(self) -> None:
+        """Store the top MAX_K of every prefix matching over _SCAN_LIMIT keys.
+
+        Works one prefix length at a time, splitting only the ranges that
+        were too long at the previous length.
+        """
+        keys, numbers = self._keys, self._numbers
+        ranges = [(0, len(keys))]
+        length = 1
+        while ranges:
+            longer = []
+            for lo, hi in ranges:
+                start = lo
+                while start < hi:
+                    if len(keys[start]) < length:
+                        start += 1
+                        continue
+                    prefix = keys[start][:length]
+                    end = bisect_left(keys, prefix + _LAST, start, hi)
+                    if end - start > _SCAN_LIMIT:
+                        self._top[prefix] = sorted(set(numbers[start:end]))[:MAX_K]
+                        longer.append((start, end))
+                    start = end
+            ranges = longer
+            length += 1
+
+    def suggest(self, prefix: str, k: int = 10) -> List[Suggestion]:
+        """Return up to ``k`` suggestions with a word starting with ``prefix``.
+
+        Matching ignores case and accents. The most listed come first,
+        then makes before models before locations.
+        """
+        key = _key(prefix)
+        if key and prefix[-1:].isspace():
+            key += " "  # "four " completes "four winds", not "fourth"
+        if not key:
+            return self.suggestions[:k]
+        top = self._top.get(key)
+        if top is not None and k <= MAX_K:
+            numbers = top[:k]
+        else:
+            lo = bisect_left(self._keys, key)
+            hi = bisect_left(self._keys, key + _LAST, lo)
+            numbers = sorted(set(self._numbers[lo:hi]))[:k]
+        return [self.suggestions[number] for number in numbers]
@@ -0,0 +1,184 @@
+"""Lightweight timing spans and counters for profiling searches.
+
+Instrumented code calls ``span()`` and ``count()`` unconditionally. Unless a
+trace is active (see ``tracing()``), both return immediately, so the
+instrumentation costs a context-variable lookup when profiling is off.
+
+    with tracing() as trace:
+        search_rv_listings_live(query="Unity")
+    print(trace.summary())
+    trace.write_chrome_trace("trace.json")  # open in chrome://tracing
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """A timed section of work."""
+
+    name: str
+    start: float
+    duration: float = 0.0
+    thread_id: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """Spans and counters collected while a trace is active."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def add_count(self, name: str, value: int) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate spans by name into calls, total and max seconds."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, {"calls": 0, "total": 0.0, "max": 0.0})
+            entry["calls"] += 1
+            entry["total"] += span.duration
+            entry["max"] = max(entry["max"], span.duration)
+        return totals
+
+    def summary(self) -> str:
+        """Return a text table of span timings and counters."""
+        lines = [f"{'span':<32} {'calls':>6} {'total ms':>10} {'max ms':>9}"]
+        totals = sorted(self.totals().items(), key=lambda item: -item[1]["total"])
+        for name, entry in totals:
+            lines.append(
+                f"{name:<32} {int(entry['calls']):>6} "
+                f"{entry['total'] * 1000:>10.2f} {entry['max'] * 1000:>9.2f}"
+            )
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':<32} {'value':>6}")
+            for name in sorted(self.counters):
+                lines.append(f"{name:<32} {self.counters[name]:>6}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        """Return the trace in Chrome's Trace Event format."""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {key: str(value) for key, value in span.attrs.items()},
+            })
+        end = max((s.start + s.duration - self.origin for s in self.spans), default=0.0)
+        for name, value in self.counters.items():
+            events.append({
+                "name": name,
+                "ph": "C",
+                "ts": end * 1e6,
+                "pid": pid,
+                "args": {"value": value},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the trace as JSON viewable in chrome://tracing or Perfetto."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+_active: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "rv_search_trace", default=None
+)
+
+
+class _NullSpan:
+    """Shared no-op span used when no trace is active."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("_trace", "_span")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any]):
+        self._trace = trace
+        self._span = Span(name=name, start=0.0, thread_id=threading.get_ident(), attrs=attrs)
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._span.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._span.duration = time.perf_counter() - self._span.start
+        if exc_info[0] is not None:
+            self._span.attrs["error"] = exc_info[0].__name__
+        self._trace.add_span(self._span)
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes to the span."""
+        self._span.attrs.update(attrs)
+
+
+def span(name: str, **attrs: Any):
+    """Time a block of work when a trace is active."""
+    trace = _active.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _ActiveSpan(trace, name, attrs)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increment a counter when a trace is active."""
+    trace = _active.get()
+    if trace is not None:
+        trace.add_count(name, value)
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the active trace, if any."""
+    return _active.get()
+
+
+@contextmanager
+def tracing(trace: Optional[Trace] = None) -> Iterator[Trace]:
+    """Collect spans and counters for the duration of the block."""
+    trace = trace or Trace()
+    token = _active.set(trace)
+    try:
+        yield trace
+    finally:
+        _active.reset(token)
@@ -0,0 +1,479 @@
+"""Watch saved searches and report new listings as they appear.
+
+Saved searches are grouped by the upstream request they need (a Craigslist
+RSS feed, or a Serper query for one site), so searches that share a feed
+poll it once. Each feed is polled on its source's interval with jitter.
+Craigslist polls are conditional (ETag / Last-Modified), so an unchanged
+feed costs a 304 and no parsing. Only items whose URL hasn't been seen on
+that feed are parsed and matched; seen URLs are kept in a ``SeenSet``, so
+memory stays small however long the watcher runs.
+
+    watcher = Watcher(load_saved_searches("searches.jsonl"), [StdoutEmitter()],
+                      state_path="watch-state.json")
+    watcher.run()
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .metrics import WATCH_MATCHES, WATCH_POLLS
+from .models import RVListing, SearchQuery
+from . import quota
+from .quota import yield_segment
+from .replay import http_client
+from .search_api import (
+    CRAIGSLIST_HEADERS,
+    SERPER_SITES,
+    QuotaExhausted,
+    SearchAPIError,
+    _craigslist_feed_url,
+    _fetch_serper,
+    _filter_serper_results,
+    _parse_rss_item,
+    _serper_api_key,
+    _serper_query,
+)
+from .seen import ScopedSeenSet, SeenSet
+from .tracing import count, span
+
+SOURCES = ("craigslist", "serper")
+
+# Seconds between polls of a feed, per source. Serper calls count against
+# the API quota, so they are polled far less often.
+DEFAULT_INTERVALS = {"craigslist": 15 * 60, "serper": 6 * 60 * 60}
+
+# Each poll is scheduled at interval * (1 +/- jitter), and first polls are
+# spread over jitter * interval, so feeds don't poll in lockstep
+DEFAULT_JITTER = 0.1
+
+# Consecutive failures back a feed off exponentially, up to this factor
+MAX_BACKOFF = 8
+
+# Serper results requested per site and poll
+SERPER_NUM = 10
+
+WATCH_FILTERS = (
+    "query", "rv_type", "min_price", "max_price", "min_year", "max_year", "location",
+)
+
+
+@dataclass
+class SavedSearch:
+    """A named set of search filters and the sources to watch."""
+
+    name: str
+    filters: Dict[str, Any] = field(default_factory=dict)
+    sources: Tuple[str, ...] = ("craigslist",)
+
+    @classmethod
+    def from_dict(cls, data: dict, default_name: str) -> "SavedSearch":
+        """Build a saved search from a dict of filters plus ``name`` and ``sources``.
+
+        The filters are validated as a SearchQuery, so bad values fail here
+        rather than when a listing is matched.
+        """
+        if not isinstance(data, dict):
+            raise SearchAPIError(f"{default_name}: expected a dict of filters, got {data!r}")
+        data = dict(data)
+        name = str(data.pop("name", default_name))
+        sources = data.pop("sources", ("craigslist",))
+        if isinstance(sources, str):
+            sources = (sources,)
+        unknown = sorted(set(sources) - set(SOURCES))
+        if unknown:
+            raise SearchAPIError(f"{name}: unknown source(s): {', '.join(unknown)}")
+        unknown = sorted(set(data) - set(WATCH_FILTERS))
+        if unknown:
+            raise SearchAPIError(f"{name}: unknown filter(s): {', '.join(unknown)}")
+        try:
+            SearchQuery.coerce(**data)
+        except (TypeError, ValueError) as e:
+            raise SearchAPIError(f"{name}: {e}")
+        return cls(name=name, filters=data, sources=tuple(sources))
+
+    def matches(self, listing: RVListing) -> bool:
+        """Apply the price and year filters; missing values pass, as in search."""
+        f = self.filters
+        if f.get("min_price") and listing.price and listing.price < f["min_price"]:
+            return False
+        if f.get("max_price") and listing.price and listing.price > f["max_price"]:
+            return False
+        if f.get("min_year") and listing.year and listing.year < f["min_year"]:
+            return False
+        if f.get("max_year") and listing.year and listing.year > f["max_year"]:
+            return False
+        return True
+
+
+def load_saved_searches(path: str, sources: Optional[Sequence[str]] = None) -> List[SavedSearch]:
+    """Read one JSON object per line: filters plus optional name and sources.
+
+    ``sources`` is the default for lines that don't list their own.
+    """
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError as e:
+        raise SearchAPIError(f"Cannot read {path}: {e}")
+
+    searches = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise SearchAPIError(f"{path}:{line_number}: invalid JSON: {e}")
+        if sources and isinstance(data, dict):
+            data.setdefault("sources", list(sources))
+        try:
+            searches.append(SavedSearch.from_dict(data, f"search-{len(searches) + 1}"))
+        except SearchAPIError as e:
+            raise SearchAPIError(f"{path}:{line_number}: {e}")
+    return searches
+
+
+@dataclass
+class Feed:
+    """One upstream request shared by the saved searches that need it."""
+
+    key: str
+    source: str
+    request: Dict[str, Any]
+    searches: List[SavedSearch] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    seen: Optional[ScopedSeenSet] = None
+    primed: bool = False
+    failures: int = 0
+    # Set when state worth saving changed since the last save
+    dirty: bool = False
+
+    def remember(self, url: str) -> bool:
+        """Record a URL, returning False if it was already seen."""
+        if not self.seen.add(url):
+            return False
+        self.dirty = True
+        return True
+
+
+def build_feeds(searches: Sequence[SavedSearch]) -> List[Feed]:
+    """Group saved searches by the upstream requests they need."""
+    feeds: Dict[str, Feed] = {}
+
+    def attach(key: str, source: str, request: Dict[str, Any], search: SavedSearch) -> None:
+        if key not in feeds:
+            feeds[key] = Feed(key=key, source=source, request=request)
+        feeds[key].searches.append(search)
+
+    for search in searches:
+        f = search.filters
+        if "craigslist" in search.sources:
+            # Prices are matched locally, so searches that differ only in
+            # price share a feed
+            region, url = _craigslist_feed_url(
+                f.get("query"), f.get("rv_type"), min_year=f.get("min_year"),
+                location=f.get("location"),
+            )
+            attach(url, "craigslist", {"region": region, "url": url}, search)
+        if "serper" in search.sources:
+            search_query = _serper_query(
+                f.get("query"), f.get("rv_type"), f.get("min_year"), f.get("location"),
+            )
+            segment = yield_segment(f.get("query"), f.get("rv_type"))
+            for site in SERPER_SITES:
+                attach(f"serper:{site}:{search_query}", "serper",
+                       {"site": site, "search_query": search_query, "segment": segment}, search)
+    return list(feeds.values())
+
+
+class StdoutEmitter:
+    """Print one line per new listing."""
+
+    def emit(self, events: List[dict]) -> None:
+        for event in events:
+            listing = RVListing(**event["listing"])
+            print(f"[{event['search']}] {listing.summary()}  {listing.url or ''}".rstrip())
+        sys.stdout.flush()
+
+
+class FileEmitter:
+    """Append new listings to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def emit(self, events: List[dict]) -> None:
+        with open(self.path, "a") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+
+class WebhookEmitter:
+    """POST each poll's new listings as ``{"events": [...]}`` to a URL."""
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, events: List[dict]) -> None:
+        try:
+            response = httpx.post(self.url, json={"events": events}, timeout=self.timeout)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"Warning: Webhook {self.url} failed: {e}", file=sys.stderr)
+
+
+def open_seen_set(state_path: Optional[str], exact: bool = False) -> SeenSet:
+    """Open the seen URLs stored next to a watch state file (in memory without one)."""
+    seen_path = f"{state_path}.seen" if state_path else None
+    try:
+        return SeenSet(seen_path, exact=exact)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        raise SearchAPIError(f"Cannot read seen URLs {seen_path}: {e}")
+
+
+class Watcher:
+    """Poll the feeds behind a set of saved searches and emit new matches.
+
+    The first successful poll of a feed only records what is already
+    listed, unless ``emit_initial`` is set. With a ``state_path``, seen URLs
+    and HTTP validators survive restarts; seen URLs are stored in a
+    ``SeenSet`` at ``state_path + ".seen"`` unless ``seen`` is given.
+    """
+
+    def __init__(
+        self,
+        searches: Sequence[SavedSearch],
+        emitters: Sequence[Any],
+        intervals: Optional[Dict[str, float]] = None,
+        jitter: float = DEFAULT_JITTER,
+        state_path: Optional[str] = None,
+        emit_initial: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+        seen: Optional[SeenSet] = None,
+    ):
+        self.feeds = build_feeds(searches)
+        self.emitters = list(emitters)
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.jitter = jitter
+        self.state_path = state_path
+        self.emit_initial = emit_initial
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self.seen = seen if seen is not None else open_seen_set(state_path)
+        for feed in self.feeds:
+            feed.seen = self.seen.scoped(feed.key)
+        self._clients: Dict[str, httpx.Client] = {}
+        self._api_key: Optional[str] = None
+        if any(feed.source == "serper" for feed in self.feeds):
+            self._api_key = _serper_api_key()
+        if state_path:
+            self.load_state()
+
+    # State
+
+    def load_state(self) -> None:
+        """Restore feed validators from ``state_path``, if it exists."""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            raise SearchAPIError(f"Cannot read watch state {self.state_path}: {e}")
+        saved = state.get("feeds", {})
+        for feed in self.feeds:
+            entry = saved.get(feed.key)
+            if entry is None:
+                continue
+            feed.etag = entry.get("etag")
+            feed.last_modified = entry.get("last_modified")
+            feed.primed = True
+
+    def save_state(self) -> None:
+        """Write validators and seen URLs atomically, if changed."""
+        if not self.state_path or not any(feed.dirty for feed in self.feeds):
+            return
+        state = {"feeds": {
+            feed.key: {
+                "etag": feed.etag,
+                "last_modified": feed.last_modified,
+            }
+            for feed in self.feeds if feed.primed
+        }}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self.seen.save()
+        for feed in self.feeds:
+            feed.dirty = False
+
+    # Polling
+
+    def _client(self, source: str) -> httpx.Client:
+        client = self._clients.get(source)
+        if client is None:
+            if source == "craigslist":
+                client = http_client(timeout=30, follow_redirects=True, headers=CRAIGSLIST_HEADERS)
+            else:
+                client = http_client(timeout=30)
+            self._clients[source] = client
+        return client
+
+    def close(self) -> None:
+        """Close HTTP clients and save state."""
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+        self.save_state()
+        self.seen.close()
+
+    def _fetch_craigslist(self, feed: Feed) -> Optional[List[RVListing]]:
+        """Return unseen listings, or None if the feed is unchanged (304)."""
+        headers = {}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+        response = self._client("craigslist").get(feed.request["url"], headers=headers)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if validators != (feed.etag, feed.last_modified):
+            feed.etag, feed.last_modified = validators
+            feed.dirty = True
+
+        listings = []
+        for item in ET.fromstring(response.text).iter("item"):
+            url = (item.findtext("link") or "").strip()
+            # Seen items are skipped before any regex parsing
+            if not url or not feed.remember(url):
+                continue
+            listing = _parse_rss_item(item)
+            if listing is not None:
+                listings.append(listing)
+        return listings
+
+    def _fetch_serper(self, feed: Feed) -> List[RVListing]:
+        """Return unseen, active listings from one site's Serper results."""
+        site = feed.request["site"]
+        ledger = quota.SERPER_QUOTA
+        if ledger.near_exhaustion(self._api_key):
+            # Stop at the reserve, as live searches do
+            raise QuotaExhausted(f"Serper quota is down to its reserve ({ledger.reserve} calls)")
+        if not ledger.schedule([site], feed.request["segment"]):
+            # The site delivers (almost) nothing for this make and type
+            count("watch.serper_skipped")
+            return []
+        organic = _fetch_serper(
+            self._client("serper"), self._api_key, site, feed.request["search_query"], SERPER_NUM,
+        )
+        unseen = [result for result in organic
+                  if result.get("link") and feed.remember(result["link"])]
+        return _filter_serper_results(unseen, site, segment=feed.request["segment"])
+
+    def poll(self, feed: Feed) -> List[dict]:
+        """Poll one feed and return events for new matching listings."""
+        source = feed.source
+        try:
+            with span("watch.poll", source=source):
+                if source == "craigslist":
+                    listings = self._fetch_craigslist(feed)
+                else:
+                    listings = self._fetch_serper(feed)
+        except (httpx.HTTPError, ET.ParseError, QuotaExhausted) as e:
+            feed.failures += 1
+            WATCH_POLLS.inc(source=source, outcome="error")
+            print(f"Warning: Failed to poll {feed.key}: {e}", file=sys.stderr)
+            return []
+        feed.failures = 0
+
+        if listings is None:
+            WATCH_POLLS.inc(source=source, outcome="not_modified")
+            return []
+        first_poll = not feed.primed
+        if first_poll:
+            feed.primed = feed.dirty = True
+        WATCH_POLLS.inc(source=source, outcome="new" if listings else "unchanged")
+        count("watch.new_items", len(listings))
+        if first_poll and not self.emit_initial:
+            return []
+
+        found_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        events = []
+        for search in feed.searches:
+            for listing in listings:
+                if search.matches(listing):
+                    events.append({
+                        "search": search.name,
+                        "source": source,
+                        "found_at": found_at,
+                        "listing": listing.to_dict(),
+                    })
+        WATCH_MATCHES.inc(len(events), source=source)
+        return events
+
+    def _emit(self, events: List[dict]) -> None:
+        if not events:
+            return
+        for emitter in self.emitters:
+            emitter.emit(events)
+
+    def _next_delay(self, feed: Feed) -> float:
+        interval = self.intervals[feed.source] * min(2 ** feed.failures, MAX_BACKOFF)
+        return interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def poll_all(self) -> int:
+        """Poll every feed once, returning the number of events emitted."""
+        emitted = 0
+        for feed in self.feeds:
+            events = self.poll(feed)
+            self._emit(events)
+            emitted += len(events)
+        self.save_state()
+        return emitted
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """Poll feeds on schedule until interrupted (or ``max_polls`` polls)."""
+        now = self._clock()
+        queue = [
+            (now + self._rng.uniform(0, self.intervals[feed.source] * self.jitter), i, feed)
+            for i, feed in enumerate(self.feeds)
+        ]
+        heapq.heapify(queue)
+        polls = 0
+        try:
+            while queue and (max_polls is None or polls < max_polls):
+                due, i, feed = queue[0]
+                delay = due - self._clock()
+                if delay > 0:
+                    self._sleep(delay)
+                    continue
+                heapq.heappop(queue)
+                events = self.poll(feed)
+                polls += 1
+                self._emit(events)
+                self.save_state()
+                heapq.heappush(queue, (self._clock() + self._next_delay(feed), i, feed))
+        finally:
+            self.close()
@@ -0,0 +1,17 @@
+"""Shared test fixtures."""
+
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import quota
+
+
+@pytest.fixture(autouse=True)
+def quota_ledger(tmp_path, monkeypatch):
+    """Record Serper calls made by tests in a throwaway quota ledger."""
+    ledger = quota.QuotaLedger(str(tmp_path / "quota.db"), burst=1000)
+    monkeypatch.setattr(quota, "SERPER_QUOTA", ledger)
+    yield ledger
+    ledger.close()
@@ -0,0 +1,418 @@
+"""Tests for the agent loop against a fake Anthropic client."""
+
+import asyncio
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import agent
+from rv_search_agent.agent import AgentUsage, run_agent
+from rv_search_agent.tracing import tracing
+
+
+def _strip_cache_control(value):
+    if isinstance(value, dict):
+        return {k: _strip_cache_control(v) for k, v in value.items() if k != "cache_control"}
+    if isinstance(value, list):
+        return [_strip_cache_control(v) for v in value]
+    if isinstance(value, SimpleNamespace):
+        return _strip_cache_control(vars(value))
+    return value
+
+
+class FakeCachingMessages:
+    """Calls the search tool ``tool_turns`` times, then answers.
+
+    Usage is simulated like the prompt cache: a request writes everything up
+    to its last breakpoint, and reads the longest prefix an earlier request
+    wrote. Tokens are approximated as characters / 4.
+    """
+
+    def __init__(self, tool_turns=2, tool_input=None):
+        self.tool_turns = tool_turns
+        self.tool_input = tool_input or {"query": "Unity", "max_results": 2}
+        self.requests = []
+        self.usages = []
+        self.cached = set()
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        segments = tuple(
+            json.dumps(_strip_cache_control(part), sort_keys=True)
+            for part in [kwargs["tools"], kwargs["system"]] + kwargs["messages"]
+        )
+        read = max((len(prefix) for prefix in self.cached if segments[:len(prefix)] == prefix),
+                   default=0)
+        self.cached.add(segments)
+        tokens = [len(segment) // 4 for segment in segments]
+        usage = SimpleNamespace(
+            input_tokens=0,
+            output_tokens=20,
+            cache_read_input_tokens=sum(tokens[:read]),
+            cache_creation_input_tokens=sum(tokens[read:]),
+        )
+        self.usages.append(usage)
+
+        tools_off = kwargs.get("tool_choice") == {"type": "none"}
+        if len(self.requests) <= self.tool_turns and not tools_off:
+            block = SimpleNamespace(type="tool_use", name="search_rv_listings",
+                                    input=self.tool_input, id=f"tool_{len(self.requests)}")
+            return SimpleNamespace(stop_reason="tool_use", content=[block], usage=usage)
+        return SimpleNamespace(stop_reason="end_turn", usage=usage,
+                               content=[SimpleNamespace(type="text", text="Done")])
+
+
+class FakeAsyncMessages:
+    """Async client that sleeps per call, searches once, then answers.
+
+    Tracks the most model calls in flight at once.
+    """
+
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def create(self, messages, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if len(messages) == 1:
+            block = SimpleNamespace(type="tool_use", name="search_rv_listings", id="tool_1",
+                                    input={"query": messages[0]["content"][0]["text"]})
+            return SimpleNamespace(stop_reason="tool_use", content=[block])
+        count = json.loads(messages[-1]["content"][0]["content"])["count"]
+        return SimpleNamespace(stop_reason="end_turn",
+                               content=[SimpleNamespace(type="text", text=f"{count} found")])
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    fake = FakeCachingMessages()
+    monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+    return fake
+
+
+class TestPromptCaching:
+    """Test cache breakpoints and cache usage accounting."""
+
+    def test_request_shape(self, messages):
+        """Test breakpoints on the tools, the system prompt and only the newest message."""
+        assert run_agent("Find a Unity", fast_path=False) == "Done"
+        assert len(messages.requests) == 3
+        for request in messages.requests:
+            assert request["system"][-1]["cache_control"] == {"type": "ephemeral"}
+            assert request["system"][-1]["text"] == agent.SYSTEM_PROMPT
+            assert request["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+            newest = request["messages"][-1]
+            assert newest["role"] == "user"
+            assert newest["content"][-1]["cache_control"] == {"type": "ephemeral"}
+            marked = json.dumps(_strip_cache_control(request["messages"][:-1]))
+            assert json.dumps(request["messages"][:-1], default=vars) == marked
+        assert "cache_control" not in agent.TOOLS[-1]
+        assert messages.requests[0]["messages"][0]["content"][0]["text"] == "Find a Unity"
+
+    def test_usage_per_run(self, messages):
+        """Test that each call after the first reads the previous call's prefix."""
+        usage = AgentUsage()
+        run_agent("Find a Unity", usage=usage, fast_path=False)
+        calls = messages.usages
+        assert calls[0].cache_read_input_tokens == 0
+        for previous, call in zip(calls, calls[1:]):
+            assert call.cache_read_input_tokens == \
+                previous.cache_read_input_tokens + previous.cache_creation_input_tokens
+
+        assert usage.llm_calls == 3
+        assert usage.output_tokens == 60
+        assert usage.cache_read_input_tokens == sum(c.cache_read_input_tokens for c in calls)
+        assert usage.cache_creation_input_tokens == sum(c.cache_creation_input_tokens for c in calls)
+        assert 0 < usage.cache_hit_rate < 1
+
+
+class TestModelRouting:
+    """Test routing tool turns and answer turns to different models."""
+
+    ROUTING = agent.ModelRouting(tool_model="fast", answer_model="big",
+                                 tool_max_tokens=100, answer_max_tokens=2000)
+
+    def test_models_per_turn(self, messages):
+        """Test that the first turn goes to the tool model and later turns to the answer model."""
+        run_agent("Find a Unity", fast_path=False, routing=self.ROUTING)
+        sent = [(r["model"], r["max_tokens"]) for r in messages.requests]
+        assert sent == [("fast", 100), ("big", 2000), ("big", 2000)]
+
+    def test_turn_usage(self, messages):
+        """Test that each call's kind, model, latency and tokens are recorded."""
+        usage = AgentUsage()
+        run_agent("Find a Unity", usage=usage, fast_path=False, routing=self.ROUTING)
+        assert [(t.turn, t.kind, t.model) for t in usage.turns] == \
+            [(1, "tool", "fast"), (2, "answer", "big"), (3, "answer", "big")]
+        assert [t.stop_reason for t in usage.turns] == ["tool_use", "tool_use", "end_turn"]
+        assert all(t.latency >= 0 and t.output_tokens == 20 for t in usage.turns)
+        assert sum(t.cache_read_input_tokens for t in usage.turns) == usage.cache_read_input_tokens
+
+    def test_direct_answer_reissued(self, monkeypatch):
+        """Test that a tool turn answering without a tool is re-issued, costing no turn."""
+        fake = FakeCachingMessages(tool_turns=0)
+        monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+        usage = AgentUsage()
+        assert run_agent("What is a Class B?", usage=usage, fast_path=False,
+                         routing=self.ROUTING) == "Done"
+        assert [(r["model"], r["max_tokens"]) for r in fake.requests] == \
+            [("fast", 100), ("big", 2000)]
+        assert [(t.turn, t.kind) for t in usage.turns] == [(1, "tool"), (1, "answer")]
+        assert usage.runs[-1].turns == 1
+        assert usage.runs[-1].output_tokens == sum(t.output_tokens for t in usage.turns)
+
+    def test_question_without_search_goes_to_answer_model(self, monkeypatch):
+        """Test that a message with nothing to search starts on the answer model."""
+        fake = FakeCachingMessages(tool_turns=0)
+        monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+        usage = AgentUsage()
+        assert run_agent("How do I winterize my plumbing?", usage=usage, fast_path=False,
+                         routing=self.ROUTING) == "Done"
+        assert [(r["model"], r["max_tokens"]) for r in fake.requests] == [("big", 2000)]
+        assert [t.kind for t in usage.turns] == ["answer"]
+
+    def test_no_reissue_without_routing(self, monkeypatch):
+        """Test that a direct answer isn't re-issued when both turns use one model."""
+        fake = FakeCachingMessages(tool_turns=0)
+        monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+        routing = agent.ModelRouting("big", "big", 2000, 2000)
+        run_agent("What is a Class B?", fast_path=False, routing=routing)
+        assert len(fake.requests) == 1
+
+    def test_from_env(self, monkeypatch):
+        """Test configuring models and budgets from the environment."""
+        monkeypatch.setenv("RV_SEARCH_TOOL_MODEL", "small")
+        monkeypatch.setenv("RV_SEARCH_ANSWER_MAX_TOKENS", "512")
+        routing = agent.ModelRouting.from_env()
+        assert routing.tool_model == "small"
+        assert routing.answer_model == agent.MODEL
+        assert routing.tool_max_tokens == agent.TOOL_MAX_TOKENS
+        assert routing.answer_max_tokens == 512
+
+
+class TestBudget:
+    """Test the budget governor's limits and wrap-up turn."""
+
+    @pytest.fixture
+    def looping(self, monkeypatch):
+        fake = FakeCachingMessages(tool_turns=100)
+        monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+        return fake
+
+    def test_max_turns(self, looping):
+        """Test that the last allowed turn is a wrap-up without tools."""
+        usage = AgentUsage()
+        budget = agent.AgentBudget(max_turns=3)
+        assert run_agent("Find a Unity", usage=usage, fast_path=False, budget=budget) == "Done"
+        assert len(looping.requests) == 3
+        assert [r.get("tool_choice") for r in looping.requests] == [None, None, {"type": "none"}]
+        note = looping.requests[-1]["messages"][-1]["content"][-1]
+        assert note["type"] == "text" and "turn budget" in note["text"]
+        run = usage.runs[0]
+        assert (run.turns, run.tool_calls, run.wrap_up) == (3, 2, "turns")
+        assert run.output_tokens == 60 and run.input_tokens > 0
+        assert run.used(budget)["turns"] == 1.0
+
+    def test_max_tool_calls(self, looping):
+        """Test wrapping up once the tool calls are used, with their results."""
+        usage = AgentUsage()
+        run_agent("Find a Unity", usage=usage, fast_path=False,
+                  budget=agent.AgentBudget(max_tool_calls=1))
+        assert len(looping.requests) == 2
+        assert usage.runs[0].wrap_up == "tool_calls"
+        assert looping.requests[1]["messages"][-1]["content"][0]["type"] == "tool_result"
+
+    def test_no_tool_calls(self, looping):
+        """Test that a tool call over budget is refused, not run."""
+        usage = AgentUsage()
+        run_agent("Find a Unity", usage=usage, fast_path=False,
+                  budget=agent.AgentBudget(max_tool_calls=0))
+        result = looping.requests[1]["messages"][-1]["content"][0]["content"]
+        assert "budget is used up" in json.loads(result)["error"]
+        assert usage.runs[0].tool_calls == 0
+
+    def test_deadline_and_output_tokens(self, looping):
+        """Test the deadline, and capping the wrap-up's max_tokens at the output left."""
+        usage = AgentUsage()
+        run_agent("Find a Unity", usage=usage, fast_path=False,
+                  budget=agent.AgentBudget(deadline=0))
+        assert usage.runs[0].wrap_up == "deadline"
+
+        routing = agent.ModelRouting(tool_max_tokens=100, answer_max_tokens=100)
+        run_agent("Find a Unity", usage=usage, fast_path=False, routing=routing,
+                  budget=agent.AgentBudget(max_output_tokens=150))
+        assert usage.runs[1].wrap_up == "output_tokens"
+        assert looping.requests[-1]["max_tokens"] == 90
+        assert usage.turns[-1].max_tokens == 90
+
+    def test_within_budget(self, messages):
+        """Test that a run within its budget isn't cut short."""
+        usage = AgentUsage()
+        assert run_agent("Find a Unity", usage=usage, fast_path=False) == "Done"
+        assert "tool_choice" not in messages.requests[-1]
+        run = usage.runs[0]
+        assert (run.turns, run.tool_calls, run.wrap_up) == (3, 2, None)
+        assert 0 < run.elapsed < agent.BUDGET.deadline
+
+    def test_async_max_turns(self, monkeypatch):
+        """Test that arun_agent enforces the budget too."""
+        fake = FakeCachingMessages(tool_turns=100)
+
+        async def create(**kwargs):
+            return fake.create(**kwargs)
+
+        monkeypatch.setattr(agent, "create_async_agent",
+                            lambda: SimpleNamespace(messages=SimpleNamespace(create=create)))
+        usage = AgentUsage()
+        answer = asyncio.run(agent.arun_agent("Find a Unity", usage=usage, fast_path=False,
+                                              budget=agent.AgentBudget(max_turns=2)))
+        assert answer == "Done"
+        assert usage.runs[0].wrap_up == "turns"
+
+    def test_invalid(self):
+        """Test that a budget must leave a turn for the answer."""
+        with pytest.raises(ValueError):
+            agent.AgentBudget(max_turns=1)
+
+
+class TestSpeculation:
+    """Test prefetching the model's likely first search."""
+
+    @pytest.mark.parametrize("query, expected", [
+        ("What's the typical price of a 2023 Unity U24RL?",
+         ("summarize_rv_market", {"query": "u24rl", "min_year": 2023, "max_year": 2023,
+                                  "max_results": agent.SUMMARY_MAX_RESULTS})),
+        ("Find AWD Class B vans near Denver, CO",
+         ("search_rv_listings", {"rv_type": "class b", "near": "denver, co",
+                                 "max_results": agent.TOOL_MAX_RESULTS})),
+        ("Compare Storyteller vans under $200k in California",
+         ("search_rv_listings", {"query": "storyteller", "max_price": 200_000,
+                                 "max_results": agent.TOOL_MAX_RESULTS})),
+        ("Tell me about RVs", None),
+    ])
+    def test_guess(self, query, expected):
+        """Test that criteria and known names are found among other words."""
+        guess = agent.guess_tool_call(query)
+        assert (guess and (guess[0], guess[1].filters())) == expected
+
+    @pytest.fixture
+    def searches(self, monkeypatch):
+        calls = []
+        search = agent.search_rv_listings
+
+        def counting_search(query):
+            calls.append(query)
+            return search(query)
+
+        monkeypatch.setattr(agent, "search_rv_listings", counting_search)
+        return calls
+
+    def _run(self, monkeypatch, tool_input):
+        fake = FakeCachingMessages(tool_turns=1, tool_input=tool_input)
+        monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+        return run_agent("Compare Unity prices", fast_path=False, speculate=True)
+
+    def test_hit(self, monkeypatch, searches):
+        """Test that a matching tool call is served from the prefetch."""
+        hits = agent.AGENT_SPECULATION.value(outcome="hit")
+        assert self._run(monkeypatch, {"query": "UNITY "}) == "Done"
+        assert len(searches) == 1
+        assert agent.AGENT_SPECULATION.value(outcome="hit") == hits + 1
+
+    def test_speculation_traced(self, monkeypatch, searches):
+        """Test that the prefetched search is recorded in the run's trace."""
+        with tracing() as trace:
+            self._run(monkeypatch, {"query": "Unity"})
+        assert "agent.speculate" in trace.totals()
+
+    def test_miss(self, monkeypatch, searches):
+        """Test that a different tool call runs its own search."""
+        misses = agent.AGENT_SPECULATION.value(outcome="miss")
+        assert self._run(monkeypatch, {"query": "Unity", "max_results": 2}) == "Done"
+        assert 2 in [query.max_results for query in searches]
+        assert agent.AGENT_SPECULATION.value(outcome="miss") == misses + 1
+
+
+class TestFastPath:
+    """Test answering plain structured requests without the model."""
+
+    @pytest.mark.parametrize("query, filters", [
+        ("Find me Class C RVs under $100,000", {"rv_type": "class c", "max_price": 100_000}),
+        ("Show me Unity U24RL listings in Denver, CO", {"query": "u24rl", "near": "denver, co"}),
+        ("Storyteller Beast MODE XO from 2023 to 2025 under $250k",
+         {"query": "beast mode xo", "min_year": 2023, "max_year": 2025, "max_price": 250_000}),
+        ("Class B+ with under 20,000 miles within 50 miles of Seattle, WA",
+         {"rv_type": "class b+", "max_mileage": 20_000, "near": "seattle, wa", "radius_miles": 50}),
+        ("fifth wheels between $50,000 and $90,000",
+         {"rv_type": "fifth wheel", "min_price": 50_000, "max_price": 90_000}),
+        ("Winnebago 2020+", {"query": "winnebago", "min_year": 2020}),
+        ("Class C RVs near Springfield, IL", {"rv_type": "class c", "near": "springfield, il"}),
+    ])
+    def test_parse(self, query, filters):
+        """Test that each criterion is extracted, and years aren't read as prices."""
+        simple = agent.parse_simple_query(query)
+        assert simple.search.filters() == {**filters, "max_results": agent.TOOL_MAX_RESULTS}
+
+    @pytest.mark.parametrize("query", [
+        "Find me 2024 Storyteller Overland XO Classic RVs",  # unknown model
+        "What's the typical price of a 2023 Unity U24RL?",
+        "Travel trailers in California",  # a state, not a city
+        "Class C RVs near Springfield",  # in several states
+        "Unity under 2020",
+        "Class C from 2024 to 2020",
+        "Find me RVs",
+    ])
+    def test_falls_back(self, query):
+        """Test that anything not fully understood is left to the model."""
+        assert agent.parse_simple_query(query) is None
+
+    def test_run_agent_without_model(self, monkeypatch):
+        """Test that a simple query is answered from the search, with no model calls."""
+        monkeypatch.setattr(agent, "create_agent", lambda: pytest.fail("called the model"))
+        answer = run_agent("Find me Class C RVs under $100,000", fast_path=True)
+        assert answer.startswith("Found 2 listings for Class C RVs up to $100,000:")
+        assert "Thor Four Winds 28A - $89,500" in answer
+        assert "https://example.com/listing/3" in answer
+
+    def test_run_agent_falls_back(self, messages):
+        """Test that other queries go to the model."""
+        assert run_agent("Compare Unity prices", fast_path=True) == "Done"
+        assert len(messages.requests) == 3
+
+
+class TestAsyncAgent:
+    """Test arun_agent and its shared concurrency limiter."""
+
+    def test_concurrent_sessions(self, monkeypatch):
+        """Test that many sessions run together, within the limiter's bound."""
+        fake = FakeAsyncMessages()
+        monkeypatch.setattr(agent, "create_async_agent", lambda: SimpleNamespace(messages=fake))
+        limiter = agent.AgentLimiter(8)
+
+        async def main():
+            return await asyncio.gather(*(
+                agent.arun_agent(query, fast_path=False, limiter=limiter)
+                for query in ["Unity", "Storyteller"] * 50
+            ))
+
+        answers = asyncio.run(main())
+        assert answers == ["9 found", "10 found"] * 50
+        assert fake.calls == 200
+        assert fake.max_in_flight == 8
+
+    def test_fast_path(self, monkeypatch):
+        """Test that simple queries are answered without a model client."""
+        monkeypatch.setattr(agent, "create_async_agent", lambda: pytest.fail("called the model"))
+        answer = asyncio.run(agent.arun_agent("Class C under $100k", fast_path=True))
+        assert answer.startswith("Found 2 listings")
@@ -0,0 +1,232 @@
+"""Tests for batch search."""
+
+import json
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import cli
+from rv_search_agent.batch import iter_rv_listings_batch, search_rv_listings_batch
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.models import RVListing
+from rv_search_agent.planner import execute_batch, plan_search
+from rv_search_agent.search_api import (
+    SearchAPIError,
+    _search_demo,
+    search_rv_listings_live,
+)
+
+SAVED_SEARCHES = [
+    {"query": "Storyteller"},
+    {"query": "unity", "max_price": 200000, "max_results": 3},
+    {"rv_type": "Class C", "max_price": 100000},
+    {"source": "Facebook Marketplace", "min_year": 2022},
+    {"near": "Denver, CO", "radius_miles": 300},
+    {"query": "Storyteller "},
+    {"query": "NonExistentBrandXYZ123"},
+]
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    SEARCH_CACHE.clear()
+    yield
+    SEARCH_CACHE.clear()
+
+
+def _mock_serper(requests, failing=None):
+    real_client = httpx.Client
+    lock = threading.Lock()
+
+    def handler(request):
+        q = json.loads(request.content)["q"]
+        with lock:
+            requests.append(q)
+        if failing and q.startswith(f"site:{failing} "):
+            return httpx.Response(503)
+        return httpx.Response(200, json={"organic": [
+            {"title": "2023 Unity U24RL - $150,000", "link": "https://a", "snippet": ""},
+            {"title": "2019 Unity U24MB - $90,000", "link": "https://b", "snippet": ""},
+            {"title": "2022 Unity U24TB - SOLD", "link": "https://c", "snippet": ""},
+        ]})
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+    return client
+
+
+class TestBatchSearch:
+    """Test batch search against single searches."""
+
+    def test_demo_matches_single_searches(self):
+        """Test that batch results equal one search per filter dict, in order."""
+        expected = [_search_demo(**filters) for filters in SAVED_SEARCHES]
+        assert search_rv_listings_batch(SAVED_SEARCHES, demo_mode=True) == expected
+
+    def test_duplicates_and_cache(self):
+        """Test that duplicate searches run once and results are cached."""
+        results = search_rv_listings_batch(SAVED_SEARCHES, demo_mode=True)
+        assert results[0] == results[5]
+        assert len(SEARCH_CACHE) == len(SAVED_SEARCHES) - 1
+
+        streamed = list(iter_rv_listings_batch(SAVED_SEARCHES, demo_mode=True))
+        assert sorted(index for index, _ in streamed) == list(range(len(SAVED_SEARCHES)))
+        assert SEARCH_CACHE.hits == len(SAVED_SEARCHES) - 1
+
+    def test_invalid_queries(self):
+        """Test that bad filters are reported with the query index."""
+        with pytest.raises(SearchAPIError, match="Query 1: unknown filter"):
+            search_rv_listings_batch([{"query": "Unity"}, {"make": "Unity"}], demo_mode=True)
+        with pytest.raises(SearchAPIError, match="unknown filter"):
+            search_rv_listings_batch([{"source": "Dealer"}], live=True)
+        with pytest.raises(SearchAPIError, match="Unknown location"):
+            search_rv_listings_batch([{"near": "Atlantis"}], demo_mode=True)
+
+    def test_execute_batch_matches_execute(self):
+        """Test shared scans against executing each plan on its own."""
+        catalog = ListingCatalog([
+            RVListing(
+                title=f"{2015 + i % 10} Make{i % 7} Model{i % 5}",
+                price=40000 + (i * 1777) % 200000,
+                year=2015 + i % 10,
+                make=f"Make{i % 7}",
+                model=f"Model{i % 5}",
+                rv_type=["Class A", "Class B", "Class C"][i % 3],
+                source="Facebook Marketplace" if i % 20 == 0 else "Dealer",
+            )
+            for i in range(3000)
+        ])
+        searches = [
+            ({"query": "Make1"}, 5),
+            ({"query": "Make1", "max_price": 100000}, 2000),
+            ({"query": "Make2", "max_price": 100000}, 10),
+            ({"rv_type": "Class B", "min_year": 2020}, 50),
+            ({"rv_type": "Class B", "query": "Model3"}, 3000),
+            ({"max_price": 45000}, 3000),
+            ({}, 1),
+        ]
+        plans = [plan_search(catalog, **filters) for filters, _ in searches]
+        execute_batch(plans, [limit for _, limit in searches])
+        for (filters, limit), plan in zip(searches, plans):
+            single = plan_search(catalog, **filters)
+            single.execute(limit)
+            assert plan.results == single.results
+
+    def test_live_coalesces_requests(self):
+        """Test that searches differing only in price share upstream requests."""
+        searches = [
+            {"query": "Unity", "max_price": 100000},
+            {"query": "Unity", "min_price": 100000},
+            {"query": "Storyteller"},
+        ]
+        requests = []
+        with patch.object(httpx, "Client", _mock_serper(requests)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            results = search_rv_listings_batch(searches, live=True)
+            assert len(requests) == 8
+            assert len(set(requests)) == 8
+
+            SEARCH_CACHE.clear()
+            expected = [search_rv_listings_live(**filters) for filters in searches]
+        assert results == expected
+        assert [listing.price for listing in results[0]] == [90000] * 4
+
+    def test_live_shared_request_yield_recorded_once(self, quota_ledger):
+        """Test that a request shared by several searches counts as one call of yield."""
+        searches = [{"query": "Unity", "max_price": 100000}, {"query": "Unity"}]
+        with patch.object(httpx, "Client", _mock_serper([])), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            search_rv_listings_batch(searches, live=True)
+        yields = quota_ledger.segment_yields()
+        assert len(yields) == 4
+        assert {(row["calls"], row["fetched"], row["kept"]) for row in yields} == {(1, 3, 2)}
+
+    def test_live_stays_above_reserve(self, quota_ledger):
+        """Test that a batch only plans the calls above the quota's reserve."""
+        quota_ledger.monthly_limit = quota_ledger.reserve + 2
+        requests = []
+        with patch.object(httpx, "Client", _mock_serper(requests)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            results = search_rv_listings_batch(
+                [{"query": "Unity"}, {"query": "Unity", "min_price": 100000},
+                 {"query": "Storyteller"}], live=True)
+        # Unity's two best sites, then Storyteller's best
+        assert len(requests) == 3
+        assert sum("storyteller" in q.lower() for q in requests) == 1
+        assert all(results)
+
+    def test_live_request_failure_not_cached(self, capsys):
+        """Test that a search with a failed Serper request keeps other sites' results uncached."""
+        requests = []
+        with patch.object(httpx, "Client", _mock_serper(requests, failing="rvtrader.com")), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            results = search_rv_listings_batch([{"query": "Unity"}], live=True)
+        assert results[0]
+        assert "Failed to search rvtrader.com" in capsys.readouterr().err
+        assert len(SEARCH_CACHE) == 0
+
+    def test_craigslist_feed_failure(self, capsys):
+        """Test that one failing Craigslist feed doesn't stop the others."""
+        real_client = httpx.Client
+
+        def handler(request):
+            if request.url.host == "denver.craigslist.org":
+                return httpx.Response(503)
+            return httpx.Response(200, text=(
+                "<rss><channel><item><title>2021 Unity U24RL - $140,000</title>"
+                f"<link>https://{request.url.host}/1</link></item></channel></rss>"))
+
+        def client(*args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(handler)
+            return real_client(*args, **kwargs)
+
+        searches = [
+            {"query": "Unity", "location": "Seattle"},
+            {"query": "Unity", "location": "Denver"},
+            {"query": "Unity", "location": "Austin"},
+        ]
+        with patch.object(httpx, "Client", client):
+            results = search_rv_listings_batch(searches, demo_mode=False)
+        assert [len(listings) for listings in results] == [1, 0, 1]
+        assert "Failed to search Craigslist denver" in capsys.readouterr().err
+        assert len(SEARCH_CACHE) == 2
+
+
+class TestBatchCLI:
+    """Test the --batch CLI mode."""
+
+    def test_batch_file(self, tmp_path, capsys):
+        """Test that each query's results are printed under its header."""
+        path = tmp_path / "queries.jsonl"
+        path.write_text(
+            '{"query": "Storyteller", "max_results": 2}\n'
+            "# comment lines and blank lines are skipped\n"
+            "\n"
+            '{"query": "NonExistentBrandXYZ123"}\n'
+        )
+        with patch.object(sys, "argv", ["rv-search", "--batch", str(path)]), \
+                pytest.raises(SystemExit) as exit_info:
+            cli.main()
+        out = capsys.readouterr().out
+        assert exit_info.value.code == 0
+        assert 'Query 1: {"query": "Storyteller", "max_results": 2}' in out
+        assert "Found 2 listing(s)" in out
+        assert 'Query 2: {"query": "NonExistentBrandXYZ123", "max_results": 10}' in out
+        assert "No listings found" in out
+
+    def test_batch_invalid_line(self, tmp_path, capsys):
+        """Test that malformed JSON is reported with its line number."""
+        path = tmp_path / "queries.jsonl"
+        path.write_text('{"query": "Unity"}\nnot json\n')
+        with patch.object(sys, "argv", ["rv-search", "--batch", str(path)]), \
+                pytest.raises(SystemExit) as exit_info:
+            cli.main()
+        assert exit_info.value.code == 1
+        assert f"{path}:2: invalid JSON" in capsys.readouterr().out
@@ -0,0 +1,97 @@
+"""Tests for the search result cache."""
+
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import search_api
+from rv_search_agent.cache import SEARCH_CACHE, QueryCache
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.models import RVListing
+
+
+def search_rv_listings_demo(**filters):
+    return search_api.search_rv_listings(demo_mode=True, **filters)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clean_cache():
+    SEARCH_CACHE.clear()
+    yield SEARCH_CACHE
+    SEARCH_CACHE.clear()
+
+
+class TestQueryCache:
+    """Test the LRU cache itself."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = QueryCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = QueryCache(ttl_seconds=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 5
+        assert cache.get("a") == 1
+        clock.now = 16
+        assert cache.get("a") is None
+        assert cache.expirations == 1
+
+    def test_disabled(self):
+        """Test that a disabled cache never stores values."""
+        cache = QueryCache(enabled=False)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_hit_rate(self):
+        """Test hit-rate statistics."""
+        cache = QueryCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        assert cache.stats()["hit_rate"] == 0.5
+
+
+class TestSearchCaching:
+    """Test caching in search_rv_listings."""
+
+    def test_repeated_search_hits_cache(self, clean_cache):
+        """Test that an equivalent repeated search is served from the cache."""
+        first = search_rv_listings_demo(query="Storyteller", max_results=5)
+        second = search_rv_listings_demo(query="storyteller ", max_results=5)
+        assert first == second
+        assert clean_cache.hits == 1
+
+    def test_results_are_copies(self, clean_cache):
+        """Test that callers sorting results don't mutate the cached value."""
+        first = search_rv_listings_demo(query="Unity")
+        first.reverse()
+        second = search_rv_listings_demo(query="Unity")
+        assert first == list(reversed(second))
+
+    def test_catalog_change_invalidates(self, clean_cache, monkeypatch):
+        """Test that adding listings to the catalog invalidates cached results."""
+        catalog = ListingCatalog([RVListing(title="2020 Winnebago View", make="Winnebago")])
+        monkeypatch.setattr(search_api, "DEMO_CATALOG", catalog)
+        assert len(search_rv_listings_demo(query="Winnebago")) == 1
+        catalog.add(RVListing(title="2021 Winnebago Revel", make="Winnebago"))
+        assert len(search_rv_listings_demo(query="Winnebago")) == 2
@@ -0,0 +1,52 @@
+"""Tests for the listing catalog."""
+
+import sys
+
+sys.path.insert(0, "src")
+from rv_search_agent.catalog import ListingCatalog, SearchKeys, normalize_text
+from rv_search_agent.models import RVListing
+from rv_search_agent.search_api import _search_demo
+
+
+class TestCatalog:
+    """Test precomputed search keys and catalog search."""
+
+    def test_normalize_text_casefolds_and_strips_accents(self):
+        """Test that normalization is case and accent insensitive."""
+        assert normalize_text("Résidence Égal") == "residence egal"
+        assert normalize_text("STRASSE") == normalize_text("Straße")
+        assert normalize_text(None) is None
+
+    def test_low_cardinality_keys_are_interned(self):
+        """Test that rv_type and source keys share one string object."""
+        first = SearchKeys.from_listing(RVListing(title="a", rv_type="Class B", source="Dealer"))
+        second = SearchKeys.from_listing(RVListing(title="b", rv_type="class b", source="DEALER"))
+        assert first.rv_type is second.rv_type
+        assert first.source is second.source
+
+    def test_version_bumps_on_extend(self):
+        """Test that adding listings bumps the catalog version."""
+        catalog = ListingCatalog([RVListing(title="a")])
+        version = catalog.version
+        catalog.add(RVListing(title="b"))
+        assert catalog.version == version + 1
+        assert len(catalog) == 2
+
+    def test_search_is_accent_insensitive(self):
+        """Test that catalog search matches accented text."""
+        catalog = ListingCatalog([
+            RVListing(title="2023 Unity U24RL", make="Unity", location="Montréal, QC"),
+            RVListing(title="2022 Winnebago View", make="Winnebago", location="Denver, CO"),
+        ])
+        results = _search_demo(location="montreal", catalog=catalog)
+        assert [r.make for r in results] == ["Unity"]
+
+    def test_search_rv_type_substring(self):
+        """Test that rv_type keeps substring matching semantics."""
+        catalog = ListingCatalog([
+            RVListing(title="a", rv_type="Class B+"),
+            RVListing(title="b", rv_type="Class C"),
+            RVListing(title="c"),
+        ])
+        results = _search_demo(rv_type="class b", catalog=catalog)
+        assert [r.title for r in results] == ["a", "c"]
@@ -8,6 +8,7 @@ from unittest.mock import patch
 import pytest
 
 sys.path.insert(0, "src")
+from rv_search_agent.cli import main
 from rv_search_agent.search_api import (
     search_rv_listings,
     search_rv_listings_live,
@@ -405,6 +406,21 @@ class TestLiveSearch:
             if original_key:
                 os.environ["SERPER_API_KEY"] = original_key
 
+    @pytest.mark.parametrize("flags", [
+        ["--near", "Denver, CO"],
+        ["--radius", "50"],
+        ["--source", "Dealer"],
+        ["--min-mileage", "0", "--max-mileage", "20000"],
+        ["--explain"],
+    ])
+    def test_cli_live_rejects_unsupported_filters(self, flags, capsys):
+        """Test that --live refuses filters it can't apply instead of dropping them."""
+        with pytest.raises(SystemExit) as exc_info:
+            main(["-q", "Unity", "--live"] + flags)
+        assert exc_info.value.code == 2
+        err = capsys.readouterr().err
+        assert f"{flags[0]}" in err and "can't be used with --live" in err
+
     @pytest.mark.skipif(
         not os.environ.get("SERPER_API_KEY"),
         reason="SERPER_API_KEY not set"
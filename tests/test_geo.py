@@ -0,0 +1,102 @@
+"""Tests for geocoding and radius search."""
+
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent.geo import (
+    GEOCODE_CACHE_SIZE,
+    Gazetteer,
+    GeoIndex,
+    geocode,
+    get_gazetteer,
+    haversine_miles,
+)
+from rv_search_agent.search_api import SearchAPIError, search_rv_listings
+
+
+class TestGeocode:
+    """Test the bundled gazetteer."""
+
+    def test_city_and_state(self):
+        """Test that 'City, ST' and 'City, State' resolve the same."""
+        assert geocode("Denver, CO") == geocode("denver, colorado")
+        assert geocode("Denver, CO") is not None
+
+    def test_state_only(self):
+        """Test that a bare state resolves to its centroid."""
+        assert geocode("Colorado") == geocode("CO")
+        assert geocode("Colorado") is not None
+
+    def test_unknown_city_in_known_state(self):
+        """Test that unknown cities don't fall back to the state centroid."""
+        assert geocode("Nowheresville, CO") is None
+
+    def test_ambiguous_city(self):
+        """Test that a bare city name in several states is flagged as ambiguous."""
+        gazetteer = get_gazetteer()
+        assert gazetteer.is_ambiguous("Springfield")
+        assert gazetteer.is_ambiguous("springfield, somewhere")
+        assert not gazetteer.is_ambiguous("Springfield, IL")
+        assert not gazetteer.is_ambiguous("Springfield IL")
+        assert not gazetteer.is_ambiguous("Denver")
+        assert not gazetteer.is_ambiguous(None)
+
+    def test_cache_is_bounded(self):
+        """Test that distinct location strings don't grow the cache without limit."""
+        gazetteer = Gazetteer.load()
+        for i in range(GEOCODE_CACHE_SIZE + 100):
+            gazetteer.geocode(f"Town {i}, CO")
+        assert gazetteer._lookup.cache_info().currsize == GEOCODE_CACHE_SIZE
+        assert gazetteer.geocode("Denver, CO") == geocode("Denver, CO")
+
+    def test_haversine(self):
+        """Test distance between Denver and Boulder is about 25 miles."""
+        denver = geocode("Denver, CO")
+        boulder = geocode("Boulder, CO")
+        assert 20 < haversine_miles(*denver, *boulder) < 30
+
+
+class TestGeoIndex:
+    """Test the grid spatial index."""
+
+    def test_within_matches_linear_scan(self):
+        """Test that index results equal a brute-force scan."""
+        points = [(30 + i * 0.37 % 15, -120 + i * 0.91 % 40) for i in range(500)]
+        index = GeoIndex()
+        for item_id, (lat, lon) in enumerate(points):
+            index.insert(item_id, lat, lon)
+
+        origin = (37.0, -100.0)
+        expected = sorted(
+            item_id for item_id, p in enumerate(points)
+            if haversine_miles(*origin, *p) <= 300
+        )
+        found = index.within(*origin, 300)
+        assert sorted(item_id for _, item_id in found) == expected
+        assert [d for d, _ in found] == sorted(d for d, _ in found)
+
+
+class TestNearSearch:
+    """Test near/radius_miles search parameters."""
+
+    def test_near_sorts_by_distance(self):
+        """Test that near results are within the radius, nearest first."""
+        denver = geocode("Denver, CO")
+        results = search_rv_listings(near="Denver, CO", radius_miles=400, max_results=50)
+        assert len(results) > 0
+        distances = [haversine_miles(*denver, *geocode(r.location)) for r in results]
+        assert distances == sorted(distances)
+        assert all(d <= 400 for d in distances)
+
+    def test_near_combines_with_filters(self):
+        """Test near with a query filter."""
+        results = search_rv_listings(query="Storyteller", near="Denver", radius_miles=50)
+        assert {r.location for r in results} <= {"Denver, CO", "Boulder, CO"}
+        assert len(results) > 0
+
+    def test_unknown_near_raises(self):
+        """Test that an unknown place raises SearchAPIError."""
+        with pytest.raises(SearchAPIError):
+            search_rv_listings(near="Atlantis")
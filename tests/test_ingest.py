@@ -0,0 +1,63 @@
+"""Tests for bulk parsing of Serper results and RSS items."""
+
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import ingest
+from rv_search_agent.ingest import chunk_size, parse_rss_items, parse_serper_results
+from rv_search_agent.search_api import _parse_rss_item, _parse_serper_result
+
+SERPER_RESULTS = [
+    {"title": f"{2015 + i % 10} Winnebago View 24D - ${50000 + i:,} | RV Trader",
+     "link": f"https://www.rvtrader.com/listing/{i}",
+     "snippet": f"Class C with {i % 90},000 miles. Located in Denver, CO."}
+    if i % 50 else {"title": "", "link": f"https://www.rvtrader.com/listing/{i}"}
+    for i in range(2500)
+]
+
+RSS_ITEMS = [
+    f"<item><title>{2015 + i % 10} Unity U24RL - ${90000 + i:,} (Austin)</title>"
+    f"<link>https://austin.craigslist.org/rvs/d/{i}.html</link></item>"
+    for i in range(2500)
+]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(2) as pool:
+        yield pool
+
+
+class TestIngest:
+    """Test that bulk parsing matches parsing one item at a time."""
+
+    def test_serper_parallel_matches_serial(self, pool):
+        """Test results in input order, with None for non-listings."""
+        expected = [_parse_serper_result(result, "rvtrader.com") for result in SERPER_RESULTS]
+        assert parse_serper_results(SERPER_RESULTS, "rvtrader.com", workers=2) == expected
+        assert parse_serper_results(SERPER_RESULTS, "rvtrader.com", executor=pool) == expected
+        assert expected[0] is None and expected[1].price == 50001
+
+    def test_rss_parallel_matches_serial(self, pool):
+        """Test RSS items given as XML or as elements."""
+        elements = [ET.fromstring(item) for item in RSS_ITEMS]
+        expected = [_parse_rss_item(element) for element in elements]
+        assert parse_rss_items(RSS_ITEMS, workers=2) == expected
+        assert parse_rss_items(elements, executor=pool, workers=2) == expected
+
+    def test_small_batches_stay_in_process(self):
+        """Test that small batches and one worker don't start a pool."""
+        with patch.object(ingest, "ProcessPoolExecutor", side_effect=AssertionError):
+            assert len(parse_serper_results(SERPER_RESULTS[:100], "rvtrader.com", workers=8)) == 100
+            assert len(parse_rss_items(RSS_ITEMS, workers=1)) == len(RSS_ITEMS)
+            assert parse_rss_items([]) == []
+
+    def test_chunk_size(self):
+        """Test chunks split work evenly but never get too small."""
+        assert chunk_size(100_000, 4) == 6250
+        assert chunk_size(3000, 8) == ingest.MIN_CHUNK_ITEMS
@@ -0,0 +1,65 @@
+"""Tests for market summaries and the summarize_rv_market tool."""
+
+import json
+import sys
+
+sys.path.insert(0, "src")
+from rv_search_agent.agent import TOOLS, process_tool_call
+from rv_search_agent.market import summarize_listings
+from rv_search_agent.models import RVListing
+from rv_search_agent.search_api import search_rv_listings
+
+
+def _listing(number, price=None, year=None, mileage=None):
+    return RVListing(title=f"Listing {number}", price=price, year=year, make="Unity",
+                     model="U24RL", mileage=mileage, url=f"https://example.com/{number}")
+
+
+class TestSummarizeListings:
+    """Test the statistics computed over listings."""
+
+    def test_statistics(self):
+        """Test price, mileage and per-year stats, skipping missing values."""
+        listings = [
+            _listing(1, price=150_000, year=2023, mileage=8_000),
+            _listing(2, price=170_000, year=2023),
+            _listing(3, price=120_000, year=2021, mileage=30_000),
+            _listing(4, year=2022, mileage=10_000),
+        ]
+        summary = summarize_listings(listings)
+        assert summary["count"] == 4
+        assert summary["price"] == {"count": 3, "min": 120_000, "median": 150_000,
+                                    "mean": 146_667, "max": 170_000}
+        assert summary["mileage"]["count"] == 3
+        assert summary["mileage"]["median"] == 10_000
+        assert summary["price_by_year"] == [
+            {"year": 2023, "count": 2, "median": 160_000},
+            {"year": 2021, "count": 1, "median": 120_000},
+        ]
+        assert summary["cheapest"]["url"] == "https://example.com/3"
+        assert summary["most_expensive"]["url"] == "https://example.com/2"
+
+    def test_no_data(self):
+        """Test that statistics without data are None."""
+        summary = summarize_listings([_listing(1)])
+        assert summary["price"] is None and summary["mileage"] is None
+        assert summary["price_by_year"] == [] and summary["cheapest"] is None
+
+
+class TestSummaryTool:
+    """Test the summarize_rv_market tool."""
+
+    def test_summarizes_matching_listings(self):
+        """Test that the tool summarizes what the search matches, in far fewer bytes."""
+        assert [tool["name"] for tool in TOOLS] == ["search_rv_listings", "summarize_rv_market"]
+        result = process_tool_call("summarize_rv_market", {"query": "Storyteller"})
+        listings = search_rv_listings(query="Storyteller", max_results=100)
+        assert json.loads(result) == summarize_listings(listings)
+        full = process_tool_call("search_rv_listings", {"query": "Storyteller", "max_results": 100})
+        assert len(result) * 5 < len(full)
+
+    def test_no_matches_and_errors(self):
+        """Test empty and invalid searches."""
+        assert json.loads(process_tool_call("summarize_rv_market", {"query": "zzz"}))["count"] == 0
+        error = json.loads(process_tool_call("summarize_rv_market", {"max_results": 0}))
+        assert error["error"].startswith("Invalid search")
@@ -0,0 +1,139 @@
+"""Tests for the Prometheus-style metrics."""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import agent
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.metrics import (
+    SEARCH_REQUESTS,
+    SERPER_REQUESTS,
+    Counter,
+    Histogram,
+    Registry,
+    start_http_server,
+)
+from rv_search_agent.search_api import SearchAPIError, search_rv_listings, search_rv_listings_live
+
+FACEBOOK = "facebook.com/marketplace"
+
+
+def _mock_transport(handler):
+    real_client = httpx.Client
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+    return client
+
+
+def _serper_handler(request):
+    if b"facebook.com" in request.content:
+        raise httpx.ConnectError("connection refused", request=request)
+    return httpx.Response(200, json={"organic": [
+        {"title": "2023 Unity U24RL - $150,000", "link": "https://a", "snippet": ""},
+        {"title": "2022 Unity U24TB - SOLD", "link": "https://b", "snippet": ""},
+    ]})
+
+
+class FakeMessages:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            block = SimpleNamespace(type="tool_use", name="search_rv_listings",
+                                    input={"query": "Unity"}, id="tool_1")
+            return SimpleNamespace(stop_reason="tool_use", content=[block])
+        return SimpleNamespace(stop_reason="end_turn",
+                               content=[SimpleNamespace(type="text", text="Done")])
+
+
+class TestMetrics:
+    """Test metric types and text exposition."""
+
+    def test_counter_render(self):
+        """Test counter exposition with labels."""
+        registry = Registry()
+        counter = Counter("requests_total", "Requests.", ["site"], registry=registry)
+        counter.inc(site="a")
+        counter.inc(2, site='b"c')
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{site="a"} 1' in text
+        assert 'requests_total{site="b\\"c"} 2' in text
+
+    def test_non_string_labels(self):
+        """Test that label values are converted to strings, with one series per value."""
+        registry = Registry()
+        counter = Counter("responses_total", "Responses.", ["code"], registry=registry)
+        counter.inc(code=200)
+        counter.inc(code="200")
+        counter.inc(code="503")
+        text = registry.render()
+        assert text.count("responses_total{") == 2
+        assert 'responses_total{code="200"} 2' in text
+        assert counter.value(code=200) == 2
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket, sum and count lines."""
+        registry = Registry()
+        histogram = Histogram("latency_seconds", "Latency.", registry=registry, buckets=[0.1, 1])
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+        assert "latency_seconds_sum 5.55" in text
+
+    def test_scrape_after_synthetic_load(self, monkeypatch):
+        """Test scraping the HTTP endpoint after searches and an agent run."""
+        SEARCH_CACHE.clear()
+        before_hits = SEARCH_REQUESTS.value(mode="demo", outcome="cache_hit")
+        before_errors = SERPER_REQUESTS.value(site=FACEBOOK, outcome="error")
+
+        for _ in range(3):
+            search_rv_listings(query="Storyteller", demo_mode=True)
+
+        with patch.object(httpx, "Client", _mock_transport(_serper_handler)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            search_rv_listings_live(query="Unity")
+
+        with patch.object(httpx, "Client", _mock_transport(lambda r: httpx.Response(403))):
+            with pytest.raises(SearchAPIError):
+                search_rv_listings(query="Unity", location="denver", demo_mode=False)
+
+        messages = FakeMessages()
+        monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=messages))
+        agent.run_agent("Find a Unity", fast_path=False)
+
+        server = start_http_server(0)
+        try:
+            host, port = server.server_address
+            response = httpx.get(f"http://{host}:{port}/metrics")
+        finally:
+            server.shutdown()
+            server.server_close()
+            SEARCH_CACHE.clear()
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert SEARCH_REQUESTS.value(mode="demo", outcome="cache_hit") == before_hits + 2
+        assert 'rv_search_latency_seconds_count{mode="demo"}' in text
+        assert SERPER_REQUESTS.value(site=FACEBOOK, outcome="error") == before_errors + 1
+        assert f'rv_search_serper_requests_total{{site="{FACEBOOK}",outcome="error"}}' in text
+        assert 'rv_search_serper_requests_total{site="rvtrader.com",outcome="ok"}' in text
+        assert 'rv_search_serper_listings_total{site="rvtrader.com",result="inactive"}' in text
+        assert 'rv_search_craigslist_requests_total{region="denver",outcome="blocked"}' in text
+        assert 'rv_search_agent_tool_calls_total{tool="search_rv_listings"}' in text
+        assert "rv_search_agent_run_seconds_count" in text
@@ -0,0 +1,118 @@
+"""Tests for the SearchQuery model and the search entry points that take it."""
+
+import json
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import search_api
+from rv_search_agent.agent import process_tool_call
+from rv_search_agent.batch import search_rv_listings_batch
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.models import SearchQuery
+from rv_search_agent.search_api import SearchAPIError, _search_demo, search_rv_listings
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    SEARCH_CACHE.clear()
+    yield
+    SEARCH_CACHE.clear()
+
+
+class TestSearchQuery:
+    """Test normalization, validation and compilation."""
+
+    def test_equivalent_queries_hash_equal(self):
+        """Test that text is trimmed and casefolded once, and blanks dropped."""
+        first = SearchQuery(query=" Storyteller ", rv_type="Class B", location="")
+        second = SearchQuery(query="storyteller", rv_type="class b", max_results=None)
+        assert first == second and hash(first) == hash(second)
+        assert first.location is None and first.max_results == 20
+        assert SearchQuery(query="Résidence").query == "residence"
+        assert {first: "cached"}[second] == "cached"
+
+    def test_frozen(self):
+        """Test that fields can't be reassigned."""
+        search = SearchQuery(query="Unity")
+        with pytest.raises(AttributeError):
+            search.query = "Winnebago"
+        if sys.version_info >= (3, 10):
+            assert not hasattr(search, "__dict__")
+
+    @pytest.mark.parametrize("filters, message", [
+        ({"min_price": 90_000, "max_price": 50_000}, "min_price"),
+        ({"min_year": -1}, "can't be negative"),
+        ({"max_results": 0}, "max_results"),
+        ({"near": "Denver, CO", "radius_miles": 0}, "radius_miles"),
+    ])
+    def test_invalid_ranges(self, filters, message):
+        """Test that invalid bounds raise ValueError."""
+        with pytest.raises(ValueError, match=message):
+            SearchQuery(**filters)
+
+    @pytest.mark.parametrize("filters, message", [
+        ({"max_price": "50000"}, "max_price must be a number"),
+        ({"min_year": True}, "min_year must be a number"),
+        ({"query": 7}, "query must be a string"),
+    ])
+    def test_invalid_types(self, filters, message):
+        """Test that filters of the wrong type raise TypeError."""
+        with pytest.raises(TypeError, match=message):
+            SearchQuery(**filters)
+
+    def test_coerce_overrides(self):
+        """Test that filters passed with a SearchQuery override its fields."""
+        search = SearchQuery(query="Unity", max_price=150_000)
+        assert SearchQuery.coerce(search) is search
+        assert SearchQuery.coerce(search, max_results=5, rv_type=None) == \
+            SearchQuery(query="unity", max_price=150_000, max_results=5)
+        assert search.filters() == {"query": "unity", "max_price": 150_000, "max_results": 20}
+
+    @pytest.mark.parametrize("filters", [
+        {"query": "storyteller"},
+        {"rv_type": "Class C", "max_price": 150_000},
+        {"source": "Facebook", "min_year": 2022},
+        {"location": "CA", "max_mileage": 20_000},
+    ])
+    def test_predicate_matches_catalog_search(self, filters):
+        """Test that the compiled predicate selects what the planner does."""
+        search = SearchQuery(max_results=1000, **filters)
+        predicate = search.predicate()
+        assert predicate is search.predicate()
+        expected = [listing for listing in search_api.DEMO_CATALOG if predicate(listing)]
+        assert _search_demo(search) == expected
+
+
+class TestEntryPoints:
+    """Test that the search functions accept a SearchQuery."""
+
+    def test_search_shares_cache_with_keywords(self):
+        """Test that a SearchQuery and equivalent keywords hit the same cache entry."""
+        search = SearchQuery(query="Storyteller", max_results=5)
+        first = search_rv_listings(search, demo_mode=True)
+        second = search_rv_listings(query="storyteller ", max_results=5, demo_mode=True)
+        assert first == second
+        assert SEARCH_CACHE.hits == 1
+
+    def test_batch_accepts_queries(self):
+        """Test that batches mix SearchQuerys and filter dicts."""
+        searches = [SearchQuery(query="Unity"), {"query": "Winnebago", "max_results": 3}]
+        results = search_rv_listings_batch(searches, demo_mode=True)
+        assert results[0] == search_rv_listings(query="Unity", demo_mode=True)
+        assert len(results[1]) <= 3
+
+    def test_invalid_search_raises(self):
+        """Test that entry points report invalid filters as SearchAPIError."""
+        with pytest.raises(SearchAPIError, match="Invalid search"):
+            search_rv_listings(min_year=2025, max_year=2020, demo_mode=True)
+        with pytest.raises(SearchAPIError, match="Query 0"):
+            search_rv_listings_batch([{"max_results": 0}], demo_mode=True)
+
+    def test_tool_call(self):
+        """Test that the agent tool builds one SearchQuery, defaulting to 10 results."""
+        result = json.loads(process_tool_call("search_rv_listings", {"query": "Class C"}))
+        assert result["count"] <= 10
+        error = json.loads(process_tool_call("search_rv_listings", {"min_price": "cheap"}))
+        assert error["error"].startswith("Invalid search")
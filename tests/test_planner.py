@@ -0,0 +1,82 @@
+"""Tests for the search query planner."""
+
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import planner
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.models import RVListing
+from rv_search_agent.planner import QueryPlan
+from rv_search_agent.search_api import SearchAPIError, _search_demo, search_rv_listings
+
+
+def _catalog():
+    listings = []
+    for i in range(200):
+        listings.append(RVListing(
+            title=f"{2015 + i % 10} Make{i % 7} Model{i % 5}",
+            price=40000 + (i * 1777) % 200000,
+            year=2015 + i % 10,
+            make=f"Make{i % 7}",
+            model=f"Model{i % 5}",
+            location=["Denver, CO", "Austin, TX", "Miami, FL", None][i % 4],
+            mileage=(i * 997) % 80000 or None,
+            rv_type=["Class A", "Class B", "Class C"][i % 3],
+            source="Facebook Marketplace" if i % 20 == 0 else "Dealer",
+        ))
+    return ListingCatalog(listings)
+
+
+class TestPlanner:
+    """Test predicate ordering and index-driven scans."""
+
+    def test_selective_source_drives_scan(self):
+        """Test that a selective indexed filter becomes the access path."""
+        plan = _search_demo(source="Facebook", max_results=100, catalog=_catalog(), explain=True)
+        assert plan.access.startswith("index on source")
+        assert plan.rows_examined == 10
+        assert len(plan.results) == 10
+
+    def test_unselective_filter_full_scan(self):
+        """Test that an unselective filter falls back to a full scan."""
+        plan = _search_demo(source="Dealer", max_results=1000, catalog=_catalog(), explain=True)
+        assert plan.access == "full scan"
+        assert plan.rows_examined == 200
+
+    def test_predicates_ordered_by_rank(self):
+        """Test that cheaper, more selective predicates run first."""
+        plan = _search_demo(
+            query="Make1", max_price=60000, rv_type="Class", max_results=100,
+            catalog=_catalog(), explain=True,
+        )
+        ranks = [p.rank for p in plan.predicates]
+        assert ranks == sorted(ranks)
+        assert plan.predicates[0].name == "price"
+
+    @pytest.mark.parametrize("filters", [
+        {"source": "facebook", "max_price": 150000},
+        {"rv_type": "class b", "min_year": 2020, "location": "denver"},
+        {"query": "model3", "min_mileage": 10000, "max_mileage": 50000},
+        {"location": "miami", "source": "dealer", "max_year": 2018},
+    ])
+    def test_plan_matches_full_scan(self, filters, monkeypatch):
+        """Test that index-driven plans return the same rows as a full scan."""
+        catalog = _catalog()
+        planned = _search_demo(max_results=1000, catalog=catalog, **filters)
+        monkeypatch.setattr(planner, "INDEX_SELECTIVITY_THRESHOLD", -1.0)
+        scanned = _search_demo(max_results=1000, catalog=catalog, **filters)
+        assert planned == scanned
+
+    def test_explain_via_search_api(self):
+        """Test explain mode through search_rv_listings."""
+        plan = search_rv_listings(query="Storyteller", explain=True, demo_mode=True)
+        assert isinstance(plan, QueryPlan)
+        assert plan.rows_examined >= len(plan.results) > 0
+        assert "Rows examined" in plan.explain()
+
+    def test_explain_not_supported_live(self):
+        """Test that explain is rejected outside demo mode."""
+        with pytest.raises(SearchAPIError):
+            search_rv_listings(explain=True, demo_mode=False)
@@ -0,0 +1,231 @@
+"""Tests for the Serper quota ledger and quota-aware live search."""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import cli, quota
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.quota import REPROBE_EVERY, QuotaLedger, yield_segment
+from rv_search_agent.search_api import QuotaExhausted, _fetch_serper, search_rv_listings_live
+
+OCT_2026 = 1791000000.0  # 2026-10-03 UTC
+
+
+class FakeClock:
+    def __init__(self, now=OCT_2026):
+        self.now = now
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    SEARCH_CACHE.clear()
+    yield
+    SEARCH_CACHE.clear()
+
+
+def _mock_http(requests):
+    """Serve Serper searches (yield varies by site) and a Craigslist feed."""
+    real_client = httpx.Client
+
+    def handler(request):
+        if request.method == "GET":
+            requests.append("craigslist")
+            return httpx.Response(200, text=(
+                "<rss><channel><item><title>2021 Unity U24RL - $140,000</title>"
+                "<link>https://cl/1</link></item></channel></rss>"
+            ))
+        site = json.loads(request.content)["q"].split()[0][len("site:"):]
+        requests.append(site)
+        title = "2022 Unity U24TB - SOLD" if site != "conejorv.com" else "2022 Unity U24TB - $150,000"
+        return httpx.Response(200, json={"organic": [
+            {"title": title, "link": f"https://{site}/1", "snippet": ""},
+        ]})
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+    return client
+
+
+class TestQuotaLedger:
+    """Test call accounting, rate limiting and site yield."""
+
+    def test_monthly_limit(self, tmp_path, clock):
+        """Test that calls stop at the limit and the budget resets each month."""
+        ledger = QuotaLedger(str(tmp_path / "q.db"), monthly_limit=3, reserve=1, clock=clock)
+        assert [ledger.acquire("key", "rvtrader.com") for _ in range(4)] == [True] * 3 + [False]
+        assert ledger.remaining("key") == 0
+        assert ledger.near_exhaustion("key")
+        assert ledger.remaining("other") == 3
+
+        clock.now += 31 * 24 * 3600
+        assert ledger.acquire("key", "rvtrader.com")
+        assert ledger.used("key") == 1
+
+    def test_rate_limit_shared_across_ledgers(self, tmp_path, clock):
+        """Test the token bucket, shared through the database as by two processes."""
+        path = str(tmp_path / "q.db")
+        first = QuotaLedger(path, rate=2, burst=2, clock=clock, sleep=clock.sleep)
+        second = QuotaLedger(path, rate=2, burst=2, clock=clock, sleep=clock.sleep)
+        for ledger in (first, second, first, second, first):
+            assert ledger.acquire("key", "rvtrader.com")
+        # Two calls from the burst, then one every half second
+        assert clock.slept == pytest.approx(1.5)
+        assert first.used("key") == 5
+
+    def test_order_sites_by_yield(self, tmp_path):
+        """Test that high-yield sites come first and unknown sites sit in the middle."""
+        ledger = QuotaLedger(str(tmp_path / "q.db"))
+        ledger.record_yield("low.com", 20, 1)
+        ledger.record_yield("high.com", 10, 9)
+        ledger.record_yield("high.com", 10, 8)
+        assert ledger.site_yields()["high.com"] == (20, 17)
+        assert ledger.order_sites(["low.com", "new.com", "high.com"]) == ["high.com", "new.com", "low.com"]
+
+    def test_disabled(self, tmp_path):
+        """Test that a disabled ledger allows everything and writes nothing."""
+        ledger = QuotaLedger(str(tmp_path / "q.db"), monthly_limit=0, enabled=False)
+        assert ledger.acquire("key", "rvtrader.com")
+        assert not ledger.near_exhaustion("key")
+        assert not os.path.exists(tmp_path / "q.db")
+
+
+class TestSiteSchedule:
+    """Test per-make/type yield and the site schedule built from it."""
+
+    def test_segments_ranked_separately(self, tmp_path):
+        """Test that each make and type gets its own site order."""
+        ledger = QuotaLedger(str(tmp_path / "q.db"))
+        unity, winnebago = yield_segment("Unity U24RL", None), yield_segment("winnebago", "Class C")
+        assert unity == ("unity", "") and winnebago == ("winnebago", "class c")
+        for _ in range(3):
+            ledger.record_yield("a.com", 10, 8, unity)
+            ledger.record_yield("b.com", 10, 1, unity)
+            ledger.record_yield("a.com", 10, 1, winnebago)
+            ledger.record_yield("b.com", 10, 9, winnebago)
+        assert ledger.schedule(["b.com", "a.com"], unity) == ["a.com", "b.com"]
+        assert ledger.schedule(["a.com", "b.com"], winnebago) == ["b.com", "a.com"]
+
+    @pytest.mark.parametrize("query, make", [
+        ("2019 Winnebago View", "winnebago"),
+        ("2018-2021 $50k Unity U24RL", "unity"),
+        ("'19 Jayco Greyhawk 31FS", "jayco"),
+        ("2019", ""),
+        (None, ""),
+    ])
+    def test_segment_skips_leading_numbers(self, query, make):
+        """Test that years and prices before the make don't become the make."""
+        assert yield_segment(query, None) == (make, "")
+
+    def test_low_yield_skipped_and_reprobed(self, tmp_path):
+        """Test that a site delivering nothing is skipped but probed again later."""
+        ledger = QuotaLedger(str(tmp_path / "q.db"))
+        segment = ("unity", "")
+        for _ in range(3):
+            ledger.record_yield("sold.com", 10, 0, segment)
+        ledger.record_yield("good.com", 10, 6, segment)
+        schedules = [ledger.schedule(["sold.com", "good.com"], segment) for _ in range(REPROBE_EVERY)]
+        assert schedules[:-1] == [["good.com"]] * (REPROBE_EVERY - 1)
+        assert schedules[-1] == ["good.com", "sold.com"]
+        # Other makes still try the site
+        assert "sold.com" in ledger.schedule(["sold.com", "good.com"], ("storyteller", ""))
+
+    def test_search_stops_when_satisfied(self, quota_ledger):
+        """Test that a learned schedule finds max_results with one call."""
+        requests = []
+        with patch.object(httpx, "Client", _mock_http(requests)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            for _ in range(3):
+                search_rv_listings_live(query="Unity", max_results=1)
+                SEARCH_CACHE.clear()
+            del requests[:]
+            listings = search_rv_listings_live(query="Unity", max_results=1)
+        assert requests == ["conejorv.com"]
+        assert [listing.url for listing in listings] == ["https://conejorv.com/1"]
+
+
+class TestQuotaAwareSearch:
+    """Test live search against the ledger."""
+
+    def test_calls_recorded_and_sites_ordered(self, quota_ledger):
+        """Test that each call is recorded and the best site is queried first next time."""
+        requests = []
+        with patch.object(httpx, "Client", _mock_http(requests)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            assert len(search_rv_listings_live(query="Unity")) == 1
+            assert quota_ledger.used("test") == 4
+            assert quota_ledger.site_yields()["conejorv.com"] == (1, 1)
+            SEARCH_CACHE.clear()
+            del requests[:]
+            search_rv_listings_live(query="Unity")
+        assert requests[0] == "conejorv.com"
+
+    def test_degrades_near_exhaustion(self, quota_ledger, capsys):
+        """Test fewer sites above the reserve, then stale cache, then Craigslist."""
+        quota_ledger.monthly_limit = 6
+        quota_ledger.reserve = 4
+        quota_ledger.record_yield("conejorv.com", 10, 9)
+        requests = []
+        with patch.object(httpx, "Client", _mock_http(requests)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}), \
+                patch.object(SEARCH_CACHE, "ttl_seconds", 0):
+            search_rv_listings_live(query="Unity")
+            assert requests[0] == "conejorv.com"
+            assert len(requests) == 2  # only the calls above the reserve
+
+            del requests[:]
+            listings = search_rv_listings_live(query="Unity")  # stale cache entry
+            assert requests == []
+            assert [listing.url for listing in listings] == ["https://conejorv.com/1"]
+
+            listings = search_rv_listings_live(query="Storyteller")
+        assert requests == ["craigslist"]
+        assert listings[0].url == "https://cl/1"
+        assert quota_ledger.used("test") == 2
+        captured = capsys.readouterr()
+        assert "quota nearly used up" in captured.err
+        assert captured.out == ""  # keeps --json output parseable
+
+    def test_fetch_raises_when_exhausted(self, quota_ledger):
+        """Test that a direct fetch past the limit raises QuotaExhausted."""
+        quota_ledger.monthly_limit = 0
+        with pytest.raises(QuotaExhausted, match="used up"):
+            _fetch_serper(None, "test", "rvtrader.com", "Unity", 10)
+
+
+class TestQuotaCLI:
+    """Test `rv-search quota`."""
+
+    def test_report(self, quota_ledger, capsys):
+        """Test the per-key usage report."""
+        quota_ledger.acquire("test", "rvtrader.com")
+        quota_ledger.acquire("test", "conejorv.com")
+        quota_ledger.record_yield("conejorv.com", 10, 4)
+        with patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            cli.main(["quota"])
+            out = capsys.readouterr().out
+            assert f"Key {quota.key_id('test')} (SERPER_API_KEY): 2 used, 2,498 left" in out
+            assert "conejorv.com" in out and "40%" in out
+
+            cli.main(["quota", "--json"])
+        report = json.loads(capsys.readouterr().out)
+        assert report["keys"][0]["sites"] == {"conejorv.com": 1, "rvtrader.com": 1}
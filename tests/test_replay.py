@@ -0,0 +1,182 @@
+"""Tests for the record/replay HTTP harness."""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import cli, replay
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.replay import (
+    FixtureNotFound,
+    FixtureStore,
+    HttpHarness,
+    RecordingTransport,
+    ReplayTransport,
+)
+from rv_search_agent.search_api import SearchAPIError, search_rv_listings_live
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    SEARCH_CACHE.clear()
+    yield
+    SEARCH_CACHE.clear()
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    """Give each test its own harness, live by default."""
+    harness = HttpHarness()
+    monkeypatch.setattr(replay, "HTTP_HARNESS", harness)
+    return harness
+
+
+def _serper(request):
+    site = json.loads(request.content)["q"].split()[0][len("site:"):]
+    return httpx.Response(200, json={"organic": [
+        {"title": "2022 Unity U24TB - $150,000", "link": f"https://{site}/1", "snippet": ""},
+    ]})
+
+
+def _recording_client(store, handler):
+    """Patch httpx.Client to record responses from ``handler``."""
+    real_client = httpx.Client
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = RecordingTransport(store, httpx.MockTransport(handler))
+        return real_client(*args, **kwargs)
+    return patch.object(httpx, "Client", client)
+
+
+def _post(transport, body=b"{}"):
+    request = httpx.Request("POST", "https://google.serper.dev/search", content=body,
+                            headers={"X-API-KEY": "secret"})
+    return transport.handle_request(request)
+
+
+class TestFixtures:
+    """Test recording and replaying request/response pairs."""
+
+    def test_round_trip_without_headers(self, tmp_path):
+        """Test that a recorded response replays and API keys are never stored."""
+        store = FixtureStore(str(tmp_path))
+        recorded = _post(RecordingTransport(store, httpx.MockTransport(_serper)),
+                         b'{"q": "site:rvtrader.com Unity"}')
+        replayed = _post(ReplayTransport(FixtureStore(str(tmp_path))),
+                         b'{"q": "site:rvtrader.com Unity"}')
+        assert replayed.status_code == 200
+        assert replayed.json() == recorded.json()
+        fixtures = os.listdir(tmp_path)
+        assert len(fixtures) == 1
+        assert "secret" not in (tmp_path / fixtures[0]).read_text()
+
+    def test_repeated_requests_replay_in_order(self, tmp_path):
+        """Test that a 200-then-304 sequence replays in order, repeating the last response."""
+        statuses = iter([200, 304])
+        store = FixtureStore(str(tmp_path))
+        recorder = RecordingTransport(store, httpx.MockTransport(
+            lambda request: httpx.Response(next(statuses), text="<rss/>")))
+        _post(recorder)
+        _post(recorder)
+
+        player = ReplayTransport(FixtureStore(str(tmp_path)))
+        assert [_post(player).status_code for _ in range(3)] == [200, 304, 304]
+        with pytest.raises(FixtureNotFound):
+            _post(player, b'{"q": "never recorded"}')
+
+    def test_injected_latency_and_errors(self, tmp_path):
+        """Test fixed latency and a seeded, repeatable error rate."""
+        _post(RecordingTransport(FixtureStore(str(tmp_path)), httpx.MockTransport(_serper)),
+              b'{"q": "site:a.com x"}')
+        slept = []
+
+        def outcomes(seed):
+            player = HttpHarness("replay", str(tmp_path), latency=0.25, error_rate=0.5,
+                                 seed=seed).transport()
+            player._sleep = slept.append
+            results = []
+            for _ in range(40):
+                try:
+                    results.append(_post(player, b'{"q": "site:a.com x"}').status_code)
+                except httpx.ConnectError:
+                    results.append("error")
+            return results
+
+        first = outcomes(seed=7)
+        assert first == outcomes(seed=7)
+        assert 5 < first.count("error") < 35
+        assert slept == [0.25] * 80
+
+        player = ReplayTransport(FixtureStore(str(tmp_path)), error_rate=1.0, error_status=503)
+        assert _post(player, b'{"q": "site:a.com x"}').status_code == 503
+
+
+class TestReplayedSearch:
+    """Test live search against recorded fixtures."""
+
+    def test_live_search_replays_offline(self, harness, tmp_path):
+        """Test that a recorded live search returns the same listings from fixtures."""
+        with patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            with _recording_client(FixtureStore(str(tmp_path)), _serper):
+                recorded = search_rv_listings_live(query="Unity")
+            SEARCH_CACHE.clear()
+
+            harness.configure("replay", str(tmp_path))
+
+            def no_network(request):
+                raise AssertionError("replay reached the network")
+            with patch.object(httpx.HTTPTransport, "handle_request", no_network):
+                replayed = search_rv_listings_live(query="Unity")
+        assert [listing.url for listing in replayed] == [listing.url for listing in recorded]
+
+    def test_cli_replay_flags(self, harness, tmp_path, capsys, quota_ledger):
+        """Test that --replay serves a live search and skips the quota ledger."""
+        with patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            with _recording_client(FixtureStore(str(tmp_path)), _serper):
+                search_rv_listings_live(query="Unity", max_results=1)
+            SEARCH_CACHE.clear()
+            used = quota_ledger.used("test")
+            cli.main(["--live", "--query", "Unity", "-n", "1", "--replay", str(tmp_path),
+                      "--replay-latency", "0"])
+            assert quota_ledger.used("test") == used
+        assert harness.replaying
+        assert "Unity U24TB" in capsys.readouterr().out
+        assert quota_ledger.enabled and not quota_ledger.active
+
+    def test_env_replay_skips_quota(self, tmp_path, monkeypatch, quota_ledger):
+        """Test that replay chosen through the environment doesn't touch the ledger."""
+        monkeypatch.setenv("SERPER_API_KEY", "test")
+        with _recording_client(FixtureStore(str(tmp_path)), _serper):
+            search_rv_listings_live(query="Unity", max_results=1)
+        SEARCH_CACHE.clear()
+        used, yields = quota_ledger.used("test"), quota_ledger.segment_yields()
+        quota_ledger.monthly_limit = used  # a real call now would raise QuotaExhausted
+
+        monkeypatch.setenv("RV_SEARCH_HTTP", "replay")
+        monkeypatch.setenv("RV_SEARCH_HTTP_FIXTURES", str(tmp_path))
+        monkeypatch.setattr(replay, "HTTP_HARNESS", HttpHarness.from_env(lazy=True))
+        listings = search_rv_listings_live(query="Unity", max_results=1)
+        assert [listing.title for listing in listings] == ["2022 Unity U24TB"]
+        assert quota_ledger.used("test") == used
+        assert quota_ledger.segment_yields() == yields
+
+    def test_bad_env_value(self, monkeypatch):
+        """Test that a bad setting fails on first use with SearchAPIError, not at import."""
+        monkeypatch.setenv("RV_SEARCH_HTTP_ERROR_RATE", "abc")
+        harness = HttpHarness.from_env(lazy=True)
+        with pytest.raises(SearchAPIError, match="RV_SEARCH_HTTP_ERROR_RATE"):
+            harness.transport()
+        monkeypatch.setenv("RV_SEARCH_HTTP_ERROR_RATE", "2")
+        with pytest.raises(SearchAPIError, match="error_rate"):
+            HttpHarness.from_env()
+
+    def test_cli_rejects_record_and_replay(self, harness, tmp_path, capsys):
+        """Test that --record and --replay together is an error."""
+        with pytest.raises(SystemExit):
+            cli.main(["--live", "--record", str(tmp_path), "--replay", str(tmp_path)])
+        assert "can't be used together" in capsys.readouterr().out
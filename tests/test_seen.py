@@ -0,0 +1,148 @@
+"""Tests for the seen-URL set and its use in live searches."""
+
+import os
+import sys
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent.search_api import (
+    SearchAPIError,
+    _parse_rss_feed,
+    search_rv_listings,
+    search_rv_listings_live,
+)
+from rv_search_agent.seen import SeenSet
+
+
+def _urls(start, stop):
+    return [f"https://example.com/listing/{i}" for i in range(start, stop)]
+
+
+class TestSeenSet:
+    """Test the scalable Bloom filter."""
+
+    def test_add_and_contains(self):
+        """Test that add reports new URLs and lookups find them."""
+        seen = SeenSet(capacity=100)
+        assert seen.add("https://a") is True
+        assert seen.add("https://a") is False
+        assert "https://a" in seen
+        assert "https://b" not in seen
+        assert len(seen) == 1
+
+    def test_grows_within_error_bound(self):
+        """Test that filters are added as URLs arrive and stay under the error bound."""
+        seen = SeenSet(capacity=1000, error_rate=0.01)
+        for url in _urls(0, 10000):
+            seen.add(url)
+        assert len(seen.filters) == 4
+        assert all(url in seen for url in _urls(0, 10000))
+        false_positives = sum(url in seen for url in _urls(10000, 30000))
+        assert false_positives / 20000 < seen.max_error_rate < 0.02
+
+    def test_save_and_load(self, tmp_path):
+        """Test a round trip through the seen-set file."""
+        path = str(tmp_path / "seen.bin")
+        seen = SeenSet(path, capacity=50)
+        for url in _urls(0, 200):
+            seen.add(url)
+        seen.save()
+
+        loaded = SeenSet(path)
+        assert len(loaded) == 200
+        assert loaded.capacity == 50
+        assert all(url in loaded for url in _urls(0, 200))
+        assert loaded.add("https://new") is True
+
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 1)
+        with pytest.raises(ValueError, match="truncated"):
+            SeenSet(path)
+
+    def test_exact_store(self, tmp_path):
+        """Test that the exact store rejects false positives and survives restarts."""
+        path = str(tmp_path / "seen.bin")
+        # A tiny, saturated filter reports nearly everything as seen
+        seen = SeenSet(path, capacity=1, error_rate=0.5, exact=True)
+        seen.filters[:] = []
+        seen.add("https://a")
+        seen.filters[0].bits[:] = b"\xff" * len(seen.filters[0].bits)
+        assert seen.add("https://b") is True
+        assert "https://c" not in seen
+        assert "https://b" in seen
+        seen.close()
+
+        os.remove(path)  # the store still knows URLs the filter file lost
+        seen = SeenSet(path, exact=True)
+        assert seen.add("https://a") is False
+        seen.close()
+
+    def test_exact_refuses_inexact_file(self, tmp_path):
+        """Test that a file recorded without the exact store can't be opened exact."""
+        path = str(tmp_path / "seen.bin")
+        seen = SeenSet(path)
+        seen.add("https://a")
+        seen.save()
+        with pytest.raises(ValueError, match="without exact=True"):
+            SeenSet(path, exact=True)
+        assert SeenSet(path).add("https://a") is False
+
+        exact_path = str(tmp_path / "exact.bin")
+        seen = SeenSet(exact_path, exact=True)
+        seen.add("https://a")
+        seen.close()
+        seen = SeenSet(exact_path, exact=True)
+        assert seen.add("https://a") is False
+        seen.close()
+
+    def test_scoped(self):
+        """Test that scopes track URLs independently."""
+        seen = SeenSet()
+        first, second = seen.scoped("feed-1"), seen.scoped("feed-2")
+        assert first.add("https://a") is True
+        assert "https://a" in first
+        assert "https://a" not in second
+        assert second.add("https://a") is True
+
+
+class TestSeenInSearch:
+    """Test skipping seen listings in Craigslist and live searches."""
+
+    def test_rss_feed_skips_seen(self):
+        """Test that seen items are skipped and unreturned items stay unseen."""
+        items = "".join(
+            f"<item><title>2022 Unity - ${100000 + i}</title><link>https://cl/{i}</link></item>"
+            for i in range(6)
+        )
+        xml = f"<rss><channel>{items}</channel></rss>"
+        seen = SeenSet()
+        pages = [[listing.url for listing in _parse_rss_feed(xml, max_results=2, seen=seen)]
+                 for _ in range(4)]
+        assert pages == [["https://cl/0", "https://cl/1"], ["https://cl/2", "https://cl/3"],
+                         ["https://cl/4", "https://cl/5"], []]
+
+    def test_live_search_skips_seen(self):
+        """Test that a repeated live search returns only new results."""
+        organic = [{"title": "2023 Unity U24RL - $150,000", "link": "https://a", "snippet": ""}]
+        real_client = httpx.Client
+
+        def client(*args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(
+                lambda request: httpx.Response(200, json={"organic": organic}))
+            return real_client(*args, **kwargs)
+
+        seen = SeenSet()
+        with patch.object(httpx, "Client", client), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+            assert len(search_rv_listings_live(query="Unity", seen=seen)) == 1
+            organic.append({"title": "2022 Unity U24TB - $140,000", "link": "https://b", "snippet": ""})
+            listings = search_rv_listings_live(query="Unity", seen=seen)
+        assert [listing.url for listing in listings] == ["https://b"]
+
+    def test_demo_mode_rejects_seen(self):
+        """Test that demo searches don't accept a seen set."""
+        with pytest.raises(SearchAPIError, match="seen"):
+            search_rv_listings(query="Unity", demo_mode=True, seen=SeenSet())
@@ -0,0 +1,139 @@
+"""Tests for agent sessions, local refinement and the session store."""
+
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import agent, session as session_module
+from rv_search_agent.search_api import SearchAPIError
+from rv_search_agent.session import AgentSession, SessionStore
+
+
+class ScriptedMessages:
+    """Answers each question with one scripted tool call (or none), then "Done"."""
+
+    def __init__(self, script):
+        self.script = script
+        self.requests = []
+
+    def create(self, messages, **kwargs):
+        self.requests.append({"messages": messages, **kwargs})
+        block = messages[-1]["content"][-1]
+        if block["type"] == "tool_result" or self.script[block["text"]] is None:
+            return SimpleNamespace(stop_reason="end_turn",
+                                   content=[SimpleNamespace(type="text", text="Done")])
+        name, tool_input = self.script[block["text"]]
+        tool_use = SimpleNamespace(type="tool_use", name=name, input=tool_input,
+                                   id=f"tool_{len(self.requests)}")
+        return SimpleNamespace(stop_reason="tool_use", content=[tool_use])
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    fake = ScriptedMessages({
+        "Find Storyteller vans": ("search_rv_listings", {"query": "Storyteller", "max_results": 50}),
+        "Now only the AWD ones": ("refine_results", {"keyword": "AWD"}),
+        "Which of those are under $200k?": ("refine_results", {"max_price": 200_000}),
+        "Which is the best value?": None,
+    })
+    monkeypatch.setattr(agent, "create_agent", lambda: SimpleNamespace(messages=fake))
+    monkeypatch.setattr(session_module, "create_agent", lambda: SimpleNamespace(messages=fake))
+    return fake
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Count the searches sessions run."""
+    calls = []
+    search = session_module.search_rv_listings
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return search(*args, **kwargs)
+    monkeypatch.setattr(session_module, "search_rv_listings", counted)
+    return calls
+
+
+class TestRefine:
+    """Test result sets and local refinement."""
+
+    def test_refine_chain(self, searches):
+        """Test that refinements filter earlier results without searching."""
+        session = AgentSession()
+        found = session.search("Storyteller", max_results=50)
+        awd = session.refine(keyword="awd")
+        assert 0 < len(awd) < len(found)
+        assert all("awd" in f"{listing.title} {listing.description}".lower() for listing in awd)
+        cheap = session.refine(max_price=200_000)
+        assert cheap and all(listing.price <= 200_000 for listing in cheap)
+        assert all(listing in awd for listing in cheap)
+        assert session.result_sets["r3"]["parent"] == "r2"
+        assert session.results("r1") == found
+        assert len(searches) == 1
+
+    def test_errors(self):
+        """Test refining nothing, an unknown set and an invalid range."""
+        session = AgentSession()
+        with pytest.raises(SearchAPIError, match="No earlier results"):
+            session.refine(keyword="awd")
+        session.search("Unity")
+        with pytest.raises(SearchAPIError, match="Unknown result set"):
+            session.refine("r9")
+        with pytest.raises(SearchAPIError, match="Invalid refinement"):
+            session.refine(min_year=2025, max_year=2020)
+
+
+class TestConversation:
+    """Test multi-turn conversations."""
+
+    def test_follow_ups_refine(self, messages, searches):
+        """Test that follow-ups see the conversation and filter locally."""
+        session = AgentSession()
+        for question in ["Find Storyteller vans", "Now only the AWD ones",
+                         "Which of those are under $200k?"]:
+            assert session.ask(question) == "Done"
+        assert len(searches) == 1
+        assert [tool["name"] for tool in messages.requests[0]["tools"]][-1] == "refine_results"
+
+        last = messages.requests[-1]["messages"]
+        assert last[0]["content"][0]["text"] == "Find Storyteller vans"
+        refined = json.loads(last[-1]["content"][0]["content"])
+        assert refined["refined_from"] == "r2" and refined["result_set"] == "r3"
+        assert set(refined["results"][0]) == {"summary", "url"}
+        assert session.messages[-1] == {"role": "assistant",
+                                        "content": [{"type": "text", "text": "Done"}]}
+
+    def test_follow_up_answered_by_answer_model(self, messages):
+        """Test that a follow-up that isn't a search goes straight to the answer model."""
+        session = AgentSession(routing=agent.ModelRouting("fast", "big", 100, 2000))
+        session.ask("Find Storyteller vans")
+        assert messages.requests[0]["model"] == "fast"
+        messages.requests.clear()
+        assert session.ask("Which is the best value?") == "Done"
+        assert [(r["model"], r["max_tokens"]) for r in messages.requests] == [("big", 2000)]
+        assert session.usage.turns[-1].kind == "answer"
+        assert session.messages[-2]["content"][0]["text"] == "Which is the best value?"
+        assert session.messages[-1]["content"] == [{"type": "text", "text": "Done"}]
+
+    def test_store_round_trip(self, messages, tmp_path):
+        """Test that a saved session reloads identically from compact state."""
+        store = SessionStore(str(tmp_path / "sessions.db"))
+        session = AgentSession()
+        session.ask("Find Storyteller vans")
+        session.ask("Now only the AWD ones")
+        stored = store.save(session)
+
+        loaded = store.load(session.session_id)
+        assert loaded.messages == session.messages
+        assert loaded.results() == session.results()
+        assert loaded.usage == session.usage
+        assert stored < len(json.dumps(session.messages))
+
+        loaded.ask("Which of those are under $200k?")
+        assert loaded.latest == "r3"
+        store.delete(session.session_id)
+        assert store.load(session.session_id) is None
+        store.close()
@@ -0,0 +1,145 @@
+"""Tests for similar-listing search."""
+
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.cli import main
+from rv_search_agent.models import RVListing
+from rv_search_agent.search_api import DEMO_CATALOG, SearchAPIError, find_similar
+from rv_search_agent.similar import SimilarityIndex, listing_features, recall
+
+MAKES = {
+    "Winnebago": ["View", "Revel", "Travato"],
+    "Storyteller": ["Classic MODE", "Beast MODE"],
+    "Unity": ["U24RL", "U24TB"],
+    "Airstream": ["Interstate", "Atlas"],
+    "Jayco": ["Greyhawk", "Redhawk"],
+}
+WORDS = ["solar", "lithium", "awd", "diesel", "bunkhouse", "king", "queen", "murphy", "sofa",
+         "starlink", "awning", "generator", "heated", "tanks", "warranty", "tires", "garage"]
+
+
+def random_listings(count, seed=7):
+    rng = random.Random(seed)
+    listings = []
+    for i in range(count):
+        make = rng.choice(list(MAKES))
+        model = rng.choice(MAKES[make])
+        year = rng.randint(2015, 2025)
+        listings.append(RVListing(
+            title=f"{year} {make} {model}",
+            make=make,
+            model=model,
+            year=year,
+            price=rng.randrange(40_000, 300_000, 500),
+            mileage=rng.randrange(1_000, 80_000, 100),
+            description=" ".join(rng.sample(WORDS, 5)),
+            url=f"https://example.com/listing/{i}",
+        ))
+    return listings
+
+
+class TestSimilarityIndex:
+    """Test the hashed TF-IDF vectors and the LSH index."""
+
+    def test_features_cover_text_fields_and_numbers(self):
+        """Test that features include words, categorical fields and numeric buckets."""
+        features = listing_features(RVListing(
+            title="2024 Unity U24RL", make="Unity", model="U24RL", year=2024,
+            price=250_000, description="Solar and lithium",
+        ))
+        assert {"unity", "u24rl", "solar", "lithium", "make=unity", "model=u24rl"} <= set(features)
+        assert "and" not in features
+        assert any(feature.startswith("price:") for feature in features)
+        assert any(feature.startswith("year~") for feature in features)
+
+    def test_nearby_prices_share_a_bucket(self):
+        """Test that the offset bucket grids put close prices in a common bucket."""
+        def prices(price):
+            return {f for f in listing_features(RVListing(title="x", price=price))
+                    if f.startswith("price")}
+        assert prices(100_000) & prices(104_000)
+        assert not prices(100_000) & prices(200_000)
+
+    def test_similar_leaves_out_the_listing(self):
+        """Test that a listing is not its own neighbour."""
+        listings = random_listings(500)
+        index = SimilarityIndex(listings)
+        found = index.similar(listings[0].url, k=5, candidates=50)
+        assert len(found) == 5
+        assert listings[0] not in [listing for _, listing in found]
+        assert [score for score, _ in found] == sorted((s for s, _ in found), reverse=True)
+
+    def test_recall_against_exact_search(self):
+        """Test that LSH candidates find most of the exact nearest neighbours."""
+        listings = random_listings(2_000)
+        index = SimilarityIndex(listings)
+        scores = [recall(index.similar(listing.url, k=10, candidates=100),
+                         index.exact(listing.url, k=10))
+                  for listing in listings[:20]]
+        assert sum(scores) / len(scores) >= 0.8
+
+    def test_small_index_is_searched_exhaustively(self):
+        """Test that an index no bigger than the candidates matches exact search."""
+        listings = random_listings(100)
+        index = SimilarityIndex(listings)
+        assert index.similar(listings[3].url, k=5) == index.exact(listings[3].url, k=5)
+
+    def test_unindexed_listing(self):
+        """Test that listings outside the index can be queried."""
+        listings = random_listings(300)
+        index = SimilarityIndex(listings)
+        probe = RVListing(title="2024 Unity U24RL", make="Unity", model="U24RL", year=2024,
+                          description="solar lithium awd starlink")
+        found = index.similar(probe, k=3, candidates=50)
+        assert len(found) == 3
+        assert all(listing.make == "Unity" for _, listing in found)
+
+    def test_unknown_url_raises(self):
+        """Test that an unindexed URL raises KeyError."""
+        index = SimilarityIndex(random_listings(10))
+        with pytest.raises(KeyError):
+            index.similar("https://example.com/missing")
+
+    def test_bits_grow_with_listings(self):
+        """Test that the default bits per table keep buckets small."""
+        assert SimilarityIndex(random_listings(10)).bits == 8
+        assert SimilarityIndex(random_listings(20_000)).bits == 10
+
+
+class TestFindSimilar:
+    """Test find_similar on catalogs and from the CLI."""
+
+    def test_demo_catalog_neighbours(self):
+        """Test that a Unity's nearest demo listings are Unitys."""
+        found = find_similar("https://example.com/listing/unity1", k=4)
+        assert [listing.make for listing in found] == ["Unity"] * 4
+
+    def test_errors(self):
+        """Test that unknown URLs and bad k raise SearchAPIError."""
+        with pytest.raises(SearchAPIError, match="No listing"):
+            find_similar("https://example.com/missing")
+        with pytest.raises(SearchAPIError, match="k must"):
+            find_similar("https://example.com/listing/1", k=0)
+
+    def test_index_rebuilt_after_extend(self):
+        """Test that the catalog's index is reused until listings are added."""
+        catalog = ListingCatalog(random_listings(20))
+        index = catalog.similarity_index()
+        assert catalog.similarity_index() is index
+        catalog.add(RVListing(title="2025 Unity U24MB", make="Unity",
+                              url="https://example.com/listing/new"))
+        assert catalog.similarity_index() is not index
+        assert find_similar("https://example.com/listing/new", k=1, catalog=catalog)
+
+    def test_cli_similar_to(self, capsys):
+        """Test that --similar-to prints the nearest demo listings."""
+        main(["--similar-to", "https://example.com/listing/unity1", "-n", "2"])
+        output = capsys.readouterr().out
+        assert "Found 2 listing(s)" in output
+        assert "Unity" in output
+        assert DEMO_CATALOG.similarity_index() is DEMO_CATALOG.similarity_index()
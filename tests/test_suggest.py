@@ -0,0 +1,106 @@
+"""Tests for make, model and location autocomplete."""
+
+import json
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent.catalog import ListingCatalog
+from rv_search_agent.cli import main
+from rv_search_agent.models import RVListing, normalize_text
+from rv_search_agent.search_api import SearchAPIError, suggest
+from rv_search_agent.suggest import MAX_K, Suggestion, SuggestIndex
+
+
+def listing(make=None, model=None, location=None):
+    return RVListing(title=f"{make} {model}", make=make, model=model, location=location)
+
+
+class TestSuggestIndex:
+    """Test prefix matching and ranking."""
+
+    def test_ranked_by_listing_count(self):
+        """Test that the most listed values come first, with kinds and counts."""
+        index = SuggestIndex([listing("Winnebago", "View", "Denver, CO")] * 3
+                             + [listing("Winnebago", "Revel", "Wichita, KS")] * 2)
+        assert index.suggest("w") == [
+            Suggestion("Winnebago", "make", 5),
+            Suggestion("Winnebago View", "model", 3),
+            Suggestion("Winnebago Revel", "model", 2),
+            Suggestion("Wichita, KS", "location", 2),
+        ]
+        assert [s.text for s in index.suggest("w", k=2)] == ["Winnebago", "Winnebago View"]
+
+    def test_matches_any_word_ignoring_case_and_accents(self):
+        """Test that prefixes match later words, case and accent insensitively."""
+        index = SuggestIndex([listing("Thor", "Four Winds 28A", "Montréal, QC")])
+        assert [s.text for s in index.suggest("WINDS")] == ["Thor Four Winds 28A"]
+        assert [s.text for s in index.suggest("montre")] == ["Montréal, QC"]
+        assert [s.text for s in index.suggest("qc")] == ["Montréal, QC"]
+        assert index.suggest("inds") == []
+
+    def test_trailing_space_ends_the_word(self):
+        """Test that a typed space only matches a finished word."""
+        index = SuggestIndex([listing("Thor", "Four Winds"), listing("Fourth", "One")])
+        assert {s.text for s in index.suggest("four")} == {
+            "Thor Four Winds", "Fourth", "Fourth One"}
+        assert [s.text for s in index.suggest("four ")] == ["Thor Four Winds"]
+        assert [s.text for s in index.suggest("four  w")] == ["Thor Four Winds"]
+
+    def test_spellings_are_merged(self):
+        """Test that values differing in case count as one suggestion."""
+        index = SuggestIndex([listing(make="Jayco")] * 2 + [listing(make="JAYCO")])
+        assert index.suggest("j") == [Suggestion("Jayco", "make", 3)]
+
+    def test_empty_prefix_returns_most_listed(self):
+        """Test that an empty prefix suggests the most listed values."""
+        index = SuggestIndex([listing("Unity", "U24RL")] * 2 + [listing("Thor", "Chateau")])
+        assert [s.text for s in index.suggest("", k=2)] == ["Unity", "Unity U24RL"]
+
+    def test_precomputed_prefixes_match_a_full_ranking(self):
+        """Test that busy prefixes, precomputed or not, rank like a brute-force scan."""
+        rng = random.Random(3)
+        makes = [f"Make{i}" for i in range(400)]
+        listings = [listing(rng.choice(makes), f"M{rng.randint(0, 999)}", f"City{i % 700}, CO")
+                    for i in range(5_000)]
+        index = SuggestIndex(listings)
+        assert index._top
+        for prefix in ["m", "make1", "c", "city2", "co", "m4", "make39"]:
+            for k in (5, MAX_K, MAX_K + 5):
+                expected = [s for s in index.suggestions if any(
+                    word.startswith(prefix) for word in normalize_text(s.text).split())][:k]
+                assert index.suggest(prefix, k) == expected
+
+
+class TestSuggest:
+    """Test suggest on catalogs and from the CLI."""
+
+    def test_demo_catalog(self):
+        """Test suggestions from the demo catalog."""
+        suggestions = suggest("story", k=2)
+        assert suggestions[0] == Suggestion("Storyteller", "make", suggestions[0].count)
+        assert suggestions[1].kind == "model"
+
+    def test_bad_k(self):
+        """Test that k below 1 raises SearchAPIError."""
+        with pytest.raises(SearchAPIError):
+            suggest("s", k=0)
+
+    def test_index_rebuilt_after_extend(self):
+        """Test that new listings show up in suggestions."""
+        catalog = ListingCatalog([listing("Unity", "U24RL")])
+        assert suggest("air", catalog=catalog) == []
+        catalog.add(listing("Airstream", "Atlas"))
+        assert suggest("air", catalog=catalog)[0] == Suggestion("Airstream", "make", 1)
+
+    def test_cli_suggest(self, capsys):
+        """Test the suggest subcommand's table and JSON output."""
+        main(["suggest", "uni", "-n", "2"])
+        output = capsys.readouterr().out
+        assert "Unity " in output and "make" in output and "listing(s)" in output
+        main(["suggest", "uni", "--json"])
+        assert json.loads(capsys.readouterr().out)[0]["text"] == "Unity"
+        main(["suggest", "zzz"])
+        assert "No suggestions" in capsys.readouterr().out
@@ -0,0 +1,78 @@
+"""Tests for timing spans and counters."""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import httpx
+
+sys.path.insert(0, "src")
+from rv_search_agent.cache import SEARCH_CACHE
+from rv_search_agent.search_api import search_rv_listings_live
+from rv_search_agent.tracing import count, current_trace, span, tracing
+
+
+def _mock_serper(payload):
+    real_client = httpx.Client
+
+    def client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(lambda request: httpx.Response(200, json=payload))
+        return real_client(*args, **kwargs)
+    return client
+
+
+class TestTracing:
+    """Test span and counter collection."""
+
+    def test_disabled_is_noop(self):
+        """Test that spans and counters do nothing without an active trace."""
+        assert current_trace() is None
+        with span("idle") as first, span("idle") as second:
+            count("idle")
+        assert first is second
+
+    def test_spans_and_counters(self):
+        """Test that spans and counters are collected while tracing."""
+        with tracing() as trace:
+            with span("outer", site="a"):
+                with span("inner"):
+                    count("items", 3)
+            count("items")
+        assert [s.name for s in trace.spans] == ["inner", "outer"]
+        assert trace.spans[1].attrs == {"site": "a"}
+        assert trace.counters["items"] == 4
+        assert current_trace() is None
+
+    def test_chrome_trace_export(self, tmp_path):
+        """Test the Chrome trace event JSON export."""
+        with tracing() as trace:
+            with span("work"):
+                count("done")
+        path = tmp_path / "trace.json"
+        trace.write_chrome_trace(str(path))
+        events = json.loads(path.read_text())["traceEvents"]
+        assert {e["ph"] for e in events} == {"X", "C"}
+        assert events[0]["name"] == "work"
+        assert events[0]["dur"] >= 0
+
+    def test_live_search_instrumented(self):
+        """Test per-stage spans and per-site counters for a Serper search."""
+        payload = {"organic": [
+            {"title": "2023 Unity U24RL - $150,000", "link": "https://a", "snippet": "Class B"},
+            {"title": "2022 Unity U24TB - SOLD", "link": "https://b", "snippet": ""},
+            {"title": "2019 Unity U24MB - $90,000", "link": "https://c", "snippet": ""},
+        ]}
+        SEARCH_CACHE.clear()
+        with patch.object(httpx, "Client", _mock_serper(payload)), \
+                patch.dict(os.environ, {"SERPER_API_KEY": "test"}), \
+                tracing() as trace:
+            search_rv_listings_live(query="Unity", min_price=100000)
+
+        assert trace.totals()["serper.http"]["calls"] == 4
+        assert {"serper.decode", "serper.parse"} <= set(trace.totals())
+        assert trace.counters["serper.rvtrader.com.fetched"] == 3
+        assert trace.counters["serper.rvtrader.com.inactive"] == 1
+        assert trace.counters["serper.rvtrader.com.filtered"] == 1
+        assert trace.counters["serper.rvtrader.com.kept"] == 1
+        SEARCH_CACHE.clear()
@@ -0,0 +1,240 @@
+"""Tests for the saved-search watcher, against a local fake feed server."""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, "src")
+from rv_search_agent import cli, search_api
+from rv_search_agent.search_api import SearchAPIError
+from rv_search_agent.watch import SavedSearch, Watcher, load_saved_searches
+
+
+class FakeFeedServer:
+    """Serves Craigslist-style RSS with ETags and a Serper-style search API."""
+
+    def __init__(self):
+        self.items = []
+        self.organic = []
+        self.requests = []
+        self.not_modified = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                etag = f'"{len(server.items)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                items = "".join(
+                    f"<item><title>{title}</title><link>{link}</link></item>"
+                    for title, link in server.items
+                )
+                body = f"<rss><channel>{items}</channel></rss>".encode()
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append(payload["q"])
+                body = json.dumps({"organic": server.organic}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return None
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = FakeFeedServer()
+    with patch.object(search_api, "CRAIGSLIST_URL", server.url + "/{region}/search/rva"), \
+            patch.object(search_api, "SERPER_URL", server.url + "/search"), \
+            patch.dict(os.environ, {"SERPER_API_KEY": "test"}):
+        yield server
+    server.close()
+
+
+class ListEmitter:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, events):
+        self.events.extend(events)
+
+
+UNITY_SEARCHES = [
+    SavedSearch("cheap", {"query": "Unity", "max_price": 150000}),
+    SavedSearch("any", {"query": "Unity"}),
+]
+
+
+class TestWatcher:
+    """Test polling, conditional requests and seen-URL tracking."""
+
+    def test_craigslist_polls(self, server):
+        """Test priming, 304s and that only new items are reported."""
+        server.items = [("2021 Unity U24RL - $140,000 (Denver)", "https://cl/1")]
+        emitter = ListEmitter()
+        watcher = Watcher(UNITY_SEARCHES, [emitter])
+        assert len(watcher.feeds) == 1
+
+        assert watcher.poll_all() == 0  # first poll records existing items
+        assert watcher.poll_all() == 0
+        assert server.not_modified == 1
+
+        server.items.append(("2023 Unity U24TB - $190,000 (Austin)", "https://cl/2"))
+        server.items.append(("2022 Unity U24MB - $120,000", "https://cl/3"))
+        assert watcher.poll_all() == 3
+        found = sorted((e["search"], e["listing"]["url"]) for e in emitter.events)
+        assert found == [("any", "https://cl/2"), ("any", "https://cl/3"), ("cheap", "https://cl/3")]
+        assert emitter.events[0]["source"] == "craigslist"
+
+        assert watcher.poll_all() == 0
+        assert len(server.requests) == 4
+        watcher.close()
+
+    def test_state_survives_restart(self, server, tmp_path):
+        """Test that seen URLs and ETags are persisted."""
+        state = str(tmp_path / "state.json")
+        server.items = [("2021 Unity U24RL - $140,000", "https://cl/1")]
+        watcher = Watcher(UNITY_SEARCHES, [ListEmitter()], state_path=state)
+        watcher.poll_all()
+        watcher.close()
+
+        emitter = ListEmitter()
+        watcher = Watcher(UNITY_SEARCHES, [emitter], state_path=state)
+        watcher.poll_all()
+        assert server.not_modified == 1
+
+        server.items.append(("2023 Unity U24TB - $140,000", "https://cl/2"))
+        watcher.poll_all()
+        assert [e["listing"]["url"] for e in emitter.events] == ["https://cl/2"] * 2
+        watcher.close()
+
+    def test_serper_polls(self, server):
+        """Test Serper feeds: one per site, seen and sold results skipped."""
+        server.organic = [{"title": "2023 Unity U24RL - $150,000", "link": "https://s/1"}]
+        emitter = ListEmitter()
+        watcher = Watcher([SavedSearch("unity", {"query": "Unity"}, ("serper",))], [emitter],
+                          emit_initial=True)
+        assert len(watcher.feeds) == 4
+        watcher.poll_all()
+        assert len(emitter.events) == 4
+
+        server.organic.append({"title": "2022 Unity U24TB - SOLD", "link": "https://s/2"})
+        server.organic.append({"title": "2021 Unity U24MB - $99,000", "link": "https://s/3"})
+        watcher.poll_all()
+        assert len(emitter.events) == 8
+        assert {e["listing"]["url"] for e in emitter.events[4:]} == {"https://s/3"}
+        watcher.close()
+
+    def test_schedule_intervals_and_jitter(self, server):
+        """Test that each source is polled on its own jittered interval."""
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        searches = [SavedSearch("both", {"query": "Unity"}, ("craigslist", "serper"))]
+        watcher = Watcher(searches, [], intervals={"craigslist": 100, "serper": 1000},
+                          jitter=0.1, clock=lambda: now[0], sleep=sleep)
+        polls = {}
+        poll = watcher.poll
+
+        def record(feed):
+            polls.setdefault(feed.key, []).append(now[0])
+            return poll(feed)
+
+        with patch.object(watcher, "poll", record):
+            watcher.run(max_polls=40)
+
+        assert len(polls) == 5
+        for key, times in polls.items():
+            interval = 1000 if key.startswith("serper:") else 100
+            assert times[0] <= interval * 0.1
+            gaps = [b - a for a, b in zip(times, times[1:])]
+            assert gaps and all(interval * 0.9 <= gap <= interval * 1.1 for gap in gaps)
+
+    def test_failures_back_off(self, server):
+        """Test that a failing feed is polled less often."""
+        server.close()
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        watcher = Watcher(UNITY_SEARCHES, [], intervals={"craigslist": 10}, jitter=0,
+                          clock=lambda: now[0], sleep=sleep)
+        watcher.run(max_polls=4)
+        assert watcher.feeds[0].failures == 4
+        assert now[0] == 10 * (2 + 4 + 8)
+
+    def test_load_saved_searches(self, tmp_path):
+        """Test the saved-search file format and validation."""
+        path = tmp_path / "searches.jsonl"
+        path.write_text(
+            '{"name": "unity", "query": "Unity", "max_price": 150000}\n'
+            "# comment\n"
+            '{"query": "Storyteller", "sources": ["serper"]}\n'
+        )
+        searches = load_saved_searches(str(path), ["craigslist", "serper"])
+        assert [s.name for s in searches] == ["unity", "search-2"]
+        assert searches[0].sources == ("craigslist", "serper")
+        assert searches[1].sources == ("serper",)
+
+        path.write_text('{"query": "Unity", "source": "Dealer"}\n')
+        with pytest.raises(SearchAPIError, match="unknown filter"):
+            load_saved_searches(str(path))
+
+    @pytest.mark.parametrize("line, error", [
+        ('{"max_price": "50000"}', "max_price must be a number"),
+        ('{"min_year": 2024, "max_year": 2020}', r"min_year \(2024\) is greater than max_year"),
+        ('{"min_price": -1}', "min_price can't be negative"),
+        ('{"query": 7}', "query must be a string"),
+    ])
+    def test_invalid_filter_values(self, tmp_path, line, error):
+        """Test that bad filter values are rejected at load, with the file and line."""
+        path = tmp_path / "searches.jsonl"
+        path.write_text('{"query": "Unity"}\n' + line + "\n")
+        with pytest.raises(SearchAPIError, match=f"searches.jsonl:2: search-2: {error}"):
+            load_saved_searches(str(path))
+
+
+class TestWatchCLI:
+    """Test `rv-search watch`."""
+
+    def test_watch_once(self, server, tmp_path, capsys):
+        """Test a single polling pass writing JSON lines."""
+        server.items = [("2021 Unity U24RL - $140,000 (Denver)", "https://cl/1")]
+        searches = tmp_path / "searches.jsonl"
+        searches.write_text('{"name": "unity", "query": "Unity"}\n')
+        output = tmp_path / "new.jsonl"
+
+        cli.main(["watch", str(searches), "--once", "--emit-initial", "--output", str(output)])
+
+        assert "[unity] 2021 - $140,000 - Denver  https://cl/1" in capsys.readouterr().out
+        event = json.loads(output.read_text())
+        assert event["search"] == "unity"
+        assert event["listing"]["price"] == 140000